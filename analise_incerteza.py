@@ -0,0 +1,173 @@
+# analise_incerteza.py (Monte Carlo: incerteza do ponto de operação e do custo anual)
+#
+# Rugosidade, envelhecimento dos tubos, viscosidade, fatores K e os pontos medidos das curvas
+# da bomba são sorteados de distribuições informadas pelo usuário. Cada lote de amostras vira
+# uma rede em lote (com_parametros) e curvas da bomba em lote (hidraulica.CurvaLote, um
+# ajuste por amostra), resolvidas por um único Newton vetorizado em resolver_pontos_operacao.
+#
+# Os lotes são distribuídos por um pool de processos. Cada lote tem a sua semente, derivada
+# da semente da análise (SeedSequence.spawn), então o resultado não depende do número de
+# processos, só da semente, do número de amostras e do tamanho do lote.
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from hidraulica import CurvaLote, calcular_analise_energetica, calcular_curva_sistema, resolver_pontos_operacao
+
+DISTRIBUICOES = ("Fixo", "Normal", "Lognormal", "Uniforme", "Triangular")
+# Percentis das faixas (inferior, mediana, superior)
+PERCENTIS = (5, 50, 95)
+TAMANHO_LOTE = 2000
+# Curvas sorteadas que formam as faixas do gráfico, repartidas entre os lotes (as demais amostras
+# só entram no ponto de operação): o custo das faixas não cresce com o número de amostras
+CURVAS_FAIXA = 500
+# Iniciar um processo (spawn, com as importações) custa mais que ~10^4 amostras: o pool só
+# recebe um processo a cada AMOSTRAS_POR_PROCESSO amostras
+AMOSTRAS_POR_PROCESSO = 20000
+
+def incertezas_padrao():
+    """
+    Tabela editável das incertezas. Fatores multiplicam o valor nominal (1 = nominal);
+    o envelhecimento é o crescimento da rugosidade em mm/ano, aplicado sobre a idade da rede.
+    Normal/Lognormal usam Média e Desvio; Uniforme usa Mínimo e Máximo; Triangular usa os três.
+    """
+    return pd.DataFrame([
+        {"Parâmetro": "Rugosidade (fator)", "Distribuição": "Lognormal", "Média": 1.0, "Desvio": 0.3, "Mínimo": 0.5, "Máximo": 2.0},
+        {"Parâmetro": "Envelhecimento (mm/ano)", "Distribuição": "Uniforme", "Média": 0.01, "Desvio": 0.005, "Mínimo": 0.0, "Máximo": 0.02},
+        {"Parâmetro": "Viscosidade (fator)", "Distribuição": "Normal", "Média": 1.0, "Desvio": 0.05, "Mínimo": 0.9, "Máximo": 1.1},
+        {"Parâmetro": "Fatores K (fator)", "Distribuição": "Uniforme", "Média": 1.0, "Desvio": 0.1, "Mínimo": 0.8, "Máximo": 1.2},
+        {"Parâmetro": "Altura medida (fator)", "Distribuição": "Normal", "Média": 1.0, "Desvio": 0.02, "Mínimo": 0.95, "Máximo": 1.05},
+        {"Parâmetro": "Eficiência medida (fator)", "Distribuição": "Normal", "Média": 1.0, "Desvio": 0.02, "Mínimo": 0.95, "Máximo": 1.05},
+    ])
+
+# Chave de cada linha da tabela de incertezas_padrao, na mesma ordem
+CHAVES_INCERTEZAS = ("rugosidade", "envelhecimento", "viscosidade", "k", "altura", "eficiencia")
+
+def incertezas_do_editor(df):
+    """ Dicionário {chave: distribuição} a partir da tabela editada (linhas na ordem de incertezas_padrao). """
+    distribuicoes = {}
+    for chave, (_, linha) in zip(CHAVES_INCERTEZAS, df.iterrows()):
+        distribuicoes[chave] = {"tipo": linha["Distribuição"], **{campo: float(linha[campo]) for campo in ("Média", "Desvio", "Mínimo", "Máximo")}}
+    return distribuicoes
+
+def amostrar(rng, distribuicao, forma):
+    """ Amostras de uma distribuição do editor ({"tipo", "Média", "Desvio", "Mínimo", "Máximo"}). """
+    tipo = distribuicao["tipo"]
+    media, desvio = distribuicao["Média"], distribuicao["Desvio"]
+    minimo, maximo = distribuicao["Mínimo"], distribuicao["Máximo"]
+    if tipo == "Fixo" or (tipo in ("Normal", "Lognormal") and desvio <= 0) or (tipo in ("Uniforme", "Triangular") and maximo <= minimo):
+        return np.full(forma, media if tipo != "Uniforme" else 0.5 * (minimo + maximo))
+    if tipo == "Normal":
+        return rng.normal(media, desvio, forma)
+    if tipo == "Lognormal":
+        # Parâmetros do logaritmo a partir da média e do desvio da própria variável
+        sigma2 = np.log1p((desvio / media) ** 2)
+        return rng.lognormal(np.log(media) - sigma2 / 2, np.sqrt(sigma2), forma)
+    if tipo == "Uniforme":
+        return rng.uniform(minimo, maximo, forma)
+    if tipo == "Triangular":
+        return rng.triangular(minimo, np.clip(media, minimo, maximo), maximo, forma)
+    raise ValueError(f"Distribuição desconhecida: '{tipo}'.")
+
+def _ajustar_lote(vazoes, valores, fatores, grau=2):
+    """ Um ajuste polinomial por amostra dos pontos medidos perturbados: (grau + 1, amostras). """
+    return np.polyfit(vazoes, (valores * fatores).T, grau)
+
+def _avaliar_lote(tarefa):
+    """ Executado no processo de trabalho: sorteia e resolve um lote de amostras. """
+    (rede, h_geometrica, pontos_altura, pontos_eficiencia, distribuicoes, idade_anos, semente, tamanho,
+     energia, vazoes_grafico, curvas) = tarefa
+    rng = np.random.default_rng(semente)
+    num_trechos = rede.num_trechos
+    # Ordem fixa dos sorteios: a mesma semente reproduz o mesmo lote
+    fator_rugosidade = np.maximum(amostrar(rng, distribuicoes["rugosidade"], (tamanho, num_trechos)), 0.0)
+    taxa_envelhecimento = np.maximum(amostrar(rng, distribuicoes["envelhecimento"], (tamanho, 1)), 0.0)
+    fator_viscosidade = np.maximum(amostrar(rng, distribuicoes["viscosidade"], (tamanho, 1)), 1e-3)
+    fator_k = np.maximum(amostrar(rng, distribuicoes["k"], (tamanho, num_trechos)), 0.0)
+    fator_altura = amostrar(rng, distribuicoes["altura"], (tamanho, len(pontos_altura[0])))
+    fator_eficiencia = amostrar(rng, distribuicoes["eficiencia"], (tamanho, len(pontos_eficiencia[0])))
+
+    rede_lote = rede.com_parametros(
+        rugosidade_m=rede.rugosidade_m * fator_rugosidade + taxa_envelhecimento * idade_anos / 1000,
+        k_total=rede.k_total * fator_k, nu=rede.nu * fator_viscosidade,
+    )
+    curva_altura = CurvaLote(_ajustar_lote(*pontos_altura, fator_altura))
+    curva_eficiencia = CurvaLote(_ajustar_lote(*pontos_eficiencia, fator_eficiencia))
+    pontos = resolver_pontos_operacao(rede_lote, h_geometrica, curva_altura)
+    eficiencia = np.where(pontos["convergiu"], np.clip(curva_eficiencia(pontos["vazao"]), 0, 100), np.nan)
+    custos = calcular_analise_energetica(pontos["vazao"], pontos["altura"], eficiencia, *energia)
+
+    # Curvas das primeiras amostras do lote na malha do gráfico (já são sorteios independentes),
+    # em float32 para reduzir a transferência
+    grade = np.asarray(vazoes_grafico, dtype=float)[:, np.newaxis]
+    faixa = slice(0, curvas)
+    alturas_sistema = np.asarray(calcular_curva_sistema(rede_lote.selecionar_lote(faixa), h_geometrica, grade))
+    return {
+        "vazao": pontos["vazao"], "altura": pontos["altura"], "eficiencia": eficiencia,
+        "potencia_kW": np.where(pontos["convergiu"], custos["potencia_eletrica_kW"], np.nan),
+        "custo_anual": np.where(pontos["convergiu"], custos["custo_anual"], np.nan),
+        "curva_bomba": CurvaLote(curva_altura.coeficientes[:, faixa])(grade).astype(np.float32),
+        "curva_sistema": np.where(alturas_sistema < 1e10, alturas_sistema, np.nan).astype(np.float32),
+    }
+
+def _pontos_medidos(df, col_y):
+    """ Pontos numéricos (vazão, valor) de uma curva medida, com o mesmo tratamento de criar_funcao_curva. """
+    vazoes = pd.to_numeric(df["Vazão (m³/h)"], errors="coerce")
+    valores = pd.to_numeric(df[col_y], errors="coerce")
+    validos = vazoes.notna() & valores.notna()
+    return vazoes[validos].to_numpy(dtype=float), valores[validos].to_numpy(dtype=float)
+
+def analisar_incerteza(rede, h_geometrica, curva_altura_df, curva_eficiencia_df, distribuicoes, amostras, semente,
+                       eficiencia_motor_percent, horas_dia, custo_kwh, fluido_selecionado, fluidos_combinados, vazoes_grafico,
+                       idade_anos=0.0, tamanho_lote=TAMANHO_LOTE, max_processos=None):
+    """
+    Análise de Monte Carlo do ponto de operação e do custo anual.
+
+    `distribuicoes` vem de incertezas_do_editor. Retorna {"amostras": DataFrame por amostra,
+    "percentis": DataFrame por grandeza, "faixas": percentis das curvas na malha
+    `vazoes_grafico`, "fracao_sem_ponto", "tempo_s", "us_por_amostra", "processos"}.
+    """
+    inicio = time.perf_counter()
+    pontos_altura = _pontos_medidos(curva_altura_df, "Altura (m)")
+    pontos_eficiencia = _pontos_medidos(curva_eficiencia_df, "Eficiência (%)")
+    if len(pontos_altura[0]) < 3 or len(pontos_eficiencia[0]) < 3:
+        raise ValueError("As curvas da bomba precisam de pelo menos 3 pontos para o ajuste.")
+    energia = (eficiencia_motor_percent, horas_dia, custo_kwh, fluido_selecionado, fluidos_combinados)
+    tamanhos = [min(tamanho_lote, amostras - i) for i in range(0, amostras, tamanho_lote)]
+    sementes = np.random.SeedSequence(semente).spawn(len(tamanhos))
+    curvas = -(-CURVAS_FAIXA // len(tamanhos))
+    tarefas = [(rede, h_geometrica, pontos_altura, pontos_eficiencia, distribuicoes, idade_anos, s, n, energia, vazoes_grafico, curvas)
+               for s, n in zip(sementes, tamanhos)]
+
+    if max_processos is None:
+        max_processos = min(os.cpu_count() or 1, -(-amostras // AMOSTRAS_POR_PROCESSO))
+    max_processos = min(max_processos, len(tarefas))
+    if max_processos <= 1:
+        lotes = [_avaliar_lote(tarefa) for tarefa in tarefas]
+    else:
+        with ProcessPoolExecutor(max_workers=max_processos, mp_context=multiprocessing.get_context('spawn')) as executor:
+            lotes = list(executor.map(_avaliar_lote, tarefas))
+
+    resultado = {chave: np.concatenate([lote[chave] for lote in lotes], axis=-1) for chave in lotes[0]}
+    df_amostras = pd.DataFrame({
+        "Vazão (m³/h)": resultado["vazao"], "Altura (m)": resultado["altura"], "Eficiência (%)": resultado["eficiencia"],
+        "Potência (kW)": resultado["potencia_kW"], "Custo Anual (R$)": resultado["custo_anual"],
+    })
+    validas = df_amostras.dropna()
+    percentis = validas.quantile([p / 100 for p in PERCENTIS]).T
+    percentis.columns = [f"P{p}" for p in PERCENTIS]
+    percentis["Média"] = validas.mean()
+    faixas = {"vazoes": np.asarray(vazoes_grafico, dtype=float)}
+    for chave in ("curva_bomba", "curva_sistema"):
+        faixas[chave] = np.nanpercentile(resultado[chave], PERCENTIS, axis=-1) if len(validas) else None
+    tempo = time.perf_counter() - inicio
+    return {
+        "amostras": df_amostras, "percentis": percentis, "faixas": faixas,
+        "fracao_sem_ponto": 1 - len(validas) / amostras, "tempo_s": tempo, "us_por_amostra": tempo / amostras * 1e6,
+        "processos": max_processos,
+    }
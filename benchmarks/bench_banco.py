@@ -0,0 +1,169 @@
+# benchmarks/bench_banco.py
+# Consultas por segundo da camada SQLite (database.py) contra a implementação anterior,
+# que abria e fechava uma conexão a cada consulta (journal padrão, sem índice por data).
+#
+# Cargas: "página" = as cinco leituras de uma renderização da interface (fluidos,
+# materiais, projetos, cenários do projeto e um cenário); "gravação" = save_scenario;
+# "concorrente" = várias threads renderizando páginas enquanto outra grava.
+#
+# Uso: python benchmarks/bench_banco.py [--usuarios 20] [--cenarios 20] [--threads 4] [--segundos 2]
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database
+
+class BancoLegado:
+    """ Réplica das funções anteriores: uma conexão nova por chamada. """
+    def __init__(self, caminho):
+        self.caminho = caminho
+
+    def _executar(self, sql, parametros, gravar=False):
+        conn = sqlite3.connect(self.caminho)
+        cursor = conn.cursor()
+        cursor.execute(sql, parametros)
+        linhas = cursor.fetchall()
+        if gravar:
+            conn.commit()
+        conn.close()
+        return linhas
+
+    def setup_database(self):
+        conn = sqlite3.connect(self.caminho)
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS scenarios (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT NOT NULL, project_name TEXT NOT NULL,
+                scenario_name TEXT NOT NULL, scenario_data TEXT NOT NULL, last_modified TIMESTAMP NOT NULL, UNIQUE(username, project_name, scenario_name));
+            CREATE TABLE IF NOT EXISTS user_fluids (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT NOT NULL, fluid_name TEXT NOT NULL,
+                density REAL NOT NULL, kinematic_viscosity REAL NOT NULL, UNIQUE(username, fluid_name));
+            CREATE TABLE IF NOT EXISTS user_materials (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT NOT NULL, material_name TEXT NOT NULL,
+                roughness REAL NOT NULL, UNIQUE(username, material_name));
+        ''')
+        conn.close()
+
+    def save_scenario(self, username, project_name, scenario_name, scenario_data):
+        self._executar('''
+            INSERT OR REPLACE INTO scenarios (id, username, project_name, scenario_name, scenario_data, last_modified)
+            VALUES ((SELECT id FROM scenarios WHERE username = ? AND project_name = ? AND scenario_name = ?), ?, ?, ?, ?, ?)
+        ''', (username, project_name, scenario_name, username, project_name, scenario_name, json.dumps(scenario_data), datetime.now().isoformat(" ")), gravar=True)
+
+    def load_scenario(self, username, project_name, scenario_name):
+        linhas = self._executar("SELECT scenario_data FROM scenarios WHERE username = ? AND project_name = ? AND scenario_name = ?", (username, project_name, scenario_name))
+        return json.loads(linhas[0][0]) if linhas else None
+
+    def get_user_projects(self, username):
+        return [r[0] for r in self._executar("SELECT DISTINCT project_name FROM scenarios WHERE username = ? ORDER BY project_name ASC", (username,))]
+
+    def get_scenarios_for_project(self, username, project_name):
+        return [r[0] for r in self._executar("SELECT scenario_name FROM scenarios WHERE username = ? AND project_name = ? ORDER BY last_modified DESC", (username, project_name))]
+
+    def get_user_fluids(self, username):
+        return {r[0]: {'rho': r[1], 'nu': r[2]} for r in self._executar("SELECT fluid_name, density, kinematic_viscosity FROM user_fluids WHERE username = ?", (username,))}
+
+    def get_user_materials(self, username):
+        return {r[0]: r[1] for r in self._executar("SELECT material_name, roughness FROM user_materials WHERE username = ?", (username,))}
+
+    def add_user_fluid(self, username, fluid_name, density, kinematic_viscosity):
+        self._executar("INSERT INTO user_fluids (username, fluid_name, density, kinematic_viscosity) VALUES (?, ?, ?, ?)", (username, fluid_name, density, kinematic_viscosity), gravar=True)
+
+    def add_user_material(self, username, material_name, roughness):
+        self._executar("INSERT INTO user_materials (username, material_name, roughness) VALUES (?, ?, ?)", (username, material_name, roughness), gravar=True)
+
+class BancoAtual:
+    """ As funções de database.py apontadas para o arquivo do benchmark. """
+    def __init__(self, caminho):
+        database.DB_NAME = caminho
+        for nome in ("setup_database", "save_scenario", "load_scenario", "get_user_projects", "get_scenarios_for_project",
+                     "get_user_fluids", "get_user_materials", "add_user_fluid", "add_user_material"):
+            setattr(self, nome, getattr(database, nome))
+
+CENARIO = {"h_geometrica": 15.0, "fluido_selecionado": "Água a 20°C", "trechos_antes": [{"comprimento": 20.0, "diametro": 100.0}] * 5}
+
+def popular(banco, num_usuarios, cenarios_por_projeto):
+    banco.setup_database()
+    for u in range(num_usuarios):
+        for k in range(5):
+            banco.add_user_fluid(f"u{u}", f"Fluido {k}", 1000.0, 1e-6)
+            banco.add_user_material(f"u{u}", f"Material {k}", 0.05)
+            for c in range(cenarios_por_projeto):
+                banco.save_scenario(f"u{u}", f"Projeto {k}", f"Cenário {c}", CENARIO)
+
+def renderizar_pagina(banco, i, num_usuarios):
+    usuario = f"u{i % num_usuarios}"
+    banco.get_user_fluids(usuario)
+    banco.get_user_materials(usuario)
+    projetos = banco.get_user_projects(usuario)
+    cenarios = banco.get_scenarios_for_project(usuario, projetos[i % len(projetos)])
+    banco.load_scenario(usuario, projetos[i % len(projetos)], cenarios[0])
+
+def por_segundo(funcao, segundos):
+    """ Repete funcao(i) por 'segundos' e devolve as repetições por segundo. """
+    i, inicio = 0, time.perf_counter()
+    while time.perf_counter() - inicio < segundos:
+        funcao(i)
+        i += 1
+    return i / (time.perf_counter() - inicio)
+
+def concorrente(banco, num_usuarios, num_threads, segundos):
+    """ Leituras (páginas) de num_threads threads com uma thread gravando ao mesmo tempo. """
+    contagens, erros, parar = [0] * (num_threads + 1), [], threading.Event()
+
+    def leitor(t):
+        i = t
+        while not parar.is_set():
+            try:
+                renderizar_pagina(banco, i, num_usuarios)
+                contagens[t] += 5
+            except sqlite3.OperationalError as e:
+                erros.append(str(e))
+            i += num_threads
+
+    def escritor():
+        i = 0
+        while not parar.is_set():
+            try:
+                banco.save_scenario("u0", "Projeto 0", f"Concorrente {i % 50}", CENARIO)
+                contagens[-1] += 1
+            except sqlite3.OperationalError as e:
+                erros.append(str(e))
+            i += 1
+
+    threads = [threading.Thread(target=leitor, args=(t,)) for t in range(num_threads)] + [threading.Thread(target=escritor)]
+    inicio = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(segundos)
+    parar.set()
+    for thread in threads:
+        thread.join()
+    duracao = time.perf_counter() - inicio
+    return sum(contagens[:-1]) / duracao, contagens[-1] / duracao, len(erros)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--usuarios", type=int, default=20)
+    parser.add_argument("--cenarios", type=int, default=20, help="cenários por projeto (5 projetos por usuário)")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--segundos", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"{'implementação':>13} | {'leituras/s':>10} | {'páginas/s':>9} | {'gravações/s':>11} | {'conc. leituras/s':>16} | {'conc. gravações/s':>17} | {'erros':>5}")
+    for nome, classe in (("anterior", BancoLegado), ("atual", BancoAtual)):
+        with tempfile.TemporaryDirectory() as diretorio:
+            banco = classe(os.path.join(diretorio, "bench.db"))
+            popular(banco, args.usuarios, args.cenarios)
+            paginas = por_segundo(lambda i: renderizar_pagina(banco, i, args.usuarios), args.segundos)
+            gravacoes = por_segundo(lambda i: banco.save_scenario(f"u{i % args.usuarios}", "Projeto 0", f"Cenário {i % args.cenarios}", CENARIO), args.segundos)
+            leituras_conc, gravacoes_conc, erros = concorrente(banco, args.usuarios, args.threads, args.segundos)
+            print(f"{nome:>13} | {5 * paginas:>10.0f} | {paginas:>9.0f} | {gravacoes:>11.0f} | {leituras_conc:>16.0f} | {gravacoes_conc:>17.0f} | {erros:>5}")
+            database.fechar_conexoes()
+
+if __name__ == "__main__":
+    main()
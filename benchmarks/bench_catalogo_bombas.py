@@ -0,0 +1,87 @@
+# benchmarks/bench_catalogo_bombas.py
+# Busca de bombas pelo ponto de trabalho (catalogo_bombas.buscar_bombas: índice R*Tree nos
+# envelopes + um único lote vetorizado) contra duas referências: o mesmo lote sobre o
+# catálogo inteiro, sem o índice, e um laço que resolve uma bomba por vez (poly1d).
+#
+# Uso: python benchmarks/bench_catalogo_bombas.py [--bombas 10000] [--janelas 5]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database
+from catalogo_bombas import GRAU, avaliar_bombas, buscar_bombas, catalogo_sintetico
+from hidraulica import CompiledNetwork, calcular_potencia_eletrica, resolver_pontos_operacao
+
+MATERIAIS = {"Aço Carbono (novo)": 0.046}
+FLUIDOS = {"Água a 20°C": {"rho": 998.2, "nu": 1.004e-6}}
+H_GEOMETRICA = 20.0
+# Janelas de vazão (m³/h) e diâmetro da adutora (mm) que as atende
+JANELAS = ((20, 40, 80), (60, 100, 150), (150, 250, 200), (400, 600, 300), (900, 1400, 400))
+
+def rede_para(diametro):
+    trecho = {"comprimento": 500.0, "diametro": float(diametro), "material": "Aço Carbono (novo)", "acessorios": [{"k": 5.0, "quantidade": 1}]}
+    return CompiledNetwork({"antes": [trecho], "paralelo": {}, "depois": []}, "Água a 20°C", MATERIAIS, FLUIDOS)
+
+def catalogo_completo():
+    linhas = database.obter_conexao().execute(
+        "SELECT e.flow_min, e.flow_max, p.coefficients FROM pump_catalog p JOIN pump_catalog_envelope e ON e.id = p.id").fetchall()
+    coeficientes = np.frombuffer(b"".join(linha[2] for linha in linhas), dtype=np.float64).reshape(len(linhas), 3, GRAU + 1)
+    return coeficientes, np.array([linha[:2] for linha in linhas])
+
+def laco_escalar(rede, coeficientes, faixa, vazao_min, vazao_max):
+    """ Uma bomba por vez: o caminho que a busca teria sem o lote. """
+    viaveis = 0
+    for (altura, eficiencia, _), (q_min, q_max) in zip(coeficientes, faixa):
+        curva = np.poly1d(altura)
+        if curva(0.0) <= H_GEOMETRICA or altura[0] >= 0:
+            continue
+        ponto = resolver_pontos_operacao(rede, H_GEOMETRICA, curva)
+        vazao = float(ponto["vazao"])
+        if ponto["convergiu"] and vazao_min <= vazao <= vazao_max and q_min <= vazao <= q_max:
+            viaveis += calcular_potencia_eletrica(vazao, float(ponto["altura"]), np.poly1d(eficiencia)(vazao), 90, rede.rho) > 0
+    return viaveis
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bombas", type=int, default=10000)
+    parser.add_argument("--janelas", type=int, default=len(JANELAS))
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as diretorio:
+        database.fechar_conexoes()
+        database.DB_NAME = os.path.join(diretorio, "catalogo.db")
+        database.setup_database()
+        inicio = time.perf_counter()
+        database.add_catalog_pumps(catalogo_sintetico(args.bombas, semente=1))
+        print(f"{args.bombas} curvas empacotadas e gravadas em {time.perf_counter() - inicio:.2f} s "
+              f"({sum(os.path.getsize(os.path.join(diretorio, nome)) for nome in os.listdir(diretorio)) / 1e6:.1f} MB com o WAL)\n")
+        coeficientes, faixa = catalogo_completo()
+
+        print(f"{'janela (m³/h)':>14} | {'candidatas':>10} | {'viáveis':>7} | {'índice+lote (ms)':>16} | "
+              f"{'sem índice (ms)':>15} | {'laço escalar (ms)':>17}")
+        for vazao_min, vazao_max, diametro in JANELAS[:args.janelas]:
+            rede = rede_para(diametro)
+            inicio = time.perf_counter()
+            busca = buscar_bombas(rede, H_GEOMETRICA, vazao_min, vazao_max, 90, 24, 0.75, "Água a 20°C", FLUIDOS)
+            tempo_busca = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            completo = avaliar_bombas(rede, H_GEOMETRICA, coeficientes, vazao_min, vazao_max, 90, 24, 0.75, "Água a 20°C", FLUIDOS, faixa)
+            tempo_completo = time.perf_counter() - inicio
+            if int(completo["viavel"].sum()) != busca["viaveis"]:
+                print(f"  aviso: sem índice {int(completo['viavel'].sum())} viáveis, com índice {busca['viaveis']}")
+
+            inicio = time.perf_counter()
+            laco_escalar(rede, coeficientes, faixa, vazao_min, vazao_max)
+            tempo_laco = time.perf_counter() - inicio
+            print(f"{f'{vazao_min}–{vazao_max}':>14} | {busca['candidatas']:>10} | {busca['viaveis']:>7} | {1000 * tempo_busca:>16.1f} | "
+                  f"{1000 * tempo_completo:>15.1f} | {1000 * tempo_laco:>17.1f}")
+        database.fechar_conexoes()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# benchmarks/bench_divisao_vazao.py
+# Compara o solver de Newton da divisão de vazão (resolver_divisao_vazao) com a
+# implementação anterior baseada em scipy.optimize.root(method='hybr').
+#
+# Uso: python benchmarks/bench_divisao_vazao.py [--repeticoes N]
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from scipy.optimize import root
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hidraulica import CompiledNetwork, resolver_divisao_vazao
+
+MATERIAIS = {"Aço Carbono (novo)": 0.046, "PVC / Plástico": 0.0015, "Ferro Fundido": 0.26}
+FLUIDOS = {"Água a 20°C": {"rho": 998.2, "nu": 1.004e-6}}
+
+def gerar_rede(num_ramais, rng):
+    ramais = {}
+    for i in range(num_ramais):
+        ramais[f"Ramal {i+1}"] = [
+            {"comprimento": float(rng.uniform(5, 200)), "diametro": float(rng.choice([25, 40, 50, 80, 100, 150])),
+             "material": str(rng.choice(list(MATERIAIS))), "acessorios": [{"k": 0.9, "quantidade": int(rng.integers(0, 4))}]}
+            for _ in range(int(rng.integers(1, 4)))
+        ]
+    return CompiledNetwork({"antes": [], "paralelo": ramais, "depois": []}, "Água a 20°C", MATERIAIS, FLUIDOS)
+
+def divisao_legada(rede, vazao_total_m3h):
+    """ Implementação anterior: hybr com Jacobiano por diferenças finitas e chute uniforme. """
+    num_ramais = rede.num_ramais
+    def equacoes_perda(vazoes_parciais_m3h):
+        vazao_ultimo_ramal = vazao_total_m3h - sum(vazoes_parciais_m3h)
+        if vazao_ultimo_ramal < -0.01: return [1e12] * (num_ramais - 1)
+        perdas = rede.perdas_ramais(np.append(vazoes_parciais_m3h, vazao_ultimo_ramal))
+        return perdas[:-1] - perdas[-1]
+    solucao = root(equacoes_perda, np.full(num_ramais - 1, vazao_total_m3h / num_ramais), method='hybr', options={'xtol': 1e-8})
+    return np.append(solucao.x, vazao_total_m3h - sum(solucao.x)), solucao.success, solucao.nfev
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+    rng = np.random.default_rng(42)
+    vazoes_teste = np.linspace(1.0, 300.0, 100)
+
+    print(f"{'ramais':>6} | {'legado (ms)':>11} {'nfev':>6} {'falhas':>6} | {'newton (ms)':>11} {'iter':>5} {'falhas':>6} | {'curva lote (ms)':>15} | {'balanço (m³/h)':>14}")
+    for num_ramais in (2, 5, 10, 20, 50):
+        rede = gerar_rede(num_ramais, rng)
+
+        inicio = time.perf_counter()
+        for _ in range(args.repeticoes):
+            resultados = [divisao_legada(rede, q) for q in vazoes_teste]
+        tempo_legado = (time.perf_counter() - inicio) / args.repeticoes * 1000
+        nfev = np.mean([r[2] for r in resultados])
+        falhas_legado = sum(not r[1] for r in resultados)
+
+        # Chamadas escalares sucessivas, como dentro do root de encontrar_ponto_operacao (com warm start)
+        inicio = time.perf_counter()
+        for _ in range(args.repeticoes):
+            rede._memoria_divisao = None
+            novos = [resolver_divisao_vazao(rede, q) for q in vazoes_teste]
+        tempo_newton = (time.perf_counter() - inicio) / args.repeticoes * 1000
+        iteracoes = np.mean([r["iteracoes"] for r in novos])
+        falhas_newton = sum(not r["convergiu"] for r in novos)
+
+        # Curva do sistema inteira em uma chamada vetorizada
+        inicio = time.perf_counter()
+        for _ in range(args.repeticoes):
+            rede._memoria_divisao = None
+            lote = resolver_divisao_vazao(rede, vazoes_teste)
+        tempo_lote = (time.perf_counter() - inicio) / args.repeticoes * 1000
+
+        erro_balanco = np.abs(lote["vazoes"].sum(axis=-1) - vazoes_teste).max()
+        print(f"{num_ramais:>6} | {tempo_legado:>11.1f} {nfev:>6.1f} {falhas_legado:>6} | {tempo_newton:>11.1f} {iteracoes:>5.1f} {falhas_newton:>6} | {tempo_lote:>15.2f} | {erro_balanco:>14.2e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+# benchmarks/bench_escalabilidade.py
+# Suíte de escalabilidade: gera redes sintéticas de tamanho crescente (trechos por parte
+# em série, número de ramais em paralelo e acessórios por trecho) e mede, para cada uma,
+# o tempo (mediana de várias repetições) e o pico de memória Python (tracemalloc, em uma
+# execução separada) das etapas de uma análise:
+#
+#   ponto_operacao   encontrar_ponto_operacao (ponto pelo solver em lote + curva tabelada)
+#   perdas_paralelo  calcular_perdas_paralelo na vazão de projeto
+#   curva_sistema    calcular_curva_sistema em 200 vazões (a varredura do gráfico)
+#   sensibilidade    sensibilidade_uniforme com 151 fatores de diâmetro (50% a 200%)
+#   diagrama         gerar_diagrama_rede (fonte DOT com as velocidades de cada trecho)
+#   diagrama_png     renderização do diagrama pelo Graphviz (só se o executável 'dot' existir)
+#   relatorio        generate_report (PDF com tabelas, diagrama e gráfico a 300 dpi)
+#
+# O resultado é gravado em JSON (--saida); com --comparar BASE.json cada medição é
+# comparada com a linha de base e o script termina com código 1 se alguma ficou mais
+# lenta que a tolerância, para uso antes de cada alteração ser integrada.
+#
+# Uso: python benchmarks/bench_escalabilidade.py [--tamanhos P,M,G,GG] [--casos ...]
+#      [--saida atual.json] [--comparar base.json] [--tolerancia 0.25] [--tempo-min 0.3]
+#
+# Tamanhos: nomes de TAMANHOS ou "TxRxA" (trechos por parte em série x ramais x acessórios).
+
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from PIL import Image
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+from graficos import criar_figura_curvas, gerar_diagrama_rede
+from hidraulica import (
+    FLUIDOS_PADRAO, K_FACTORS, MATERIAIS_PADRAO, CompiledNetwork, calcular_curva_sistema, calcular_perdas_paralelo,
+    encontrar_ponto_operacao
+)
+from report_generator import generate_report
+from sensibilidade import sensibilidade_uniforme
+
+# (trechos por parte em série, ramais em paralelo, acessórios por trecho); cada ramal tem
+# metade dos trechos de uma parte em série
+TAMANHOS = {"P": (2, 2, 1), "M": (5, 4, 3), "G": (12, 8, 6), "GG": (25, 16, 10)}
+CASOS = ("ponto_operacao", "perdas_paralelo", "curva_sistema", "sensibilidade", "diagrama", "diagrama_png", "relatorio")
+H_GEOMETRICA = 15.0
+VAZAO_PROJETO = 100.0
+FLUIDO = "Água a 20°C"
+
+def ler_tamanho(texto):
+    if texto in TAMANHOS:
+        return texto, TAMANHOS[texto]
+    try:
+        trechos, ramais, acessorios = (int(parte) for parte in texto.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Tamanho '{texto}' inválido: use {', '.join(TAMANHOS)} ou TxRxA.")
+    return texto, (trechos, ramais, acessorios)
+
+def gerar_sistema(trechos_serie, num_ramais, acessorios_por_trecho, semente=42):
+    """ Rede sintética determinística: diâmetros, materiais e acessórios sorteados do catálogo. """
+    rng = np.random.default_rng(semente)
+    nomes_acessorios, materiais = list(K_FACTORS), list(MATERIAIS_PADRAO)
+    contador = iter(range(1, 10**9))
+
+    def trecho(diametros):
+        acessorios = [{"nome": nome, "k": K_FACTORS[nome], "quantidade": int(rng.integers(1, 3))}
+                      for nome in rng.choice(nomes_acessorios, size=acessorios_por_trecho)]
+        return {"id": next(contador), "comprimento": float(rng.uniform(5, 80)), "diametro": float(rng.choice(diametros)),
+                "material": str(rng.choice(materiais)), "acessorios": acessorios}
+
+    trechos_ramal = max(1, trechos_serie // 2)
+    return {
+        "antes": [trecho([150.0, 200.0]) for _ in range(trechos_serie)],
+        "paralelo": {f"Ramal {i+1}": [trecho([50.0, 65.0, 80.0]) for _ in range(trechos_ramal)] for i in range(num_ramais)},
+        "depois": [trecho([150.0, 200.0]) for _ in range(trechos_serie)],
+    }
+
+def preparar(sistema):
+    """ Rede compilada e curvas da bomba que cruzam o sistema exatamente na vazão de projeto. """
+    rede = CompiledNetwork(sistema, FLUIDO, MATERIAIS_PADRAO, FLUIDOS_PADRAO)
+    altura_projeto = float(calcular_curva_sistema(rede, H_GEOMETRICA, VAZAO_PROJETO))
+    shutoff = H_GEOMETRICA + 2 * (altura_projeto - H_GEOMETRICA)
+    bomba = np.poly1d([-(shutoff - altura_projeto) / VAZAO_PROJETO**2, 0.0, shutoff])
+    eficiencia = np.poly1d([-0.007, 1.4, 0.0])
+    return rede, bomba, eficiencia
+
+def argumentos_relatorio(sistema, rede, bomba, fonte_dot):
+    """ Imagens do relatório prontas (o caso 'relatorio' mede só a montagem do PDF). """
+    vazoes = np.linspace(0, 2 * VAZAO_PROJETO, 200)
+    fig = criar_figura_curvas(vazoes, bomba(vazoes), calcular_curva_sistema(rede, H_GEOMETRICA, vazoes), VAZAO_PROJETO, bomba(VAZAO_PROJETO))
+    grafico = io.BytesIO()
+    fig.savefig(grafico, format="PNG", dpi=300, bbox_inches="tight")
+    plt.close(fig)
+    if shutil.which("dot"):
+        import graphviz
+        diagrama = graphviz.Source(fonte_dot).pipe(format="png")
+    else:
+        # Sem Graphviz: imagem larga e baixa como as do rankdir='LR', proporcional ao número de trechos
+        largura = 300 * (len(sistema["antes"]) + len(sistema["depois"]) + max(len(t) for t in sistema["paralelo"].values()) + 2)
+        buffer = io.BytesIO()
+        Image.new("RGB", (min(largura, 12000), 150 * (len(sistema["paralelo"]) + 2)), "white").save(buffer, format="PNG")
+        diagrama = buffer.getvalue()
+    return {
+        "project_name": "Benchmark", "scenario_name": "Escalabilidade",
+        "params_data": {"Fluido Selecionado": FLUIDO, "Altura Geométrica (m)": f"{H_GEOMETRICA:.2f}"},
+        "results_data": {"Potência Elétrica Consumida (kW)": "0.00"},
+        "metrics_data": [("Vazão (m³/h)", f"{VAZAO_PROJETO:.2f}")],
+        "network_data": sistema, "diagram_image_bytes": diagrama, "chart_figure_bytes": grafico.getvalue(),
+    }
+
+def montar_casos(sistema):
+    """ {caso: função sem argumentos}; casos indisponíveis neste ambiente ficam de fora. """
+    rede, bomba, eficiencia = preparar(sistema)
+    _, distribuicao = calcular_perdas_paralelo(rede, VAZAO_PROJETO)
+    vazoes = np.linspace(0, 2 * VAZAO_PROJETO, 200)
+    fatores = np.arange(50, 201)
+
+    def diagrama():
+        return gerar_diagrama_rede(sistema, VAZAO_PROJETO, distribuicao, FLUIDO, MATERIAIS_PADRAO, FLUIDOS_PADRAO).source
+
+    fonte_dot = diagrama()
+    casos = {
+        "ponto_operacao": lambda: encontrar_ponto_operacao(rede, H_GEOMETRICA, bomba),
+        "perdas_paralelo": lambda: calcular_perdas_paralelo(rede, VAZAO_PROJETO),
+        "curva_sistema": lambda: calcular_curva_sistema(rede, H_GEOMETRICA, vazoes),
+        "sensibilidade": lambda: sensibilidade_uniforme(rede, fatores, H_GEOMETRICA, bomba, eficiencia, chute_vazao=VAZAO_PROJETO),
+        "diagrama": diagrama,
+    }
+    if shutil.which("dot"):
+        import graphviz
+        casos["diagrama_png"] = lambda: graphviz.Source(fonte_dot).pipe(format="png")
+    argumentos = argumentos_relatorio(sistema, rede, bomba, fonte_dot)
+    casos["relatorio"] = lambda: generate_report(**argumentos)
+    return casos
+
+def medir(funcao, tempo_min, repeticoes_min=3, repeticoes_max=1000):
+    """ Tempos (ms) de repetições até somar 'tempo_min' s, após uma execução de aquecimento, e pico de memória (kB). """
+    funcao()
+    tempos = []
+    while len(tempos) < repeticoes_min or (sum(tempos) < tempo_min * 1000 and len(tempos) < repeticoes_max):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tracemalloc.start()
+    funcao()
+    pico = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+    return {"mediana_ms": statistics.median(tempos), "min_ms": min(tempos), "repeticoes": len(tempos), "pico_memoria_kb": pico}
+
+def ambiente():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "data": datetime.now().isoformat(timespec="seconds"), "commit": commit, "python": platform.python_version(),
+        "numpy": np.__version__, "plataforma": platform.platform(), "processador": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(), "graphviz": bool(shutil.which("dot")),
+    }
+
+def executar(tamanhos, casos_pedidos, tempo_min):
+    resultados = []
+    for nome, (trechos_serie, num_ramais, acessorios) in tamanhos:
+        sistema = gerar_sistema(trechos_serie, num_ramais, acessorios)
+        num_trechos = 2 * trechos_serie + sum(len(trechos) for trechos in sistema["paralelo"].values())
+        casos = montar_casos(sistema)
+        for caso in casos_pedidos:
+            if caso not in casos:
+                continue
+            medicao = medir(casos[caso], tempo_min)
+            resultados.append({"caso": caso, "tamanho": nome, "trechos_serie": trechos_serie, "ramais": num_ramais,
+                               "acessorios_por_trecho": acessorios, "trechos_total": num_trechos, **medicao})
+            print(f"{caso:>16} | {nome:>8} | {num_trechos:>7} | {medicao['mediana_ms']:>11.3f} | {medicao['min_ms']:>9.3f} | "
+                  f"{medicao['repeticoes']:>5} | {medicao['pico_memoria_kb']:>11.0f}", flush=True)
+    return resultados
+
+def expoentes(resultados):
+    """ Inclinação log-log do tempo em função do número de trechos, entre o menor e o maior tamanho de cada caso. """
+    por_caso = {}
+    for r in resultados:
+        por_caso.setdefault(r["caso"], []).append(r)
+    saida = {}
+    for caso, medicoes in por_caso.items():
+        menor, maior = min(medicoes, key=lambda r: r["trechos_total"]), max(medicoes, key=lambda r: r["trechos_total"])
+        if maior["trechos_total"] > menor["trechos_total"]:
+            saida[caso] = math.log(maior["mediana_ms"] / menor["mediana_ms"]) / math.log(maior["trechos_total"] / menor["trechos_total"])
+    return saida
+
+def comparar(resultados, base, tolerancia):
+    """ Imprime a razão atual/base de cada medição e devolve quantas passaram da tolerância. """
+    indice = {(r["caso"], r["tamanho"]): r for r in base["resultados"]}
+    print(f"\nComparação com a linha de base ({base['ambiente'].get('commit') or 'sem commit'}, {base['ambiente']['data']}); tolerância {tolerancia:.0%}")
+    print(f"{'caso':>16} | {'tamanho':>8} | {'base (ms)':>10} | {'atual (ms)':>10} | {'tempo':>6} | {'memória':>7} | situação")
+    regressoes = 0
+    for r in resultados:
+        anterior = indice.get((r["caso"], r["tamanho"]))
+        if anterior is None:
+            continue
+        razao = r["mediana_ms"] / anterior["mediana_ms"]
+        razao_memoria = r["pico_memoria_kb"] / anterior["pico_memoria_kb"] if anterior["pico_memoria_kb"] else 1.0
+        situacao = "REGRESSÃO" if razao > 1 + tolerancia else ("melhor" if razao < 1 / (1 + tolerancia) else "ok")
+        if razao_memoria > 1 + tolerancia:
+            situacao += " (memória)"
+        regressoes += situacao.startswith("REGRESSÃO")
+        print(f"{r['caso']:>16} | {r['tamanho']:>8} | {anterior['mediana_ms']:>10.3f} | {r['mediana_ms']:>10.3f} | "
+              f"{razao:>5.2f}x | {razao_memoria:>6.2f}x | {situacao}")
+
+    # Expoentes calculados só com os tamanhos medidos nas duas execuções
+    comuns = {(r["caso"], r["tamanho"]) for r in resultados} & set(indice)
+    expoentes_base = expoentes([r for r in base["resultados"] if (r["caso"], r["tamanho"]) in comuns])
+    for caso, expoente in expoentes([r for r in resultados if (r["caso"], r["tamanho"]) in comuns]).items():
+        if caso in expoentes_base and expoente > expoentes_base[caso] + 0.25:
+            print(f"Escalabilidade de '{caso}' piorou: tempo ~ trechos^{expoente:.2f} (base: ^{expoentes_base[caso]:.2f})")
+    return regressoes
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tamanhos", default=",".join(TAMANHOS), help="lista separada por vírgulas (nomes ou TxRxA)")
+    parser.add_argument("--casos", default=",".join(CASOS), help=f"subconjunto de {', '.join(CASOS)}")
+    parser.add_argument("--tempo-min", type=float, default=0.3, help="tempo mínimo medido por caso e tamanho (s)")
+    parser.add_argument("--saida", default=None, help="arquivo JSON com as medições")
+    parser.add_argument("--comparar", default=None, help="JSON de uma execução anterior usado como linha de base")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="aumento relativo de tempo considerado regressão")
+    args = parser.parse_args()
+    try:
+        tamanhos = [ler_tamanho(t.strip()) for t in args.tamanhos.split(",") if t.strip()]
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    casos = [c.strip() for c in args.casos.split(",") if c.strip()]
+    desconhecidos = set(casos) - set(CASOS)
+    if desconhecidos:
+        parser.error(f"casos desconhecidos: {', '.join(sorted(desconhecidos))}")
+
+    print(f"{'caso':>16} | {'tamanho':>8} | {'trechos':>7} | {'mediana (ms)':>11} | {'mín. (ms)':>9} | {'rep.':>5} | {'pico (kB)':>11}")
+    resultados = executar(tamanhos, casos, args.tempo_min)
+    relatorio = {"ambiente": ambiente(), "resultados": resultados, "expoentes": expoentes(resultados)}
+    print("\nExpoente de escala (tempo ~ trechos^k): " + ", ".join(f"{caso} {k:.2f}" for caso, k in relatorio["expoentes"].items()))
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            base = json.load(arquivo)
+        if comparar(resultados, base, args.tolerancia):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
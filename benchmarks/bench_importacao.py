@@ -0,0 +1,92 @@
+# benchmarks/bench_importacao.py
+# Importação e exportação em massa (transferencia_dados.py): tempo de import_records
+# (executemany em lotes, uma transação) contra save_scenario chamado cenário a cenário,
+# tempo de exportação em JSON lines e Parquet e pico de memória Python (tracemalloc, em
+# uma segunda execução, porque o rastreamento deixa tudo mais lento) em dois tamanhos de
+# entrada, para mostrar que ele não cresce com o número de cenários.
+#
+# Uso: python benchmarks/bench_importacao.py [--cenarios 20000] [--trechos 12] [--individual 1000]
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database
+import transferencia_dados
+
+def gerar_registros(num_cenarios, num_trechos, semente=3):
+    """ Registros no formato de export_records, gerados sob demanda. """
+    rng = random.Random(semente)
+    for k in range(20):
+        yield {"tipo": "fluido", "username": "u", "nome": f"Fluido {k}", "rho": 1000.0 - k, "nu": 1e-6}
+        yield {"tipo": "material", "username": "u", "nome": f"Material {k}", "rugosidade": 0.05 + k / 100}
+    for i in range(num_cenarios):
+        trechos = [{"id": j, "comprimento": round(rng.uniform(5, 100), 1), "diametro": 100.0, "material": "Aço Carbono (novo)",
+                    "acessorios": [{"nome": "Cotovelo 90° (Raio Longo)", "k": 0.6, "quantidade": rng.randint(1, 4)}]} for j in range(num_trechos)]
+        yield {"tipo": "cenario", "username": "u", "project_name": f"Projeto {i % 50}", "scenario_name": f"Cenário {i}",
+               "last_modified": "2026-01-01 00:00:00", "last_results": {"vazao_op": rng.uniform(50, 100)},
+               "scenario_data": {"h_geometrica": 15.0, "fluido_selecionado": "Água a 20°C", "trechos_antes": trechos}}
+
+def novo_banco(diretorio, nome):
+    database.fechar_conexoes()
+    database.DB_NAME = os.path.join(diretorio, nome)
+    database.setup_database()
+
+def medir(funcao, antes=lambda: None):
+    """ (resultado, segundos, pico de memória em MB); `antes` prepara o banco para cada execução. """
+    antes()
+    inicio = time.perf_counter()
+    resultado = funcao()
+    duracao = time.perf_counter() - inicio
+    antes()
+    tracemalloc.start()
+    funcao()
+    pico = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return resultado, duracao, pico
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cenarios", type=int, default=20000)
+    parser.add_argument("--trechos", type=int, default=12)
+    parser.add_argument("--individual", type=int, default=1000, help="cenários gravados um a um (o total é extrapolado)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        # Referência: save_scenario por cenário (uma transação cada), extrapolado para o total
+        novo_banco(diretorio, "individual.db")
+        amostra = [r for r in gerar_registros(args.individual, args.trechos) if r["tipo"] == "cenario"]
+        inicio = time.perf_counter()
+        for r in amostra:
+            database.save_scenario(r["username"], r["project_name"], r["scenario_name"], r["scenario_data"], r["last_results"])
+        por_cenario = (time.perf_counter() - inicio) / len(amostra)
+
+        print(f"{'operação':>28} | {'cenários':>8} | {'tempo (s)':>9} | {'cenários/s':>10} | {'pico mem. (MB)':>14}")
+        print(f"{'save_scenario um a um':>28} | {args.cenarios:>8} | {por_cenario * args.cenarios:>9.2f} | {1 / por_cenario:>10.0f} | {'-':>14}  (extrapolado de {len(amostra)})")
+        for total in (args.cenarios // 4, args.cenarios):
+            _, duracao, pico = medir(lambda: database.import_records(gerar_registros(total, args.trechos)),
+                                     lambda: novo_banco(diretorio, f"lote_{total}_{time.monotonic_ns()}.db"))
+            print(f"{'import_records':>28} | {total:>8} | {duracao:>9.2f} | {total / duracao:>10.0f} | {pico:>14.1f}")
+
+        # Exportação e reimportação do banco maior nos dois formatos (pyarrow importado antes
+        # de medir, para não contar o carregamento do módulo)
+        import pyarrow.parquet  # noqa: F401
+        for extensao in ("jsonl", "parquet"):
+            arquivo = os.path.join(diretorio, f"exportacao.{extensao}")
+            _, duracao, pico = medir(lambda: transferencia_dados.exportar(arquivo))
+            tamanho = os.path.getsize(arquivo) / 1e6
+            print(f"{f'exportar {extensao} ({tamanho:.1f} MB)':>28} | {args.cenarios:>8} | {duracao:>9.2f} | {args.cenarios / duracao:>10.0f} | {pico:>14.1f}")
+            origem = database.DB_NAME
+            contagem, duracao, pico = medir(lambda: transferencia_dados.importar(arquivo),
+                                            lambda: novo_banco(diretorio, f"reimportado_{extensao}_{time.monotonic_ns()}.db"))
+            print(f"{f'importar {extensao}':>28} | {contagem['cenarios_novos']:>8} | {duracao:>9.2f} | {args.cenarios / duracao:>10.0f} | {pico:>14.1f}")
+            novo_banco(diretorio, os.path.basename(origem))
+        database.fechar_conexoes()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/bench_inicializacao.py
+# Partida a frio do aplicativo: cada medição roda em um processo Python novo, com o
+# AppTest do Streamlit, e reporta o tempo gasto em imports disparados pelo script
+# (python -X importtime), o tempo até a primeira renderização, uma segunda execução
+# no mesmo processo (rerun) e quais dependências pesadas foram carregadas.
+#
+# Páginas: "login" (sem sessão autenticada), "analise" (usuário logado com uma rede de
+# três ramais: resultados, diagrama e gráficos, sem tela de análise aberta) e
+# "sensibilidade" (a mesma, com a tela de sensibilidade de diâmetros aberta).
+#
+# Uso: python benchmarks/bench_inicializacao.py [--repeticoes 3] [--app DIRETORIO]
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PESADOS = ["pandas", "numpy", "scipy", "matplotlib", "graphviz", "fpdf", "PIL"]
+
+# Executado no processo filho: argv = [diretório do app, página]
+FILHO = r'''
+import json, os, sys, time
+from streamlit.testing.v1 import AppTest
+diretorio, pagina = sys.argv[1], sys.argv[2]
+os.chdir(diretorio); sys.path.insert(0, diretorio)
+antes = set(sys.modules)
+sys.stderr.write("--- app ---\n"); sys.stderr.flush()
+at = AppTest.from_file(os.path.join(diretorio, "pumpsprofessionalr0v4.py"), default_timeout=300)
+if pagina != "login":
+    trecho = lambda i, L, D, k: {"id": i, "comprimento": L, "diametro": D, "material": "Aço Carbono (novo)", "acessorios": [{"nome": "x", "k": k, "quantidade": 1}]}
+    at.session_state["authentication_status"] = True
+    at.session_state["name"] = "Benchmark"; at.session_state["username"] = "benchmark"
+    at.session_state["trechos_antes"] = [trecho(1, 20.0, 100.0, 0.9)]
+    at.session_state["trechos_depois"] = [trecho(2, 30.0, 100.0, 1.0)]
+    at.session_state["ramais_paralelos"] = {"Ramal 1": [trecho(3, 50.0, 80.0, 0.5)], "Ramal 2": [trecho(4, 80.0, 60.0, 2.0)], "Ramal 3": [trecho(5, 40.0, 50.0, 0.2)]}
+if pagina == "sensibilidade":
+    at.session_state["analise_selecionada"] = "Sensibilidade de Diâmetros"
+inicio = time.perf_counter(); at.run(); primeira = time.perf_counter() - inicio
+inicio = time.perf_counter(); at.run(); segunda = time.perf_counter() - inicio
+carregados = sorted({nome.split(".")[0] for nome in set(sys.modules) - antes})
+print(json.dumps({"primeira": primeira, "segunda": segunda, "carregados": carregados, "excecoes": [str(e.value) for e in at.exception]}))
+'''
+
+def tempo_imports_ms(stderr):
+    """ Soma do tempo acumulado dos imports de nível superior feitos depois do marcador. """
+    total, depois_marcador = 0, False
+    for linha in stderr.splitlines():
+        if linha.startswith("--- app ---"):
+            depois_marcador = True
+        elif depois_marcador and linha.startswith("import time:") and "|" in linha:
+            _, cumulativo, nome = linha.split("|", 2)
+            if not nome.startswith("  ") and cumulativo.strip().isdigit():
+                total += int(cumulativo)
+    return total / 1000
+
+def medir(diretorio, pagina):
+    processo = subprocess.run([sys.executable, "-X", "importtime", "-c", FILHO, diretorio, pagina],
+                              capture_output=True, text=True, check=True)
+    resultado = json.loads(processo.stdout.strip().splitlines()[-1])
+    resultado["imports_ms"] = tempo_imports_ms(processo.stderr)
+    return resultado
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--app", default=RAIZ, help="diretório com pumpsprofessionalr0v4.py (ex.: outra versão para comparação)")
+    args = parser.parse_args()
+
+    print(f"{'página':>13} | {'imports (ms)':>12} | {'1ª renderização (ms)':>20} | {'rerun (ms)':>10} | dependências pesadas carregadas")
+    for pagina in ("login", "analise", "sensibilidade"):
+        medicoes = []
+        for _ in range(args.repeticoes):
+            # Cópia em diretório temporário: o app cria o banco SQLite no diretório atual
+            with tempfile.TemporaryDirectory() as diretorio:
+                for nome in os.listdir(args.app):
+                    if nome.endswith(".py") or nome == "config.yaml":
+                        shutil.copy(os.path.join(args.app, nome), diretorio)
+                medicoes.append(medir(diretorio, pagina))
+        if any(m["excecoes"] for m in medicoes):
+            print(f"{pagina}: exceções no app: {medicoes[0]['excecoes']}")
+        pesados = [nome for nome in PESADOS if nome in medicoes[0]["carregados"]]
+        print(f"{pagina:>13} | {statistics.median(m['imports_ms'] for m in medicoes):>12.0f} | "
+              f"{statistics.median(m['primeira'] for m in medicoes) * 1000:>20.0f} | "
+              f"{statistics.median(m['segunda'] for m in medicoes) * 1000:>10.0f} | {', '.join(pesados) or '-'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# benchmarks/bench_otimizacao_diametros.py
+# Tempo do otimizador de diâmetros por custo de ciclo de vida (otimizacao_diametros.py)
+# em redes sintéticas com número crescente de trechos, com o tamanho do espaço de busca,
+# quantos projetos foram de fato avaliados, quantos tamanhos a poda descartou, o
+# tamanho da fronteira de Pareto (com o opex pelo volume bombeado, a fronteira tem vários projetos)
+# e se o ótimo é garantido (exaustivo ou ramificação e limite concluída dentro do orçamento).
+#
+# Uso: python benchmarks/bench_otimizacao_diametros.py [--trechos-por-ramal N]
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hidraulica import CompiledNetwork, resolver_pontos_operacao
+from otimizacao_diametros import OtimizadorDiametros
+
+MATERIAIS = {"Aço Carbono (novo)": 0.046, "PVC / Plástico": 0.0015, "Ferro Fundido": 0.26}
+FLUIDOS = {"Água a 20°C": {"rho": 998.2, "nu": 1.004e-6}}
+H_GEOMETRICA = 15.0
+
+def gerar_rede(num_ramais, trechos_por_ramal, rng):
+    def trecho():
+        return {"comprimento": float(rng.uniform(5, 100)), "diametro": float(rng.choice([80, 100, 150])),
+                "material": str(rng.choice(list(MATERIAIS))), "acessorios": [{"k": 0.9, "quantidade": int(rng.integers(0, 4))}]}
+    ramais = {f"Ramal {i+1}": [trecho() for _ in range(trechos_por_ramal)] for i in range(num_ramais)}
+    return CompiledNetwork({"antes": [trecho() for _ in range(3)], "paralelo": ramais, "depois": [trecho() for _ in range(3)]},
+                           "Água a 20°C", MATERIAIS, FLUIDOS)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trechos-por-ramal", type=int, default=3)
+    args = parser.parse_args()
+    curva_bomba = np.poly1d([-0.0008, 0.0, 60.0])
+    curva_eficiencia = np.poly1d([-0.004, 1.2, 0.0])
+
+    print(f"{'trechos':>7} | {'espaço de busca':>15} | {'tempo (s)':>9} | {'avaliações':>10} | {'podados':>9} | {'pareto':>6} | {'LCC ótimo (R$)':>14} | {'ótimo global':>12}")
+    for num_ramais in (1, 6, 10):
+        rede = gerar_rede(num_ramais, args.trechos_por_ramal, np.random.default_rng(3))
+        atual = resolver_pontos_operacao(rede, H_GEOMETRICA, curva_bomba)
+        inicio = time.perf_counter()
+        otimizador = OtimizadorDiametros(rede, H_GEOMETRICA, curva_bomba, curva_eficiencia, 90, 16, 0.75, "Água a 20°C", FLUIDOS,
+                                         vazao_minima_m3h=0.9 * float(atual["vazao"]))
+        resultado = otimizador.otimizar()
+        tempo = time.perf_counter() - inicio
+        num_var = len(otimizador.variaveis)
+        espaco = f"{len(otimizador.diametros_catalogo_mm)}^{num_var}"
+        print(f"{rede.num_trechos:>7} | {espaco:>15} | {tempo:>9.2f} | {resultado['avaliacoes']:>10} | "
+              f"{resultado['tamanhos_podados']:>4}/{resultado['tamanhos_total']:<4} | {len(resultado['pareto']):>6} | {resultado['custo_ciclo_vida']:>14.0f} | {'sim' if resultado['otimo_global'] else 'não':>12}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# benchmarks/bench_rede_malhada.py
+# Tempo do solver de Gradiente Global (rede_malhada) em malhas quadradas de tamanho crescente
+# e conferência do caso especial de três partes contra encontrar_ponto_operacao.
+#
+# Uso: python benchmarks/bench_rede_malhada.py
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hidraulica import MATERIAIS_PADRAO, FLUIDOS_PADRAO, CompiledNetwork, encontrar_ponto_operacao
+from rede_malhada import RedeMalhada
+
+FLUIDO = "Água a 20°C"
+
+def gerar_malha(lado, rng):
+    """ Malha lado x lado alimentada por um reservatório em um canto, com demandas aleatórias. """
+    rede = RedeMalhada()
+    rede.adicionar_reservatorio("fonte", 60.0)
+    for i in range(lado):
+        for j in range(lado):
+            rede.adicionar_juncao(f"{i},{j}", rng.uniform(0, 2))
+    rede.adicionar_tubo("alimentacao", "fonte", "0,0", 100, 500, "Ferro Fundido", [{"nome": "Cotovelo 45°", "quantidade": 2}])
+    for i in range(lado):
+        for j in range(lado):
+            if i + 1 < lado:
+                rede.adicionar_tubo(f"v{i},{j}", f"{i},{j}", f"{i+1},{j}", 100, float(rng.choice([100, 150, 200, 300])), "Ferro Fundido", [{"nome": "Tê (Fluxo Direto)"}])
+            if j + 1 < lado:
+                rede.adicionar_tubo(f"h{i},{j}", f"{i},{j}", f"{i},{j+1}", 100, float(rng.choice([100, 150, 200, 300])), "PVC / Plástico", [])
+    return rede
+
+def conferir_tres_partes():
+    trecho = lambda L, D, k: {"comprimento": L, "diametro": D, "material": "Aço Carbono (novo)", "acessorios": [{"nome": "", "k": k, "quantidade": 1}]}
+    sistema = {'antes': [trecho(20, 100, 0.9)], 'paralelo': {'Ramal 1': [trecho(50, 80, 0.5)], 'Ramal 2': [trecho(80, 60, 2.0), trecho(5, 40, 1.0)]}, 'depois': [trecho(30, 100, 1.0)]}
+    bomba = np.poly1d(np.polyfit([0, 50, 100], [40, 35, 25], 2))
+    vazao_op, _, _ = encontrar_ponto_operacao(CompiledNetwork(sistema, FLUIDO, MATERIAIS_PADRAO, FLUIDOS_PADRAO), 15.0, bomba)
+    resultado = RedeMalhada.de_sistema(sistema, 15.0, bomba).compilar(FLUIDO, MATERIAIS_PADRAO, FLUIDOS_PADRAO).resolver()
+    print(f"Três partes: encontrar_ponto_operacao = {vazao_op:.6f} m³/h, gradiente global = {resultado['vazoes']['Bomba']:.6f} m³/h")
+
+def main():
+    conferir_tres_partes()
+    rng = np.random.default_rng(1)
+    print(f"{'tubos':>6} {'junções':>8} | {'compilar (ms)':>13} {'resolver (ms)':>13} {'iter':>5} {'convergiu':>9}")
+    for lado in (10, 20, 30, 40, 50):
+        rede = gerar_malha(lado, rng)
+        inicio = time.perf_counter()
+        compilada = rede.compilar(FLUIDO, MATERIAIS_PADRAO, FLUIDOS_PADRAO)
+        tempo_compilar = (time.perf_counter() - inicio) * 1000
+        inicio = time.perf_counter()
+        resultado = compilada.resolver()
+        tempo_resolver = (time.perf_counter() - inicio) * 1000
+        print(f"{len(rede.tubos):>6} {len(rede.juncoes):>8} | {tempo_compilar:>13.1f} {tempo_resolver:>13.1f} {resultado['iteracoes']:>5} {str(resultado['convergiu']):>9}")
+
+if __name__ == "__main__":
+    main()
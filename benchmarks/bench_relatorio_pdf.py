@@ -0,0 +1,88 @@
+# benchmarks/bench_relatorio_pdf.py
+# Compara a montagem do PDF com imagens em memória (reduzidas à resolução de impressão e
+# reaproveitadas) com a implementação anterior, que gravava cada imagem em arquivo temporário.
+#
+# Uso: python benchmarks/bench_relatorio_pdf.py [--repeticoes N]
+
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import report_generator
+from graficos import criar_figura_curvas
+
+class PDFReportLegado(report_generator.PDFReport):
+    """ Implementação anterior de add_image_from_bytes: arquivo temporário e imagem na resolução original. """
+    def add_image_from_bytes(self, image_bytes):
+        temp_img_path = f"temp_image_{time.time()}.png"
+        with open(temp_img_path, "wb") as f:
+            f.write(image_bytes)
+        img_pil = Image.open(temp_img_path)
+        img_width, img_height = img_pil.size
+        img_pil.close()
+        new_width = 190
+        new_height = img_height * (new_width / img_width)
+        available_height = self.page_break_trigger - self.get_y() - 10
+        if new_height > available_height:
+            self.add_page()
+            available_height_new_page = self.page_break_trigger - self.get_y() - 10
+            if new_height > available_height_new_page:
+                scale_factor = available_height_new_page / new_height
+                new_height *= scale_factor
+                new_width *= scale_factor
+        self.image(temp_img_path, x='C', w=new_width)
+        self.ln(5)
+        os.remove(temp_img_path)
+
+def gerar_imagens():
+    vazoes = np.linspace(0, 150, 100)
+    fig = criar_figura_curvas(vazoes, 40 - 0.0015 * vazoes**2, 15 + 0.0012 * vazoes**2, 92.7, 26.8)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='PNG', dpi=300, bbox_inches='tight')
+    plt.close(fig)
+    # Diagrama largo e baixo, como os gerados pelo graphviz com rankdir='LR'
+    diagrama = Image.new('RGB', (3000, 700), 'white')
+    buffer_diagrama = io.BytesIO()
+    diagrama.save(buffer_diagrama, format='PNG')
+    return buffer_diagrama.getvalue(), buffer.getvalue()
+
+def montar(classe, imagens):
+    pdf = classe("Projeto", "Cenário")
+    pdf.add_page()
+    for imagem in imagens:
+        pdf.add_section_title("Imagem")
+        pdf.add_image_from_bytes(imagem)
+    return bytes(pdf.output())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+    diagrama, grafico = gerar_imagens()
+    casos = {
+        "relatório (diagrama + gráfico)": [diagrama, grafico],
+        "gráfico repetido 4x": [grafico] * 4,
+    }
+
+    print(f"{'caso':<32} | {'legado (ms)':>11} {'tamanho (kB)':>12} | {'memória (ms)':>12} {'tamanho (kB)':>12}")
+    for nome, imagens in casos.items():
+        resultados = []
+        for classe in (PDFReportLegado, report_generator.PDFReport):
+            inicio = time.perf_counter()
+            for _ in range(args.repeticoes):
+                pdf_bytes = montar(classe, imagens)
+            resultados.append(((time.perf_counter() - inicio) / args.repeticoes * 1000, len(pdf_bytes) / 1024))
+        (t_legado, kb_legado), (t_novo, kb_novo) = resultados
+        print(f"{nome:<32} | {t_legado:>11.1f} {kb_legado:>12.1f} | {t_novo:>12.1f} {kb_novo:>12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# benchmarks/bench_sensibilidade.py
+# Compara a análise de sensibilidade em lote (sensibilidade.py, ponto de operação
+# re-resolvido para todos os candidatos de uma vez) com um laço escalar que chama
+# encontrar_ponto_operacao para cada fator de escala.
+#
+# Uso: python benchmarks/bench_sensibilidade.py [--ramais N]
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hidraulica import CompiledNetwork, encontrar_ponto_operacao
+from sensibilidade import sensibilidade_por_grupo, sensibilidade_uniforme, varredura_diametro_vazao
+
+MATERIAIS = {"Aço Carbono (novo)": 0.046, "PVC / Plástico": 0.0015, "Ferro Fundido": 0.26}
+FLUIDOS = {"Água a 20°C": {"rho": 998.2, "nu": 1.004e-6}}
+H_GEOMETRICA = 15.0
+
+def gerar_rede(num_ramais, rng):
+    def trecho():
+        return {"comprimento": float(rng.uniform(5, 100)), "diametro": float(rng.choice([80, 100, 150])),
+                "material": str(rng.choice(list(MATERIAIS))), "acessorios": [{"k": 0.9, "quantidade": int(rng.integers(0, 4))}]}
+    ramais = {f"Ramal {i+1}": [trecho() for _ in range(int(rng.integers(1, 3)))] for i in range(num_ramais)}
+    return CompiledNetwork({"antes": [trecho()], "paralelo": ramais, "depois": [trecho()]}, "Água a 20°C", MATERIAIS, FLUIDOS)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ramais", type=int, default=4)
+    args = parser.parse_args()
+    rede = gerar_rede(args.ramais, np.random.default_rng(7))
+    curva_bomba = np.poly1d([-0.0015, 0.0, 60.0])
+    curva_eficiencia = np.poly1d([-0.01, 1.6, 0.0])
+
+    print(f"{'candidatos':>10} | {'escalar (ms)':>12} | {'lote (ms)':>10} | {'dif. máx. vazão (m³/h)':>22}")
+    for num_fatores in (31, 301, 3001):
+        fatores = np.linspace(50, 200, num_fatores)
+        inicio = time.perf_counter()
+        lote = sensibilidade_uniforme(rede, fatores, H_GEOMETRICA, curva_bomba, curva_eficiencia)
+        tempo_lote = (time.perf_counter() - inicio) * 1000
+
+        # O laço escalar é amostrado em até 31 fatores e extrapolado para o total
+        amostra = np.unique(np.linspace(0, num_fatores - 1, min(num_fatores, 31)).astype(int))
+        inicio = time.perf_counter()
+        escalar = [encontrar_ponto_operacao(rede.com_diametros(rede.diametro_m * fatores[i] / 100), H_GEOMETRICA, curva_bomba)[0] for i in amostra]
+        tempo_escalar = (time.perf_counter() - inicio) * 1000 * num_fatores / len(amostra)
+        diferenca = np.nanmax(np.abs(np.array(escalar, dtype=float) - lote["vazao"][amostra]))
+        print(f"{num_fatores:>10} | {tempo_escalar:>12.1f} | {tempo_lote:>10.1f} | {diferenca:>22.2e}")
+
+    inicio = time.perf_counter()
+    grupos = sensibilidade_por_grupo(rede, np.arange(50, 201), H_GEOMETRICA, curva_bomba, curva_eficiencia)
+    print(f"\nPor trecho/ramal: {np.size(grupos['vazao'])} candidatos em {(time.perf_counter() - inicio) * 1000:.1f} ms")
+    inicio = time.perf_counter()
+    mapa = varredura_diametro_vazao(rede, np.arange(50, 201), np.linspace(0, 250, 60), H_GEOMETRICA)
+    print(f"Diâmetro x vazão: {mapa.size} pontos em {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/bench_versoes_cenarios.py
+# Armazenamento de cenários: espaço ocupado pelo histórico de versões (deltas comprimidos
+# com versões completas periódicas) contra cópias completas em JSON, tempo de
+# restauração de versões antigas e tempo de listagem só por metadados contra a tabela
+# única anterior (JSON sem compressão, sem índice por data).
+#
+# Uso: python benchmarks/bench_versoes_cenarios.py [--trechos 40] [--versoes 200] [--cenarios 500]
+
+import argparse
+import copy
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database
+
+def gerar_cenario(num_trechos, rng):
+    def trecho(i):
+        return {"id": i, "comprimento": round(rng.uniform(5, 100), 1), "diametro": float(rng.choice([80, 100, 150])),
+                "material": "Aço Carbono (novo)", "acessorios": [{"nome": "Cotovelo 90° (Raio Longo)", "k": 0.6, "quantidade": rng.randint(1, 4)}]}
+    terco = num_trechos // 3
+    return {
+        "h_geometrica": 15.0, "fluido_selecionado": "Água a 20°C",
+        "curva_altura": [{"Vazão (m³/h)": 0, "Altura (m)": 40}, {"Vazão (m³/h)": 50, "Altura (m)": 35}, {"Vazão (m³/h)": 100, "Altura (m)": 25}],
+        "curva_eficiencia": [{"Vazão (m³/h)": 0, "Eficiência (%)": 0}, {"Vazão (m³/h)": 50, "Eficiência (%)": 70}, {"Vazão (m³/h)": 100, "Eficiência (%)": 65}],
+        "trechos_antes": [trecho(i) for i in range(terco)],
+        "ramais_paralelos": {"Ramal 1": [trecho(100 + i) for i in range(terco // 2)], "Ramal 2": [trecho(200 + i) for i in range(terco - terco // 2)]},
+        "trechos_depois": [trecho(300 + i) for i in range(num_trechos - 2 * terco)],
+    }
+
+def editar(cenario, versao, rng):
+    """ Uma edição típica da interface: muda um campo, acrescenta ou remove o último trecho. """
+    novo = copy.deepcopy(cenario)
+    operacao = rng.random()
+    if operacao < 0.6:
+        rng.choice(novo["trechos_antes"] + novo["trechos_depois"])["comprimento"] = round(rng.uniform(5, 100), 1)
+    elif operacao < 0.8:
+        novo["trechos_depois"].append({"id": 1000 + versao, "comprimento": 10.0, "diametro": 100.0, "material": "PVC / Plástico", "acessorios": []})
+    elif len(novo["trechos_depois"]) > 1:
+        novo["trechos_depois"].pop()
+    else:
+        novo["h_geometrica"] = round(rng.uniform(5, 30), 1)
+    return novo
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trechos", type=int, default=40)
+    parser.add_argument("--versoes", type=int, default=200)
+    parser.add_argument("--cenarios", type=int, default=500, help="cenários no projeto usado na listagem")
+    args = parser.parse_args()
+    rng = random.Random(11)
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        database.DB_NAME = os.path.join(diretorio, "bench.db")
+        database.setup_database()
+
+        cenario = gerar_cenario(args.trechos, rng)
+        historico = [cenario]
+        database.save_scenario("u", "Histórico", "S", cenario)
+        inicio = time.perf_counter()
+        for versao in range(2, args.versoes + 1):
+            cenario = editar(cenario, versao, rng)
+            historico.append(cenario)
+            database.save_scenario("u", "Histórico", "S", cenario)
+        tempo_gravacao = (time.perf_counter() - inicio) / (args.versoes - 1) * 1000
+
+        versoes = database.get_scenario_versions("u", "Histórico", "S")
+        armazenado = sum(v["size_bytes"] for v in versoes)
+        json_completo = sum(len(json.dumps(c).encode("utf-8")) for c in historico)
+        print(f"Histórico de {len(versoes)} versões de um cenário com {args.trechos} trechos (gravação: {tempo_gravacao:.2f} ms por versão)")
+        print(f"  cópias completas em JSON: {json_completo / 1024:>8.1f} kB")
+        print(f"  deltas + completas (zlib): {armazenado / 1024:>7.1f} kB  ({sum(v['is_full'] for v in versoes)} versões completas)")
+
+        # Restauração: a versão mais cara é a anterior a cada versão completa (mais deltas a aplicar)
+        numeros = sorted(v["version"] for v in versoes)
+        print(f"\n{'versão':>7} | {'restaurar (ms)':>14} | confere")
+        for numero in (numeros[0], numeros[len(numeros) // 2], database.INTERVALO_VERSAO_COMPLETA, numeros[-1]):
+            inicio = time.perf_counter()
+            for _ in range(20):
+                dados = database.load_scenario_version("u", "Histórico", "S", numero)
+            tempo = (time.perf_counter() - inicio) / 20 * 1000
+            print(f"{numero:>7} | {tempo:>14.3f} | {dados == historico[numero - 1]}")
+
+        # Listagem: metadados contra a tabela única anterior
+        for i in range(args.cenarios):
+            database.save_scenario("u", "Lista", f"Cenário {i}", gerar_cenario(args.trechos, rng))
+        legado = sqlite3.connect(os.path.join(diretorio, "legado.db"))
+        legado.execute("CREATE TABLE scenarios (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT NOT NULL, project_name TEXT NOT NULL, scenario_name TEXT NOT NULL, "
+                       "scenario_data TEXT NOT NULL, last_modified TIMESTAMP NOT NULL, UNIQUE(username, project_name, scenario_name))")
+        legado.executemany("INSERT INTO scenarios (username, project_name, scenario_name, scenario_data, last_modified) VALUES (?, ?, ?, ?, ?)",
+                           [("u", "Lista", f"Cenário {i}", json.dumps(gerar_cenario(args.trechos, rng)), datetime.now().isoformat(" ")) for i in range(args.cenarios)])
+        legado.commit()
+
+        def medir(funcao, repeticoes=50):
+            inicio = time.perf_counter()
+            for _ in range(repeticoes):
+                funcao()
+            return (time.perf_counter() - inicio) / repeticoes * 1000
+
+        tempo_legado = medir(lambda: legado.execute("SELECT scenario_name FROM scenarios WHERE username = ? AND project_name = ? ORDER BY last_modified DESC", ("u", "Lista")).fetchall())
+        tempo_nomes = medir(lambda: database.get_scenarios_for_project("u", "Lista"))
+        tempo_meta = medir(lambda: database.list_scenarios("u", "Lista"))
+        print(f"\nListagem de {args.cenarios} cenários: tabela única anterior {tempo_legado:.2f} ms | nomes {tempo_nomes:.2f} ms | metadados completos {tempo_meta:.2f} ms")
+        legado.close()
+        tamanho_legado = os.path.getsize(os.path.join(diretorio, "legado.db"))
+        database.obter_conexao().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        print(f"Arquivo do banco: anterior {tamanho_legado / 1024:.0f} kB ({args.cenarios} cenários) | atual {os.path.getsize(database.DB_NAME) / 1024:.0f} kB "
+              f"({args.cenarios} cenários + histórico de {len(versoes)} versões)")
+        database.fechar_conexoes()
+
+if __name__ == "__main__":
+    main()
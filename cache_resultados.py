@@ -0,0 +1,175 @@
+# cache_resultados.py (Cache de resultados hidráulicos compartilhado entre sessões)
+
+import hashlib
+import json
+import math
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+import database
+from hidraulica import FLUIDOS_PADRAO, MATERIAIS_PADRAO
+
+def _canonico(valor):
+    """ Normaliza estruturas para serialização estável: chaves ordenadas, números como float, sem 'id'. """
+    if isinstance(valor, dict):
+        return {str(k): _canonico(v) for k, v in sorted(valor.items(), key=lambda item: str(item[0])) if k != 'id'}
+    if isinstance(valor, (list, tuple)):
+        return [_canonico(v) for v in valor]
+    if isinstance(valor, (bool, np.bool_)):
+        return bool(valor)
+    if isinstance(valor, (int, float, np.integer, np.floating)):
+        valor = float(valor)
+        return None if math.isnan(valor) else valor
+    return valor
+
+def _pontos_curva(df_curva):
+    """ Pontos de uma curva da bomba (DataFrame ou lista de registros) como pares numéricos. """
+    registros = df_curva.to_dict('records') if hasattr(df_curva, 'to_dict') else list(df_curva)
+    pontos = []
+    for registro in registros:
+        par = []
+        for valor in registro.values():
+            try:
+                par.append(float(valor))
+            except (TypeError, ValueError):
+                par.append(None)
+        pontos.append(par)
+    return pontos
+
+def chave_hidraulica(sistema, h_geometrica, fluido_selecionado, fluidos_combinados, materiais_combinados, curva_altura, curva_eficiencia):
+    """
+    Hash SHA-256 das entradas hidráulicas de um cenário.
+
+    Só entram as propriedades do fluido selecionado e as rugosidades dos materiais realmente
+    usados, então alterar outro item da biblioteca não invalida o resultado. Tarifa, horas
+    de operação e rendimento do motor ficam de fora: a energia é recalculada a partir do
+    resultado hidráulico.
+    """
+    materiais_usados = {
+        trecho['material'] for parte in (sistema['antes'], sistema['depois']) for trecho in parte
+    } | {trecho['material'] for trechos_ramal in sistema['paralelo'].values() for trecho in trechos_ramal}
+    entradas = {
+        'sistema': {'antes': sistema['antes'], 'paralelo': [[nome, trechos] for nome, trechos in sistema['paralelo'].items()], 'depois': sistema['depois']},
+        'h_geometrica': h_geometrica,
+        'fluido': [fluido_selecionado, fluidos_combinados.get(fluido_selecionado)],
+        'materiais': {nome: materiais_combinados.get(nome) for nome in materiais_usados},
+        'curva_altura': _pontos_curva(curva_altura),
+        'curva_eficiencia': _pontos_curva(curva_eficiencia),
+    }
+    texto = json.dumps(_canonico(entradas), sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+class CacheResultados:
+    """
+    Cache LRU limitado por número de entradas e por tamanho (bytes do pickle), seguro para
+    uso concorrente. Conta acertos, falhas, remoções e o tempo de cálculo economizado.
+    """
+    def __init__(self, max_entradas=512, max_bytes=256 * 1024 * 1024):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes_usados = 0
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+        self.tempo_economizado_s = 0.0
+
+    def obter(self, chave, padrao=None):
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                self.falhas += 1
+                return padrao
+            self._entradas.move_to_end(chave)
+            self.acertos += 1
+            self.tempo_economizado_s += entrada[2]
+            return entrada[0]
+
+    def guardar(self, chave, valor, tempo_calculo_s=0.0):
+        tamanho = len(pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL))
+        if tamanho > self.max_bytes:
+            return
+        with self._lock:
+            if chave in self._entradas:
+                self.bytes_usados -= self._entradas.pop(chave)[1]
+            self._entradas[chave] = (valor, tamanho, tempo_calculo_s)
+            self.bytes_usados += tamanho
+            while len(self._entradas) > self.max_entradas or self.bytes_usados > self.max_bytes:
+                _, (_, tamanho_removido, _) = self._entradas.popitem(last=False)
+                self.bytes_usados -= tamanho_removido
+                self.remocoes += 1
+
+    def obter_ou_calcular(self, chave, funcao):
+        ausente = object()
+        valor = self.obter(chave, ausente)
+        if valor is not ausente:
+            return valor
+        inicio = time.perf_counter()
+        valor = funcao()
+        self.guardar(chave, valor, time.perf_counter() - inicio)
+        return valor
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+            self.bytes_usados = 0
+
+    def estatisticas(self):
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                "entradas": len(self._entradas), "bytes": self.bytes_usados,
+                "acertos": self.acertos, "falhas": self.falhas, "remocoes": self.remocoes,
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+                "tempo_economizado_s": self.tempo_economizado_s,
+            }
+
+# Instância única por processo: o Streamlit importa o módulo uma vez e todas as sessões a compartilham
+CACHE_HIDRAULICO = CacheResultados()
+
+class CacheBiblioteca:
+    """
+    Fluidos e materiais (padrão + do usuário) carregados uma vez por usuário e reutilizados
+    enquanto a versão da biblioteca no banco não mudar. A consulta da versão é uma leitura
+    por chave primária; as funções de inclusão e exclusão do banco a incrementam, então
+    alterações feitas por qualquer sessão ou processo são vistas na execução seguinte.
+    Os dicionários devolvidos são compartilhados: não devem ser modificados.
+    """
+    def __init__(self):
+        self._entradas = {}
+        self._lock = threading.Lock()
+        self.carregamentos = 0
+
+    def obter(self, username):
+        """
+        {"fluidos", "materiais"} (padrão + do usuário), {"fluidos_usuario", "materiais_usuario"}
+        (só os do usuário) e "versao" da biblioteca.
+        """
+        chave = (os.path.abspath(database.DB_NAME), username)
+        versao = database.get_library_version(username)
+        biblioteca = self._entradas.get(chave)
+        if biblioteca is not None and biblioteca["versao"] == versao:
+            return biblioteca
+        # Uma alteração entre a leitura da versão e a dos dados só faz recarregar na próxima chamada
+        fluidos_usuario, materiais_usuario = database.get_user_fluids(username), database.get_user_materials(username)
+        biblioteca = {
+            "fluidos": {**FLUIDOS_PADRAO, **fluidos_usuario}, "materiais": {**MATERIAIS_PADRAO, **materiais_usuario},
+            "fluidos_usuario": fluidos_usuario, "materiais_usuario": materiais_usuario, "versao": versao,
+        }
+        with self._lock:
+            self._entradas[chave] = biblioteca
+            self.carregamentos += 1
+        return biblioteca
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+
+# Instância única por processo, como CACHE_HIDRAULICO
+BIBLIOTECA_USUARIOS = CacheBiblioteca()
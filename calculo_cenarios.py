@@ -0,0 +1,176 @@
+# calculo_cenarios.py (Cálculo de cenários em lote pela linha de comando, sem Streamlit)
+#
+# Lê cenários no mesmo formato gravado por save_scenario (um objeto JSON, uma lista JSON
+# ou um cenário por linha) de um arquivo ou da entrada padrão e escreve um resultado JSON
+# por linha, na ordem de entrada.
+#
+# Uso: python calculo_cenarios.py [ENTRADA|-] [-o SAIDA] [--processos N] [--usuario USUARIO]
+#      [--rend-motor 90] [--horas-dia 8] [--tarifa 0.75]
+#
+# Cada cenário pode trazer "nome" e, opcionalmente, "rend_motor", "horas_por_dia" e
+# "tarifa_energia", que substituem os valores da linha de comando.
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from cache_resultados import CACHE_HIDRAULICO, chave_hidraulica
+from database import get_user_fluids, get_user_materials
+from hidraulica import FLUIDOS_PADRAO, MATERIAIS_PADRAO, MENSAGENS_STATUS, calcular_analise_energetica, resolver_cenario, sistema_do_cenario
+from propriedades_fluidos import fluido_na_temperatura
+
+def ler_cenarios(arquivo):
+    """
+    Gera (nome, dados) de cada cenário do arquivo. Linhas JSON são lidas uma a uma, sem
+    carregar a entrada inteira; uma linha inválida gera (nome, ValueError) e a leitura segue.
+    """
+    primeira = ""
+    for primeira in arquivo:
+        if primeira.strip():
+            break
+    if not primeira.strip():
+        return
+    try:
+        inicio = json.loads(primeira)
+    except json.JSONDecodeError as erro_linha:
+        # Documento JSON em várias linhas (objeto ou lista): lido por inteiro
+        resto = arquivo.read()
+        try:
+            inicio = json.loads(primeira + resto)
+        except json.JSONDecodeError:
+            # Nem documento nem linha válida: linhas JSON com a primeira inválida
+            yield "1", ValueError(f"JSON inválido: {erro_linha}")
+            yield from _ler_linhas(resto.splitlines(), 1)
+            return
+        yield from _nomear(inicio if isinstance(inicio, list) else [inicio])
+        return
+    if isinstance(inicio, list):
+        yield from _nomear(inicio)
+        return
+
+    yield _nome(inicio, 1), inicio
+    yield from _ler_linhas(arquivo, 1)
+
+def _ler_linhas(linhas, numero):
+    """ Um cenário por linha JSON, numerados a partir de `numero` + 1; linhas em branco são ignoradas. """
+    for linha in linhas:
+        if not linha.strip():
+            continue
+        numero += 1
+        try:
+            dados = json.loads(linha)
+        except json.JSONDecodeError as e:
+            yield str(numero), ValueError(f"JSON inválido: {e}")
+            continue
+        yield _nome(dados, numero), dados
+
+def _nome(dados, numero):
+    return str(dados.get("nome", numero)) if isinstance(dados, dict) else str(numero)
+
+def _nomear(lista):
+    for numero, dados in enumerate(lista, start=1):
+        yield _nome(dados, numero), dados
+
+def calcular_cenario(nome, dados, materiais, fluidos, equipamentos):
+    """ Resultado de um cenário como dicionário serializável em JSON; erros viram status "erro". """
+    if isinstance(dados, Exception):
+        return {"nome": nome, "status": "erro", "mensagem": str(dados)}
+    if not isinstance(dados, dict):
+        return {"nome": nome, "status": "erro", "mensagem": "Cenário deve ser um objeto JSON."}
+    try:
+        fluido = dados.get('fluido_selecionado', "Água a 20°C")
+        if fluido in fluidos:
+            fluidos = fluido_na_temperatura(fluidos, fluido, dados.get('temperatura_fluido'))
+        # Cenários repetidos no lote (ex.: variações só de tarifa) reaproveitam a hidráulica
+        chave = chave_hidraulica(sistema_do_cenario(dados), dados.get('h_geometrica', 15.0), fluido, fluidos, materiais,
+                                 dados.get('curva_altura', []), dados.get('curva_eficiencia', []))
+        resultado = CACHE_HIDRAULICO.obter_ou_calcular(f"{chave}:sem_curvas", lambda: resolver_cenario(dados, materiais, fluidos, com_curvas=False))
+        if resultado["status"] != "ok":
+            saida = {"nome": nome, "status": resultado["status"], "mensagem": MENSAGENS_STATUS[resultado["status"]]}
+            if "shutoff_head" in resultado:
+                saida["shutoff_head"] = resultado["shutoff_head"]
+            return saida
+
+        rend_motor, horas_por_dia, tarifa_energia = (dados.get(campo, padrao) for campo, padrao in
+                                                     zip(("rend_motor", "horas_por_dia", "tarifa_energia"), equipamentos))
+        energia = calcular_analise_energetica(resultado["vazao_op"], resultado["altura_op"], resultado["eficiencia_op"],
+                                              rend_motor, horas_por_dia, tarifa_energia, fluido, fluidos)
+        return {
+            "nome": nome, "status": "ok",
+            "vazao_op": resultado["vazao_op"], "altura_op": resultado["altura_op"], "eficiencia_op": resultado["eficiencia_op"],
+            "distribuicao_vazao": resultado["distribuicao_vazao"] if len(sistema_do_cenario(dados)['paralelo']) >= 2 else {},
+            "potencia_eletrica_kW": float(energia["potencia_eletrica_kW"]), "custo_anual": float(energia["custo_anual"]),
+        }
+    except Exception as e:
+        # Um cenário malformado não deve interromper o lote
+        return {"nome": nome, "status": "erro", "mensagem": f"Erro inesperado: {e}"}
+
+def _calcular_bloco(tarefa):
+    """ Executado no processo de trabalho: um bloco de cenários por tarefa amortiza a comunicação. """
+    bloco, materiais, fluidos, equipamentos = tarefa
+    return [calcular_cenario(nome, dados, materiais, fluidos, equipamentos) for nome, dados in bloco]
+
+def calcular_cenarios(cenarios, materiais=None, fluidos=None, rend_motor=90, horas_por_dia=8.0, tarifa_energia=0.75,
+                      max_processos=1, tamanho_bloco=64):
+    """
+    Gera o resultado de cada (nome, dados) de `cenarios`, na ordem de entrada. Com
+    'max_processos' > 1 os blocos são distribuídos por um pool com no máximo dois blocos
+    pendentes por processo, então a memória não cresce com o tamanho da entrada.
+    """
+    materiais = {**MATERIAIS_PADRAO, **(materiais or {})}
+    fluidos = {**FLUIDOS_PADRAO, **(fluidos or {})}
+    equipamentos = (rend_motor, horas_por_dia, tarifa_energia)
+    cenarios = iter(cenarios)
+    blocos = iter(lambda: list(islice(cenarios, tamanho_bloco)), [])
+    if max_processos <= 1:
+        for bloco in blocos:
+            yield from _calcular_bloco((bloco, materiais, fluidos, equipamentos))
+        return
+
+    with ProcessPoolExecutor(max_workers=max_processos, mp_context=multiprocessing.get_context('spawn')) as executor:
+        pendentes = deque()
+        for bloco in blocos:
+            pendentes.append(executor.submit(_calcular_bloco, (bloco, materiais, fluidos, equipamentos)))
+            if len(pendentes) >= 2 * max_processos:
+                yield from pendentes.popleft().result()
+        while pendentes:
+            yield from pendentes.popleft().result()
+
+def main():
+    parser = argparse.ArgumentParser(description="Calcula o ponto de operação e o custo de energia de cenários salvos em JSON.")
+    parser.add_argument("entrada", nargs="?", default="-", help="arquivo JSON/JSON lines ou '-' para a entrada padrão")
+    parser.add_argument("-o", "--saida", default="-", help="arquivo JSON lines de saída ou '-' para a saída padrão")
+    parser.add_argument("--processos", type=int, default=None)
+    parser.add_argument("--usuario", default=None, help="inclui os fluidos e materiais customizados do usuário no banco")
+    parser.add_argument("--rend-motor", type=float, default=90)
+    parser.add_argument("--horas-dia", type=float, default=8.0)
+    parser.add_argument("--tarifa", type=float, default=0.75)
+    args = parser.parse_args()
+
+    materiais, fluidos = {}, {}
+    if args.usuario:
+        materiais, fluidos = get_user_materials(args.usuario), get_user_fluids(args.usuario)
+
+    entrada = sys.stdin if args.entrada == "-" else open(args.entrada, encoding="utf-8")
+    saida = sys.stdout if args.saida == "-" else open(args.saida, "w", encoding="utf-8")
+    contagem = {"ok": 0, "falhas": 0}
+    try:
+        resultados = calcular_cenarios(ler_cenarios(entrada), materiais, fluidos, args.rend_motor, args.horas_dia, args.tarifa,
+                                       args.processos or os.cpu_count() or 1)
+        for resultado in resultados:
+            saida.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+            contagem["ok" if resultado["status"] == "ok" else "falhas"] += 1
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+        if saida is not sys.stdout:
+            saida.close()
+    print(f"{contagem['ok']} cenário(s) calculado(s); {contagem['falhas']} sem resultado.", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# catalogo_bombas.py (Catálogo de bombas dos fabricantes e busca rápida pelo ponto de trabalho)
+#
+# Cada curva do catálogo (altura, rendimento e NPSHr por vazão, numa rotação e num rotor) é
+# gravada no SQLite como arrays empacotados: os pontos medidos e os coeficientes dos ajustes
+# polinomiais. O envelope vazão x altura de cada curva vai para uma R*Tree (database.py).
+#
+# A busca tem duas fases: o índice devolve só as curvas cujo envelope cruza a janela de
+# trabalho, e as sobreviventes viram um único lote (CurvaLote) resolvido por
+# resolver_pontos_operacao contra a curva do sistema — dezenas de milhares de curvas sem um
+# laço Python por bomba.
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from database import add_catalog_pumps, get_catalog_pump, query_pump_catalog
+from hidraulica import CurvaLote, calcular_analise_energetica, calcular_curva_sistema, resolver_pontos_operacao
+from otimizacao_diametros import fator_valor_presente
+
+# Grau dos ajustes de altura, rendimento e NPSHr (o mesmo de criar_funcao_curva)
+GRAU = 2
+# Linhas da tabela de importação: uma por ponto medido; as colunas de identificação se repetem
+COLUNAS_IDENTIFICACAO = ["Fabricante", "Modelo", "Rotação (rpm)", "Rotor (mm)"]
+COLUNAS_CATALOGO = COLUNAS_IDENTIFICACAO + ["Rotor Mín. (mm)", "Rotor Máx. (mm)", "Preço (R$)",
+                                            "Vazão (m³/h)", "Altura (m)", "Eficiência (%)", "NPSHr (m)"]
+# Folga da janela de altura no índice: a curva do sistema entre as vazões extremas não é reta
+FOLGA_ALTURA = 0.05
+
+def _ajustar(vazoes, valores):
+    """ Coeficientes do ajuste de grau GRAU nos pontos finitos; NaN se forem poucos (ex.: NPSHr ausente). """
+    finitos = np.isfinite(vazoes) & np.isfinite(valores)
+    if finitos.sum() < GRAU + 1:
+        return np.full(GRAU + 1, np.nan)
+    return np.polyfit(vazoes[finitos], valores[finitos], GRAU)
+
+def empacotar_bomba(fabricante, modelo, rotacao_rpm, rotor_mm, vazoes, alturas, eficiencias, npshr=None,
+                    rotor_min_mm=None, rotor_max_mm=None, preco=0.0):
+    """
+    Registro de uma curva para add_catalog_pumps: pontos em float32 (4, n) — vazão, altura,
+    rendimento e NPSHr — e coeficientes float64 (3, GRAU + 1) dos três ajustes, mais o
+    envelope vazão x altura que vai para o índice.
+    """
+    pontos = np.vstack([np.asarray(vazoes, dtype=float), np.asarray(alturas, dtype=float), np.asarray(eficiencias, dtype=float),
+                        np.full(len(vazoes), np.nan) if npshr is None else np.asarray(npshr, dtype=float)])
+    pontos = pontos[:, np.isfinite(pontos[0]) & np.isfinite(pontos[1])]
+    pontos = pontos[:, np.argsort(pontos[0])]
+    if pontos.shape[1] < GRAU + 1:
+        raise ValueError(f"A curva '{fabricante} {modelo}' precisa de pelo menos {GRAU + 1} pontos de vazão e altura.")
+    coeficientes = np.vstack([_ajustar(pontos[0], valores) for valores in pontos[1:]])
+    return {
+        "manufacturer": str(fabricante), "model": str(modelo), "speed_rpm": float(rotacao_rpm), "impeller_mm": float(rotor_mm),
+        "impeller_min_mm": float(rotor_mm if rotor_min_mm is None or pd.isna(rotor_min_mm) else rotor_min_mm),
+        "impeller_max_mm": float(rotor_mm if rotor_max_mm is None or pd.isna(rotor_max_mm) else rotor_max_mm),
+        "price": float(0.0 if pd.isna(preco) else preco), "num_points": pontos.shape[1],
+        "points": pontos.astype(np.float32).tobytes(), "coefficients": coeficientes.astype(np.float64).tobytes(),
+        "flow_min": float(pontos[0].min()), "flow_max": float(pontos[0].max()),
+        "head_min": float(pontos[1].min()), "head_max": float(pontos[1].max()),
+    }
+
+def bombas_de_tabela(df):
+    """ Registros a partir de uma tabela no formato longo de COLUNAS_CATALOGO (CSV do fabricante). """
+    faltantes = [coluna for coluna in COLUNAS_CATALOGO if coluna not in df.columns and coluna != "NPSHr (m)"]
+    if faltantes:
+        raise ValueError(f"Colunas ausentes no catálogo: {', '.join(faltantes)}.")
+    df = df.copy()
+    for coluna in COLUNAS_CATALOGO[2:]:
+        df[coluna] = pd.to_numeric(df[coluna], errors="coerce") if coluna in df.columns else np.nan
+    bombas = []
+    for (fabricante, modelo, rotacao, rotor), pontos in df.groupby(COLUNAS_IDENTIFICACAO, sort=False):
+        primeira = pontos.iloc[0]
+        bombas.append(empacotar_bomba(fabricante, modelo, rotacao, rotor, pontos["Vazão (m³/h)"], pontos["Altura (m)"],
+                                      pontos["Eficiência (%)"], pontos["NPSHr (m)"], primeira["Rotor Mín. (mm)"],
+                                      primeira["Rotor Máx. (mm)"], primeira["Preço (R$)"]))
+    return bombas
+
+def importar_catalogo(df, on_conflict="replace"):
+    """ Grava no banco as curvas de uma tabela de catálogo; retorna quantas foram gravadas. """
+    return add_catalog_pumps(bombas_de_tabela(df), on_conflict=on_conflict)
+
+def catalogo_sintetico(quantidade, semente=0, pontos=7):
+    """
+    Curvas plausíveis para demonstração e benchmarks: BEP sorteado em log entre 5 e 2000 m³/h
+    e 5 e 200 m, parábola de altura com shutoff 20–35% acima do BEP, rendimento máximo
+    conforme o porte e NPSHr crescente com a vazão.
+    """
+    rng = np.random.default_rng(semente)
+    vazao_bep = np.exp(rng.uniform(np.log(5), np.log(2000), quantidade))
+    altura_bep = np.exp(rng.uniform(np.log(5), np.log(200), quantidade))
+    shutoff = altura_bep * rng.uniform(1.20, 1.35, quantidade)
+    eficiencia_max = np.clip(55 + 6 * np.log10(vazao_bep) + rng.normal(0, 3, quantidade), 35, 90)
+    rotacao = np.where(altura_bep > 60, 3500.0, 1750.0)
+    rotor = np.round(120 + 30 * np.sqrt(altura_bep) * 1750 / rotacao)
+    potencia_bep = vazao_bep * altura_bep * 9.81 / 3600 / (eficiencia_max / 100)
+    preco = np.round(2500 + 900 * potencia_bep ** 0.75 * rng.uniform(0.8, 1.25, quantidade), -1)
+    bombas = []
+    for i in range(quantidade):
+        vazoes = np.linspace(0, 1.4, pontos) * vazao_bep[i]
+        relativas = vazoes / vazao_bep[i]
+        bombas.append(empacotar_bomba(
+            "Sintética", f"S-{i:05d}", rotacao[i], rotor[i], vazoes,
+            shutoff[i] - (shutoff[i] - altura_bep[i]) * relativas**2,
+            np.clip(eficiencia_max[i] * (2 * relativas - relativas**2), 0, None),
+            altura_bep[i] ** 0.5 * (0.6 + 0.8 * relativas**2), 0.85 * rotor[i], rotor[i], preco[i],
+        ))
+    return bombas
+
+def pontos_bomba(pump_id):
+    """ Curvas de altura e rendimento de uma bomba do catálogo no formato dos editores do app. """
+    bomba = get_catalog_pump(pump_id)
+    if bomba is None:
+        return None
+    pontos = np.frombuffer(bomba["points"], dtype=np.float32).reshape(4, bomba["num_points"]).astype(float).round(4)
+    return {
+        "bomba": bomba,
+        "curva_altura": pd.DataFrame({"Vazão (m³/h)": pontos[0], "Altura (m)": pontos[1]}),
+        "curva_eficiencia": pd.DataFrame({"Vazão (m³/h)": pontos[0], "Eficiência (%)": pontos[2]}).dropna(),
+    }
+
+def avaliar_bombas(rede, h_geometrica, coeficientes, vazao_min, vazao_max, eficiencia_motor_percent, horas_dia, custo_kwh,
+                   fluido_selecionado, fluidos_combinados, faixa_vazao=None, npsh_disponivel=None):
+    """
+    Ponto de operação de todas as curvas de `coeficientes` (bombas, 3, GRAU + 1) contra a rede,
+    em um único lote. Só entram no Newton as curvas que vencem a altura geométrica e têm a
+    forma de uma curva de bomba (altura decrescente no fim); as demais ficam sem ponto.
+    Viável: ponto na janela [vazao_min, vazao_max], dentro dos pontos medidos (`faixa_vazao`,
+    (bombas, 2)) e, se informado, com NPSHr abaixo do NPSH disponível.
+    """
+    quantidade = len(coeficientes)
+    altura, eficiencia, npshr = (CurvaLote(coeficientes[:, k].T) for k in range(3))
+    a, b, c = altura.coeficientes
+    candidata = (c > h_geometrica) & ((a < 0) | ((a == 0) & (b < 0)))
+    vazao = np.full(quantidade, np.nan)
+    if candidata.any():
+        pontos = resolver_pontos_operacao(rede, h_geometrica, CurvaLote(altura.coeficientes[:, candidata]))
+        vazao[candidata] = pontos["vazao"]
+    convergiu = np.isfinite(vazao)
+    with np.errstate(invalid="ignore"):
+        altura_op = altura(vazao)
+        eficiencia_op = np.clip(eficiencia(vazao), 0, 100)
+        npshr_op = npshr(vazao)
+        vazao_bep = -eficiencia.coeficientes[1] / (2 * eficiencia.coeficientes[0])
+        viavel = convergiu & (vazao >= vazao_min) & (vazao <= vazao_max) & (eficiencia_op > 0)
+        if faixa_vazao is not None:
+            viavel &= (vazao >= faixa_vazao[:, 0]) & (vazao <= faixa_vazao[:, 1])
+        if npsh_disponivel:
+            viavel &= ~(npshr_op > npsh_disponivel)
+    energia = calcular_analise_energetica(np.nan_to_num(vazao), np.nan_to_num(altura_op), np.nan_to_num(eficiencia_op), eficiencia_motor_percent,
+                                          horas_dia, custo_kwh, fluido_selecionado, fluidos_combinados)
+    return {
+        "vazao": vazao, "altura": altura_op, "eficiencia": eficiencia_op, "npshr": npshr_op,
+        "fracao_bep": np.where(vazao_bep > 0, vazao / vazao_bep, np.nan),
+        "potencia_kW": np.where(convergiu, energia["potencia_eletrica_kW"], np.nan), "custo_anual": np.where(convergiu, energia["custo_anual"], np.nan),
+        "viavel": viavel,
+    }
+
+def buscar_bombas(rede, h_geometrica, vazao_min, vazao_max, eficiencia_motor_percent, horas_dia, custo_kwh,
+                  fluido_selecionado, fluidos_combinados, npsh_disponivel=None, taxa_desconto_percent=8.0, vida_util_anos=20, quantidade=10):
+    """
+    Bombas do catálogo para a rede na janela de vazões [vazao_min, vazao_max].
+
+    O índice filtra as curvas cujo envelope cruza a janela de vazão e a faixa de alturas do
+    sistema nela; as sobreviventes são resolvidas em lote (avaliar_bombas). Retorna as
+    `quantidade` melhores por rendimento no ponto e por custo de ciclo de vida (preço mais o
+    valor presente da energia), com as contagens de cada fase e o tempo total.
+    """
+    inicio = time.perf_counter()
+    alturas_sistema = np.asarray(calcular_curva_sistema(rede, h_geometrica, np.array([vazao_min, vazao_max], dtype=float)))
+    alturas_sistema = np.where(alturas_sistema < 1e10, alturas_sistema, h_geometrica)
+    linhas = query_pump_catalog(vazao_min, vazao_max, (1 - FOLGA_ALTURA) * alturas_sistema.min(), (1 + FOLGA_ALTURA) * alturas_sistema.max())
+    tempo_indice = time.perf_counter() - inicio
+    colunas = ["ID", "Fabricante", "Modelo", "Rotação (rpm)", "Rotor (mm)", "Rotor Mín. (mm)", "Rotor Máx. (mm)", "Preço (R$)"]
+    if not linhas:
+        vazio = pd.DataFrame(columns=colunas)
+        return {"melhor_eficiencia": vazio, "menor_custo_ciclo_vida": vazio, "candidatas": 0, "viaveis": 0,
+                "tempo_indice_s": tempo_indice, "tempo_s": time.perf_counter() - inicio}
+
+    coeficientes = np.frombuffer(b"".join(linha[10] for linha in linhas), dtype=np.float64).reshape(len(linhas), 3, GRAU + 1)
+    faixa_vazao = np.array([(linha[8], linha[9]) for linha in linhas])
+    avaliacao = avaliar_bombas(rede, h_geometrica, coeficientes, vazao_min, vazao_max, eficiencia_motor_percent, horas_dia, custo_kwh,
+                               fluido_selecionado, fluidos_combinados, faixa_vazao, npsh_disponivel)
+    tabela = pd.DataFrame([linha[:8] for linha in linhas], columns=colunas)
+    tabela["Vazão (m³/h)"] = avaliacao["vazao"]
+    tabela["Altura (m)"] = avaliacao["altura"]
+    tabela["Eficiência (%)"] = avaliacao["eficiencia"]
+    tabela["Q/Q_BEP"] = avaliacao["fracao_bep"]
+    tabela["NPSHr (m)"] = avaliacao["npshr"]
+    tabela["Potência (kW)"] = avaliacao["potencia_kW"]
+    tabela["Custo Anual (R$)"] = avaliacao["custo_anual"]
+    tabela["Custo de Ciclo de Vida (R$)"] = tabela["Preço (R$)"] + fator_valor_presente(taxa_desconto_percent, vida_util_anos) * avaliacao["custo_anual"]
+    viaveis = tabela[avaliacao["viavel"]]
+    return {
+        "melhor_eficiencia": viaveis.nlargest(quantidade, "Eficiência (%)").reset_index(drop=True),
+        "menor_custo_ciclo_vida": viaveis.nsmallest(quantidade, "Custo de Ciclo de Vida (R$)").reset_index(drop=True),
+        "candidatas": len(linhas), "viaveis": len(viaveis), "tempo_indice_s": tempo_indice, "tempo_s": time.perf_counter() - inicio,
+    }
@@ -1,164 +1,549 @@
-# database.py (Versão 3.0 com Biblioteca Expansível)
+# database.py (Versão 4.1 com Biblioteca Expansível, conexões reutilizadas, histórico de cenários e catálogo de bombas)
 
+import os
 import sqlite3
 import json
+import threading
+from array import array
+from contextlib import contextmanager
 from datetime import datetime
 
+from delta_cenarios import aplicar_delta, calcular_delta, compactar, descompactar
+
 DB_NAME = 'plataforma_hidraulica.db'
+TEMPO_ESPERA_BLOQUEIO_MS = 5000
+# Uma versão completa a cada N salvamentos limita quantos deltas uma restauração aplica
+INTERVALO_VERSAO_COMPLETA = 16
+
+# Uma conexão por thread (cada sessão do Streamlit roda em sua thread); o módulo sqlite3
+# mantém as instruções preparadas em cache por conexão, então reutilizá-la também evita
+# recompilar o SQL a cada chamada.
+_local = threading.local()
+_bancos_preparados = set()
+_lock_preparo = threading.Lock()
+
+def obter_conexao():
+    """ Conexão da thread atual com DB_NAME, criada e configurada no primeiro uso. """
+    chave = (os.getpid(), os.path.abspath(DB_NAME))
+    conexoes = getattr(_local, "conexoes", None)
+    if conexoes is None:
+        conexoes = _local.conexoes = {}
+    conn = conexoes.get(chave)
+    if conn is None:
+        # isolation_level=None: cada instrução é confirmada sozinha; várias linhas usam transacao()
+        conn = sqlite3.connect(DB_NAME, timeout=TEMPO_ESPERA_BLOQUEIO_MS / 1000, isolation_level=None, cached_statements=256)
+        conn.execute(f"PRAGMA busy_timeout = {TEMPO_ESPERA_BLOQUEIO_MS}")
+        # WAL: leitores não bloqueiam o escritor; com WAL, synchronous=NORMAL continua seguro contra corrupção
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conexoes[chave] = conn
+    return conn
+
+def fechar_conexoes():
+    """ Fecha as conexões da thread atual (a próxima chamada abre uma nova). """
+    for conn in getattr(_local, "conexoes", {}).values():
+        conn.close()
+    _local.conexoes = {}
+    _local.profundidade = 0
+
+@contextmanager
+def transacao():
+    """
+    Transação explícita para operações com várias linhas: tudo ou nada. Transações
+    aninhadas se juntam à mais externa. BEGIN IMMEDIATE reserva a escrita logo no início,
+    então um conflito aparece aqui (com espera de busy_timeout), não no meio da operação.
+    """
+    conn = obter_conexao()
+    if getattr(_local, "profundidade", 0) > 0:
+        _local.profundidade += 1
+        try:
+            yield conn
+        finally:
+            _local.profundidade -= 1
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    _local.profundidade = 1
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    else:
+        conn.execute("COMMIT")
+    finally:
+        _local.profundidade = 0
 
 def setup_database():
-    """Cria/atualiza todas as tabelas necessárias no banco de dados."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
-    # Tabela de Cenários (existente)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS scenarios (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT NOT NULL,
-            project_name TEXT NOT NULL,
-            scenario_name TEXT NOT NULL,
-            scenario_data TEXT NOT NULL,
-            last_modified TIMESTAMP NOT NULL,
-            UNIQUE(username, project_name, scenario_name)
-        )
-    ''')
-    
-    # NOVO: Tabela para Fluidos Customizados dos Usuários
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS user_fluids (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT NOT NULL,
-            fluid_name TEXT NOT NULL,
-            density REAL NOT NULL, -- rho (kg/m³)
-            kinematic_viscosity REAL NOT NULL, -- nu (m²/s)
-            UNIQUE(username, fluid_name)
-        )
-    ''')
+    """Cria/atualiza todas as tabelas necessárias no banco de dados (uma vez por processo)."""
+    chave = (os.getpid(), os.path.abspath(DB_NAME))
+    if chave in _bancos_preparados:
+        return
+    with _lock_preparo, transacao() as conn:
+        # Cenários em três tabelas: metadados (listagens nunca leem os dados), dados atuais
+        # comprimidos e histórico de versões (deltas, com uma versão completa periódica)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS scenario_meta (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT NOT NULL,
+                project_name TEXT NOT NULL,
+                scenario_name TEXT NOT NULL,
+                last_modified TIMESTAMP NOT NULL,
+                num_segments INTEGER NOT NULL,
+                current_version INTEGER NOT NULL,
+                last_results TEXT, -- JSON com o ponto de operação do último salvamento
+                UNIQUE(username, project_name, scenario_name)
+            )
+        ''')
+        # Lista de cenários de um projeto, mais recentes primeiro, sem ordenação em memória.
+        # As demais consultas já usam o índice da restrição UNIQUE (usuário + nome).
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_scenario_meta_projeto_data ON scenario_meta (username, project_name, last_modified DESC)")
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS scenario_data (
+                scenario_id INTEGER PRIMARY KEY,
+                data BLOB NOT NULL -- JSON comprimido (zlib)
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS scenario_versions (
+                scenario_id INTEGER NOT NULL,
+                version INTEGER NOT NULL,
+                is_full INTEGER NOT NULL, -- 1: cenário completo; 0: delta em relação à versão anterior
+                data BLOB NOT NULL, -- zlib
+                size_bytes INTEGER NOT NULL,
+                created_at TIMESTAMP NOT NULL,
+                PRIMARY KEY (scenario_id, version)
+            ) WITHOUT ROWID
+        ''')
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'scenarios'").fetchone():
+            _migrar_cenarios_v3(conn)
 
-    # NOVO: Tabela para Materiais Customizados dos Usuários
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS user_materials (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT NOT NULL,
-            material_name TEXT NOT NULL,
-            roughness REAL NOT NULL, -- epsilon (mm)
-            UNIQUE(username, material_name)
-        )
-    ''')
+        # NOVO: Tabela para Fluidos Customizados dos Usuários
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS user_fluids (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT NOT NULL,
+                fluid_name TEXT NOT NULL,
+                density REAL NOT NULL, -- rho (kg/m³)
+                kinematic_viscosity REAL NOT NULL, -- nu (m²/s)
+                property_table BLOB, -- float64 (3, n): temperatura (°C), rho e nu; NULL se constantes
+                UNIQUE(username, fluid_name)
+            )
+        ''')
+        if "property_table" not in {coluna[1] for coluna in conn.execute("PRAGMA table_info(user_fluids)")}:
+            conn.execute("ALTER TABLE user_fluids ADD COLUMN property_table BLOB")
+
+        # NOVO: Tabela para Materiais Customizados dos Usuários
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS user_materials (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT NOT NULL,
+                material_name TEXT NOT NULL,
+                roughness REAL NOT NULL, -- epsilon (mm)
+                UNIQUE(username, material_name)
+            )
+        ''')
 
-    conn.commit()
-    conn.close()
-
-# --- Funções de Cenários (sem alteração) ---
-def save_scenario(username, project_name, scenario_name, scenario_data):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    scenario_data_json = json.dumps(scenario_data)
-    timestamp = datetime.now()
-    cursor.execute('''
-        INSERT OR REPLACE INTO scenarios (id, username, project_name, scenario_name, scenario_data, last_modified)
-        VALUES ((SELECT id FROM scenarios WHERE username = ? AND project_name = ? AND scenario_name = ?), ?, ?, ?, ?, ?)
-    ''', (username, project_name, scenario_name, username, project_name, scenario_name, scenario_data_json, timestamp))
-    conn.commit()
-    conn.close()
+        # Versão da biblioteca de cada usuário, incrementada na mesma transação de cada
+        # alteração de fluidos ou materiais (inclusive por outros processos, como a importação)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS user_library_version (
+                username TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            ) WITHOUT ROWID
+        ''')
+
+        # Catálogo de bombas dos fabricantes (compartilhado entre usuários). Os pontos de cada
+        # curva e os coeficientes dos ajustes ficam em arrays empacotados (catalogo_bombas.py)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS pump_catalog (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                manufacturer TEXT NOT NULL,
+                model TEXT NOT NULL,
+                speed_rpm REAL NOT NULL,
+                impeller_mm REAL NOT NULL, -- rotor da curva
+                impeller_min_mm REAL NOT NULL,
+                impeller_max_mm REAL NOT NULL,
+                price REAL NOT NULL, -- R$
+                num_points INTEGER NOT NULL,
+                points BLOB NOT NULL, -- float32 (4, num_points): vazão, altura, eficiência, NPSHr
+                coefficients BLOB NOT NULL, -- float64 (3, grau + 1): ajustes de altura, eficiência e NPSHr
+                UNIQUE(manufacturer, model, speed_rpm, impeller_mm)
+            )
+        ''')
+        # Envelope vazão x altura de cada curva em uma R*Tree: a busca por ponto de trabalho
+        # lê só as curvas cujo envelope cruza a janela pedida
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS pump_catalog_envelope USING rtree(id, flow_min, flow_max, head_min, head_max)")
+    _bancos_preparados.add(chave)
+
+def _migrar_cenarios_v3(conn):
+    """ Copia a tabela 'scenarios' (JSON sem compressão, sem histórico) para o novo formato e a remove. """
+    cursor = conn.execute("SELECT username, project_name, scenario_name, scenario_data, last_modified FROM scenarios ORDER BY id")
+    for username, project_name, scenario_name, scenario_data_json, last_modified in cursor:
+        _gravar_cenario(conn, username, project_name, scenario_name, json.loads(scenario_data_json), None, last_modified)
+    conn.execute("DROP TABLE scenarios")
+
+def _contar_trechos(scenario_data):
+    return (len(scenario_data.get('trechos_antes', [])) + len(scenario_data.get('trechos_depois', []))
+            + sum(len(trechos) for trechos in scenario_data.get('ramais_paralelos', {}).values()))
+
+def _gravar_cenario(conn, username, project_name, scenario_name, scenario_data, results, timestamp):
+    """ Grava uma nova versão (dentro de uma transação já aberta); não cria versão se nada mudou. """
+    blob = compactar(scenario_data)
+    results_json = json.dumps(results) if results is not None else None
+    linha = conn.execute("SELECT id, current_version, last_results FROM scenario_meta WHERE username = ? AND project_name = ? AND scenario_name = ?",
+                         (username, project_name, scenario_name)).fetchone()
+    if linha is None:
+        cursor = conn.execute('''
+            INSERT INTO scenario_meta (username, project_name, scenario_name, last_modified, num_segments, current_version, last_results)
+            VALUES (?, ?, ?, ?, ?, 1, ?)
+        ''', (username, project_name, scenario_name, timestamp, _contar_trechos(scenario_data), results_json))
+        scenario_id = cursor.lastrowid
+        conn.execute("INSERT INTO scenario_data (scenario_id, data) VALUES (?, ?)", (scenario_id, blob))
+        conn.execute("INSERT INTO scenario_versions VALUES (?, 1, 1, ?, ?, ?)", (scenario_id, blob, len(blob), timestamp))
+        return
+
+    scenario_id, versao_atual, results_anteriores = linha
+    anterior = descompactar(conn.execute("SELECT data FROM scenario_data WHERE scenario_id = ?", (scenario_id,)).fetchone()[0])
+    operacoes = calcular_delta(anterior, scenario_data)
+    if not operacoes:
+        # Mesmo conteúdo: só atualiza data e resultados (mantém os anteriores se não vierem novos)
+        conn.execute("UPDATE scenario_meta SET last_modified = ?, last_results = ? WHERE id = ?",
+                     (timestamp, results_json if results is not None else results_anteriores, scenario_id))
+        return
+    versao = versao_atual + 1
+    delta = compactar(operacoes)
+    completa = versao % INTERVALO_VERSAO_COMPLETA == 1 or len(delta) >= len(blob) // 2
+    dados_versao = blob if completa else delta
+    conn.execute("INSERT INTO scenario_versions VALUES (?, ?, ?, ?, ?, ?)", (scenario_id, versao, int(completa), dados_versao, len(dados_versao), timestamp))
+    conn.execute("UPDATE scenario_data SET data = ? WHERE scenario_id = ?", (blob, scenario_id))
+    conn.execute("UPDATE scenario_meta SET last_modified = ?, num_segments = ?, current_version = ?, last_results = ? WHERE id = ?",
+                 (timestamp, _contar_trechos(scenario_data), versao, results_json, scenario_id))
+
+# --- Funções de Cenários ---
+def save_scenario(username, project_name, scenario_name, scenario_data, results=None):
+    """
+    Salva o cenário como nova versão. `results` (opcional) são os resultados do último
+    cálculo, guardados nos metadados para as listagens.
+    """
+    with transacao() as conn:
+        _gravar_cenario(conn, username, project_name, scenario_name, scenario_data, results, datetime.now())
     return True
 
 def load_scenario(username, project_name, scenario_name):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT scenario_data FROM scenarios WHERE username = ? AND project_name = ? AND scenario_name = ?", (username, project_name, scenario_name))
-    result = cursor.fetchone()
-    conn.close()
+    result = obter_conexao().execute('''
+        SELECT d.data FROM scenario_meta m JOIN scenario_data d ON d.scenario_id = m.id
+        WHERE m.username = ? AND m.project_name = ? AND m.scenario_name = ?
+    ''', (username, project_name, scenario_name)).fetchone()
     if result:
-        return json.loads(result[0])
+        return descompactar(result[0])
     return None
 
 def get_user_projects(username):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT DISTINCT project_name FROM scenarios WHERE username = ? ORDER BY project_name ASC", (username,))
-    projects = [row[0] for row in cursor.fetchall()]
-    conn.close()
-    return projects
+    cursor = obter_conexao().execute("SELECT DISTINCT project_name FROM scenario_meta WHERE username = ? ORDER BY project_name ASC", (username,))
+    return [row[0] for row in cursor.fetchall()]
 
 def get_scenarios_for_project(username, project_name):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT scenario_name FROM scenarios WHERE username = ? AND project_name = ? ORDER BY last_modified DESC", (username, project_name))
-    scenarios = [row[0] for row in cursor.fetchall()]
-    conn.close()
-    return scenarios
+    cursor = obter_conexao().execute("SELECT scenario_name FROM scenario_meta WHERE username = ? AND project_name = ? ORDER BY last_modified DESC", (username, project_name))
+    return [row[0] for row in cursor.fetchall()]
+
+def list_scenarios(username, project_name):
+    """ Metadados dos cenários de um projeto, mais recentes primeiro, sem ler os dados. """
+    cursor = obter_conexao().execute('''
+        SELECT scenario_name, last_modified, num_segments, current_version, last_results FROM scenario_meta
+        WHERE username = ? AND project_name = ? ORDER BY last_modified DESC
+    ''', (username, project_name))
+    return [{'scenario_name': row[0], 'last_modified': row[1], 'num_segments': row[2], 'version': row[3],
+             'last_results': json.loads(row[4]) if row[4] else None} for row in cursor.fetchall()]
+
+def get_scenario_versions(username, project_name, scenario_name):
+    """ Histórico de versões (mais recente primeiro): número, data, se é completa e bytes armazenados. """
+    cursor = obter_conexao().execute('''
+        SELECT v.version, v.created_at, v.is_full, v.size_bytes FROM scenario_meta m JOIN scenario_versions v ON v.scenario_id = m.id
+        WHERE m.username = ? AND m.project_name = ? AND m.scenario_name = ? ORDER BY v.version DESC
+    ''', (username, project_name, scenario_name))
+    return [{'version': row[0], 'created_at': row[1], 'is_full': bool(row[2]), 'size_bytes': row[3]} for row in cursor.fetchall()]
+
+def load_scenario_version(username, project_name, scenario_name, version):
+    """ Reconstrói uma versão: a última versão completa até ela mais os deltas seguintes. """
+    conn = obter_conexao()
+    linha = conn.execute("SELECT id FROM scenario_meta WHERE username = ? AND project_name = ? AND scenario_name = ?",
+                         (username, project_name, scenario_name)).fetchone()
+    if linha is None:
+        return None
+    cursor = conn.execute('''
+        SELECT is_full, data FROM scenario_versions
+        WHERE scenario_id = ?1 AND version <= ?2
+          AND version >= (SELECT MAX(version) FROM scenario_versions WHERE scenario_id = ?1 AND version <= ?2 AND is_full = 1)
+        ORDER BY version
+    ''', (linha[0], version))
+    dados = None
+    for is_full, blob in cursor:
+        dados = descompactar(blob) if is_full else aplicar_delta(dados, descompactar(blob))
+    return dados
+
+def restore_scenario_version(username, project_name, scenario_name, version):
+    """ Salva uma versão anterior como a nova versão atual (o histórico é preservado). """
+    with transacao() as conn:
+        dados = load_scenario_version(username, project_name, scenario_name, version)
+        if dados is None:
+            return None
+        _gravar_cenario(conn, username, project_name, scenario_name, dados, None, datetime.now())
+    return dados
 
 def delete_scenario(username, project_name, scenario_name):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM scenarios WHERE username = ? AND project_name = ? AND scenario_name = ?", (username, project_name, scenario_name))
-    conn.commit()
-    conn.close()
+    with transacao() as conn:
+        linha = conn.execute("SELECT id FROM scenario_meta WHERE username = ? AND project_name = ? AND scenario_name = ?",
+                             (username, project_name, scenario_name)).fetchone()
+        if linha:
+            for tabela in ("scenario_versions", "scenario_data"):
+                conn.execute(f"DELETE FROM {tabela} WHERE scenario_id = ?", (linha[0],))
+            conn.execute("DELETE FROM scenario_meta WHERE id = ?", (linha[0],))
     return True
 
 # --- NOVAS FUNÇÕES PARA A BIBLIOTECA EXPANSÍVEL ---
 
+def _incrementar_versao_biblioteca(conn, username):
+    conn.execute("INSERT INTO user_library_version VALUES (?, 1) ON CONFLICT (username) DO UPDATE SET version = version + 1", (username,))
+
+def get_library_version(username):
+    """ Versão da biblioteca do usuário: muda a cada fluido ou material adicionado, atualizado ou removido. """
+    linha = obter_conexao().execute("SELECT version FROM user_library_version WHERE username = ?", (username,)).fetchone()
+    return linha[0] if linha else 0
+
 # --- Fluidos ---
-def add_user_fluid(username, fluid_name, density, kinematic_viscosity):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
+def _empacotar_tabela(tabela):
+    """ Tabela (temperaturas, rho, nu) como float64 contíguos; None para fluidos de propriedades constantes. """
+    return array('d', [valor for coluna in tabela for valor in coluna]).tobytes() if tabela else None
+
+def _desempacotar_tabela(blob):
+    valores = array('d')
+    valores.frombytes(blob)
+    n = len(valores) // 3
+    return tuple(tuple(valores[i * n:(i + 1) * n]) for i in range(3))
+
+def _registro_fluido(density, kinematic_viscosity, property_table):
+    fluido = {'rho': density, 'nu': kinematic_viscosity}
+    if property_table is not None:
+        fluido['tabela'] = _desempacotar_tabela(property_table)
+    return fluido
+
+def add_user_fluid(username, fluid_name, density, kinematic_viscosity, property_table=None):
+    """ property_table: (temperaturas °C, rho, nu) opcional; density e kinematic_viscosity ficam como valores de referência. """
     try:
-        cursor.execute("INSERT INTO user_fluids (username, fluid_name, density, kinematic_viscosity) VALUES (?, ?, ?, ?)",
-                       (username, fluid_name, density, kinematic_viscosity))
-        conn.commit()
+        with transacao() as conn:
+            conn.execute("INSERT INTO user_fluids (username, fluid_name, density, kinematic_viscosity, property_table) VALUES (?, ?, ?, ?, ?)",
+                         (username, fluid_name, density, kinematic_viscosity, _empacotar_tabela(property_table)))
+            _incrementar_versao_biblioteca(conn, username)
     except sqlite3.IntegrityError:
         # Ocorre se o nome do fluido já existir para aquele usuário
         return False
-    finally:
-        conn.close()
     return True
 
 def get_user_fluids(username):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT fluid_name, density, kinematic_viscosity FROM user_fluids WHERE username = ?", (username,))
+    cursor = obter_conexao().execute("SELECT fluid_name, density, kinematic_viscosity, property_table FROM user_fluids WHERE username = ?", (username,))
     # Retorna um dicionário no formato que a nossa aplicação espera
-    fluids = {row[0]: {'rho': row[1], 'nu': row[2]} for row in cursor.fetchall()}
-    conn.close()
-    return fluids
+    return {row[0]: _registro_fluido(*row[1:]) for row in cursor.fetchall()}
 
 def delete_user_fluid(username, fluid_name):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM user_fluids WHERE username = ? AND fluid_name = ?", (username, fluid_name))
-    conn.commit()
-    conn.close()
+    with transacao() as conn:
+        if conn.execute("DELETE FROM user_fluids WHERE username = ? AND fluid_name = ?", (username, fluid_name)).rowcount:
+            _incrementar_versao_biblioteca(conn, username)
     return True
 
 # --- Materiais ---
 def add_user_material(username, material_name, roughness):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
     try:
-        cursor.execute("INSERT INTO user_materials (username, material_name, roughness) VALUES (?, ?, ?)",
-                       (username, material_name, roughness))
-        conn.commit()
+        with transacao() as conn:
+            conn.execute("INSERT INTO user_materials (username, material_name, roughness) VALUES (?, ?, ?)",
+                         (username, material_name, roughness))
+            _incrementar_versao_biblioteca(conn, username)
     except sqlite3.IntegrityError:
         return False
-    finally:
-        conn.close()
     return True
 
 def get_user_materials(username):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT material_name, roughness FROM user_materials WHERE username = ?", (username,))
+    cursor = obter_conexao().execute("SELECT material_name, roughness FROM user_materials WHERE username = ?", (username,))
     # Retorna um dicionário no formato que a nossa aplicação espera
-    materials = {row[0]: row[1] for row in cursor.fetchall()}
-    conn.close()
-    return materials
+    return {row[0]: row[1] for row in cursor.fetchall()}
 
 def delete_user_material(username, material_name):
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM user_materials WHERE username = ? AND material_name = ?", (username, material_name))
-    conn.commit()
-    conn.close()
+    with transacao() as conn:
+        if conn.execute("DELETE FROM user_materials WHERE username = ? AND material_name = ?", (username, material_name)).rowcount:
+            _incrementar_versao_biblioteca(conn, username)
+    return True
+
+# --- Catálogo de bombas ---
+def add_catalog_pumps(pumps, on_conflict="replace"):
+    """
+    Grava curvas no catálogo em uma única transação. Cada item é um dicionário com as
+    colunas de pump_catalog (sem id) mais o envelope: flow_min, flow_max, head_min e
+    head_max. on_conflict: "replace" (mesmo fabricante, modelo, rotação e rotor é
+    atualizado) ou "skip". Retorna quantas curvas foram gravadas.
+    """
+    if on_conflict not in ("replace", "skip"):
+        raise ValueError(f"on_conflict '{on_conflict}' inválido; use 'replace' ou 'skip'.")
+    colunas = ("manufacturer", "model", "speed_rpm", "impeller_mm", "impeller_min_mm", "impeller_max_mm", "price", "num_points", "points", "coefficients")
+    acao = ("DO UPDATE SET " + ", ".join(f"{c} = excluded.{c}" for c in colunas[4:])) if on_conflict == "replace" else "DO NOTHING"
+    sql = (f"INSERT INTO pump_catalog ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))}) "
+           f"ON CONFLICT (manufacturer, model, speed_rpm, impeller_mm) {acao} RETURNING id")
+    envelopes = []
+    with transacao() as conn:
+        for bomba in pumps:
+            linha = conn.execute(sql, tuple(bomba[c] for c in colunas)).fetchone()
+            if linha is not None:
+                envelopes.append((linha[0], bomba["flow_min"], bomba["flow_max"], bomba["head_min"], bomba["head_max"]))
+        conn.executemany("INSERT OR REPLACE INTO pump_catalog_envelope VALUES (?, ?, ?, ?, ?)", envelopes)
+    return len(envelopes)
+
+def count_catalog_pumps():
+    return obter_conexao().execute("SELECT count(*) FROM pump_catalog").fetchone()[0]
+
+def query_pump_catalog(flow_min, flow_max, head_min, head_max):
+    """
+    Curvas cujo envelope cruza a janela [flow_min, flow_max] x [head_min, head_max], pelo
+    índice R*Tree. Cada linha: (id, fabricante, modelo, rotação, rotor, rotor mín., rotor
+    máx., preço, vazão mín., vazão máx., coeficientes); os pontos ficam em get_catalog_pump.
+    """
+    return obter_conexao().execute('''
+        SELECT p.id, p.manufacturer, p.model, p.speed_rpm, p.impeller_mm, p.impeller_min_mm, p.impeller_max_mm, p.price,
+               e.flow_min, e.flow_max, p.coefficients
+        FROM pump_catalog_envelope e JOIN pump_catalog p ON p.id = e.id
+        WHERE e.flow_max >= ? AND e.flow_min <= ? AND e.head_max >= ? AND e.head_min <= ?
+    ''', (flow_min, flow_max, head_min, head_max)).fetchall()
+
+def get_catalog_pump(pump_id):
+    """ Uma curva do catálogo com os pontos empacotados, como dicionário (None se não existir). """
+    cursor = obter_conexao().execute("SELECT * FROM pump_catalog WHERE id = ?", (pump_id,))
+    linha = cursor.fetchone()
+    return dict(zip([coluna[0] for coluna in cursor.description], linha)) if linha else None
+
+def delete_pump_catalog():
+    """ Esvazia o catálogo (antes de importar um novo catálogo completo). """
+    with transacao() as conn:
+        conn.execute("DELETE FROM pump_catalog_envelope")
+        conn.execute("DELETE FROM pump_catalog")
     return True
+
+# --- Importação e exportação em massa ---
+def export_records(username=None, project_name=None):
+    """
+    Gera os registros de fluidos, materiais e cenários (versão atual) como dicionários,
+    lidos do cursor à medida que são consumidos. Sem `username`, exporta todos os usuários;
+    com `project_name`, só os cenários desse projeto e a biblioteca dos donos desses cenários.
+    """
+    conn = obter_conexao()
+    filtro_usuario, parametros_usuario = ("WHERE username = ?", (username,)) if username else ("", ())
+    if project_name and not username:
+        filtro_usuario = "WHERE username IN (SELECT username FROM scenario_meta WHERE project_name = ?)"
+        parametros_usuario = (project_name,)
+    for nome, rho, nu, tabela, usuario in conn.execute(f"SELECT fluid_name, density, kinematic_viscosity, property_table, username FROM user_fluids {filtro_usuario} ORDER BY id", parametros_usuario):
+        registro = {"tipo": "fluido", "username": usuario, "nome": nome, "rho": rho, "nu": nu}
+        if tabela is not None:
+            registro["tabela"] = [list(coluna) for coluna in _desempacotar_tabela(tabela)]
+        yield registro
+    for nome, rugosidade, usuario in conn.execute(f"SELECT material_name, roughness, username FROM user_materials {filtro_usuario} ORDER BY id", parametros_usuario):
+        yield {"tipo": "material", "username": usuario, "nome": nome, "rugosidade": rugosidade}
+
+    condicoes, parametros = [], []
+    if username:
+        condicoes.append("m.username = ?"); parametros.append(username)
+    if project_name:
+        condicoes.append("m.project_name = ?"); parametros.append(project_name)
+    cursor = conn.execute(f'''
+        SELECT m.username, m.project_name, m.scenario_name, m.last_modified, m.last_results, d.data
+        FROM scenario_meta m JOIN scenario_data d ON d.scenario_id = m.id
+        {"WHERE " + " AND ".join(condicoes) if condicoes else ""} ORDER BY m.id
+    ''', parametros)
+    for usuario, projeto, cenario, last_modified, last_results, blob in cursor:
+        yield {"tipo": "cenario", "username": usuario, "project_name": projeto, "scenario_name": cenario,
+               "last_modified": str(last_modified), "last_results": json.loads(last_results) if last_results else None,
+               "scenario_data": descompactar(blob)}
+
+def _importar_cenarios(conn, lote, on_conflict):
+    """ Um lote de cenários por instruções em conjunto: tabela temporária + INSERT ... SELECT. """
+    conn.executemany("INSERT INTO temp.importacao_cenarios VALUES (?, ?, ?, ?, ?, ?, ?)", lote)
+    # Cenários que já existem: ignorados ou gravados como nova versão (delta), um a um
+    existentes = conn.execute('''
+        SELECT t.username, t.project_name, t.scenario_name, t.last_modified, t.last_results, t.data FROM temp.importacao_cenarios t
+        JOIN scenario_meta m ON m.username = t.username AND m.project_name = t.project_name AND m.scenario_name = t.scenario_name
+    ''').fetchall()
+    if on_conflict == "replace":
+        for usuario, projeto, cenario, last_modified, last_results, blob in existentes:
+            _gravar_cenario(conn, usuario, projeto, cenario, descompactar(blob), json.loads(last_results) if last_results else None, last_modified)
+    conn.execute('''
+        DELETE FROM temp.importacao_cenarios WHERE EXISTS (
+            SELECT 1 FROM scenario_meta m WHERE m.username = importacao_cenarios.username
+            AND m.project_name = importacao_cenarios.project_name AND m.scenario_name = importacao_cenarios.scenario_name)
+    ''')
+    conn.execute('''
+        INSERT INTO scenario_meta (username, project_name, scenario_name, last_modified, num_segments, current_version, last_results)
+        SELECT username, project_name, scenario_name, last_modified, num_segments, 1, last_results FROM temp.importacao_cenarios
+    ''')
+    ligacao = '''FROM temp.importacao_cenarios t JOIN scenario_meta m
+        ON m.username = t.username AND m.project_name = t.project_name AND m.scenario_name = t.scenario_name'''
+    conn.execute(f"INSERT INTO scenario_data (scenario_id, data) SELECT m.id, t.data {ligacao}")
+    conn.execute(f"INSERT INTO scenario_versions SELECT m.id, 1, 1, t.data, length(t.data), t.last_modified {ligacao}")
+    novos = conn.execute("SELECT count(*) FROM temp.importacao_cenarios").fetchone()[0]
+    conn.execute("DELETE FROM temp.importacao_cenarios")
+    return novos, len(existentes)
+
+def import_records(records, username=None, on_conflict="replace", batch_size=1000):
+    """
+    Importa registros no formato de export_records em uma única transação, em lotes
+    gravados com executemany; a memória usada depende só de `batch_size`.
+    `username` substitui o usuário dos registros (mover dados entre contas).
+    on_conflict: "replace" (cenário existente ganha nova versão; fluido/material é
+    atualizado) ou "skip" (mantém o que já existe).
+    Retorna contagens {"fluidos", "materiais", "cenarios_novos", "cenarios_existentes", "ignorados"}.
+    """
+    if on_conflict not in ("replace", "skip"):
+        raise ValueError(f"on_conflict '{on_conflict}' inválido; use 'replace' ou 'skip'.")
+    acao_biblioteca = {"replace": "DO UPDATE SET {} ", "skip": "DO NOTHING"}[on_conflict]
+    sql_fluido = ("INSERT INTO user_fluids (username, fluid_name, density, kinematic_viscosity, property_table) VALUES (?, ?, ?, ?, ?) ON CONFLICT (username, fluid_name) "
+                  + acao_biblioteca.format("density = excluded.density, kinematic_viscosity = excluded.kinematic_viscosity, property_table = excluded.property_table"))
+    sql_material = ("INSERT INTO user_materials (username, material_name, roughness) VALUES (?, ?, ?) ON CONFLICT (username, material_name) "
+                    + acao_biblioteca.format("roughness = excluded.roughness"))
+    contagem = {"fluidos": 0, "materiais": 0, "cenarios_novos": 0, "cenarios_existentes": 0, "ignorados": 0}
+    fluidos, materiais, cenarios = [], [], []
+    usuarios_biblioteca = set()
+
+    def descarregar(conn, todos=False):
+        if fluidos and (todos or len(fluidos) >= batch_size):
+            conn.executemany(sql_fluido, fluidos); contagem["fluidos"] += len(fluidos); fluidos.clear()
+        if materiais and (todos or len(materiais) >= batch_size):
+            conn.executemany(sql_material, materiais); contagem["materiais"] += len(materiais); materiais.clear()
+        if cenarios and (todos or len(cenarios) >= batch_size):
+            novos, existentes = _importar_cenarios(conn, cenarios, on_conflict)
+            contagem["cenarios_novos"] += novos; contagem["cenarios_existentes"] += existentes; cenarios.clear()
+
+    with transacao() as conn:
+        conn.execute('''
+            CREATE TEMP TABLE IF NOT EXISTS importacao_cenarios (
+                username TEXT, project_name TEXT, scenario_name TEXT, last_modified TIMESTAMP,
+                num_segments INTEGER, last_results TEXT, data BLOB,
+                UNIQUE(username, project_name, scenario_name) ON CONFLICT REPLACE
+            )
+        ''')
+        conn.execute("DELETE FROM temp.importacao_cenarios")
+        for registro in records:
+            usuario = username or registro.get("username")
+            tipo = registro.get("tipo")
+            if not usuario or tipo not in ("fluido", "material", "cenario"):
+                contagem["ignorados"] += 1
+                continue
+            if tipo != "cenario":
+                usuarios_biblioteca.add(usuario)
+            if tipo == "fluido":
+                fluidos.append((usuario, registro["nome"], registro["rho"], registro["nu"], _empacotar_tabela(registro.get("tabela"))))
+            elif tipo == "material":
+                materiais.append((usuario, registro["nome"], registro["rugosidade"]))
+            else:
+                dados = registro["scenario_data"]
+                cenarios.append((usuario, registro["project_name"], registro["scenario_name"], registro.get("last_modified") or datetime.now(),
+                                 _contar_trechos(dados), json.dumps(registro["last_results"]) if registro.get("last_results") is not None else None,
+                                 compactar(dados)))
+            descarregar(conn)
+        descarregar(conn, todos=True)
+        for usuario in usuarios_biblioteca:
+            _incrementar_versao_biblioteca(conn, usuario)
+    return contagem
@@ -0,0 +1,71 @@
+# delta_cenarios.py (Compressão e deltas estruturais de cenários para o histórico de versões)
+
+import json
+import zlib
+
+NIVEL_COMPRESSAO = 6
+
+def compactar(dados):
+    """ JSON compacto comprimido com zlib. """
+    return zlib.compress(json.dumps(dados, separators=(',', ':'), ensure_ascii=False).encode('utf-8'), NIVEL_COMPRESSAO)
+
+def descompactar(blob):
+    return json.loads(zlib.decompress(blob).decode('utf-8'))
+
+def _iguais(a, b):
+    # 1 e 1.0 (ou True e 1) são iguais em Python mas não no JSON salvo
+    return type(a) is type(b) and a == b
+
+def calcular_delta(antigo, novo, caminho=()):
+    """
+    Operações que transformam `antigo` em `novo`, descendo em dicionários e listas para
+    registrar só o que mudou:
+      ["s", caminho, valor]   substitui (ou cria) o valor no caminho
+      ["d", caminho]          remove a chave do dicionário
+      ["a", caminho, itens]   acrescenta itens ao fim da lista
+      ["t", caminho, tamanho] trunca a lista
+    Trechos e ramais são acrescentados e removidos no fim pela interface, então listas e
+    dicionários que só crescem ou encolhem no fim viram operações pequenas.
+    """
+    if isinstance(antigo, dict) and isinstance(novo, dict):
+        comuns_antigo = [k for k in antigo if k in novo]
+        comuns_novo = [k for k in novo if k in antigo]
+        novas = [k for k in novo if k not in antigo]
+        # A ordem das chaves importa (ramais); se mudou além de acréscimos no fim, substitui tudo
+        if comuns_antigo != comuns_novo or list(novo)[len(comuns_novo):] != novas:
+            return [["s", list(caminho), novo]]
+        operacoes = [["d", list(caminho + (k,))] for k in antigo if k not in novo]
+        for k in comuns_novo:
+            operacoes += calcular_delta(antigo[k], novo[k], caminho + (k,))
+        operacoes += [["s", list(caminho + (k,)), novo[k]] for k in novas]
+        return operacoes
+    if isinstance(antigo, list) and isinstance(novo, list):
+        operacoes = []
+        for i in range(min(len(antigo), len(novo))):
+            operacoes += calcular_delta(antigo[i], novo[i], caminho + (i,))
+        if len(novo) > len(antigo):
+            operacoes.append(["a", list(caminho), novo[len(antigo):]])
+        elif len(novo) < len(antigo):
+            operacoes.append(["t", list(caminho), len(novo)])
+        return operacoes
+    return [] if _iguais(antigo, novo) else [["s", list(caminho), novo]]
+
+def aplicar_delta(dados, operacoes):
+    """ Aplica as operações de calcular_delta; `dados` é modificado e também devolvido. """
+    for operacao in operacoes:
+        tipo, caminho = operacao[0], operacao[1]
+        if tipo == "s" and not caminho:
+            dados = operacao[2]
+            continue
+        alvo = dados
+        for chave in caminho[:-1] if tipo in ("s", "d") else caminho:
+            alvo = alvo[chave]
+        if tipo == "s":
+            alvo[caminho[-1]] = operacao[2]
+        elif tipo == "d":
+            del alvo[caminho[-1]]
+        elif tipo == "a":
+            alvo.extend(operacao[2])
+        else:
+            del alvo[operacao[2]:]
+    return dados
@@ -0,0 +1,180 @@
+# estacao_bombeamento.py (Estações com várias bombas: associação em paralelo e booster em série)
+#
+# Cada bomba da estação é a curva do cenário com fatores de vazão e de altura (bombas iguais,
+# uma menor, um booster). Em paralelo as vazões se somam na mesma altura: as curvas são
+# invertidas (Q em função de H) numa grade comum de alturas e cada combinação de bombas
+# ligadas é uma linha do produto (combinações × bombas) @ (bombas × alturas). O booster em
+# série soma a sua altura na vazão total. O ponto de operação de todas as combinações sai de
+# uma única chamada de resolver_pontos_operacao sobre a rede real.
+
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from hidraulica import _limite_superior_bomba, calcular_potencia_eletrica, resolver_pontos_operacao
+
+ARRANJO_PARALELO = "Paralelo"
+ARRANJO_SERIE = "Série (booster)"
+PONTOS_GRADE = 400
+
+def estacao_padrao():
+    """ Três bombas iguais em paralelo, como ponto de partida do editor. """
+    return pd.DataFrame({"Bomba": ["B1", "B2", "B3"], "Arranjo": [ARRANJO_PARALELO] * 3,
+                         "Fator de Vazão": [1.0] * 3, "Fator de Altura": [1.0] * 3})
+
+def curva_escalada(curva, fator_vazao=1.0, fator_altura=1.0):
+    """ f(Q) = fator_altura · curva(Q / fator_vazao), ainda um np.poly1d (coeficiente k dividido por fator_vazao^k). """
+    grau = curva.order
+    return np.poly1d([c * fator_altura / fator_vazao ** (grau - i) for i, c in enumerate(curva.coeffs)])
+
+def ramo_estavel(curva, pontos=PONTOS_GRADE):
+    """
+    (vazões, alturas) do ramo estável: a curva amostrada de Q = 0 até a vazão de altura nula,
+    com as alturas tornadas não crescentes (à esquerda do pico vale a altura do pico).
+    """
+    vazao_max = _limite_superior_bomba(curva, 0.0) or 0.0
+    vazoes = np.linspace(0.0, max(vazao_max, 1e-6), pontos)
+    alturas = np.maximum.accumulate(np.maximum(curva(vazoes), 0.0)[::-1])[::-1]
+    return vazoes, alturas
+
+def inverter_curvas(curvas, alturas_grade):
+    """ Vazão de cada bomba em cada altura da grade, (bombas, alturas); zero acima da altura máxima da bomba. """
+    vazoes_por_altura = np.zeros((len(curvas), len(alturas_grade)))
+    for i, curva in enumerate(curvas):
+        vazoes, alturas = ramo_estavel(curva)
+        # np.interp pede abscissas crescentes: o ramo é percorrido de trás para a frente
+        vazoes_por_altura[i] = np.interp(alturas_grade, alturas[::-1], vazoes[::-1], left=vazoes[-1], right=0.0)
+    return vazoes_por_altura
+
+def _interpolar_linhas(x, xp, fp):
+    """ np.interp linha a linha (xp crescente em cada linha) e a inclinação do segmento usado; extrapola pelas pontas. """
+    n = xp.shape[-1]
+    k = np.clip((xp <= x[..., np.newaxis]).sum(axis=-1), 1, n - 1)[..., np.newaxis]
+    x0, x1 = np.take_along_axis(xp, k - 1, axis=-1)[..., 0], np.take_along_axis(xp, k, axis=-1)[..., 0]
+    f0, f1 = np.take_along_axis(fp, k - 1, axis=-1)[..., 0], np.take_along_axis(fp, k, axis=-1)[..., 0]
+    inclinacao = np.where(x1 > x0, (f1 - f0) / np.where(x1 > x0, x1 - x0, 1.0), 0.0)
+    return f0 + inclinacao * (x - x0), inclinacao
+
+class CurvaEstacao:
+    """
+    Curva combinada de cada combinação de bombas ligadas (lote de combinações): altura do
+    grupo em paralelo, linear por partes sobre a grade comum de alturas, mais a do booster.
+    Chamável como o poly1d de criar_funcao_curva e com deriv(), para resolver_pontos_operacao.
+    """
+    def __init__(self, vazoes_paralelo, alturas_grade, curva_booster, booster_ligado, derivada=False):
+        # Abscissas crescentes por linha: a grade de alturas é percorrida de cima para baixo
+        self.vazoes_paralelo = vazoes_paralelo[:, ::-1]
+        self.alturas = np.broadcast_to(alturas_grade[::-1], self.vazoes_paralelo.shape)
+        self.curva_booster = curva_booster
+        self.booster_ligado = booster_ligado
+        self.derivada = derivada
+
+    def altura_paralelo(self, vazoes_m3h):
+        vazoes = np.broadcast_to(np.asarray(vazoes_m3h, dtype=float), self.booster_ligado.shape)
+        return _interpolar_linhas(vazoes, self.vazoes_paralelo, self.alturas)
+
+    def __call__(self, vazoes_m3h):
+        altura, inclinacao = self.altura_paralelo(vazoes_m3h)
+        if self.curva_booster is None:
+            return inclinacao if self.derivada else altura
+        booster = (self.curva_booster.deriv() if self.derivada else self.curva_booster)(np.asarray(vazoes_m3h, dtype=float))
+        return (inclinacao if self.derivada else altura) + np.where(self.booster_ligado, booster, 0.0)
+
+    def deriv(self):
+        return CurvaEstacao(self.vazoes_paralelo[:, ::-1], self.alturas[0, ::-1], self.curva_booster, self.booster_ligado, derivada=True)
+
+def combinacoes_estacao(bombas):
+    """
+    Máscaras (combinações, bombas em paralelo) de todos os conjuntos não vazios de bombas em
+    paralelo, sem repetir conjuntos equivalentes (bombas iguais), cada um com e sem o booster.
+    Retorna (mascaras, booster_ligado, rotulos).
+    """
+    paralelo = [b for b in bombas if b["arranjo"] == ARRANJO_PARALELO]
+    com_booster = [False, True] if any(b["arranjo"] == ARRANJO_SERIE for b in bombas) else [False]
+    mascaras, boosters, rotulos, vistos = [], [], [], set()
+    for quantidade in range(1, len(paralelo) + 1):
+        for conjunto in combinations(range(len(paralelo)), quantidade):
+            assinatura = tuple(sorted((paralelo[i]["fator_vazao"], paralelo[i]["fator_altura"]) for i in conjunto))
+            if assinatura in vistos:
+                continue
+            vistos.add(assinatura)
+            for booster in com_booster:
+                mascara = np.zeros(len(paralelo), dtype=bool)
+                mascara[list(conjunto)] = True
+                mascaras.append(mascara)
+                boosters.append(booster)
+                rotulos.append(" + ".join(paralelo[i]["nome"] for i in conjunto) + (" + booster" if booster else ""))
+    return np.array(mascaras).reshape(len(mascaras), len(paralelo)), np.array(boosters, dtype=bool), rotulos
+
+def _por_bomba(paralelo, valores, mascaras):
+    """ Texto "B1: 45.2, B2: 45.2" das bombas ligadas em cada combinação. """
+    return [", ".join(f"{b['nome']}: {v:.1f}" for b, v, ligada in zip(paralelo, linha, mascara) if ligada) for linha, mascara in zip(valores, mascaras)]
+
+def avaliar_estacao(rede, h_geometrica, curva_altura, curva_eficiencia, bombas, eficiencia_motor_percent, vazao_minima_m3h=0.0):
+    """
+    Ponto de operação, vazão e rendimento de cada bomba e kWh/m³ de todas as combinações de
+    bombas ligadas, em um único lote. `bombas` é uma lista de {"nome", "arranjo", "fator_vazao",
+    "fator_altura"} (vários boosters em série somam as alturas). Uma combinação é viável se o
+    ponto existe, atende a vazão mínima e toda bomba ligada opera dentro da sua curva (nem
+    fechada pela altura das demais, nem empurrada além do fim da curva pelo booster). Retorna {"combinacoes": DataFrame, "recomendada": índice ou None, ...}.
+    """
+    paralelo = [b for b in bombas if b["arranjo"] == ARRANJO_PARALELO]
+    serie = [b for b in bombas if b["arranjo"] == ARRANJO_SERIE]
+    if not paralelo:
+        raise ValueError("A estação precisa de pelo menos uma bomba em paralelo.")
+    curvas = [curva_escalada(curva_altura, b["fator_vazao"], b["fator_altura"]) for b in paralelo]
+    eficiencias = [curva_escalada(curva_eficiencia, b["fator_vazao"]) for b in paralelo]
+    curvas_serie = [curva_escalada(curva_altura, b["fator_vazao"], b["fator_altura"]) for b in serie]
+    curva_booster = sum(curvas_serie, np.poly1d([0.0])) if serie else None
+
+    mascaras, booster_ligado, rotulos = combinacoes_estacao(bombas)
+    alturas_grade = np.linspace(0.0, max(float(ramo_estavel(c)[1][0]) for c in curvas), PONTOS_GRADE)
+    vazoes_bombas = inverter_curvas(curvas, alturas_grade)
+    # Composição em paralelo de todas as combinações de uma vez
+    vazoes_paralelo = mascaras.astype(float) @ vazoes_bombas
+    curva_estacao = CurvaEstacao(vazoes_paralelo, alturas_grade, curva_booster, booster_ligado)
+    pontos = resolver_pontos_operacao(rede, h_geometrica, curva_estacao)
+    vazao, altura, convergiu = pontos["vazao"], pontos["altura"], pontos["convergiu"]
+
+    # Divisão entre as bombas em paralelo na altura do grupo (a do booster é descontada)
+    altura_grupo = np.where(convergiu, curva_estacao.altura_paralelo(np.nan_to_num(vazao))[0], np.nan)
+    vazoes_individuais = np.stack([np.interp(altura_grupo, alturas_grade, vazoes_bombas[i]) for i in range(len(curvas))], axis=-1)
+    vazoes_individuais = np.where(mascaras, vazoes_individuais, 0.0)
+    rendimentos = np.stack([np.clip(eficiencias[i](vazoes_individuais[:, i]), 0, 100) for i in range(len(curvas))], axis=-1)
+    potencia = calcular_potencia_eletrica(vazoes_individuais, altura_grupo[:, np.newaxis], rendimentos, eficiencia_motor_percent, rede.rho).sum(axis=-1)
+    # Boosters em série: toda a vazão passa por cada um
+    fora_da_curva = np.zeros(len(rotulos), dtype=bool)
+    for b, curva in zip(serie, curvas_serie):
+        altura_b = curva(np.nan_to_num(vazao))
+        rendimento_b = np.clip(curva_escalada(curva_eficiencia, b["fator_vazao"])(np.nan_to_num(vazao)), 0, 100)
+        potencia = potencia + np.where(booster_ligado, calcular_potencia_eletrica(np.nan_to_num(vazao), altura_b, rendimento_b, eficiencia_motor_percent, rede.rho), 0.0)
+        fora_da_curva |= booster_ligado & ((altura_b <= 0) | (rendimento_b <= 0))
+
+    # Bomba ligada sem vazão (fechada pela altura das demais) ou empurrada além do fim da curva pelo booster
+    fora_da_curva |= (mascaras & ((vazoes_individuais <= 1e-3) | (rendimentos <= 0))).any(axis=-1) | ~(altura_grupo > 0)
+    viavel = convergiu & ~fora_da_curva & (vazao >= vazao_minima_m3h) & (potencia > 0)
+    energia_especifica = np.where(convergiu, potencia / np.where(convergiu, vazao, 1.0), np.nan)
+    tabela = pd.DataFrame({
+        "Bombas Ligadas": rotulos, "Vazão (m³/h)": vazao, "Altura (m)": altura, "Potência (kW)": np.where(convergiu, potencia, np.nan),
+        "Energia Específica (kWh/m³)": energia_especifica,
+        "Vazão por Bomba (m³/h)": _por_bomba(paralelo, vazoes_individuais, mascaras),
+        "Rendimento por Bomba (%)": _por_bomba(paralelo, rendimentos, mascaras),
+        "Viável": viavel,
+    })
+    recomendada = int(np.nanargmin(np.where(viavel, energia_especifica, np.nan))) if viavel.any() else None
+    # Curva combinada de cada combinação, para o gráfico: (vazões, alturas) sobre a grade
+    alturas_combinadas = alturas_grade + (np.where(booster_ligado[:, np.newaxis], curva_booster(vazoes_paralelo), 0.0) if serie else np.zeros(vazoes_paralelo.shape))
+    return {"combinacoes": tabela, "recomendada": recomendada, "curva": curva_estacao, "vazoes_combinadas": vazoes_paralelo,
+            "alturas_combinadas": alturas_combinadas, "vazoes_bombas": vazoes_individuais, "rendimentos": rendimentos}
+
+def bombas_do_editor(df_bombas):
+    """ Linhas do editor da estação no formato de avaliar_estacao (linhas incompletas são ignoradas). """
+    bombas = []
+    for i, linha in enumerate(df_bombas.to_dict('records')):
+        fator_vazao, fator_altura = pd.to_numeric(linha.get("Fator de Vazão"), errors='coerce'), pd.to_numeric(linha.get("Fator de Altura"), errors='coerce')
+        if linha.get("Arranjo") not in (ARRANJO_PARALELO, ARRANJO_SERIE) or not fator_vazao > 0 or not fator_altura > 0:
+            continue
+        bombas.append({"nome": str(linha.get("Bomba") or f"B{i+1}"), "arranjo": linha["Arranjo"],
+                       "fator_vazao": float(fator_vazao), "fator_altura": float(fator_altura)})
+    return bombas
@@ -0,0 +1,74 @@
+# graficos.py (Gráficos compartilhados entre a interface e a geração de relatórios)
+
+import graphviz
+import matplotlib.pyplot as plt
+
+from hidraulica import calcular_perdas_trecho
+
+# Vale para a interface e para os processos de trabalho que renderizam o relatório
+plt.style.use('seaborn-v0_8-whitegrid')
+
+def criar_figura_curvas(vazao_range, altura_bomba, altura_sistema, vazao_op, altura_op):
+    """ Figura da curva da bomba vs. curva do sistema com o ponto de operação destacado. """
+    fig_curvas, ax_curvas = plt.subplots(figsize=(8.5, 5.5)) # Tamanho otimizado para PDF
+    label_ponto_op = f'Ponto de Operação ({vazao_op:.1f} m³/h, {altura_op:.1f} m)'
+    ax_curvas.plot(vazao_range, altura_bomba, label='Curva da Bomba', color='royalblue', lw=2)
+    ax_curvas.plot(vazao_range, altura_sistema, label='Curva do Sistema', color='seagreen', lw=2)
+    ax_curvas.scatter(vazao_op, altura_op, color='red', s=100, zorder=5, label=label_ponto_op)
+    ax_curvas.set_title("Curva da Bomba vs. Curva do Sistema")
+    ax_curvas.set_xlabel("Vazão (m³/h)")
+    ax_curvas.set_ylabel("Altura Manométrica (m)")
+    ax_curvas.legend()
+    ax_curvas.grid(True)
+    return fig_curvas
+
+def criar_figura_estacao(vazoes_combinadas, alturas_combinadas, rotulos, vazoes_sistema, alturas_sistema, vazoes_op, alturas_op, destaque=None):
+    """ Curvas combinadas das combinações de bombas da estação sobre a curva do sistema; `destaque` é a recomendada. """
+    fig_estacao, ax_estacao = plt.subplots(figsize=(8.5, 5.5))
+    for i, rotulo in enumerate(rotulos):
+        ax_estacao.plot(vazoes_combinadas[i], alturas_combinadas[i], label=rotulo, lw=3 if i == destaque else 1.2, alpha=1.0 if i == destaque else 0.7)
+    ax_estacao.plot(vazoes_sistema, alturas_sistema, label='Curva do Sistema', color='black', lw=2, ls='--')
+    ax_estacao.scatter(vazoes_op, alturas_op, color='red', s=30, zorder=5)
+    ax_estacao.set_title("Combinações de Bombas vs. Curva do Sistema")
+    ax_estacao.set_xlabel("Vazão (m³/h)")
+    ax_estacao.set_ylabel("Altura Manométrica (m)")
+    ax_estacao.set_ylim(bottom=0)
+    ax_estacao.legend(fontsize=7, ncol=2)
+    ax_estacao.grid(True)
+    return fig_estacao
+
+def criar_figura_faixas(vazoes, faixas_bomba, faixas_sistema, vazoes_op, alturas_op):
+    """
+    Faixas de incerteza (Monte Carlo) das curvas da bomba e do sistema: `faixas_*` são os
+    percentis (inferior, mediana, superior) na malha `vazoes`; os pontos de operação sorteados ao fundo.
+    """
+    fig_faixas, ax_faixas = plt.subplots(figsize=(8.5, 5.5))
+    ax_faixas.scatter(vazoes_op, alturas_op, color='gray', s=4, alpha=0.15, zorder=1, label='Pontos de Operação Sorteados')
+    for faixas, cor, nome in ((faixas_bomba, 'royalblue', 'Curva da Bomba'), (faixas_sistema, 'seagreen', 'Curva do Sistema')):
+        ax_faixas.fill_between(vazoes, faixas[0], faixas[-1], color=cor, alpha=0.25, label=f'{nome} (faixa)')
+        ax_faixas.plot(vazoes, faixas[len(faixas) // 2], color=cor, lw=2, label=f'{nome} (mediana)')
+    ax_faixas.set_title("Faixas de Incerteza: Curva da Bomba vs. Curva do Sistema")
+    ax_faixas.set_xlabel("Vazão (m³/h)")
+    ax_faixas.set_ylabel("Altura Manométrica (m)")
+    ax_faixas.set_ylim(bottom=0)
+    ax_faixas.legend()
+    ax_faixas.grid(True)
+    return fig_faixas
+
+def gerar_diagrama_rede(sistema, vazao_total, distribuicao_vazao, fluido, materiais_combinados, fluidos_combinados):
+    dot = graphviz.Digraph(comment='Rede de Tubulação'); dot.attr('graph', rankdir='LR', splines='ortho'); dot.attr('node', shape='point'); dot.node('start', 'Bomba', shape='circle', style='filled', fillcolor='lightblue'); ultimo_no = 'start'
+    for i, trecho in enumerate(sistema['antes']):
+        proximo_no = f"no_antes_{i+1}"; velocidade = calcular_perdas_trecho(trecho, vazao_total, fluido, materiais_combinados, fluidos_combinados)['velocidade']; label = f"Trecho Antes {i+1}\\n{vazao_total:.1f} m³/h\\n{velocidade:.2f} m/s"; dot.edge(ultimo_no, proximo_no, label=label); ultimo_no = proximo_no
+    if len(sistema['paralelo']) >= 2 and distribuicao_vazao:
+        no_divisao = ultimo_no; no_juncao = 'no_juncao'; dot.node(no_juncao)
+        for nome_ramal, trechos_ramal in sistema['paralelo'].items():
+            vazao_ramal = distribuicao_vazao.get(nome_ramal, 0); ultimo_no_ramal = no_divisao
+            for i, trecho in enumerate(trechos_ramal):
+                velocidade = calcular_perdas_trecho(trecho, vazao_ramal, fluido, materiais_combinados, fluidos_combinados)['velocidade']; label_ramal = f"{nome_ramal} (T{i+1})\\n{vazao_ramal:.1f} m³/h\\n{velocidade:.2f} m/s"
+                if i == len(trechos_ramal) - 1: dot.edge(ultimo_no_ramal, no_juncao, label=label_ramal)
+                else: proximo_no_ramal = f"no_{nome_ramal}_{i+1}".replace(" ", "_"); dot.edge(ultimo_no_ramal, proximo_no_ramal, label=label_ramal); ultimo_no_ramal = proximo_no_ramal
+        ultimo_no = no_juncao
+    for i, trecho in enumerate(sistema['depois']):
+        proximo_no = f"no_depois_{i+1}"; velocidade = calcular_perdas_trecho(trecho, vazao_total, fluido, materiais_combinados, fluidos_combinados)['velocidade']; label = f"Trecho Depois {i+1}\\n{vazao_total:.1f} m³/h\\n{velocidade:.2f} m/s"; dot.edge(ultimo_no, proximo_no, label=label); ultimo_no = proximo_no
+    dot.node('end', 'Fim', shape='circle', style='filled', fillcolor='lightgray'); dot.edge(ultimo_no, 'end')
+    return dot
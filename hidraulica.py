@@ -0,0 +1,761 @@
+# hidraulica.py (Núcleo de cálculo de perdas de carga, versão vetorizada)
+
+import copy
+import math
+import numpy as np
+import pandas as pd
+
+from perfil_etapas import contar, etapa
+from propriedades_fluidos import TABELA_AGUA, TABELA_ETANOL, propriedades_fluido
+
+GRAVIDADE = 9.81
+PERDA_DIAMETRO_INVALIDO = 1e12
+
+# BIBLIOTECAS PADRÃO
+MATERIAIS_PADRAO = {
+    "Aço Carbono (novo)": 0.046, "Aço Carbono (pouco uso)": 0.1, "Aço Carbono (enferrujado)": 0.2,
+    "Aço Inox": 0.002, "Ferro Fundido": 0.26, "PVC / Plástico": 0.0015, "Concreto": 0.5
+}
+# "Água" e "Etanol" têm tabela por temperatura (propriedades_fluidos.py); rho e nu a 20 °C
+FLUIDOS_PADRAO = { 
+    "Água a 20°C": {"rho": 998.2, "nu": 1.004e-6}, 
+    "Etanol a 20°C": {"rho": 789.0, "nu": 1.51e-6},
+    "Água": {"rho": 998.2, "nu": 1.004e-6, "tabela": TABELA_AGUA},
+    "Etanol": {"rho": 789.0, "nu": 1.51e-6, "tabela": TABELA_ETANOL},
+}
+K_FACTORS = {
+    "Entrada de Borda Viva": 0.5, "Entrada Levemente Arredondada": 0.2, "Entrada Bem Arredondada": 0.04,
+    "Saída de Tubulação": 1.0, "Válvula Gaveta (Totalmente Aberta)": 0.2, "Válvula Gaveta (1/2 Aberta)": 5.6,
+    "Válvula Globo (Totalmente Aberta)": 10.0, "Válvula de Retenção (Tipo Portinhola)": 2.5,
+    "Cotovelo 90° (Raio Longo)": 0.6, "Cotovelo 90° (Raio Curto)": 0.9, "Cotovelo 45°": 0.4,
+    "Curva de Retorno 180°": 2.2, "Tê (Fluxo Direto)": 0.6, "Tê (Fluxo Lateral)": 1.8,
+}
+MENSAGENS_STATUS = {
+    "curva_insuficiente": "Pontos insuficientes nas curvas da bomba.",
+    "bomba_incompativel": "Altura máxima da bomba menor que a altura geométrica.",
+    "rede_vazia": "Rede sem trechos.",
+    "sem_ponto_operacao": "Ponto de operação não encontrado.",
+}
+
+def calcular_perdas_trecho(trecho, vazao_m3h, fluido_selecionado, materiais_combinados, fluidos_combinados):
+    """ Versão escalar de referência: perdas de um único trecho para uma única vazão. """
+    if vazao_m3h < 0: vazao_m3h = 0
+    rugosidade_mm = materiais_combinados[trecho["material"]]
+    vazao_m3s, diametro_m = vazao_m3h / 3600, trecho["diametro"] / 1000
+    nu = fluidos_combinados[fluido_selecionado]["nu"]
+    if diametro_m <= 0: return {"principal": 1e12, "localizada": 0, "velocidade": 0}
+    area = (math.pi * diametro_m**2) / 4
+    velocidade = vazao_m3s / area if area > 0 else 0
+    reynolds = (velocidade * diametro_m) / nu if nu > 0 else 0
+    fator_atrito = 0
+    if reynolds > 4000:
+        rugosidade_m = rugosidade_mm / 1000
+        if diametro_m <= 0: return {"principal": 1e12, "localizada": 0, "velocidade": 0}
+        log_term = math.log10((rugosidade_m / (3.7 * diametro_m)) + (5.74 / reynolds**0.9))
+        fator_atrito = 0.25 / (log_term**2)
+    elif reynolds > 0:
+        fator_atrito = 64 / reynolds
+    perda_principal = fator_atrito * (trecho["comprimento"] / diametro_m) * (velocidade**2 / (2 * 9.81))
+    k_total_trecho = sum(ac["k"] * ac["quantidade"] for ac in trecho["acessorios"])
+    perda_localizada = k_total_trecho * (velocidade**2 / (2 * 9.81))
+    return {"principal": perda_principal, "localizada": perda_localizada, "velocidade": velocidade}
+
+def parametros_trechos(lista_trechos, materiais_combinados):
+    """ Extrai de uma lista de trechos os arrays de comprimento (m), diâmetro (mm), rugosidade (mm) e K total. """
+    comprimentos = np.array([trecho["comprimento"] for trecho in lista_trechos], dtype=float)
+    diametros = np.array([trecho["diametro"] for trecho in lista_trechos], dtype=float)
+    rugosidades = np.array([materiais_combinados[trecho["material"]] for trecho in lista_trechos], dtype=float)
+    k_totais = np.array([sum(ac["k"] * ac["quantidade"] for ac in trecho["acessorios"]) for trecho in lista_trechos], dtype=float)
+    return comprimentos, diametros, rugosidades, k_totais
+
+def calcular_perdas_vetorizado(vazoes_m3h, comprimentos_m, diametros_mm, rugosidades_mm, k_totais, nu):
+    """
+    Versão vetorizada de calcular_perdas_trecho.
+
+    Todos os argumentos seguem as regras de broadcasting do NumPy: para uma matriz
+    vazões x trechos, passe `vazoes_m3h[:, np.newaxis]` junto com arrays de trechos 1D.
+    Retorna um dicionário com arrays de perda principal, localizada e velocidade.
+    """
+    diametros_m = np.asarray(diametros_mm, dtype=float) / 1000
+    diametro_valido = diametros_m > 0
+    # Diâmetros inválidos recebem 1 m apenas para evitar divisões por zero; o resultado é substituído no núcleo.
+    diametros_seguros = np.where(diametro_valido, diametros_m, 1.0)
+    return _perdas_por_constantes(
+        vazoes_m3h, (np.pi * diametros_seguros**2) / 4, diametros_seguros,
+        np.asarray(comprimentos_m, dtype=float) / diametros_seguros,
+        (np.asarray(rugosidades_mm, dtype=float) / 1000) / diametros_seguros,
+        k_totais, diametro_valido, nu
+    )
+
+def _perdas_por_constantes(vazoes_m3h, area, diametro_m, razao_l_d, rugosidade_relativa, k_total, diametro_valido, nu, com_derivada=False):
+    """
+    Núcleo vetorizado sobre constantes já pré-calculadas por trecho (área, L/D, ε/D, K total).
+    Com `com_derivada=True` inclui a chave "derivada": d(perda principal + localizada)/d(vazão em m³/h).
+    `nu` pode ser um array (ex.: uma viscosidade por amostra), compatível com os demais.
+    """
+    contar("chamadas_funcao_perda")
+    vazoes_m3h, area, diametro_m, razao_l_d, rugosidade_relativa, k_total, diametro_valido, nu = np.broadcast_arrays(
+        np.maximum(np.asarray(vazoes_m3h, dtype=float), 0.0), area, diametro_m,
+        razao_l_d, rugosidade_relativa, np.asarray(k_total, dtype=float), diametro_valido, np.asarray(nu, dtype=float)
+    )
+    velocidade = np.where(diametro_valido, (vazoes_m3h / 3600) / area, 0.0)
+    reynolds = np.where(nu > 0, velocidade * diametro_m / np.where(nu > 0, nu, 1.0), 0.0)
+
+    fator_atrito = np.zeros_like(velocidade)
+    turbulento = reynolds > 4000
+    laminar = (reynolds > 0) & ~turbulento
+    if turbulento.any():
+        log_term = np.log10(rugosidade_relativa[turbulento] / 3.7 + 5.74 / reynolds[turbulento]**0.9)
+        fator_atrito[turbulento] = 0.25 / log_term**2
+    if laminar.any():
+        fator_atrito[laminar] = 64 / reynolds[laminar]
+
+    carga_cinetica = velocidade**2 / (2 * GRAVIDADE)
+    perda_principal = np.where(diametro_valido, fator_atrito * razao_l_d * carga_cinetica, PERDA_DIAMETRO_INVALIDO)
+    perda_localizada = np.where(diametro_valido, k_total * carga_cinetica, 0.0)
+    perdas = {"principal": perda_principal, "localizada": perda_localizada, "velocidade": velocidade}
+    if not com_derivada:
+        return perdas
+
+    # dv/dQ é constante por trecho; d(v²/2g)/dQ = v/g * dv/dQ
+    dv_dq = np.where(diametro_valido, 1 / (3600 * area), 0.0)
+    dcarga_dq = velocidade / GRAVIDADE * dv_dq
+    # Laminar (e o limite Q -> 0): perda principal = 32 ν (L/D) v / (g D), linear em Q
+    derivada_principal = 32 * nu * razao_l_d / (GRAVIDADE * diametro_m) * dv_dq
+    if turbulento.any():
+        re_t = reynolds[turbulento]
+        x = rugosidade_relativa[turbulento] / 3.7 + 5.74 / re_t**0.9
+        log_term = np.log10(x)
+        # df/dQ = df/dRe * Re/Q, com Re/Q = D/ν * dv/dQ
+        df_dre = -0.5 / log_term**3 * (-0.9 * 5.74 * re_t**-1.9) / (x * np.log(10))
+        df_dq = df_dre * diametro_m[turbulento] / nu[turbulento] * dv_dq[turbulento]
+        derivada_principal[turbulento] = razao_l_d[turbulento] * (
+            df_dq * carga_cinetica[turbulento] + fator_atrito[turbulento] * dcarga_dq[turbulento]
+        )
+    perdas["derivada"] = np.where(diametro_valido, derivada_principal + k_total * dcarga_dq, 0.0)
+    return perdas
+
+def calcular_perda_serie(lista_trechos, vazao_m3h, fluido_selecionado, materiais_combinados, fluidos_combinados):
+    """ Perda total de trechos em série. Aceita uma vazão escalar ou um array de vazões. """
+    vazoes = np.asarray(vazao_m3h, dtype=float)
+    if not lista_trechos:
+        return np.zeros(vazoes.shape) if vazoes.ndim else 0.0
+    comprimentos, diametros, rugosidades, k_totais = parametros_trechos(lista_trechos, materiais_combinados)
+    nu = fluidos_combinados[fluido_selecionado]["nu"]
+    perdas = calcular_perdas_vetorizado(vazoes[..., np.newaxis], comprimentos, diametros, rugosidades, k_totais, nu)
+    perda_total = (perdas["principal"] + perdas["localizada"]).sum(axis=-1)
+    return float(perda_total) if perda_total.ndim == 0 else perda_total
+
+def _escalar_ou_array(valores):
+    valores = np.asarray(valores)
+    return float(valores) if valores.ndim == 0 else valores
+
+class CompiledNetwork:
+    """
+    Rede compilada a partir do dicionário do cenário ({'antes', 'paralelo', 'depois'}).
+
+    Material, fluido e acessórios são resolvidos uma única vez na construção; os solvers
+    trabalham apenas com arrays planos por trecho (L/D, área, rugosidade relativa e K total).
+    Os trechos ficam na ordem: antes, ramais em paralelo (na ordem do dicionário), depois.
+    Com `temperatura_c`, rho e nu saem da tabela do fluido nessa temperatura.
+    """
+    def __init__(self, sistema, fluido_selecionado, materiais_combinados, fluidos_combinados, temperatura_c=None):
+        trechos_antes = list(sistema.get('antes', []))
+        ramais = sistema.get('paralelo', {})
+        trechos_depois = list(sistema.get('depois', []))
+        trechos_paralelo = [trecho for trechos_ramal in ramais.values() for trecho in trechos_ramal]
+        todos_trechos = trechos_antes + trechos_paralelo + trechos_depois
+
+        self.fluido = fluidos_combinados[fluido_selecionado]
+        self.temperatura_c = temperatura_c
+        self.rho, self.nu = propriedades_fluido(self.fluido, temperatura_c)
+        self.nomes_ramais = list(ramais.keys())
+        self.num_trechos = len(todos_trechos)
+        comprimentos, diametros_mm, rugosidades_mm, k_totais = parametros_trechos(todos_trechos, materiais_combinados)
+        self.comprimento_m = comprimentos
+        self.rugosidade_m = rugosidades_mm / 1000
+        self.k_total = k_totais
+        self._definir_diametros(diametros_mm / 1000)
+
+        n_antes, n_paralelo = len(trechos_antes), len(trechos_paralelo)
+        self.faixa_antes = slice(0, n_antes)
+        self.faixa_paralelo = slice(n_antes, n_antes + n_paralelo)
+        self.faixa_depois = slice(n_antes + n_paralelo, self.num_trechos)
+        self.indices_serie = np.r_[0:n_antes, n_antes + n_paralelo:self.num_trechos].astype(int)
+
+        self.faixas_ramais, ramal_do_trecho, posicao_no_ramal, inicio = [], [], [], n_antes
+        for i, trechos_ramal in enumerate(ramais.values()):
+            self.faixas_ramais.append(slice(inicio, inicio + len(trechos_ramal)))
+            ramal_do_trecho += [i] * len(trechos_ramal)
+            posicao_no_ramal += list(range(len(trechos_ramal)))
+            inicio += len(trechos_ramal)
+        self.ramal_do_trecho = np.array(ramal_do_trecho, dtype=int)
+        self.posicao_no_ramal = np.array(posicao_no_ramal, dtype=int)
+        self.matriz_ramais = np.zeros((n_paralelo, len(self.nomes_ramais)))
+        self.matriz_ramais[np.arange(n_paralelo), self.ramal_do_trecho] = 1.0
+
+    def _definir_diametros(self, diametro_m):
+        self.diametro_m = diametro_m
+        self._memoria_divisao = None
+        self.diametro_valido = diametro_m > 0
+        diametro_seguro = np.where(self.diametro_valido, diametro_m, 1.0)
+        self._diametro_seguro = diametro_seguro
+        self.area = (np.pi * diametro_seguro**2) / 4
+        self.razao_l_d = self.comprimento_m / diametro_seguro
+        self.rugosidade_relativa = self.rugosidade_m / diametro_seguro
+
+    @property
+    def num_ramais(self):
+        return len(self.nomes_ramais)
+
+    def com_diametros(self, diametro_m):
+        """ Cópia da rede com outros diâmetros (m). Aceita uma dimensão de lote: (candidatos, trechos). """
+        nova_rede = copy.copy(self)
+        nova_rede._definir_diametros(np.asarray(diametro_m, dtype=float))
+        return nova_rede
+
+    def com_parametros(self, rugosidade_m=None, k_total=None, nu=None):
+        """
+        Cópia da rede com outras rugosidades (m), K totais e/ou viscosidade. Como em com_diametros,
+        aceita dimensão de lote: (amostras, trechos) para os dois primeiros e (amostras, 1) para nu.
+        """
+        nova_rede = copy.copy(self)
+        if rugosidade_m is not None: nova_rede.rugosidade_m = np.asarray(rugosidade_m, dtype=float)
+        if k_total is not None: nova_rede.k_total = np.asarray(k_total, dtype=float)
+        if nu is not None: nova_rede.nu = np.asarray(nu, dtype=float)
+        lote = np.broadcast_shapes(self.diametro_m.shape, np.shape(nova_rede.rugosidade_m), np.shape(nova_rede.k_total), np.shape(nova_rede.nu))
+        nova_rede._definir_diametros(np.broadcast_to(self.diametro_m, lote))
+        return nova_rede
+
+    def com_temperatura(self, temperatura_c):
+        """
+        Cópia da rede com o fluido em `temperatura_c` (°C); um array de temperaturas vira a
+        dimensão de lote, com rho na forma das temperaturas. As propriedades saem do
+        interpolador em cache do fluido, sem acesso ao banco.
+        """
+        temperaturas = np.asarray(temperatura_c, dtype=float)
+        rho, nu = propriedades_fluido(self.fluido, temperaturas)
+        nova_rede = self.com_parametros(nu=np.asarray(nu)[..., np.newaxis]) if temperaturas.ndim else self.com_parametros(nu=nu)
+        nova_rede.rho, nova_rede.temperatura_c = rho, temperatura_c
+        return nova_rede
+
+    def selecionar_lote(self, selecao, forma=None):
+        """
+        Cópia com apenas os elementos `selecao` (máscara ou índices) do lote, em todos os parâmetros
+        com dimensão de lote. Com `forma`, o lote é antes expandido (broadcast) para essa forma.
+        """
+        lote = self.diametro_m.shape[:-1] if forma is None else tuple(forma)
+        def selecionar(valores):
+            valores = np.asarray(valores)
+            return np.broadcast_to(valores, lote + valores.shape[-1:])[selecao] if valores.ndim > 1 else valores
+        nova_rede = copy.copy(self)
+        nova_rede.rugosidade_m, nova_rede.k_total, nova_rede.nu = selecionar(self.rugosidade_m), selecionar(self.k_total), selecionar(self.nu)
+        nova_rede._definir_diametros(selecionar(self.diametro_m))
+        return nova_rede
+
+    def perdas_trechos(self, vazoes_m3h, indices=slice(None), com_derivada=False):
+        """ Perdas dos trechos selecionados; `vazoes_m3h` deve ser compatível com (..., trechos selecionados). """
+        return _perdas_por_constantes(
+            vazoes_m3h, self.area[..., indices], self._diametro_seguro[..., indices], self.razao_l_d[..., indices],
+            self.rugosidade_relativa[..., indices], self.k_total[..., indices], self.diametro_valido[..., indices], self.nu,
+            com_derivada=com_derivada
+        )
+
+    def perda_serie(self, vazoes_m3h):
+        """ Soma das perdas dos trechos antes e depois do paralelo, vetorizada sobre as vazões. """
+        vazoes = np.asarray(vazoes_m3h, dtype=float)
+        if len(self.indices_serie) == 0:
+            return _escalar_ou_array(np.zeros(np.broadcast_shapes(vazoes.shape, self.diametro_m.shape[:-1])))
+        perdas = self.perdas_trechos(vazoes[..., np.newaxis], self.indices_serie)
+        return _escalar_ou_array((perdas["principal"] + perdas["localizada"]).sum(axis=-1))
+
+    def perdas_ramais(self, vazoes_ramais_m3h, com_derivada=False):
+        """
+        Perda de cada ramal para as vazões por ramal (..., num_ramais).
+        Com `com_derivada=True` retorna também dPerda/dQ de cada ramal.
+        """
+        vazoes = np.asarray(vazoes_ramais_m3h, dtype=float)
+        perdas = self.perdas_trechos(vazoes[..., self.ramal_do_trecho], self.faixa_paralelo, com_derivada=com_derivada)
+        perda_ramais = (perdas["principal"] + perdas["localizada"]) @ self.matriz_ramais
+        if com_derivada:
+            return perda_ramais, perdas["derivada"] @ self.matriz_ramais
+        return perda_ramais
+
+def resolver_divisao_vazao(rede, vazoes_totais_m3h, chute_fracoes=None, tolerancia=1e-9, max_iteracoes=12):
+    """
+    Divide a vazão entre os ramais em paralelo por Newton com Jacobiano analítico.
+
+    Cada passo resolve exatamente o sistema linearizado h_i + g_i·δ_i = H com Σδ_i = 0, o que
+    dá H = Σ(h_i/g_i) / Σ(1/g_i) em O(num_ramais). A soma das vazões é reimposta a cada
+    iteração, então o balanço de massa vale até o arredondamento. Vetorizado sobre um
+    array de vazões totais (e sobre redes em lote de `com_diametros`).
+
+    Sem `chute_fracoes`, parte das frações da última solução desta rede interpoladas na
+    vazão pedida (warm start) ou, na primeira chamada, de uma estimativa quadrática.
+
+    Retorna {"vazoes": (..., num_ramais), "perda": (...), "iteracoes": int, "convergiu": (...)}.
+    """
+    num_ramais = rede.num_ramais
+    lote = rede.diametro_m.shape[:-1]
+    vazoes_totais = np.maximum(np.asarray(vazoes_totais_m3h, dtype=float), 0.0)
+    forma = np.broadcast_shapes(vazoes_totais.shape, lote)
+    totais = np.broadcast_to(vazoes_totais, forma)[..., np.newaxis]
+
+    if chute_fracoes is not None:
+        fracoes = np.broadcast_to(np.asarray(chute_fracoes, dtype=float), forma + (num_ramais,))
+    elif rede._memoria_divisao is not None and not lote:
+        vazoes_memoria, fracoes_memoria = rede._memoria_divisao
+        fracoes = np.stack([np.interp(totais[..., 0], vazoes_memoria, fracoes_memoria[:, i]) for i in range(num_ramais)], axis=-1)
+    else:
+        # Estimativa h_i ≈ r_i·q²: frações proporcionais a r_i^(-1/2) avaliadas na divisão uniforme
+        perda_uniforme = rede.perdas_ramais(np.broadcast_to(totais / num_ramais, forma + (num_ramais,)))
+        condutancia = np.where(perda_uniforme > 0, 1 / np.sqrt(np.maximum(perda_uniforme, 1e-300)), 1.0)
+        fracoes = condutancia
+    fracoes = fracoes / fracoes.sum(axis=-1, keepdims=True)
+    vazoes = fracoes * totais
+
+    amortecimento = np.ones(forma)
+    residuo_anterior = np.full(forma, np.inf)
+    convergiu = np.zeros(forma, dtype=bool)
+    iteracoes = 0
+    for iteracoes in range(1, max_iteracoes + 1):
+        perdas, derivadas = rede.perdas_ramais(vazoes, com_derivada=True)
+        pesos = 1 / np.maximum(derivadas, 1e-12)
+        altura_comum = (perdas * pesos).sum(axis=-1, keepdims=True) / pesos.sum(axis=-1, keepdims=True)
+        residuo = np.abs(perdas - altura_comum).max(axis=-1)
+        convergiu = residuo <= tolerancia * (1 + np.abs(altura_comum[..., 0]))
+        if convergiu.all():
+            break
+        # Amortece os casos que pioraram (ex.: salto laminar/turbulento em Re = 4000)
+        amortecimento = np.where(residuo > residuo_anterior, amortecimento * 0.5, np.minimum(amortecimento * 2, 1.0))
+        residuo_anterior = residuo
+        passo = (altura_comum - perdas) * pesos
+        # Limita o passo para manter todas as vazões positivas
+        recuo = np.where(passo < 0, -vazoes / np.where(passo < 0, passo, -1.0), np.inf).min(axis=-1)
+        alfa = np.where(convergiu, 0.0, np.minimum(amortecimento, 0.5 * recuo))
+        vazoes = vazoes + alfa[..., np.newaxis] * passo
+        soma = vazoes.sum(axis=-1, keepdims=True)
+        vazoes = np.where(soma > 0, vazoes * (totais / np.where(soma > 0, soma, 1.0)), vazoes)
+        if (np.abs(alfa[..., np.newaxis] * passo) <= 1e-12 * (1 + totais)).all(axis=-1).all():
+            break
+
+    contar("iteracoes_divisao_newton", iteracoes)
+    perda_comum = altura_comum[..., 0]
+    if not convergiu.all():
+        # Sem solução de alturas iguais (salto laminar/turbulento): resolve pela altura comum,
+        # só para os casos pendentes (a rede em lote é expandida para a forma das vazões)
+        pendentes = ~convergiu
+        rede_pendente = rede.selecionar_lote(pendentes, forma) if lote else rede
+        vazoes_altura, perda_altura, convergiu_altura, iteracoes_altura = _divisao_por_altura_comum(
+            rede_pendente, totais[pendentes], perda_comum[pendentes], vazoes[pendentes])
+        vazoes, perda_comum, convergiu = np.array(vazoes), np.array(perda_comum), np.array(convergiu)
+        vazoes[pendentes] = np.where(convergiu[pendentes][..., np.newaxis], vazoes[pendentes], vazoes_altura)
+        perda_comum[pendentes] = np.where(convergiu[pendentes], perda_comum[pendentes], perda_altura)
+        convergiu[pendentes] = convergiu[pendentes] | convergiu_altura
+        iteracoes += iteracoes_altura
+        contar("iteracoes_divisao_altura_comum", iteracoes_altura)
+
+    if not lote and vazoes.ndim <= 2:
+        linhas_totais, linhas_vazoes = np.atleast_1d(totais[..., 0]), np.atleast_2d(vazoes)
+        ordem = np.argsort(linhas_totais)
+        validas = linhas_totais[ordem] > 0
+        if validas.any():
+            rede._memoria_divisao = (linhas_totais[ordem][validas], (linhas_vazoes[ordem] / np.maximum(linhas_totais[ordem][:, np.newaxis], 1e-300))[validas])
+    return {"vazoes": vazoes, "perda": perda_comum, "iteracoes": iteracoes, "convergiu": convergiu}
+
+def _divisao_por_altura_comum(rede, totais, chute_altura, chute_vazoes, tolerancia=1e-9, max_iteracoes=60):
+    """
+    Divisão de vazão formulada na altura comum H: Σ q_i(H) = Q.
+
+    Cada q_i(H) inverte a curva monotônica do ramal. No salto do fator de atrito (Re = 4000)
+    a curva do ramal é descontínua e q_i(H) fica constante na vazão de transição, então
+    Σ q_i(H) é contínua e monotônica e a equação sempre tem solução.
+    Retorna (vazoes, altura_comum, convergiu, iteracoes).
+    """
+    forma = totais.shape[:-1]
+    num_ramais = rede.num_ramais
+    # Vazões de transição (Re = 4000) de cada trecho, agrupadas por ramal: (..., ramais, trechos por ramal)
+    vazao_transicao = 4000 * rede.nu * rede.area[..., rede.faixa_paralelo] / rede._diametro_seguro[..., rede.faixa_paralelo] * 3600
+    vazao_transicao = np.where(rede.diametro_valido[..., rede.faixa_paralelo] & (rede.nu > 0), vazao_transicao, np.inf)
+    trechos_por_ramal = int(rede.posicao_no_ramal.max()) + 1 if len(rede.posicao_no_ramal) else 1
+    transicoes = np.full(np.broadcast_shapes(forma, vazao_transicao.shape[:-1]) + (num_ramais, trechos_por_ramal), np.inf)
+    transicoes[..., rede.ramal_do_trecho, rede.posicao_no_ramal] = np.broadcast_to(vazao_transicao, transicoes.shape[:-2] + vazao_transicao.shape[-1:])
+    transicoes = np.broadcast_to(np.sort(transicoes, axis=-1), forma + (num_ramais, trechos_por_ramal))
+    transicoes = np.minimum(transicoes, totais[..., np.newaxis])
+    altura_esquerda = np.stack([rede.perdas_ramais(transicoes[..., k] * (1 - 1e-9)) for k in range(trechos_por_ramal)], axis=-1)
+    altura_direita = np.stack([rede.perdas_ramais(transicoes[..., k] * (1 + 1e-9)) for k in range(trechos_por_ramal)], axis=-1)
+
+    def inverter_ramais(altura, chute):
+        """ q_i(H) limitada a [0, Q] e dq_i/dH (zero nos patamares de transição). """
+        altura = altura[..., np.newaxis]
+        no_patamar = (altura[..., np.newaxis] >= altura_esquerda) & (altura[..., np.newaxis] <= altura_direita) & (transicoes < totais[..., np.newaxis])
+        patamar = no_patamar.any(axis=-1)
+        vazao_patamar = np.where(no_patamar, transicoes, np.inf).min(axis=-1)
+        inferior = np.where(altura[..., np.newaxis] > altura_direita, transicoes, 0.0).max(axis=-1)
+        superior = np.where(altura[..., np.newaxis] < altura_esquerda, transicoes, np.inf).min(axis=-1)
+        superior = np.minimum(superior, np.broadcast_to(totais, superior.shape))
+        vazoes = np.where((chute > inferior) & (chute < superior), chute, 0.5 * (inferior + superior))
+        for _ in range(max_iteracoes):
+            perdas, derivadas = rede.perdas_ramais(vazoes, com_derivada=True)
+            # Critério em vazão (passo de Newton estimado), compatível com a tolerância do balanço de massa
+            passo_estimado = np.abs(perdas - altura) / np.maximum(derivadas, 1e-12)
+            resolvido = patamar | (passo_estimado <= tolerancia * (1 + totais) / (10 * num_ramais)) | (superior - inferior <= 1e-12 * (1 + totais))
+            if resolvido.all():
+                break
+            inferior = np.where(perdas < altura, vazoes, inferior)
+            superior = np.where(perdas > altura, vazoes, superior)
+            novas = vazoes - (perdas - altura) / np.maximum(derivadas, 1e-12)
+            fora = (novas <= inferior) | (novas >= superior)
+            vazoes = np.where(resolvido, vazoes, np.where(fora, 0.5 * (inferior + superior), novas))
+        vazoes = np.where(patamar, vazao_patamar, vazoes)
+        dq_dh = np.where(patamar | (vazoes >= totais), 0.0, 1 / np.maximum(derivadas, 1e-12))
+        return vazoes, dq_dh
+
+    altura_min = np.zeros(forma)
+    altura_max = rede.perdas_ramais(np.broadcast_to(totais, forma + (num_ramais,))).max(axis=-1)
+    altura = np.clip(chute_altura, altura_min, altura_max)
+    convergiu = np.zeros(forma, dtype=bool)
+    vazoes = chute_vazoes
+    iteracoes = 0
+    for iteracoes in range(1, max_iteracoes + 1):
+        vazoes, dq_dh = inverter_ramais(altura, vazoes)
+        erro = vazoes.sum(axis=-1) - totais[..., 0]
+        convergiu = np.abs(erro) <= tolerancia * (1 + totais[..., 0])
+        if convergiu.all():
+            break
+        altura_min = np.where(erro < 0, altura, altura_min)
+        altura_max = np.where(erro > 0, altura, altura_max)
+        nova_altura = altura - erro / np.maximum(dq_dh.sum(axis=-1), 1e-300)
+        fora = (nova_altura <= altura_min) | (nova_altura >= altura_max)
+        altura = np.where(convergiu, altura, np.where(fora, 0.5 * (altura_min + altura_max), nova_altura))
+    soma = vazoes.sum(axis=-1, keepdims=True)
+    vazoes = np.where(soma > 0, vazoes * (totais / np.where(soma > 0, soma, 1.0)), vazoes)
+    return vazoes, altura, convergiu, iteracoes
+
+def calcular_perdas_paralelo(rede, vazao_total_m3h):
+    if rede.num_ramais < 2: return 0, {}
+    resultado = resolver_divisao_vazao(rede, float(vazao_total_m3h))
+    if not resultado["convergiu"]: return -1, {}
+    vazoes_finais = resultado["vazoes"]
+    perda_final_paralelo = float(resultado["perda"])
+    distribuicao_vazao = {nome_ramal: vazao for nome_ramal, vazao in zip(rede.nomes_ramais, vazoes_finais)}
+    return perda_final_paralelo, distribuicao_vazao
+
+def calcular_potencia_eletrica(vazao_m3h, h_man, eficiencia_bomba_percent, eficiencia_motor_percent, rho):
+    """ Potência elétrica (kW); zero onde o rendimento é nulo. Vetorizada, como calcular_analise_energetica. """
+    rendimento = (np.asarray(eficiencia_bomba_percent, dtype=float) / 100) * (np.asarray(eficiencia_motor_percent, dtype=float) / 100)
+    potencia_hidraulica_W = np.asarray(vazao_m3h, dtype=float) / 3600 * rho * 9.81 * np.asarray(h_man, dtype=float)
+    return _escalar_ou_array(np.where(rendimento > 0, potencia_hidraulica_W / np.where(rendimento > 0, rendimento, 1.0), 0.0) / 1000)
+
+def calcular_analise_energetica(vazao_m3h, h_man, eficiencia_bomba_percent, eficiencia_motor_percent, horas_dia, custo_kwh, fluido_selecionado, fluidos_combinados,
+                                temperatura_c=None):
+    """ Potência elétrica e custo anual. Aceita arrays (um valor por candidato, ou por temperatura) além de escalares. """
+    rho, _ = propriedades_fluido(fluidos_combinados[fluido_selecionado], temperatura_c)
+    potencia_eletrica_kW = calcular_potencia_eletrica(vazao_m3h, h_man, eficiencia_bomba_percent, eficiencia_motor_percent, rho)
+    custo_anual = potencia_eletrica_kW * horas_dia * 30 * 12 * custo_kwh
+    return {"potencia_eletrica_kW": potencia_eletrica_kW, "custo_anual": custo_anual}
+
+def criar_funcao_curva(df_curva, col_x, col_y, grau=2):
+    df_curva[col_x] = pd.to_numeric(df_curva[col_x], errors='coerce')
+    df_curva[col_y] = pd.to_numeric(df_curva[col_y], errors='coerce')
+    df_curva = df_curva.dropna(subset=[col_x, col_y])
+    if len(df_curva) < grau + 1: return None
+    coeficientes = np.polyfit(df_curva[col_x], df_curva[col_y], grau)
+    return np.poly1d(coeficientes)
+
+class CurvaLote:
+    """
+    Um polinômio por elemento do lote (amostras de Monte Carlo, bombas de um catálogo):
+    `coeficientes` tem a forma (grau + 1, lote), como o retorno de np.polyfit com várias
+    colunas. Chamável como o poly1d de criar_funcao_curva, com deriv(); a vazão pode ter
+    uma dimensão extra à esquerda (ex.: (pontos, 1)).
+    """
+    def __init__(self, coeficientes):
+        self.coeficientes = np.asarray(coeficientes, dtype=float)
+
+    def __call__(self, vazoes_m3h):
+        vazoes = np.asarray(vazoes_m3h, dtype=float)
+        resultado = np.zeros(np.broadcast_shapes(vazoes.shape, self.coeficientes.shape[1:]))
+        for coeficiente in self.coeficientes:
+            resultado = resultado * vazoes + coeficiente
+        return resultado
+
+    def deriv(self):
+        grau = len(self.coeficientes) - 1
+        if grau == 0:
+            return CurvaLote(np.zeros_like(self.coeficientes))
+        return CurvaLote(self.coeficientes[:-1] * np.arange(grau, 0, -1)[:, np.newaxis])
+
+    def limite_superior(self, h_geometrica):
+        """
+        Vazão-limite de cada elemento para a parábola (grau 2), um bracket por elemento; None
+        (bracket por duplicação em resolver_pontos_operacao) para outros graus ou se algum
+        elemento não tem raiz positiva.
+        """
+        if len(self.coeficientes) != 3:
+            return None
+        a, b, c = self.coeficientes[0], self.coeficientes[1], self.coeficientes[2] - h_geometrica
+        discriminante = b**2 - 4 * a * c
+        with np.errstate(invalid="ignore", divide="ignore"):
+            raiz = np.sqrt(discriminante)
+            raizes = np.stack([(-b - raiz) / (2 * a), (-b + raiz) / (2 * a), np.where(b != 0, -c / b, np.nan)])
+        # Parábola degenerada (a = 0) usa a raiz da reta
+        raizes = np.where(a != 0, raizes, np.stack([raizes[2]] * 3))
+        raizes = np.where((raizes > 0) & (discriminante >= 0), raizes, np.inf).min(axis=0)
+        return raizes if np.all(np.isfinite(raizes)) else None
+
+def calcular_curva_sistema(rede, h_geometrica, vazoes_m3h):
+    """ Avaliação exata da curva do sistema, vetorizada (1e12 onde a divisão em paralelo falha). """
+    vazoes = np.asarray(vazoes_m3h, dtype=float)
+    perda_par = np.zeros(vazoes.shape)
+    if rede.num_ramais >= 2:
+        divisao = resolver_divisao_vazao(rede, vazoes)
+        perda_par = np.where(divisao["convergiu"], divisao["perda"], -1)
+    alturas = np.where(perda_par == -1, 1e12, h_geometrica + rede.perda_serie(vazoes) + perda_par)
+    alturas = np.where(vazoes < 0, h_geometrica, alturas)
+    return _escalar_ou_array(alturas)
+
+class CurvaSistema:
+    """
+    Curva do sistema tabelada uma única vez em malha adaptativa, com interpolante
+    monotônico (PCHIP). É chamável como a antiga closure `curva_sistema`: aceita vazão
+    escalar ou array; fora da faixa tabelada a tabela é estendida sob demanda.
+    """
+    def __init__(self, rede, h_geometrica, vazao_max_m3h, pontos_iniciais=65, tolerancia_m=1e-3, max_refinos=2):
+        self.rede = rede
+        self.h_geometrica = h_geometrica
+        self.tolerancia_m = tolerancia_m
+        self.max_refinos = max_refinos
+        self.vazoes = np.linspace(0.0, max(vazao_max_m3h, 1e-6), pontos_iniciais)
+        self.alturas = np.atleast_1d(calcular_curva_sistema(rede, h_geometrica, self.vazoes))
+        self.avaliacoes = len(self.vazoes)
+        self._refinar(0.0)
+
+    def _refinar(self, vazao_inicial):
+        """
+        Bissecta os intervalos (a partir de `vazao_inicial`) onde a interpolação erra mais que a
+        tolerância no ponto médio, em até `max_refinos` passadas. Cada passada avalia em um único
+        lote só os pontos médios das metades criadas na anterior.
+        """
+        testar = self.vazoes[:-1] >= vazao_inicial
+        for _ in range(self.max_refinos):
+            self._construir_interpolante()
+            medios = (0.5 * (self.vazoes[1:] + self.vazoes[:-1]))[testar]
+            if not len(medios):
+                break
+            alturas_medios = np.atleast_1d(calcular_curva_sistema(self.rede, self.h_geometrica, medios))
+            self.avaliacoes += len(medios)
+            erro = np.abs(self._interpolante(medios) - alturas_medios)
+            refinar = (erro > np.maximum(self.tolerancia_m, 1e-4 * np.abs(alturas_medios))) & (alturas_medios != 1e12)
+            if not refinar.any():
+                break
+            novas = medios[refinar]
+            self.vazoes = np.concatenate([self.vazoes, novas])
+            self.alturas = np.concatenate([self.alturas, alturas_medios[refinar]])
+            ordem = np.argsort(self.vazoes)
+            self.vazoes, self.alturas = self.vazoes[ordem], self.alturas[ordem]
+            # O PCHIP muda a inclinação nos vizinhos do ponto novo: retesta também o intervalo ao lado
+            indices = np.flatnonzero(np.isin(self.vazoes, novas))
+            testar = np.zeros(len(self.vazoes) - 1, dtype=bool)
+            for deslocamento in (-2, -1, 0, 1):
+                testar[np.clip(indices + deslocamento, 0, len(testar) - 1)] = True
+        self._construir_interpolante()
+        contar("pontos_curva_sistema", self.avaliacoes)
+
+    def _construir_interpolante(self):
+        # Pontos onde a divisão em paralelo falhou (sentinela 1e12) ficam fora do interpolante
+        from scipy.interpolate import PchipInterpolator
+        validos = self.alturas != 1e12
+        self._interpolante = PchipInterpolator(self.vazoes[validos], self.alturas[validos], extrapolate=True)
+
+    @property
+    def vazao_max(self):
+        return self.vazoes[-1]
+
+    def estender(self, vazao_max_m3h):
+        """ Amplia a faixa tabelada até `vazao_max_m3h`, mantendo a resolução já obtida. """
+        if vazao_max_m3h <= self.vazao_max:
+            return
+        vazao_inicial = self.vazao_max
+        novas = np.linspace(vazao_inicial, vazao_max_m3h, 17)[1:]
+        self.vazoes = np.concatenate([self.vazoes, novas])
+        self.alturas = np.concatenate([self.alturas, np.atleast_1d(calcular_curva_sistema(self.rede, self.h_geometrica, novas))])
+        self.avaliacoes += len(novas)
+        self._refinar(vazao_inicial)
+
+    def exata(self, vazoes_m3h):
+        return calcular_curva_sistema(self.rede, self.h_geometrica, vazoes_m3h)
+
+    def __call__(self, vazoes_m3h):
+        vazoes = np.asarray(vazoes_m3h, dtype=float)
+        if vazoes.size and vazoes.max() > self.vazao_max:
+            self.estender(float(vazoes.max()))
+        alturas = np.where(vazoes < 0, self.h_geometrica, self._interpolante(np.maximum(vazoes, 0.0)))
+        return _escalar_ou_array(alturas)
+
+def _limite_superior_bomba(func_curva_bomba, h_geometrica):
+    """
+    Vazão a partir da qual a bomba não vence mais a altura geométrica (limite do bracket).
+    Curvas em lote com `limite_superior` podem devolver um limite por elemento do lote.
+    """
+    if hasattr(func_curva_bomba, "limite_superior"):
+        return func_curva_bomba.limite_superior(h_geometrica)
+    raizes = np.roots((func_curva_bomba - h_geometrica).coeffs) if hasattr(func_curva_bomba, "coeffs") else []
+    positivas = [r.real for r in raizes if abs(r.imag) < 1e-9 and r.real > 0]
+    return min(positivas) if positivas else None
+
+def encontrar_ponto_operacao(rede, h_geometrica, func_curva_bomba, vazao_max_tabela=None):
+    """
+    Ponto de operação na curva exata por resolver_pontos_operacao (lote de um elemento) e
+    curva do sistema tabelada até o limite da bomba, para o gráfico. Retorna
+    (vazao_op, altura_op, curva_sistema), com `curva_sistema` uma CurvaSistema.
+    """
+    vazao_limite = _limite_superior_bomba(func_curva_bomba, h_geometrica)
+    if vazao_limite is None:
+        # Sem raiz positiva: expande o bracket até a bomba ficar abaixo do sistema
+        vazao_limite = 50.0
+        for _ in range(60):
+            if func_curva_bomba(vazao_limite) < calcular_curva_sistema(rede, h_geometrica, vazao_limite): break
+            vazao_limite *= 2
+    with etapa("curva_sistema_tabelada"):
+        curva_sistema = CurvaSistema(rede, h_geometrica, max(vazao_limite, vazao_max_tabela or 0.0))
+    ponto = resolver_pontos_operacao(rede, h_geometrica, func_curva_bomba, tolerancia=1e-12)
+    if not ponto["convergiu"]:
+        return None, None, curva_sistema
+    vazao_op = float(ponto["vazao"])
+    return vazao_op, func_curva_bomba(vazao_op), curva_sistema
+
+def resolver_pontos_operacao(rede, h_geometrica, func_curva_bomba, chute_vazao=None, tolerancia=1e-9, max_iteracoes=50):
+    """
+    Pontos de operação de uma rede em lote (`com_diametros` com dimensão de candidatos), todos
+    de uma vez: Newton em bomba(Q) - h_geo - perdas(Q) = 0, protegido por bisseção no bracket
+    [0, Q_limite] de cada candidato. A derivada do paralelo sai da própria divisão resolvida,
+    dH/dQ = 1/Σ(1/g_i), e as frações de cada iteração servem de chute para a seguinte.
+    `h_geometrica` também pode ser um array (ex.: níveis de reservatório), assim como a curva
+    da bomba (ex.: CurvaAfinidade com várias rotações); os dois entram no lote.
+    Retorna {"vazao", "altura", "convergiu"} com a forma do lote (NaN sem ponto de operação).
+    """
+    lote = np.broadcast_shapes(rede.diametro_m.shape[:-1], np.shape(h_geometrica), np.shape(func_curva_bomba(0.0)))
+    derivada_bomba = func_curva_bomba.deriv()
+    fracoes = None
+
+    def avaliar(vazoes):
+        nonlocal fracoes
+        perda, derivada = np.zeros(lote), np.zeros(lote)
+        if len(rede.indices_serie):
+            perdas = rede.perdas_trechos(vazoes[..., np.newaxis], rede.indices_serie, com_derivada=True)
+            perda = (perdas["principal"] + perdas["localizada"]).sum(axis=-1)
+            derivada = perdas["derivada"].sum(axis=-1)
+        if rede.num_ramais >= 2:
+            divisao = resolver_divisao_vazao(rede, vazoes, chute_fracoes=fracoes)
+            _, derivadas_ramais = rede.perdas_ramais(divisao["vazoes"], com_derivada=True)
+            soma = divisao["vazoes"].sum(axis=-1, keepdims=True)
+            fracoes = np.where(soma > 0, divisao["vazoes"] / np.where(soma > 0, soma, 1.0), 1.0 / rede.num_ramais)
+            perda = perda + np.where(divisao["convergiu"], divisao["perda"], PERDA_DIAMETRO_INVALIDO)
+            derivada = derivada + 1 / (1 / np.maximum(derivadas_ramais, 1e-12)).sum(axis=-1)
+        return func_curva_bomba(vazoes) - h_geometrica - perda, derivada_bomba(vazoes) - derivada
+
+    # A menor altura geométrica dá o maior limite, que serve de bracket para todo o lote
+    # (ou para cada elemento, se a curva fornecer um limite por elemento)
+    vazao_limite = _limite_superior_bomba(func_curva_bomba, float(np.min(h_geometrica)))
+    inferior = np.zeros(lote)
+    superior = np.full(lote, vazao_limite if vazao_limite is not None else 50.0)
+    if vazao_limite is None:
+        # Sem raiz positiva: dobra o bracket dos candidatos em que a bomba ainda vence o sistema
+        for _ in range(60):
+            erro_superior, _ = avaliar(superior)
+            cresce = erro_superior > 0
+            if not cresce.any(): break
+            inferior = np.where(cresce, superior, inferior)
+            superior = np.where(cresce, superior * 2, superior)
+        fracoes = None
+
+    vazoes = 0.5 * (inferior + superior) if chute_vazao is None else np.clip(np.broadcast_to(chute_vazao, lote), inferior, superior)
+    convergiu = np.zeros(lote, dtype=bool)
+    for _ in range(max_iteracoes):
+        erro, derivada = avaliar(vazoes)
+        inferior = np.where(erro > 0, vazoes, inferior)
+        superior = np.where(erro < 0, vazoes, superior)
+        novas = vazoes - erro / np.where(derivada < 0, derivada, -1e-12)
+        # O passo de Newton é testado antes da bisseção: um passo abaixo do arredondamento
+        # (novas == vazoes, sobre o limite do bracket) não deve devolver o ponto ao meio do bracket
+        convergiu = convergiu | (np.abs(novas - vazoes) <= tolerancia * (1 + vazoes)) | (superior - inferior <= tolerancia * (1 + vazoes))
+        fora = ~np.isfinite(novas) | (novas <= inferior) | (novas >= superior)
+        novas = np.where(fora, 0.5 * (inferior + superior), novas)
+        vazoes = np.where(convergiu, vazoes, novas)
+        contar("iteracoes_ponto_newton")
+        if convergiu.all():
+            break
+
+    valido = convergiu & (vazoes > 1e-3) & (func_curva_bomba(0.0) > h_geometrica)
+    vazoes = np.where(valido, vazoes, np.nan)
+    return {"vazao": vazoes, "altura": func_curva_bomba(vazoes), "convergiu": valido}
+
+def resolver_hidraulica(sistema, h_geometrica, fluido_selecionado, curva_altura_df, curva_eficiencia_df, materiais_combinados, fluidos_combinados, com_curvas=True):
+    """
+    Cadeia hidráulica completa de um cenário: ajuste das curvas, ponto de operação,
+    divisão de vazão e curvas do gráfico. Não depende de tarifa, horas nem rendimento do
+    motor, então o resultado pode ser guardado em cache e a energia recalculada a partir dele.
+    O campo "status" indica "ok" ou o motivo da interrupção.
+
+    Com `com_curvas=False` (cálculo em lote, sem gráfico) a curva do sistema não é
+    tabelada: o ponto de operação sai direto do Newton de `resolver_pontos_operacao`.
+    """
+    with etapa("ajuste_curvas"):
+        func_curva_bomba = criar_funcao_curva(curva_altura_df, "Vazão (m³/h)", "Altura (m)")
+        func_curva_eficiencia = criar_funcao_curva(curva_eficiencia_df, "Vazão (m³/h)", "Eficiência (%)")
+    if func_curva_bomba is None or func_curva_eficiencia is None:
+        return {"status": "curva_insuficiente"}
+    shutoff_head = float(func_curva_bomba(0))
+    if shutoff_head < h_geometrica:
+        return {"status": "bomba_incompativel", "shutoff_head": shutoff_head}
+    is_rede_vazia = not any(
+        trecho for parte in sistema.values()
+        for trecho in (parte if isinstance(parte, list) else [item for sublist in parte.values() for item in sublist])
+    )
+    if is_rede_vazia:
+        return {"status": "rede_vazia"}
+
+    with etapa("compilar_rede"):
+        rede = CompiledNetwork(sistema, fluido_selecionado, materiais_combinados, fluidos_combinados)
+    with etapa("ponto_operacao"):
+        if com_curvas:
+            vazao_op, altura_op, curva_sistema = encontrar_ponto_operacao(rede, h_geometrica, func_curva_bomba)
+        else:
+            pontos = resolver_pontos_operacao(rede, h_geometrica, func_curva_bomba)
+            vazao_op, altura_op = (float(pontos["vazao"]), float(pontos["altura"])) if pontos["convergiu"] else (None, None)
+    if vazao_op is None or altura_op is None:
+        return {"status": "sem_ponto_operacao"}
+    eficiencia_op = float(min(max(func_curva_eficiencia(vazao_op), 0), 100))
+    with etapa("divisao_vazao_ponto"):
+        _, distribuicao_vazao = calcular_perdas_paralelo(rede, vazao_op)
+    if not com_curvas:
+        return {
+            "status": "ok", "rede": rede, "func_curva_bomba": func_curva_bomba, "func_curva_eficiencia": func_curva_eficiencia,
+            "vazao_op": float(vazao_op), "altura_op": float(altura_op), "eficiencia_op": eficiencia_op,
+            "distribuicao_vazao": {nome: float(vazao) for nome, vazao in distribuicao_vazao.items()},
+        }
+
+    max_vazao_curva = curva_altura_df["Vazão (m³/h)"].max()
+    vazao_range = np.linspace(0, max(vazao_op * 1.2, max_vazao_curva * 1.2), 100)
+    with etapa("curvas_grafico"):
+        altura_sistema = curva_sistema(vazao_range)
+    return {
+        "status": "ok", "rede": rede, "func_curva_bomba": func_curva_bomba, "func_curva_eficiencia": func_curva_eficiencia,
+        "vazao_op": float(vazao_op), "altura_op": float(altura_op), "eficiencia_op": eficiencia_op,
+        "distribuicao_vazao": {nome: float(vazao) for nome, vazao in distribuicao_vazao.items()},
+        "vazao_range": vazao_range, "altura_bomba": func_curva_bomba(vazao_range),
+        "altura_sistema": np.where(altura_sistema < 1e10, altura_sistema, np.nan),
+    }
+
+def sistema_do_cenario(dados):
+    """ Rede no formato de `resolver_hidraulica` a partir de um cenário salvo (esquema de save_scenario). """
+    return {'antes': dados.get('trechos_antes', []), 'paralelo': dados.get('ramais_paralelos', {}), 'depois': dados.get('trechos_depois', [])}
+
+def resolver_cenario(dados, materiais_combinados, fluidos_combinados, com_curvas=True):
+    """ `resolver_hidraulica` aplicado a um cenário salvo, com os mesmos padrões da interface. """
+    return resolver_hidraulica(
+        sistema_do_cenario(dados), dados.get('h_geometrica', 15.0), dados.get('fluido_selecionado', "Água a 20°C"),
+        pd.DataFrame(dados.get('curva_altura', [])), pd.DataFrame(dados.get('curva_eficiencia', [])),
+        materiais_combinados, fluidos_combinados, com_curvas
+    )
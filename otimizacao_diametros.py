@@ -0,0 +1,335 @@
+# otimizacao_diametros.py (Escolha de diâmetros comerciais por custo de ciclo de vida)
+
+import numpy as np
+import pandas as pd
+
+from hidraulica import calcular_analise_energetica, resolver_pontos_operacao
+
+# Ø interno (mm) -> custo instalado (R$/m). Valores de referência; substitua pelo catálogo do fornecedor.
+CATALOGO_DIAMETROS_PADRAO = {
+    25: 45.0, 32: 55.0, 40: 65.0, 50: 80.0, 65: 105.0, 80: 130.0, 100: 170.0, 125: 220.0,
+    150: 280.0, 200: 400.0, 250: 540.0, 300: 700.0, 350: 880.0, 400: 1080.0, 500: 1550.0, 600: 2100.0,
+}
+# Espaços podados com até este número de projetos são avaliados por inteiro, em lotes de TAMANHO_LOTE
+LIMITE_EXAUSTIVO = 4096
+TAMANHO_LOTE = 1024
+
+def fator_valor_presente(taxa_desconto_percent, anos):
+    """ Fator que converte um custo anual constante em valor presente. """
+    taxa = taxa_desconto_percent / 100
+    return float(anos) if taxa == 0 else (1 - (1 + taxa) ** -anos) / taxa
+
+def nomes_trechos(rede):
+    """ Rótulo de cada trecho da rede compilada, na ordem dos arrays. """
+    nomes = [f"Antes (T{i+1})" for i in range(rede.faixa_antes.stop - rede.faixa_antes.start)]
+    for nome_ramal, faixa in zip(rede.nomes_ramais, rede.faixas_ramais):
+        nomes += [f"{nome_ramal} (T{i+1})" for i in range(faixa.stop - faixa.start)]
+    nomes += [f"Depois (T{i+1})" for i in range(rede.faixa_depois.stop - rede.faixa_depois.start)]
+    return nomes
+
+def fronteira_pareto(capex, opex):
+    """ Índices dos pontos não dominados (menor capex e menor opex), em ordem crescente de capex. """
+    ordem = np.lexsort((opex, capex))
+    indices, melhor_opex = [], np.inf
+    for i in ordem:
+        if opex[i] < melhor_opex:
+            indices.append(i)
+            melhor_opex = opex[i]
+    return np.array(indices, dtype=int)
+
+class OtimizadorDiametros:
+    """
+    Atribui a cada trecho (ou a cada ramal, com `mesmo_diametro_no_ramal`) um diâmetro do
+    catálogo minimizando capex + valor presente da energia, com a vazão de operação
+    (recalculada na curva da bomba) de pelo menos `vazao_minima_m3h`.
+
+    O opex é o custo de bombear o mesmo volume anual em todos os projetos (vazão mínima ×
+    `horas_dia`): um projeto com vazão maior opera menos horas. Com horas fixas, o tubo
+    menor estrangularia a vazão e pareceria gastar menos energia, e capex e opex
+    apontariam ambos para os menores diâmetros. Sem vazão mínima (None ou 0) vale a vazão
+    da rede atual; se ela não tem ponto de operação, o volume é o do projeto de maior vazão
+    (tudo no maior diâmetro) e qualquer vazão é aceita.
+
+    A busca combina poda, busca local e uma etapa exata:
+    - poda por viabilidade: com os demais trechos no maior diâmetro permitido, um tamanho
+      que já não entrega a vazão mínima nunca entrega (a vazão cresce com o diâmetro);
+    - poda por limite: capex mínimo dos demais + capex do tamanho + limite inferior da
+      energia (menor custo por m³ na curva da bomba entre a vazão mínima e a máxima alcançável) acima
+      da solução incumbente descarta o tamanho;
+    - descida por vizinhança (±1 tamanho por variável) feita ao mesmo tempo para vários
+      pesos da energia, que dá o incumbente e espalha projetos ao longo da fronteira;
+    - etapa exata: espaço podado de até LIMITE_EXAUSTIVO projetos avaliado por inteiro, em
+      lotes; acima disso, ramificação e limite (`_ramificar`).
+    Garantia: com "otimo_global" verdadeiro no resultado, o projeto é o de menor custo de
+    ciclo de vida entre todas as combinações do catálogo (na tolerância do ponto de operação);
+    falso só quando `max_avaliacoes` interrompe a ramificação, e então é o melhor encontrado.
+    Todo projeto avaliado fica memorizado; a fronteira de Pareto capex x opex sai desse arquivo
+    (no modo exaustivo, todo o espaço podado).
+    """
+    def __init__(self, rede, h_geometrica, func_curva_bomba, func_curva_eficiencia, eficiencia_motor_percent, horas_dia,
+                 custo_kwh, fluido_selecionado, fluidos_combinados, catalogo=None, vazao_minima_m3h=None,
+                 taxa_desconto_percent=8.0, vida_util_anos=20, mesmo_diametro_no_ramal=False):
+        self.rede = rede
+        self.h_geometrica = h_geometrica
+        self.func_curva_bomba = func_curva_bomba
+        self.func_curva_eficiencia = func_curva_eficiencia
+        self.horas_dia = horas_dia
+        self.parametros_energia = (eficiencia_motor_percent, horas_dia, custo_kwh, fluido_selecionado, fluidos_combinados)
+        catalogo = catalogo or CATALOGO_DIAMETROS_PADRAO
+        self.diametros_catalogo_mm = np.array(sorted(catalogo), dtype=float)
+        self.custos_catalogo = np.array([catalogo[d] for d in sorted(catalogo)], dtype=float)
+        self.fator_vp = fator_valor_presente(taxa_desconto_percent, vida_util_anos)
+        self.vazao_minima = vazao_minima_m3h
+
+        # Variáveis de decisão: trechos em série e, com dois ou mais ramais, os trechos (ou ramais) em paralelo
+        variaveis = [[int(k)] for k in rede.indices_serie]
+        if rede.num_ramais >= 2:
+            for faixa in rede.faixas_ramais:
+                trechos_ramal = list(range(faixa.start, faixa.stop))
+                variaveis += [trechos_ramal] if mesmo_diametro_no_ramal else [[k] for k in trechos_ramal]
+        self.variaveis = variaveis
+        self.variavel_do_trecho = np.full(rede.num_trechos, -1)
+        for v, trechos in enumerate(variaveis):
+            self.variavel_do_trecho[trechos] = v
+        self.comprimento_variavel = np.array([rede.comprimento_m[trechos].sum() for trechos in variaveis])
+        # Trechos fora do cálculo (ramal único) mantêm o diâmetro e entram no capex com custo interpolado
+        fixos = self.variavel_do_trecho < 0
+        self.capex_fixo = float((rede.comprimento_m[fixos] * np.interp(rede.diametro_m[fixos] * 1000, self.diametros_catalogo_mm, self.custos_catalogo)).sum())
+        self._memoria = {}
+
+        if not self.vazao_minima:
+            atual = resolver_pontos_operacao(rede, h_geometrica, func_curva_bomba)
+            self.vazao_minima = float(atual["vazao"]) if atual["convergiu"] else 0.0
+        # Vazão que define o volume anual exigido (ver _opex)
+        self.vazao_referencia = self.vazao_minima
+        if not self.vazao_referencia and variaveis:
+            maior = np.full((1, len(variaveis)), len(self.diametros_catalogo_mm) - 1)
+            ponto = resolver_pontos_operacao(rede.com_diametros(self._diametros(maior)), h_geometrica, func_curva_bomba)
+            self.vazao_referencia = float(ponto["vazao"][0]) if ponto["convergiu"][0] else 0.0
+
+    def _diametros(self, indices):
+        """ Diâmetros por trecho (m) para índices de catálogo por variável (n, variáveis). """
+        diametros = np.broadcast_to(self.rede.diametro_m, (len(indices), self.rede.num_trechos)).copy()
+        ativos = self.variavel_do_trecho >= 0
+        diametros[:, ativos] = self.diametros_catalogo_mm[indices[:, self.variavel_do_trecho[ativos]]] / 1000
+        return diametros
+
+    def _opex(self, vazao, altura, eficiencia):
+        """
+        Custo anual de energia para bombear o volume exigido (vazão de referência × `horas_dia`):
+        o custo a `horas_dia` escalado pelas horas necessárias na vazão do projeto.
+        """
+        vazao = np.asarray(vazao, dtype=float)
+        custo = np.asarray(calcular_analise_energetica(vazao, altura, eficiencia, *self.parametros_energia)["custo_anual"])
+        return np.where(vazao > 0, custo * self.vazao_referencia / np.where(vazao > 0, vazao, 1.0), np.inf)
+
+    def _limite_opex(self, vazao_max):
+        """
+        Limite inferior do opex de projetos cuja vazão não passa de `vazao_max` (m³/h): todo ponto
+        de operação viável está na curva da bomba entre a vazão mínima e a máxima, e o opex de
+        cada ponto é o custo por m³ nele vezes o volume exigido.
+        """
+        vazao_max = np.atleast_1d(np.asarray(vazao_max, dtype=float))
+        vazoes = np.linspace(self.vazao_minima, max(np.nanmax(vazao_max, initial=0.0), self.vazao_minima), 200)
+        eficiencia = np.clip(self.func_curva_eficiencia(vazoes), 0, 100)
+        energia = self._opex(vazoes, self.func_curva_bomba(vazoes), np.where(eficiencia > 0, eficiencia, np.nan))
+        # Menor custo até cada vazão da malha; o ponto seguinte da malha cobre o intervalo até vazao_max
+        energia_min = np.minimum.accumulate(np.where(np.isfinite(energia), energia, np.inf))
+        indice = np.minimum(np.searchsorted(vazoes, np.nan_to_num(vazao_max), side="right"), len(vazoes) - 1)
+        limite = energia_min[indice] * 0.999
+        return np.where(np.isfinite(limite), limite, 0.0)
+
+    def avaliar(self, indices, chute_vazao=None):
+        """
+        capex (R$), opex anual (R$/ano, mesmo volume bombeado) e vazão de cada projeto; opex = inf
+        se a vazão mínima não é atendida. `chute_vazao` (m³/h) acelera o Newton quando os projetos
+        são vizinhos.
+        """
+        indices = np.atleast_2d(np.asarray(indices, dtype=int))
+        chaves = [linha.tobytes() for linha in indices]
+        novos = {chave: linha for chave, linha in zip(chaves, indices) if chave not in self._memoria}
+        if novos:
+            lote = np.array(list(novos.values()))
+            pontos = resolver_pontos_operacao(self.rede.com_diametros(self._diametros(lote)), self.h_geometrica, self.func_curva_bomba, chute_vazao)
+            eficiencia = np.clip(self.func_curva_eficiencia(pontos["vazao"]), 0, 100)
+            opex = self._opex(pontos["vazao"], pontos["altura"], eficiencia)
+            viavel = pontos["convergiu"] & (pontos["vazao"] >= self.vazao_minima * (1 - 1e-9)) & (eficiencia > 0)
+            opex = np.where(viavel, opex, np.inf)
+            capex = self.capex_fixo + (self.comprimento_variavel * self.custos_catalogo[lote]).sum(axis=-1)
+            for chave, c, o, q in zip(novos, capex, opex, pontos["vazao"]):
+                self._memoria[chave] = (c, o, q)
+        valores = np.array([self._memoria[chave] for chave in chaves])
+        return valores[:, 0], valores[:, 1], valores[:, 2]
+
+    def _podar(self, permitidos, incumbente_total, peso_max):
+        """ Aplica as podas por viabilidade e por limite; devolve a nova máscara (variáveis, tamanhos). """
+        num_var, num_tamanhos = permitidos.shape
+        maiores = np.array([np.flatnonzero(linha).max() for linha in permitidos])
+        candidatos = np.repeat(maiores[np.newaxis, np.newaxis, :], num_var, axis=0).repeat(num_tamanhos, axis=1)
+        candidatos[np.arange(num_var), :, np.arange(num_var)] = np.arange(num_tamanhos)
+        _, _, vazao_maiores = self.avaliar(maiores)
+        _, opex, _ = self.avaliar(candidatos.reshape(-1, num_var), vazao_maiores[0])
+        permitidos = permitidos & np.isfinite(opex.reshape(num_var, num_tamanhos))
+        if not permitidos.any(axis=1).all():
+            return permitidos
+
+        custo_tamanhos = self.comprimento_variavel[:, np.newaxis] * self.custos_catalogo[np.newaxis, :]
+        capex_min = np.where(permitidos, custo_tamanhos, np.inf).min(axis=1)
+        # Energia mínima possível: todo ponto de operação viável está na curva da bomba entre a vazão mínima e a máxima,
+        # e o opex de cada ponto é o custo por m³ nele vezes o volume exigido
+        _, _, vazao_max = self.avaliar(np.where(permitidos, np.arange(num_tamanhos), -1).max(axis=1))
+        opex_min = self._limite_opex(vazao_max[0])[0]
+        limite = self.capex_fixo + capex_min.sum() - capex_min[:, np.newaxis] + custo_tamanhos + peso_max * self.fator_vp * opex_min
+        return permitidos & (limite <= incumbente_total)
+
+    def _exaustivo(self, permitidos):
+        """ Avalia todas as combinações de tamanhos permitidos, em lotes; devolve o projeto de menor custo de ciclo de vida. """
+        grade = np.meshgrid(*[np.flatnonzero(linha) for linha in permitidos], indexing="ij")
+        todos = np.stack([eixo.ravel() for eixo in grade], axis=-1)
+        valores, chute = [], None
+        for inicio in range(0, len(todos), TAMANHO_LOTE):
+            capex, opex, vazao = self.avaliar(todos[inicio:inicio + TAMANHO_LOTE], chute)
+            valores.append(capex + self.fator_vp * opex)
+            if np.isfinite(vazao).any():
+                chute = float(np.nanmedian(vazao))
+        return todos[np.concatenate(valores).argmin()]
+
+    def _ramificar(self, permitidos, incumbente, valor_incumbente, max_avaliacoes):
+        """
+        Ramificação e limite no custo de ciclo de vida, em largura: cada nível fixa uma variável
+        em todos os tamanhos permitidos e avalia os filhos em um único lote, com as variáveis
+        ainda livres no maior tamanho permitido. Esse projeto limita a vazão de qualquer
+        complemento do nó (a vazão cresce com o diâmetro) e, se viável, concorre a incumbente.
+        O nó é descartado se inviável ou se capex das fixadas + capex mínimo das livres + limite
+        do opex na sua vazão supera o incumbente. Devolve (incumbente, completo); completo é
+        False se o nível seguinte não cabe em `max_avaliacoes`.
+        """
+        num_var, num_tamanhos = permitidos.shape
+        custo_tamanhos = self.comprimento_variavel[:, np.newaxis] * self.custos_catalogo[np.newaxis, :]
+        capex_min = np.where(permitidos, custo_tamanhos, np.inf).min(axis=1)
+        maiores = np.array([np.flatnonzero(linha).max() for linha in permitidos])
+        # Variáveis de maior amplitude de custo primeiro: o limite aperta nos primeiros níveis
+        ordem = np.argsort(capex_min - custo_tamanhos[np.arange(num_var), maiores], kind="stable")
+        nos, avaliacoes = maiores[np.newaxis, :], 0
+        for nivel, v in enumerate(ordem):
+            tamanhos = np.flatnonzero(permitidos[v])
+            filhos = np.repeat(nos, len(tamanhos), axis=0)
+            filhos[:, v] = np.tile(tamanhos, len(nos))
+            avaliacoes += len(filhos)
+            if avaliacoes > max_avaliacoes:
+                return incumbente, False
+            capex, opex, vazao = self.avaliar(filhos, self.vazao_minima)
+            valor = capex + self.fator_vp * opex
+            if valor.min() < valor_incumbente:
+                incumbente, valor_incumbente = filhos[valor.argmin()], valor.min()
+            livres = ordem[nivel + 1:]
+            ajuste = (capex_min[livres] - custo_tamanhos[livres, maiores[livres]]).sum()
+            limite = capex + ajuste + self.fator_vp * self._limite_opex(vazao)
+            nos = filhos[np.isfinite(opex) & (limite < valor_incumbente * (1 - 1e-12))]
+            if not len(nos):
+                break
+        return incumbente, True
+
+    def otimizar(self, pesos_energia=(0.25, 0.5, 1.0, 2.0, 4.0), max_iteracoes=200, max_avaliacoes=10000):
+        """
+        Retorna {"status", "diametros_mm", "capex", "opex_anual", "custo_ciclo_vida", "vazao",
+        "pareto" (DataFrame), "avaliacoes", "tamanhos_podados", "otimo_global", "metodo"}. O peso 1
+        é o custo de ciclo de vida; os demais pesos da energia apenas espalham a busca ao longo da
+        fronteira. `max_avaliacoes` limita os projetos visitados pela ramificação e limite.
+        """
+        num_var, num_tamanhos = len(self.variaveis), len(self.diametros_catalogo_mm)
+        if num_var == 0:
+            return {"status": "sem_variaveis"}
+        pesos = np.unique(np.append(np.asarray(pesos_energia, dtype=float), 1.0))
+
+        def objetivo(capex, opex, peso):
+            return capex + peso * self.fator_vp * opex
+
+        # Incumbente: diâmetros atuais arredondados para o catálogo (ou tudo no maior tamanho, se inviável)
+        diametro_atual_mm = np.array([self.rede.diametro_m[trechos].max() * 1000 for trechos in self.variaveis])
+        inicial = np.abs(self.diametros_catalogo_mm[np.newaxis, :] - diametro_atual_mm[:, np.newaxis]).argmin(axis=1)
+        capex, opex, _ = self.avaliar(inicial)
+        if not np.isfinite(opex[0]):
+            inicial = np.full(num_var, num_tamanhos - 1)
+            capex, opex, _ = self.avaliar(inicial)
+            if not np.isfinite(opex[0]):
+                return {"status": "inviavel", "vazao_minima": self.vazao_minima}
+        permitidos = self._podar(np.ones((num_var, num_tamanhos), dtype=bool), objetivo(capex[0], opex[0], pesos.max()), pesos.max())
+        # O incumbente continua permitido: seu limite inferior nunca supera o próprio custo
+        permitidos[np.arange(num_var), inicial] = True
+
+        # Posição de cada variável na lista de tamanhos permitidos, uma linha por peso
+        tamanhos_permitidos = [np.flatnonzero(linha) for linha in permitidos]
+        posicoes = np.array([[int(np.flatnonzero(t == i)[0]) for t, i in zip(tamanhos_permitidos, inicial)]] * len(pesos))
+        limites_pos = np.array([len(t) - 1 for t in tamanhos_permitidos])
+
+        def para_indices(pos):
+            return np.array([[tamanhos_permitidos[v][p] for v, p in enumerate(linha)] for linha in pos])
+
+        capex_atual, opex_atual, vazao_atual = self.avaliar(para_indices(posicoes), self.vazao_minima)
+        valor_atual = objetivo(capex_atual, opex_atual, pesos)
+        for _ in range(max_iteracoes):
+            # Vizinhos ±1 de todas as variáveis para todos os pesos: (pesos, variáveis, 2, variáveis)
+            vizinhos = np.repeat(posicoes[:, np.newaxis, np.newaxis, :], num_var, axis=1).repeat(2, axis=2)
+            vizinhos[:, np.arange(num_var), 0, np.arange(num_var)] -= 1
+            vizinhos[:, np.arange(num_var), 1, np.arange(num_var)] += 1
+            validos = ((vizinhos >= 0) & (vizinhos <= limites_pos)).all(axis=-1)
+            vizinhos = np.clip(vizinhos, 0, limites_pos)
+            chute = float(np.median(vazao_atual))
+            capex_v, opex_v, _ = self.avaliar(para_indices(vizinhos.reshape(-1, num_var)), chute)
+            valores = np.where(validos.ravel(), objetivo(capex_v, opex_v, np.repeat(pesos, 2 * num_var)), np.inf).reshape(len(pesos), num_var, 2)
+
+            ganho = valor_atual[:, np.newaxis] - valores.min(axis=-1)
+            melhora = ganho > 1e-9 * (1 + np.abs(valor_atual[:, np.newaxis]))
+            if not melhora.any():
+                break
+            passo = np.where(melhora, np.where(valores.argmin(axis=-1) == 0, -1, 1), 0)
+            # Movimento combinado (todas as melhorias juntas) contra o melhor movimento isolado
+            combinado = posicoes + passo
+            capex_c, opex_c, _ = self.avaliar(para_indices(combinado), chute)
+            valor_combinado = objetivo(capex_c, opex_c, pesos)
+            melhor_var = ganho.argmax(axis=1)
+            isolado = posicoes.copy()
+            isolado[np.arange(len(pesos)), melhor_var] += passo[np.arange(len(pesos)), melhor_var]
+            valor_isolado = valor_atual - ganho.max(axis=1)
+            usar_combinado = valor_combinado < valor_isolado
+            novas = np.where(usar_combinado[:, np.newaxis], combinado, isolado)
+            posicoes = np.where(melhora.any(axis=1)[:, np.newaxis], novas, posicoes)
+            valor_atual = np.where(melhora.any(axis=1), np.minimum(np.where(usar_combinado, valor_combinado, valor_isolado), valor_atual), valor_atual)
+            _, _, vazao_atual = self.avaliar(para_indices(posicoes))
+
+        # Etapa exata no custo de ciclo de vida, com a descida do peso 1 como incumbente
+        melhor = para_indices(posicoes[pesos == 1.0])[0]
+        if np.prod(permitidos.sum(axis=1), dtype=float) <= LIMITE_EXAUSTIVO:
+            melhor, otimo_global, metodo = self._exaustivo(permitidos), True, "exaustivo"
+        else:
+            capex, opex, _ = self.avaliar(melhor)
+            melhor, otimo_global = self._ramificar(permitidos, melhor, capex[0] + self.fator_vp * opex[0], max_avaliacoes)
+            metodo = "ramificacao"
+        capex, opex, vazao = self.avaliar(melhor)
+
+        arquivo = np.array([np.frombuffer(chave, dtype=int) for chave in self._memoria])
+        valores_arquivo = np.array(list(self._memoria.values()))
+        viaveis = np.isfinite(valores_arquivo[:, 1])
+        arquivo, valores_arquivo = arquivo[viaveis], valores_arquivo[viaveis]
+        pareto = fronteira_pareto(valores_arquivo[:, 0], valores_arquivo[:, 1])
+        nomes = nomes_trechos(self.rede)
+        rotulos = [nomes[trechos[0]] if len(trechos) == 1 else nomes[trechos[0]].rsplit(" (T", 1)[0] for trechos in self.variaveis]
+        tabela_pareto = pd.DataFrame({
+            "Capex (R$)": valores_arquivo[pareto, 0],
+            "Custo Anual de Energia (R$)": valores_arquivo[pareto, 1],
+            "Custo de Ciclo de Vida (R$)": valores_arquivo[pareto, 0] + self.fator_vp * valores_arquivo[pareto, 1],
+            "Vazão (m³/h)": valores_arquivo[pareto, 2],
+            "Horas de Bombeamento (h/dia)": self.horas_dia * self.vazao_referencia / valores_arquivo[pareto, 2],
+            **{f"Ø {rotulo} (mm)": self.diametros_catalogo_mm[arquivo[pareto, v]] for v, rotulo in enumerate(rotulos)},
+        })
+        return {
+            "status": "ok",
+            "diametros_mm": dict(zip(rotulos, self.diametros_catalogo_mm[melhor])),
+            "capex": float(capex[0]), "opex_anual": float(opex[0]),
+            "custo_ciclo_vida": float(capex[0] + self.fator_vp * opex[0]), "vazao": float(vazao[0]),
+            "pareto": tabela_pareto,
+            "avaliacoes": len(self._memoria),
+            "tamanhos_podados": int((~permitidos).sum()), "tamanhos_total": int(permitidos.size),
+            "otimo_global": otimo_global, "metodo": metodo,
+        }
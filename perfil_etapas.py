@@ -0,0 +1,145 @@
+# perfil_etapas.py (Tempo por etapa e contadores dos solvers, para diagnosticar lentidão)
+#
+# Desligado por padrão. Sem uma coleta ativa, etapa() e contar() só consultam uma
+# ContextVar e retornam. A coleta é por contexto: cada sessão do Streamlit roda o script
+# em sua própria thread, então sessões simultâneas não se misturam.
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_coleta_atual = ContextVar("coleta_perfil", default=None)
+
+class ColetaPerfil:
+    """ Etapas (início, duração, profundidade) e contadores de uma execução. """
+    def __init__(self, nome="execucao"):
+        self.nome = nome
+        self.inicio = time.perf_counter()
+        self.duracao_ms = None
+        self.etapas = []
+        self.contadores = {}
+        self._abertas = []
+
+    def _agora_ms(self):
+        return (time.perf_counter() - self.inicio) * 1000
+
+    def abrir(self, nome, atributos):
+        etapa = {"nome": nome, "inicio_ms": self._agora_ms(), "duracao_ms": None, "profundidade": len(self._abertas),
+                 "contadores": {}, **({"atributos": atributos} if atributos else {})}
+        self.etapas.append(etapa)
+        self._abertas.append(etapa)
+        return etapa
+
+    def fechar(self, etapa):
+        etapa["duracao_ms"] = self._agora_ms() - etapa["inicio_ms"]
+        self._abertas.remove(etapa)
+
+    def contar(self, nome, quantidade):
+        self.contadores[nome] = self.contadores.get(nome, 0) + quantidade
+        # Cada etapa aberta acumula os contadores das etapas internas
+        for etapa in self._abertas:
+            etapa["contadores"][nome] = etapa["contadores"].get(nome, 0) + quantidade
+
+    def incorporar(self, etapas, prefixo=""):
+        """
+        Acrescenta etapas medidas em outro processo (ex.: o relatório no pool) dentro da etapa
+        aberta agora, alinhadas ao fim dela, já que os relógios dos processos não coincidem.
+        """
+        if not etapas:
+            return
+        fim_externo = max(e["inicio_ms"] + (e["duracao_ms"] or 0) for e in etapas)
+        deslocamento = self._agora_ms() - fim_externo
+        base = len(self._abertas)
+        for etapa in etapas:
+            copia = {**etapa, "nome": prefixo + etapa["nome"], "inicio_ms": etapa["inicio_ms"] + deslocamento,
+                     "profundidade": etapa["profundidade"] + base, "contadores": dict(etapa["contadores"])}
+            self.etapas.append(copia)
+            if etapa["profundidade"] == 0:
+                for nome, quantidade in etapa["contadores"].items():
+                    self.contar(nome, quantidade)
+
+    def finalizar(self):
+        for etapa in list(self._abertas):
+            self.fechar(etapa)
+        self.duracao_ms = self._agora_ms()
+        return self
+
+    def resumo(self):
+        """
+        Uma linha por etapa (na ordem de início), com o tempo próprio (sem as etapas internas)
+        e a fração do total da execução.
+        """
+        total = self.duracao_ms if self.duracao_ms is not None else self._agora_ms()
+        linhas = []
+        for i, etapa in enumerate(self.etapas):
+            duracao = etapa["duracao_ms"] if etapa["duracao_ms"] is not None else self._agora_ms() - etapa["inicio_ms"]
+            internas = 0.0
+            for seguinte in self.etapas[i + 1:]:
+                if seguinte["profundidade"] <= etapa["profundidade"]:
+                    break
+                if seguinte["profundidade"] == etapa["profundidade"] + 1:
+                    internas += seguinte["duracao_ms"] or 0.0
+            linhas.append({"etapa": etapa["nome"], "profundidade": etapa["profundidade"], "inicio_ms": etapa["inicio_ms"],
+                           "duracao_ms": duracao, "proprio_ms": max(duracao - internas, 0.0),
+                           "fracao": duracao / total if total else 0.0, "contadores": etapa["contadores"]})
+        return linhas
+
+    def trace(self):
+        """ Eventos no formato Trace Event (JSON), aberto pelo Perfetto e por chrome://tracing. """
+        pid = os.getpid()
+        eventos = [{"name": self.nome, "ph": "X", "ts": 0, "dur": (self.duracao_ms or self._agora_ms()) * 1000,
+                    "pid": pid, "tid": 0, "args": self.contadores}]
+        for etapa in self.etapas:
+            eventos.append({"name": etapa["nome"], "ph": "X", "ts": etapa["inicio_ms"] * 1000, "dur": (etapa["duracao_ms"] or 0.0) * 1000,
+                            "pid": pid, "tid": 0, "args": {**etapa["contadores"], **etapa.get("atributos", {})}})
+        return {"traceEvents": eventos, "displayTimeUnit": "ms"}
+
+    def trace_json(self):
+        return json.dumps(self.trace(), ensure_ascii=False)
+
+def coleta_atual():
+    return _coleta_atual.get()
+
+def ativar_coleta(nome="execucao"):
+    """
+    Inicia uma coleta no contexto atual e a devolve. Usada no script do Streamlit, em que
+    cada rerun substitui a coleta anterior (ou a desativa com desativar_coleta()).
+    """
+    coleta = ColetaPerfil(nome)
+    _coleta_atual.set(coleta)
+    return coleta
+
+def desativar_coleta():
+    _coleta_atual.set(None)
+
+@contextmanager
+def coletar(nome="execucao"):
+    """ Coleta restrita a um bloco `with`; a coleta anterior do contexto é restaurada no fim. """
+    coleta = ColetaPerfil(nome)
+    token = _coleta_atual.set(coleta)
+    try:
+        yield coleta
+    finally:
+        _coleta_atual.reset(token)
+        coleta.finalizar()
+
+@contextmanager
+def etapa(nome, **atributos):
+    """ Mede o bloco como uma etapa da coleta ativa (nada é feito se não houver coleta). """
+    coleta = _coleta_atual.get()
+    if coleta is None:
+        yield
+        return
+    aberta = coleta.abrir(nome, atributos)
+    try:
+        yield
+    finally:
+        coleta.fechar(aberta)
+
+def contar(nome, quantidade=1):
+    """ Soma `quantidade` ao contador `nome` (iterações, chamadas) da coleta ativa, se houver. """
+    coleta = _coleta_atual.get()
+    if coleta is not None:
+        coleta.contar(nome, quantidade)
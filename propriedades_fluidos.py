@@ -0,0 +1,103 @@
+# propriedades_fluidos.py (Propriedades dos fluidos em função da temperatura)
+#
+# Além de 'rho' e 'nu' na temperatura de referência, um fluido pode trazer uma 'tabela':
+# (temperaturas em °C, rho em kg/m³, nu em m²/s). A tabela é interpolada — nu em escala
+# logarítmica, pois a viscosidade cai quase exponencialmente com a temperatura — e o
+# interpolador de cada fluido fica em cache, então varreduras e simulações com temperatura
+# variável consultam arrays em memória em vez de reler o banco a cada ponto.
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+TEMPERATURA_REFERENCIA = 20.0
+
+# Água (pressão atmosférica) e etanol: valores usuais de tabela
+TABELA_AGUA = (
+    (0.0, 5.0, 10.0, 15.0, 20.0, 25.0, 30.0, 40.0, 50.0, 60.0, 70.0, 80.0, 90.0, 100.0),
+    (999.8, 1000.0, 999.7, 999.1, 998.2, 997.0, 995.7, 992.2, 988.0, 983.2, 977.8, 971.8, 965.3, 958.4),
+    (1.787e-6, 1.519e-6, 1.307e-6, 1.139e-6, 1.004e-6, 0.893e-6, 0.801e-6, 0.658e-6, 0.553e-6, 0.474e-6, 0.413e-6, 0.364e-6, 0.326e-6, 0.294e-6),
+)
+TABELA_ETANOL = (
+    (0.0, 10.0, 20.0, 30.0, 40.0, 50.0, 60.0, 70.0),
+    (806.3, 797.7, 789.0, 780.4, 771.7, 763.0, 754.2, 745.3),
+    (2.199e-6, 1.838e-6, 1.51e-6, 1.285e-6, 1.081e-6, 0.919e-6, 0.785e-6, 0.676e-6),
+)
+
+class TabelaPropriedades:
+    """ Interpolador de rho(T) e nu(T) de um fluido, vetorizado sobre arrays de temperaturas. """
+    def __init__(self, temperaturas, rho, nu):
+        temperaturas, rho, nu = (np.asarray(valores, dtype=float) for valores in (temperaturas, rho, nu))
+        if not (temperaturas.ndim == 1 and len(temperaturas) >= 2 and temperaturas.shape == rho.shape == nu.shape):
+            raise ValueError("A tabela do fluido precisa de pelo menos 2 temperaturas, cada uma com ρ e ν.")
+        if not (np.all(np.isfinite(temperaturas)) and np.all(rho > 0) and np.all(nu > 0)):
+            raise ValueError("A tabela do fluido deve ter temperaturas finitas e ρ e ν positivos.")
+        ordem = np.argsort(temperaturas)
+        self.temperaturas, self.rho_tabela, self.log_nu = temperaturas[ordem], rho[ordem], np.log(nu[ordem])
+        if np.any(np.diff(self.temperaturas) <= 0):
+            raise ValueError("A tabela do fluido tem temperaturas repetidas.")
+
+    @property
+    def faixa(self):
+        return float(self.temperaturas[0]), float(self.temperaturas[-1])
+
+    def _validar(self, temperatura_c):
+        temperaturas = np.asarray(temperatura_c, dtype=float)
+        minima, maxima = self.faixa
+        if np.any(~(temperaturas >= minima) | ~(temperaturas <= maxima)):
+            raise ValueError(f"Temperatura fora da faixa da tabela do fluido ({minima:g} a {maxima:g} °C).")
+        return temperaturas
+
+    def rho(self, temperatura_c):
+        return np.interp(self._validar(temperatura_c), self.temperaturas, self.rho_tabela)
+
+    def nu(self, temperatura_c):
+        return np.exp(np.interp(self._validar(temperatura_c), self.temperaturas, self.log_nu))
+
+@lru_cache(maxsize=128)
+def _tabela_em_cache(tabela):
+    return TabelaPropriedades(*tabela)
+
+def tabela_do_fluido(fluido):
+    """ Interpolador (em cache, pela própria tabela) de um fluido; None se as propriedades forem constantes. """
+    tabela = fluido.get("tabela")
+    if not tabela:
+        return None
+    return _tabela_em_cache(tuple(tuple(float(valor) for valor in coluna) for coluna in tabela))
+
+def propriedades_fluido(fluido, temperatura_c=None):
+    """
+    (rho, nu) do fluido na temperatura (°C, escalar ou array). Sem temperatura, ou para um
+    fluido sem tabela, valem os valores de referência (arrays na forma da temperatura).
+    """
+    tabela = None if temperatura_c is None else tabela_do_fluido(fluido)
+    if tabela is None:
+        if temperatura_c is None or np.ndim(temperatura_c) == 0:
+            return fluido["rho"], fluido["nu"]
+        forma = np.shape(temperatura_c)
+        return np.full(forma, float(fluido["rho"])), np.full(forma, float(fluido["nu"]))
+    rho, nu = tabela.rho(temperatura_c), tabela.nu(temperatura_c)
+    return (float(rho), float(nu)) if np.ndim(temperatura_c) == 0 else (rho, nu)
+
+def fluido_na_temperatura(fluidos_combinados, fluido_selecionado, temperatura_c):
+    """
+    Cópia da biblioteca com o fluido selecionado avaliado na temperatura ('rho' e 'nu'
+    trocados, a tabela mantida): as funções que recebem (fluido_selecionado,
+    fluidos_combinados) passam a calcular nessa temperatura sem outra mudança.
+    """
+    fluido = fluidos_combinados[fluido_selecionado]
+    if temperatura_c is None or tabela_do_fluido(fluido) is None:
+        return fluidos_combinados
+    rho, nu = propriedades_fluido(fluido, temperatura_c)
+    return {**fluidos_combinados, fluido_selecionado: {**fluido, "rho": rho, "nu": nu, "temperatura": float(temperatura_c)}}
+
+def tabela_de_editor(df):
+    """ Tabela (temperaturas, rho, nu) a partir do editor do app; None se vazia. Linhas incompletas são ignoradas. """
+    colunas = ["Temperatura (°C)", "Densidade (kg/m³)", "Viscosidade (m²/s)"]
+    valores = df.reindex(columns=colunas).apply(pd.to_numeric, errors="coerce").dropna()
+    if len(valores) == 0:
+        return None
+    tabela = tuple(tuple(valores[coluna].tolist()) for coluna in colunas)
+    TabelaPropriedades(*tabela)
+    return tabela
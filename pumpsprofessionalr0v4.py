@@ -1,172 +1,28 @@
 import streamlit as st
-import pandas as pd
-import math
 import time
-import numpy as np
-from scipy.optimize import root
-import graphviz
-import matplotlib.pyplot as plt
-import io
 import yaml
 from yaml.loader import SafeLoader
 import streamlit_authenticator as stauth
 
-# Importando as funções do banco de dados e do gerador de relatórios
+# Importando as funções do banco de dados. Os módulos de cálculo e gráficos (pandas,
+# NumPy/SciPy, Matplotlib, Graphviz) só são carregados depois do login, abaixo.
 from database import (
     setup_database, save_scenario, load_scenario, get_user_projects, 
-    get_scenarios_for_project, delete_scenario, add_user_fluid, get_user_fluids, 
-    delete_user_fluid, add_user_material, get_user_materials, delete_user_material
+    delete_scenario, add_user_fluid,
+    delete_user_fluid, add_user_material, delete_user_material,
+    list_scenarios, get_scenario_versions, restore_scenario_version, count_catalog_pumps
 )
-from report_generator import generate_report
+from perfil_etapas import ativar_coleta, desativar_coleta, etapa
 
 # --- CONFIGURAÇÕES E CONSTANTES ---
 st.set_page_config(layout="wide", page_title="Análise de Redes Hidráulicas")
-plt.style.use('seaborn-v0_8-whitegrid')
-
-# BIBLIOTECAS PADRÃO
-MATERIAIS_PADRAO = {
-    "Aço Carbono (novo)": 0.046, "Aço Carbono (pouco uso)": 0.1, "Aço Carbono (enferrujado)": 0.2,
-    "Aço Inox": 0.002, "Ferro Fundido": 0.26, "PVC / Plástico": 0.0015, "Concreto": 0.5
-}
-FLUIDOS_PADRAO = { 
-    "Água a 20°C": {"rho": 998.2, "nu": 1.004e-6}, 
-    "Etanol a 20°C": {"rho": 789.0, "nu": 1.51e-6} 
-}
-K_FACTORS = {
-    "Entrada de Borda Viva": 0.5, "Entrada Levemente Arredondada": 0.2, "Entrada Bem Arredondada": 0.04,
-    "Saída de Tubulação": 1.0, "Válvula Gaveta (Totalmente Aberta)": 0.2, "Válvula Gaveta (1/2 Aberta)": 5.6,
-    "Válvula Globo (Totalmente Aberta)": 10.0, "Válvula de Retenção (Tipo Portinhola)": 2.5,
-    "Cotovelo 90° (Raio Longo)": 0.6, "Cotovelo 90° (Raio Curto)": 0.9, "Cotovelo 45°": 0.4,
-    "Curva de Retorno 180°": 2.2, "Tê (Fluxo Direto)": 0.6, "Tê (Fluxo Lateral)": 1.8,
-}
+# Telas de análise abaixo dos resultados; cada uma carrega o próprio módulo ao ser aberta
+ANALISES = [
+    "Sensibilidade de Diâmetros", "Otimização de Diâmetros", "Período Estendido", "Velocidade Variável",
+    "Estação de Bombeamento", "Incerteza (Monte Carlo)", "Catálogo de Bombas",
+]
 
 # --- FUNÇÕES DE CÁLCULO ---
-def calcular_perda_serie(lista_trechos, vazao_m3h, fluido_selecionado, materiais_combinados, fluidos_combinados):
-    perda_total = 0
-    for trecho in lista_trechos:
-        perdas = calcular_perdas_trecho(trecho, vazao_m3h, fluido_selecionado, materiais_combinados, fluidos_combinados)
-        perda_total += perdas["principal"] + perdas["localizada"]
-    return perda_total
-
-def calcular_perdas_trecho(trecho, vazao_m3h, fluido_selecionado, materiais_combinados, fluidos_combinados):
-    if vazao_m3h < 0: vazao_m3h = 0
-    rugosidade_mm = materiais_combinados[trecho["material"]]
-    vazao_m3s, diametro_m = vazao_m3h / 3600, trecho["diametro"] / 1000
-    nu = fluidos_combinados[fluido_selecionado]["nu"]
-    if diametro_m <= 0: return {"principal": 1e12, "localizada": 0, "velocidade": 0}
-    area = (math.pi * diametro_m**2) / 4
-    velocidade = vazao_m3s / area if area > 0 else 0
-    reynolds = (velocidade * diametro_m) / nu if nu > 0 else 0
-    fator_atrito = 0
-    if reynolds > 4000:
-        rugosidade_m = rugosidade_mm / 1000
-        if diametro_m <= 0: return {"principal": 1e12, "localizada": 0, "velocidade": 0}
-        log_term = math.log10((rugosidade_m / (3.7 * diametro_m)) + (5.74 / reynolds**0.9))
-        fator_atrito = 0.25 / (log_term**2)
-    elif reynolds > 0:
-        fator_atrito = 64 / reynolds
-    perda_principal = fator_atrito * (trecho["comprimento"] / diametro_m) * (velocidade**2 / (2 * 9.81))
-    k_total_trecho = sum(ac["k"] * ac["quantidade"] for ac in trecho["acessorios"])
-    perda_localizada = k_total_trecho * (velocidade**2 / (2 * 9.81))
-    return {"principal": perda_principal, "localizada": perda_localizada, "velocidade": velocidade}
-
-def calcular_perdas_paralelo(ramais, vazao_total_m3h, fluido_selecionado, materiais_combinados, fluidos_combinados):
-    num_ramais = len(ramais)
-    if num_ramais < 2: return 0, {}
-    lista_ramais = list(ramais.values())
-    def equacoes_perda(vazoes_parciais_m3h):
-        vazao_ultimo_ramal = vazao_total_m3h - sum(vazoes_parciais_m3h)
-        if vazao_ultimo_ramal < -0.01: return [1e12] * (num_ramais - 1)
-        todas_vazoes = np.append(vazoes_parciais_m3h, vazao_ultimo_ramal)
-        perdas = [calcular_perda_serie(ramal, vazao, fluido_selecionado, materiais_combinados, fluidos_combinados) for ramal, vazao in zip(lista_ramais, todas_vazoes)]
-        erros = [perdas[i] - perdas[-1] for i in range(num_ramais - 1)]
-        return erros
-    chute_inicial = np.full(num_ramais - 1, vazao_total_m3h / num_ramais)
-    solucao = root(equacoes_perda, chute_inicial, method='hybr', options={'xtol': 1e-8})
-    if not solucao.success: return -1, {}
-    vazoes_finais = np.append(solucao.x, vazao_total_m3h - sum(solucao.x))
-    perda_final_paralelo = calcular_perda_serie(lista_ramais[0], vazoes_finais[0], fluido_selecionado, materiais_combinados, fluidos_combinados)
-    distribuicao_vazao = {nome_ramal: vazao for nome_ramal, vazao in zip(ramais.keys(), vazoes_finais)}
-    return perda_final_paralelo, distribuicao_vazao
-
-def calcular_analise_energetica(vazao_m3h, h_man, eficiencia_bomba_percent, eficiencia_motor_percent, horas_dia, custo_kwh, fluido_selecionado, fluidos_combinados):
-    rho = fluidos_combinados[fluido_selecionado]["rho"]
-    ef_bomba = eficiencia_bomba_percent / 100
-    ef_motor = eficiencia_motor_percent / 100
-    potencia_eletrica_kW = (vazao_m3h / 3600 * rho * 9.81 * h_man) / (ef_bomba * ef_motor) / 1000 if ef_bomba * ef_motor > 0 else 0
-    custo_anual = potencia_eletrica_kW * horas_dia * 30 * 12 * custo_kwh
-    return {"potencia_eletrica_kW": potencia_eletrica_kW, "custo_anual": custo_anual}
-
-def criar_funcao_curva(df_curva, col_x, col_y, grau=2):
-    df_curva[col_x] = pd.to_numeric(df_curva[col_x], errors='coerce')
-    df_curva[col_y] = pd.to_numeric(df_curva[col_y], errors='coerce')
-    df_curva = df_curva.dropna(subset=[col_x, col_y])
-    if len(df_curva) < grau + 1: return None
-    coeficientes = np.polyfit(df_curva[col_x], df_curva[col_y], grau)
-    return np.poly1d(coeficientes)
-
-def encontrar_ponto_operacao(sistema, h_geometrica, fluido, func_curva_bomba, materiais_combinados, fluidos_combinados):
-    def curva_sistema(vazao_m3h):
-        if vazao_m3h < 0: return h_geometrica
-        perda_total = 0
-        perda_total += calcular_perda_serie(sistema['antes'], vazao_m3h, fluido, materiais_combinados, fluidos_combinados)
-        perda_par, _ = calcular_perdas_paralelo(sistema['paralelo'], vazao_m3h, fluido, materiais_combinados, fluidos_combinados)
-        if perda_par == -1: return 1e12
-        perda_total += perda_par
-        perda_total += calcular_perda_serie(sistema['depois'], vazao_m3h, fluido, materiais_combinados, fluidos_combinados)
-        return h_geometrica + perda_total
-    def erro(vazao_m3h):
-        if vazao_m3h < 0: return 1e12
-        return func_curva_bomba(vazao_m3h) - curva_sistema(vazao_m3h)
-    solucao = root(erro, 50.0, method='hybr', options={'xtol': 1e-8})
-    if solucao.success and solucao.x[0] > 1e-3:
-        vazao_op = solucao.x[0]
-        altura_op = func_curva_bomba(vazao_op)
-        return vazao_op, altura_op, curva_sistema
-    else:
-        return None, None, curva_sistema
-
-def gerar_diagrama_rede(sistema, vazao_total, distribuicao_vazao, fluido, materiais_combinados, fluidos_combinados):
-    dot = graphviz.Digraph(comment='Rede de Tubulação'); dot.attr('graph', rankdir='LR', splines='ortho'); dot.attr('node', shape='point'); dot.node('start', 'Bomba', shape='circle', style='filled', fillcolor='lightblue'); ultimo_no = 'start'
-    for i, trecho in enumerate(sistema['antes']):
-        proximo_no = f"no_antes_{i+1}"; velocidade = calcular_perdas_trecho(trecho, vazao_total, fluido, materiais_combinados, fluidos_combinados)['velocidade']; label = f"Trecho Antes {i+1}\\n{vazao_total:.1f} m³/h\\n{velocidade:.2f} m/s"; dot.edge(ultimo_no, proximo_no, label=label); ultimo_no = proximo_no
-    if len(sistema['paralelo']) >= 2 and distribuicao_vazao:
-        no_divisao = ultimo_no; no_juncao = 'no_juncao'; dot.node(no_juncao)
-        for nome_ramal, trechos_ramal in sistema['paralelo'].items():
-            vazao_ramal = distribuicao_vazao.get(nome_ramal, 0); ultimo_no_ramal = no_divisao
-            for i, trecho in enumerate(trechos_ramal):
-                velocidade = calcular_perdas_trecho(trecho, vazao_ramal, fluido, materiais_combinados, fluidos_combinados)['velocidade']; label_ramal = f"{nome_ramal} (T{i+1})\\n{vazao_ramal:.1f} m³/h\\n{velocidade:.2f} m/s"
-                if i == len(trechos_ramal) - 1: dot.edge(ultimo_no_ramal, no_juncao, label=label_ramal)
-                else: proximo_no_ramal = f"no_{nome_ramal}_{i+1}".replace(" ", "_"); dot.edge(ultimo_no_ramal, proximo_no_ramal, label=label_ramal); ultimo_no_ramal = proximo_no_ramal
-        ultimo_no = no_juncao
-    for i, trecho in enumerate(sistema['depois']):
-        proximo_no = f"no_depois_{i+1}"; velocidade = calcular_perdas_trecho(trecho, vazao_total, fluido, materiais_combinados, fluidos_combinados)['velocidade']; label = f"Trecho Depois {i+1}\\n{vazao_total:.1f} m³/h\\n{velocidade:.2f} m/s"; dot.edge(ultimo_no, proximo_no, label=label); ultimo_no = proximo_no
-    dot.node('end', 'Fim', shape='circle', style='filled', fillcolor='lightgray'); dot.edge(ultimo_no, 'end')
-    return dot
-
-def gerar_grafico_sensibilidade_diametro(sistema_base, fator_escala_range, **params_fixos):
-    custos, fatores = [], np.arange(fator_escala_range[0], fator_escala_range[1] + 5, 5)
-    materiais_combinados = params_fixos['materiais_combinados']
-    fluidos_combinados = params_fixos['fluidos_combinados']
-    for fator in fatores:
-        escala = fator / 100.0
-        sistema_escalado = {'antes': [t.copy() for t in sistema_base['antes']], 'paralelo': {k: [t.copy() for t in v] for k, v in sistema_base['paralelo'].items()}, 'depois': [t.copy() for t in sistema_base['depois']]}
-        for t_list in sistema_escalado.values():
-            if isinstance(t_list, list):
-                for t in t_list: t['diametro'] *= escala
-            elif isinstance(t_list, dict):
-                for _, ramal in t_list.items():
-                    for t in ramal: t['diametro'] *= escala
-        vazao_ref = params_fixos['vazao_op']
-        perda_antes = calcular_perda_serie(sistema_escalado['antes'], vazao_ref, params_fixos['fluido'], materiais_combinados, fluidos_combinados)
-        perda_par, _ = calcular_perdas_paralelo(sistema_escalado['paralelo'], vazao_ref, params_fixos['fluido'], materiais_combinados, fluidos_combinados)
-        perda_depois = calcular_perda_serie(sistema_escalado['depois'], vazao_ref, params_fixos['fluido'], materiais_combinados, fluidos_combinados)
-        if perda_par == -1: custos.append(np.nan); continue
-        h_man = params_fixos['h_geo'] + perda_antes + perda_par + perda_depois
-        resultado_energia = calcular_analise_energetica(vazao_ref, h_man, fluidos_combinados=fluidos_combinados, **params_fixos['equipamentos'])
-        custos.append(resultado_energia['custo_anual'])
-    return pd.DataFrame({'Fator de Escala nos Diâmetros (%)': fatores, 'Custo Anual de Energia (R$)': custos})
-
 def render_trecho_ui(trecho, prefixo, lista_trechos, materiais_combinados):
     st.markdown(f"**Trecho**"); c1, c2, c3 = st.columns(3)
     trecho['comprimento'] = c1.number_input("L (m)", min_value=0.1, value=trecho['comprimento'], key=f"comp_{prefixo}_{trecho['id']}")
@@ -197,6 +53,27 @@ def adicionar_ramal_paralelo():
     st.session_state.ramais_paralelos[novo_nome_ramal] = [{"id": novo_id, "comprimento": 50.0, "diametro": 80.0, "material": "Aço Carbono (novo)", "acessorios": []}]
 def remover_ultimo_ramal():
     if len(st.session_state.ramais_paralelos) > 1: st.session_state.ramais_paralelos.popitem()
+def aplicar_cenario(data):
+    st.session_state.h_geometrica = data.get('h_geometrica', 15.0)
+    st.session_state.fluido_selecionado = data.get('fluido_selecionado', "Água a 20°C")
+    st.session_state.temperatura_fluido = data.get('temperatura_fluido', TEMPERATURA_REFERENCIA)
+    st.session_state.curva_altura_df = pd.DataFrame(data['curva_altura'])
+    st.session_state.curva_eficiencia_df = pd.DataFrame(data['curva_eficiencia'])
+    st.session_state.trechos_antes = data['trechos_antes']
+    st.session_state.trechos_depois = data['trechos_depois']
+    st.session_state.ramais_paralelos = data['ramais_paralelos']
+    # Sem os dados no cenário, as telas da estação e da incerteza voltam aos valores padrão ao abrir
+    for chave_dados, chave_estado in (('estacao_bombas', 'estacao_bombas_df'), ('incertezas', 'incertezas_df')):
+        if chave_dados in data:
+            st.session_state[chave_estado] = pd.DataFrame(data[chave_dados])
+        else:
+            st.session_state.pop(chave_estado, None)
+def usar_bomba_catalogo(pump_id):
+    from catalogo_bombas import pontos_bomba
+    pontos = pontos_bomba(pump_id)
+    if pontos is not None:
+        st.session_state.curva_altura_df = pontos['curva_altura']
+        st.session_state.curva_eficiencia_df = pontos['curva_eficiencia']
 def adicionar_acessorio(id_trecho, lista_trechos):
     nome_acessorio = st.session_state[f"selectbox_acessorio_{id_trecho}"]
     quantidade = st.session_state[f"quantidade_acessorio_{id_trecho}"]
@@ -206,20 +83,48 @@ def adicionar_acessorio(id_trecho, lista_trechos):
             break
 
 # --- INICIALIZAÇÃO E AUTENTICAÇÃO ---
-setup_database()
 with open('config.yaml') as file:
     config = yaml.load(file, Loader=SafeLoader)
-authenticator = stauth.Authenticate(
-    config['credentials'],
-    config['cookie']['name'],
-    config['cookie']['key'],
-    config['cookie']['expiry_days']
-)
+# Administradores: lista 'admins' do config.yaml (perfil de desempenho e importação do catálogo)
+admins = config.get('admins', [])
+# Perfil de desempenho por etapa: só para administradores que o ligarem na barra lateral;
+# desligado, as etapas não medem nada. A decisão vem antes do login para que banco_e_login
+# também seja medido, e por isso usa o usuário da execução anterior
+if (st.session_state.get("authentication_status") and st.session_state.get("username") in admins
+        and st.session_state.get("perfil_etapas_ativo")):
+    coleta_perfil = ativar_coleta("rerun")
+else:
+    coleta_perfil = None
+    desativar_coleta()
 
-authenticator.login()
+with etapa("banco_e_login"):
+    setup_database()
+    authenticator = stauth.Authenticate(
+        config['credentials'],
+        config['cookie']['name'],
+        config['cookie']['key'],
+        config['cookie']['expiry_days']
+    )
+    authenticator.login()
+# Depois do login, que define o usuário desta execução (inclusive a que acabou de entrar)
+usuario_admin = bool(st.session_state.get("authentication_status")) and st.session_state.get("username") in admins
 
 # --- LÓGICA PRINCIPAL DA APLICAÇÃO ---
 if st.session_state.get("authentication_status"):
+    # Só o necessário para a tela principal; cada análise opcional importa o próprio módulo
+    # quando é aberta pela primeira vez. Nas execuções seguintes eles vêm de sys.modules.
+    with etapa("importacoes"):
+        import pandas as pd
+        import numpy as np
+        import matplotlib.pyplot as plt
+        from graficos import criar_figura_curvas, criar_figura_estacao, criar_figura_faixas, gerar_diagrama_rede
+        from servico_relatorios import SERVICO_RELATORIOS, chave_relatorio, montar_dados_relatorio
+        from hidraulica import (
+            K_FACTORS, calcular_analise_energetica, calcular_curva_sistema, resolver_hidraulica
+        )
+        from propriedades_fluidos import TEMPERATURA_REFERENCIA, fluido_na_temperatura, propriedades_fluido, tabela_de_editor, tabela_do_fluido
+        from cache_resultados import BIBLIOTECA_USUARIOS, CACHE_HIDRAULICO, chave_hidraulica
+
     name = st.session_state['name']
     username = st.session_state['username']
     
@@ -232,13 +137,15 @@ if st.session_state.get("authentication_status"):
         st.session_state.curva_eficiencia_df = pd.DataFrame([{"Vazão (m³/h)": 0, "Eficiência (%)": 0}, {"Vazão (m³/h)": 50, "Eficiência (%)": 70}, {"Vazão (m³/h)": 100, "Eficiência (%)": 65}])
     if 'fluido_selecionado' not in st.session_state: st.session_state.fluido_selecionado = "Água a 20°C"
     if 'h_geometrica' not in st.session_state: st.session_state.h_geometrica = 15.0
+    if 'temperatura_fluido' not in st.session_state: st.session_state.temperatura_fluido = TEMPERATURA_REFERENCIA
 
-    user_fluids = get_user_fluids(username)
-    fluidos_combinados = {**FLUIDOS_PADRAO, **user_fluids}
-    user_materials = get_user_materials(username)
-    materiais_combinados = {**MATERIAIS_PADRAO, **user_materials}
+    # Biblioteca em cache por usuário; recarregada só quando um fluido ou material muda
+    with etapa("biblioteca"):
+        biblioteca = BIBLIOTECA_USUARIOS.obter(username)
+    user_fluids, user_materials = biblioteca["fluidos_usuario"], biblioteca["materiais_usuario"]
+    fluidos_combinados, materiais_combinados = biblioteca["fluidos"], biblioteca["materiais"]
     
-    with st.sidebar:
+    with st.sidebar, etapa("barra_lateral"):
         st.header(f"Bem-vindo(a), {name}!")
         st.divider()
         st.header("🚀 Gestão de Projetos e Cenários")
@@ -255,33 +162,51 @@ if st.session_state.get("authentication_status"):
 
         scenarios = []
         scenario_idx = 0
+        metadados_cenarios = {}
         if st.session_state.get("selected_project"):
-            scenarios = get_scenarios_for_project(username, st.session_state.selected_project)
+            # Só metadados: a lista não lê os dados (comprimidos) dos cenários
+            metadados_cenarios = {meta['scenario_name']: meta for meta in list_scenarios(username, st.session_state.selected_project)}
+            scenarios = list(metadados_cenarios)
             if st.session_state.get('scenario_to_select') in scenarios:
                 scenario_idx = scenarios.index(st.session_state.get('scenario_to_select'))
                 del st.session_state['scenario_to_select']
             elif st.session_state.get('selected_scenario') in scenarios:
                 scenario_idx = scenarios.index(st.session_state.get('selected_scenario'))
 
-        st.selectbox("Selecione o Cenário", scenarios, index=scenario_idx, key="selected_scenario", placeholder="Nenhum cenário encontrado")
+        def rotulo_cenario(nome):
+            meta = metadados_cenarios.get(nome)
+            if not meta:
+                return nome
+            rotulo = f"{nome} · {meta['num_segments']} trechos · v{meta['version']}"
+            if meta['last_results']:
+                rotulo += f" · {meta['last_results']['vazao_op']:.1f} m³/h"
+            return rotulo
+        st.selectbox("Selecione o Cenário", scenarios, index=scenario_idx, key="selected_scenario", placeholder="Nenhum cenário encontrado", format_func=rotulo_cenario)
         
         col1, col2 = st.columns(2)
         if col1.button("Carregar Cenário", use_container_width=True, disabled=not st.session_state.get("selected_scenario")):
             data = load_scenario(username, st.session_state.selected_project, st.session_state.selected_scenario)
             if data:
-                st.session_state.h_geometrica = data.get('h_geometrica', 15.0)
-                st.session_state.fluido_selecionado = data.get('fluido_selecionado', "Água a 20°C")
-                st.session_state.curva_altura_df = pd.DataFrame(data['curva_altura'])
-                st.session_state.curva_eficiencia_df = pd.DataFrame(data['curva_eficiencia'])
-                st.session_state.trechos_antes = data['trechos_antes']
-                st.session_state.trechos_depois = data['trechos_depois']
-                st.session_state.ramais_paralelos = data['ramais_paralelos']
+                aplicar_cenario(data)
                 st.success(f"Cenário '{st.session_state.selected_scenario}' carregado.")
                 st.rerun()
         if col2.button("Deletar Cenário", use_container_width=True, disabled=not st.session_state.get("selected_scenario")):
             delete_scenario(username, st.session_state.selected_project, st.session_state.selected_scenario)
             st.success(f"Cenário '{st.session_state.selected_scenario}' deletado.")
             st.rerun()
+        if st.session_state.get("selected_scenario"):
+            with st.expander("🕘 Histórico de Versões"):
+                versoes = get_scenario_versions(username, st.session_state.selected_project, st.session_state.selected_scenario)
+                versao_escolhida = st.selectbox(
+                    "Versão", [v['version'] for v in versoes], key="versao_cenario",
+                    format_func=lambda n: next(f"v{v['version']} · {str(v['created_at'])[:16]} · {v['size_bytes']} B{' (completa)' if v['is_full'] else ''}" for v in versoes if v['version'] == n)
+                )
+                if st.button("Restaurar Versão", use_container_width=True, disabled=not versoes or versao_escolhida == versoes[0]['version']):
+                    data = restore_scenario_version(username, st.session_state.selected_project, st.session_state.selected_scenario, versao_escolhida)
+                    if data:
+                        aplicar_cenario(data)
+                        st.success(f"Versão {versao_escolhida} restaurada como versão atual.")
+                        st.rerun()
 
         st.divider()
         st.subheader("Salvar Cenário")
@@ -292,13 +217,18 @@ if st.session_state.get("authentication_status"):
                 scenario_data = {
                     'h_geometrica': st.session_state.h_geometrica,
                     'fluido_selecionado': st.session_state.fluido_selecionado,
+                    'temperatura_fluido': st.session_state.temperatura_fluido,
                     'curva_altura': st.session_state.curva_altura_df.to_dict('records'),
                     'curva_eficiencia': st.session_state.curva_eficiencia_df.to_dict('records'),
                     'trechos_antes': st.session_state.trechos_antes,
                     'trechos_depois': st.session_state.trechos_depois,
                     'ramais_paralelos': st.session_state.ramais_paralelos
                 }
-                save_scenario(username, project_name_input, scenario_name_input, scenario_data)
+                # Editores das telas de análise que ainda não foram abertas ficam de fora (valem os padrões)
+                for chave_dados, chave_estado in (('estacao_bombas', 'estacao_bombas_df'), ('incertezas', 'incertezas_df')):
+                    if chave_estado in st.session_state:
+                        scenario_data[chave_dados] = st.session_state[chave_estado].to_dict('records')
+                save_scenario(username, project_name_input, scenario_name_input, scenario_data, results=st.session_state.get("ultimos_resultados"))
                 st.success(f"Cenário '{scenario_name_input}' salvo.")
                 st.session_state.project_to_select = project_name_input
                 st.session_state.scenario_to_select = scenario_name_input
@@ -317,20 +247,36 @@ if st.session_state.get("authentication_status"):
                 new_fluid_name = st.text_input("Nome do Fluido")
                 new_fluid_density = st.number_input("Densidade (ρ) [kg/m³]", format="%.2f", min_value=0.0)
                 new_fluid_viscosity = st.number_input("Viscosidade Cinemática (ν) [m²/s]", format="%.4e", min_value=0.0)
+                st.caption(f"Opcional: propriedades por temperatura. Com a tabela, ρ e ν acima podem ficar em zero (valem os da tabela a {TEMPERATURA_REFERENCIA:g} °C).")
+                new_fluid_table = st.data_editor(pd.DataFrame({"Temperatura (°C)": [], "Densidade (kg/m³)": [], "Viscosidade (m²/s)": []}, dtype=float),
+                                                 num_rows="dynamic", hide_index=True, key="editor_tabela_fluido",
+                                                 column_config={"Viscosidade (m²/s)": st.column_config.NumberColumn(format="%.4e")})
                 submitted_fluid = st.form_submit_button("Adicionar Fluido")
                 if submitted_fluid:
-                    if new_fluid_name and new_fluid_density > 0 and new_fluid_viscosity > 0:
-                        if add_user_fluid(username, new_fluid_name, new_fluid_density, new_fluid_viscosity):
-                            st.success(f"Fluido '{new_fluid_name}' adicionado!")
-                            st.rerun()
-                        else:
-                            st.error(f"Fluido '{new_fluid_name}' já existe.")
+                    try:
+                        tabela_fluido = tabela_de_editor(new_fluid_table)
+                    except ValueError as e:
+                        st.error(str(e))
                     else:
-                        st.warning("Preencha todos os campos do fluido com valores válidos.")
+                        if tabela_fluido and (new_fluid_density <= 0 or new_fluid_viscosity <= 0):
+                            # Valores de referência vindos da própria tabela (dentro da faixa dela)
+                            temperatura_ref = min(max(TEMPERATURA_REFERENCIA, min(tabela_fluido[0])), max(tabela_fluido[0]))
+                            new_fluid_density, new_fluid_viscosity = propriedades_fluido({"tabela": tabela_fluido}, temperatura_ref)
+                        if new_fluid_name and new_fluid_density > 0 and new_fluid_viscosity > 0:
+                            if add_user_fluid(username, new_fluid_name, new_fluid_density, new_fluid_viscosity, tabela_fluido):
+                                st.success(f"Fluido '{new_fluid_name}' adicionado!")
+                                st.rerun()
+                            else:
+                                st.error(f"Fluido '{new_fluid_name}' já existe.")
+                        else:
+                            st.warning("Preencha todos os campos do fluido com valores válidos.")
             if user_fluids:
                 st.write("Fluidos Salvos:")
-                fluids_df = pd.DataFrame.from_dict(user_fluids, orient='index').reset_index()
-                fluids_df.columns = ['Nome', 'Densidade (ρ)', 'Viscosidade (ν)']
+                fluids_df = pd.DataFrame([
+                    {'Nome': nome, 'Densidade (ρ)': fluido['rho'], 'Viscosidade (ν)': fluido['nu'],
+                     'Faixa da Tabela (°C)': f"{min(fluido['tabela'][0]):g} a {max(fluido['tabela'][0]):g}" if fluido.get('tabela') else "—"}
+                    for nome, fluido in user_fluids.items()
+                ])
                 st.dataframe(fluids_df, use_container_width=True, hide_index=True)
                 fluid_to_delete = st.selectbox("Selecione um fluido para deletar", options=[""] + list(user_fluids.keys()))
                 if st.button("Deletar Fluido", key="del_fluid"):
@@ -370,6 +316,15 @@ if st.session_state.get("authentication_status"):
         if st.session_state.fluido_selecionado in lista_fluidos:
             idx_fluido = lista_fluidos.index(st.session_state.fluido_selecionado)
         st.session_state.fluido_selecionado = st.selectbox("Selecione o Fluido", lista_fluidos, index=idx_fluido)
+        tabela_fluido_sel = tabela_do_fluido(fluidos_combinados[st.session_state.fluido_selecionado])
+        if tabela_fluido_sel is not None:
+            temperatura_min, temperatura_max = tabela_fluido_sel.faixa
+            st.session_state.temperatura_fluido = st.number_input("Temperatura do Fluido (°C)", temperatura_min, temperatura_max,
+                                                                  float(min(max(st.session_state.temperatura_fluido, temperatura_min), temperatura_max)))
+            # Daqui em diante os cálculos usam o fluido na temperatura escolhida (cópia; a biblioteca em cache não muda)
+            fluidos_combinados = fluido_na_temperatura(fluidos_combinados, st.session_state.fluido_selecionado, st.session_state.temperatura_fluido)
+            fluido_atual = fluidos_combinados[st.session_state.fluido_selecionado]
+            st.caption(f"ρ = {fluido_atual['rho']:.1f} kg/m³ · ν = {fluido_atual['nu']:.3e} m²/s")
         st.session_state.h_geometrica = st.number_input("Altura Geométrica (m)", 0.0, value=st.session_state.h_geometrica)
         st.divider()
         with st.expander("📈 Curva da Bomba", expanded=True):
@@ -392,37 +347,49 @@ if st.session_state.get("authentication_status"):
                 with st.container(border=True): render_trecho_ui(trecho, f"depois_{i}", st.session_state.trechos_depois, materiais_combinados)
             c1, c2 = st.columns(2); c1.button("Adicionar Trecho (Depois)", on_click=adicionar_item, args=("trechos_depois",), use_container_width=True); c2.button("Remover Trecho (Depois)", on_click=remover_ultimo_item, args=("trechos_depois",), use_container_width=True)
         st.divider(); st.header("🔌 Equipamentos e Custo"); rend_motor = st.slider("Eficiência do Motor (%)", 1, 100, 90); horas_por_dia = st.number_input("Horas por Dia", 1.0, 24.0, 8.0, 0.5); tarifa_energia = st.number_input("Custo da Energia (R$/kWh)", 0.10, 5.00, 0.75, 0.01, format="%.2f")
+        with st.expander("🗄️ Cache de Resultados"):
+            estat_cache = CACHE_HIDRAULICO.estatisticas()
+            c1, c2 = st.columns(2)
+            c1.metric("Acertos", estat_cache["acertos"]); c2.metric("Falhas", estat_cache["falhas"])
+            st.caption(f"Taxa de acerto: {estat_cache['taxa_acerto']:.0%} · {estat_cache['entradas']} entradas ({estat_cache['bytes'] / 1024:.0f} kB) · Tempo economizado: {estat_cache['tempo_economizado_s']:.2f} s")
+        if usuario_admin:
+            # Preenchido no fim do script, quando todas as etapas do rerun já foram medidas
+            painel_perfil = st.expander("⏱️ Perfil de Desempenho", expanded=coleta_perfil is not None)
+            painel_perfil.checkbox("Medir as etapas de cada execução", key="perfil_etapas_ativo")
 
     # --- CORPO PRINCIPAL DA APLICAÇÃO ---
     st.title("💧 Análise de Redes de Bombeamento com Curva de Bomba")
     
     try:
         sistema_atual = {'antes': st.session_state.trechos_antes, 'paralelo': st.session_state.ramais_paralelos, 'depois': st.session_state.trechos_depois}
-        func_curva_bomba = criar_funcao_curva(st.session_state.curva_altura_df, "Vazão (m³/h)", "Altura (m)")
-        func_curva_eficiencia = criar_funcao_curva(st.session_state.curva_eficiencia_df, "Vazão (m³/h)", "Eficiência (%)")
-        if func_curva_bomba is None or func_curva_eficiencia is None:
+        # Resultado hidráulico em cache (compartilhado entre sessões); energia e custo são recalculados a cada rerun
+        with etapa("chave_hidraulica"):
+            chave_cenario = chave_hidraulica(sistema_atual, st.session_state.h_geometrica, st.session_state.fluido_selecionado, fluidos_combinados, materiais_combinados, st.session_state.curva_altura_df, st.session_state.curva_eficiencia_df)
+        with etapa("resultado_hidraulico"):
+            resultado_hidraulico = CACHE_HIDRAULICO.obter_ou_calcular(chave_cenario, lambda: resolver_hidraulica(
+                sistema_atual, st.session_state.h_geometrica, st.session_state.fluido_selecionado,
+                st.session_state.curva_altura_df, st.session_state.curva_eficiencia_df, materiais_combinados, fluidos_combinados
+            ))
+        st.session_state.ultimos_resultados = None
+        if resultado_hidraulico["status"] == "curva_insuficiente":
             st.warning("Forneça pontos de dados suficientes para as curvas da bomba.")
             st.stop()
-        
-        shutoff_head = func_curva_bomba(0)
-        if shutoff_head < st.session_state.h_geometrica:
-            st.error(f"**Bomba Incompatível:** A altura máxima da bomba ({shutoff_head:.2f} m) é menor que a Altura Geométrica ({st.session_state.h_geometrica:.2f} m).")
+        if resultado_hidraulico["status"] == "bomba_incompativel":
+            st.error(f"**Bomba Incompatível:** A altura máxima da bomba ({resultado_hidraulico['shutoff_head']:.2f} m) é menor que a Altura Geométrica ({st.session_state.h_geometrica:.2f} m).")
             st.stop()
-        is_rede_vazia = not any(
-            trecho for parte in sistema_atual.values()
-            for trecho in (parte if isinstance(parte, list) else [item for sublist in parte.values() for item in sublist])
-        )
-        if is_rede_vazia:
+        if resultado_hidraulico["status"] == "rede_vazia":
             st.warning("Adicione pelo menos um trecho à rede para realizar o cálculo.")
             st.stop()
 
-        vazao_op, altura_op, func_curva_sistema = encontrar_ponto_operacao(sistema_atual, st.session_state.h_geometrica, st.session_state.fluido_selecionado, func_curva_bomba, materiais_combinados, fluidos_combinados)
-        
-        if vazao_op is not None and altura_op is not None:
-            eficiencia_op = func_curva_eficiencia(vazao_op)
-            if eficiencia_op > 100: eficiencia_op = 100
-            if eficiencia_op < 0: eficiencia_op = 0
+        if resultado_hidraulico["status"] == "ok":
+            rede = resultado_hidraulico["rede"]
+            vazao_op, altura_op = resultado_hidraulico["vazao_op"], resultado_hidraulico["altura_op"]
+            eficiencia_op = resultado_hidraulico["eficiencia_op"]
             resultados_energia = calcular_analise_energetica(vazao_op, altura_op, eficiencia_op, rend_motor, horas_por_dia, tarifa_energia, st.session_state.fluido_selecionado, fluidos_combinados)
+            # Guardados nos metadados do cenário no próximo "Salvar" (a barra lateral roda antes deste cálculo)
+            st.session_state.ultimos_resultados = {
+                "vazao_op": vazao_op, "altura_op": altura_op, "eficiencia_op": eficiencia_op, "custo_anual": float(resultados_energia['custo_anual'])
+            }
             
             st.header("📊 Resultados no Ponto de Operação")
             c1,c2,c3,c4 = st.columns(4)
@@ -432,87 +399,403 @@ if st.session_state.get("authentication_status"):
             c4.metric("Custo Anual", f"R$ {resultados_energia['custo_anual']:.2f}")
             st.divider()
 
-            fig_curvas, ax_curvas = plt.subplots(figsize=(8.5, 5.5)) # Tamanho otimizado para PDF
-            
-            # ALTERAÇÃO 1: Restaurando a legenda detalhada do ponto de operação
-            label_ponto_op = f'Ponto de Operação ({vazao_op:.1f} m³/h, {altura_op:.1f} m)'
-            
-            max_vazao_curva = st.session_state.curva_altura_df['Vazão (m³/h)'].max()
-            max_plot_vazao = max(vazao_op * 1.2, max_vazao_curva * 1.2) 
-            vazao_range = np.linspace(0, max_plot_vazao, 100)
-            altura_bomba = func_curva_bomba(vazao_range)
-            altura_sistema = [func_curva_sistema(q) if func_curva_sistema(q) < 1e10 else np.nan for q in vazao_range]
-            ax_curvas.plot(vazao_range, altura_bomba, label='Curva da Bomba', color='royalblue', lw=2)
-            ax_curvas.plot(vazao_range, altura_sistema, label='Curva do Sistema', color='seagreen', lw=2)
-            ax_curvas.scatter(vazao_op, altura_op, color='red', s=100, zorder=5, label=label_ponto_op)
-            ax_curvas.set_title("Curva da Bomba vs. Curva do Sistema")
-            ax_curvas.set_xlabel("Vazão (m³/h)")
-            ax_curvas.set_ylabel("Altura Manométrica (m)")
-            ax_curvas.legend()
-            ax_curvas.grid(True)
+            vazao_range = resultado_hidraulico["vazao_range"]
+            altura_bomba = resultado_hidraulico["altura_bomba"]
+            altura_sistema = resultado_hidraulico["altura_sistema"]
+            with etapa("figura_curvas"):
+                fig_curvas = criar_figura_curvas(vazao_range, altura_bomba, altura_sistema, vazao_op, altura_op)
             
             st.header("📄 Exportar Relatório")
-            params_data = {
-                "Fluido Selecionado": st.session_state.fluido_selecionado,
-                "Altura Geométrica (m)": f"{st.session_state.h_geometrica:.2f}",
-                "Horas de Operação por Dia": f"{horas_por_dia:.1f}",
-                "Custo de Energia (R$/kWh)": f"{tarifa_energia:.2f}",
-                "Eficiência do Motor (%)": f"{rend_motor:.1f}"
-            }
-            results_data = {
-                "Potência Elétrica Consumida (kW)": f"{resultados_energia['potencia_eletrica_kW']:.2f}",
-                "Custo Anual de Energia (R$)": f"{resultados_energia['custo_anual']:.2f}"
-            }
-            metrics_data = [
-                ("Vazão (m³/h)", f"{vazao_op:.2f}"),
-                ("Altura (m)", f"{altura_op:.2f}"),
-                ("Eficiência Bomba (%)", f"{eficiencia_op:.1f}")
-            ]
-            
-            _, distribuicao_vazao_op = calcular_perdas_paralelo(sistema_atual['paralelo'], vazao_op, st.session_state.fluido_selecionado, materiais_combinados, fluidos_combinados)
-            diagrama_obj = gerar_diagrama_rede(sistema_atual, vazao_op, distribuicao_vazao_op if len(sistema_atual['paralelo']) >= 2 else {}, st.session_state.fluido_selecionado, materiais_combinados, fluidos_combinados)
-            diagrama_bytes = diagrama_obj.pipe(format='png')
-
-            chart_buffer = io.BytesIO()
-            fig_curvas.savefig(chart_buffer, format='PNG', dpi=300, bbox_inches='tight')
-            chart_buffer.seek(0)
+            distribuicao_vazao_op = resultado_hidraulico["distribuicao_vazao"]
+            with etapa("diagrama_rede"):
+                diagrama_obj = gerar_diagrama_rede(sistema_atual, vazao_op, distribuicao_vazao_op if len(sistema_atual['paralelo']) >= 2 else {}, st.session_state.fluido_selecionado, materiais_combinados, fluidos_combinados)
 
-            pdf_bytes = generate_report(
-                project_name=st.session_state.get("selected_project", "N/A"),
-                scenario_name=st.session_state.get("selected_scenario", "N/A"),
-                params_data=params_data,
-                results_data=results_data,
-                metrics_data=metrics_data,
-                network_data=sistema_atual,
-                diagram_image_bytes=diagrama_bytes,
-                chart_figure_bytes=chart_buffer.getvalue()
-            )
-            st.download_button(
-                label="📥 Baixar Relatório em PDF",
-                data=pdf_bytes,
-                file_name=f"Relatorio_{st.session_state.get('selected_project', 'NovoProjeto')}_{st.session_state.get('selected_scenario', 'NovoCenario')}.pdf",
-                mime="application/pdf"
+            # O PDF (diagrama PNG, gráfico em 300 dpi e montagem) só é gerado quando solicitado, no pool de processos
+            dados_relatorio = montar_dados_relatorio(
+                st.session_state.get("selected_project", "N/A"), st.session_state.get("selected_scenario", "N/A"),
+                sistema_atual, st.session_state.h_geometrica, st.session_state.fluido_selecionado, resultado_hidraulico,
+                resultados_energia, rend_motor, horas_por_dia, tarifa_energia, diagrama_obj.source
             )
+            chave_rel = chave_relatorio(chave_cenario, dados_relatorio)
+            if st.button("📄 Gerar Relatório em PDF"):
+                st.session_state.relatorio_solicitado = chave_rel
+            if st.session_state.get("relatorio_solicitado") == chave_rel:
+                with st.spinner("Gerando relatório..."), etapa("relatorio_pdf"):
+                    pdf_bytes = SERVICO_RELATORIOS.solicitar(chave_rel, dados_relatorio, perfil=coleta_perfil is not None).result()
+                    if coleta_perfil is not None:
+                        # Etapas medidas no processo de trabalho (diagrama PNG, savefig, montagem do PDF)
+                        coleta_perfil.incorporar(SERVICO_RELATORIOS.obter_etapas(chave_rel))
+                st.download_button(
+                    label="📥 Baixar Relatório em PDF",
+                    data=pdf_bytes,
+                    file_name=f"Relatorio_{st.session_state.get('selected_project', 'NovoProjeto')}_{st.session_state.get('selected_scenario', 'NovoCenario')}.pdf",
+                    mime="application/pdf"
+                )
             
             st.divider()
             st.header("🗺️ Diagrama da Rede")
             st.graphviz_chart(diagrama_obj)
             st.divider()
             st.header("📈 Gráfico de Curvas: Bomba vs. Sistema")
-            st.pyplot(fig_curvas)
+            with etapa("exibir_grafico_curvas"):
+                st.pyplot(fig_curvas)
             plt.close(fig_curvas)
             st.divider()
-            st.header("📈 Análise de Sensibilidade de Custo por Diâmetro")
-            escala_range = st.slider("Fator de Escala para Diâmetros (%)", 50, 200, (80, 120), key="sensibilidade_slider")
-            params_equipamentos_sens = {'eficiencia_bomba_percent': eficiencia_op, 'eficiencia_motor_percent': rend_motor, 'horas_dia': horas_por_dia, 'custo_kwh': tarifa_energia, 'fluido_selecionado': st.session_state.fluido_selecionado}
-            params_fixos_sens = {'vazao_op': vazao_op, 'h_geo': st.session_state.h_geometrica, 'fluido': st.session_state.fluido_selecionado, 'equipamentos': params_equipamentos_sens, 'materiais_combinados': materiais_combinados, 'fluidos_combinados': fluidos_combinados}
-            chart_data_sensibilidade = gerar_grafico_sensibilidade_diametro(sistema_atual, escala_range, **params_fixos_sens)
-            st.line_chart(chart_data_sensibilidade.set_index('Fator de Escala nos Diâmetros (%)'))
+            func_curva_bomba = resultado_hidraulico["func_curva_bomba"]
+            analise = st.radio("Análises", ANALISES, index=None, horizontal=True, key="analise_selecionada")
+            if analise is None:
+                st.caption("Escolha uma análise acima; o módulo de cada uma só é carregado quando ela é aberta.")
+            elif analise == "Sensibilidade de Diâmetros":
+                with etapa("importacoes", analise=analise):
+                    from sensibilidade import (
+                        dataframe_sensibilidade, sensibilidade_por_grupo, sensibilidade_temperatura, sensibilidade_uniforme, tabela_custos,
+                        varredura_diametro_vazao
+                    )
+                st.header("📈 Análise de Sensibilidade de Diâmetros")
+                st.caption("O ponto de operação é recalculado para cada candidato; como a vazão muda com o diâmetro, a energia por m³ bombeado é a base de comparação.")
+                tipo_sens = st.radio("Tipo de análise", ["Escala uniforme", "Por trecho / ramal", "Diâmetro × Vazão"], horizontal=True, key="sensibilidade_tipo")
+                escala_range = st.slider("Fator de Escala para Diâmetros (%)", 50, 200, (80, 120), key="sensibilidade_slider")
+                fatores_sens = np.arange(escala_range[0], escala_range[1] + 1, 1)
+                args_sens = (st.session_state.h_geometrica, resultado_hidraulico["func_curva_bomba"], resultado_hidraulico["func_curva_eficiencia"])
+                args_custo = (rend_motor, horas_por_dia, tarifa_energia, st.session_state.fluido_selecionado, fluidos_combinados)
+                chave_sens = f"{chave_cenario}:sensibilidade:{tipo_sens}:{escala_range[0]}-{escala_range[1]}"
+                coluna_fator = 'Fator de Escala nos Diâmetros (%)'
+                if tipo_sens == "Escala uniforme":
+                    with etapa("sensibilidade", tipo=tipo_sens):
+                        pontos_sens = CACHE_HIDRAULICO.obter_ou_calcular(chave_sens, lambda: sensibilidade_uniforme(rede, fatores_sens, *args_sens, chute_vazao=vazao_op))
+                    df_sens = dataframe_sensibilidade(tabela_custos(pontos_sens, *args_custo)).set_index(coluna_fator)
+                    c1, c2 = st.columns(2)
+                    c1.line_chart(df_sens['Custo Anual de Energia (R$)']); c2.line_chart(df_sens['Energia Específica (kWh/m³)'])
+                    st.line_chart(df_sens['Vazão (m³/h)'])
+                elif tipo_sens == "Por trecho / ramal":
+                    with etapa("sensibilidade", tipo=tipo_sens):
+                        pontos_sens = CACHE_HIDRAULICO.obter_ou_calcular(chave_sens, lambda: sensibilidade_por_grupo(rede, fatores_sens, *args_sens, chute_vazao=vazao_op))
+                    df_sens = dataframe_sensibilidade(tabela_custos(pontos_sens, *args_custo))
+                    st.line_chart(df_sens, x=coluna_fator, y='Energia Específica (kWh/m³)', color='Grupo')
+                    energia_especifica_atual = resultados_energia['potencia_eletrica_kW'] / vazao_op
+                    ranking = df_sens[df_sens[coluna_fator] == escala_range[1]].set_index('Grupo')
+                    ranking = ranking.assign(**{'Redução de Energia Específica (%)': 100 * (1 - ranking['Energia Específica (kWh/m³)'] / energia_especifica_atual)})
+                    st.subheader(f"Efeito de escalar cada trecho/ramal em {escala_range[1]}%")
+                    st.dataframe(ranking.drop(columns=coluna_fator).sort_values('Redução de Energia Específica (%)', ascending=False), use_container_width=True)
+                else:
+                    vazoes_mapa = np.linspace(0, vazao_range.max(), 60)
+                    with etapa("sensibilidade", tipo=tipo_sens):
+                        alturas_mapa = CACHE_HIDRAULICO.obter_ou_calcular(chave_sens, lambda: varredura_diametro_vazao(rede, fatores_sens, vazoes_mapa, st.session_state.h_geometrica))
+                    fig_mapa, ax_mapa = plt.subplots(figsize=(8.5, 5))
+                    mapa = ax_mapa.contourf(vazoes_mapa, fatores_sens, alturas_mapa, levels=20, cmap='viridis')
+                    fig_mapa.colorbar(mapa, ax=ax_mapa, label="Altura do Sistema (m)")
+                    # Lugar geométrico dos pontos de operação: onde a altura do sistema iguala a da bomba
+                    ax_mapa.contour(vazoes_mapa, fatores_sens, alturas_mapa - resultado_hidraulico["func_curva_bomba"](vazoes_mapa), levels=[0], colors='red')
+                    ax_mapa.scatter(vazao_op, 100, color='red', zorder=5, label='Ponto de Operação Atual')
+                    ax_mapa.set_xlabel("Vazão (m³/h)"); ax_mapa.set_ylabel(coluna_fator); ax_mapa.legend()
+                    st.pyplot(fig_mapa)
+                    plt.close(fig_mapa)
+                if tabela_fluido_sel is not None:
+                    st.subheader("🌡️ Temperatura do Fluido (Verão × Inverno)")
+                    faixa_temperatura = st.slider("Faixa de Temperaturas (°C)", temperatura_min, temperatura_max,
+                                                  (max(temperatura_min, 5.0), min(temperatura_max, 35.0)), key="sensibilidade_temperatura")
+                    temperaturas_sens = np.linspace(faixa_temperatura[0], faixa_temperatura[1], 31)
+                    chave_temperatura = f"{chave_cenario}:sensibilidade_temperatura:{faixa_temperatura[0]}-{faixa_temperatura[1]}"
+                    with etapa("sensibilidade", tipo="temperatura"):
+                        pontos_temperatura = CACHE_HIDRAULICO.obter_ou_calcular(chave_temperatura, lambda: sensibilidade_temperatura(rede, temperaturas_sens, *args_sens, chute_vazao=vazao_op))
+                    df_temperatura = dataframe_sensibilidade(tabela_custos(pontos_temperatura, *args_custo)).set_index('Temperatura do Fluido (°C)')
+                    c1, c2 = st.columns(2)
+                    c1.line_chart(df_temperatura['Vazão (m³/h)']); c2.line_chart(df_temperatura['Custo Anual de Energia (R$)'])
+            elif analise == "Otimização de Diâmetros":
+                with etapa("importacoes", analise=analise):
+                    from otimizacao_diametros import OtimizadorDiametros
+                st.header("🧮 Otimização de Diâmetros (Custo de Ciclo de Vida)")
+                st.caption("Diâmetros comerciais que minimizam o custo das tubulações mais o valor presente da energia, mantendo a vazão mínima no ponto de operação recalculado. A energia é a de bombear o mesmo volume anual em todos os projetos (vazão mínima × horas de operação): um projeto com vazão maior opera menos horas.")
+                c1, c2, c3 = st.columns(3)
+                taxa_desconto = c1.number_input("Taxa de Desconto (% a.a.)", 0.0, 30.0, 8.0, 0.5, key="otimizacao_taxa")
+                vida_util = c2.number_input("Vida Útil (anos)", 1, 50, 20, key="otimizacao_vida")
+                vazao_minima = c3.number_input("Vazão Mínima (m³/h)", 0.0, float(vazao_range.max()), float(round(vazao_op, 2)), key="otimizacao_vazao")
+                mesmo_diametro = st.checkbox("Mesmo diâmetro em todo o ramal", key="otimizacao_ramal")
+                chave_otim = f"{chave_cenario}:otimizacao:{taxa_desconto}:{vida_util}:{vazao_minima}:{mesmo_diametro}:{rend_motor}:{horas_por_dia}:{tarifa_energia}"
+                if st.button("🧮 Otimizar Diâmetros"):
+                    st.session_state.otimizacao_solicitada = chave_otim
+                if st.session_state.get("otimizacao_solicitada") == chave_otim:
+                    otimizador = OtimizadorDiametros(
+                        rede, st.session_state.h_geometrica, resultado_hidraulico["func_curva_bomba"], resultado_hidraulico["func_curva_eficiencia"],
+                        rend_motor, horas_por_dia, tarifa_energia, st.session_state.fluido_selecionado, fluidos_combinados,
+                        vazao_minima_m3h=vazao_minima, taxa_desconto_percent=taxa_desconto, vida_util_anos=vida_util, mesmo_diametro_no_ramal=mesmo_diametro
+                    )
+                    with st.spinner("Otimizando diâmetros..."), etapa("otimizacao_diametros"):
+                        otimizacao = CACHE_HIDRAULICO.obter_ou_calcular(chave_otim, otimizador.otimizar)
+                    if otimizacao["status"] == "sem_variaveis":
+                        st.warning("A rede não possui trechos a dimensionar.")
+                    elif otimizacao["status"] == "inviavel":
+                        st.error(f"Nenhuma combinação do catálogo atinge a vazão mínima de {vazao_minima:.2f} m³/h com esta bomba.")
+                    else:
+                        c1, c2, c3, c4 = st.columns(4)
+                        c1.metric("Custo de Ciclo de Vida", f"R$ {otimizacao['custo_ciclo_vida']:,.2f}")
+                        c2.metric("Custo das Tubulações", f"R$ {otimizacao['capex']:,.2f}")
+                        c3.metric("Custo Anual de Energia", f"R$ {otimizacao['opex_anual']:,.2f}")
+                        c4.metric("Vazão", f"{otimizacao['vazao']:.2f} m³/h")
+                        st.dataframe(pd.DataFrame({"Diâmetro Ótimo (mm)": otimizacao["diametros_mm"]}), use_container_width=True)
+                        st.subheader("Fronteira de Pareto: Custo das Tubulações × Custo Anual de Energia")
+                        st.scatter_chart(otimizacao["pareto"], x="Capex (R$)", y="Custo Anual de Energia (R$)")
+                        garantia = "ótimo global" if otimizacao["otimo_global"] else "melhor projeto encontrado (limite de avaliações atingido)"
+                        st.caption(f"{otimizacao['avaliacoes']} projetos avaliados; {otimizacao['tamanhos_podados']} de {otimizacao['tamanhos_total']} tamanhos descartados pela poda; {garantia}.")
+                        with st.expander("Projetos da fronteira"):
+                            st.dataframe(otimizacao["pareto"], use_container_width=True)
+            elif analise == "Período Estendido":
+                with etapa("importacoes", analise=analise):
+                    from simulacao_periodo import dataframe_simulacao, perfil_horario_padrao, perfil_temperatura, simular_periodo
+                if 'perfil_horario_df' not in st.session_state: st.session_state.perfil_horario_df = perfil_horario_padrao()
+                st.header("🕒 Simulação em Período Estendido")
+                st.caption("A altura geométrica acompanha o nível do reservatório de descarga (a Altura Geométrica informada é a do reservatório vazio); a bomba liga e desliga por nível, fica parada nos horários bloqueados e paga a tarifa de cada hora.")
+                c1, c2, c3, c4 = st.columns(4)
+                horas_sim = 24 if c1.radio("Período", ["24 horas", "1 ano (8760 h)"], key="simulacao_periodo") == "24 horas" else 8760
+                passo_sim = c2.selectbox("Passo (h)", [1.0, 0.5, 0.25], key="simulacao_passo")
+                area_sim = c3.number_input("Área do Reservatório (m²)", 0.1, 1e6, 50.0, key="simulacao_area")
+                demanda_sim = c4.number_input("Demanda Média (m³/h)", 0.0, 1e6, float(round(vazao_op * horas_por_dia / 24, 2)), key="simulacao_demanda")
+                st.session_state.demanda_media_simulacao = demanda_sim
+                c1, c2, c3, c4 = st.columns(4)
+                nivel_max_sim = c1.number_input("Nível Máximo (m)", 0.1, 100.0, 5.0, key="simulacao_nivel_max")
+                nivel_liga_sim = c2.number_input("Liga com Nível Abaixo de (m)", 0.0, 100.0, 1.0, key="simulacao_nivel_liga")
+                nivel_desliga_sim = c3.number_input("Desliga com Nível Acima de (m)", 0.0, 100.0, 4.5, key="simulacao_nivel_desliga")
+                nivel_inicial_sim = c4.number_input("Nível Inicial (m)", 0.0, 100.0, 2.5, key="simulacao_nivel_inicial")
+                with st.expander("Perfil horário: demanda, tarifa e bloqueio"):
+                    st.caption(f"Demanda de cada hora = demanda média × fator; tarifa = R$ {tarifa_energia:.2f}/kWh × fator. O padrão diário se repete no período.")
+                    st.session_state.perfil_horario_df = st.data_editor(st.session_state.perfil_horario_df, disabled=["Hora"], hide_index=True, key="editor_perfil_horario")
+                perfil_sim = st.session_state.perfil_horario_df
+                temperaturas_sim, amplitudes_sim = None, (0.0, 0.0)
+                if tabela_fluido_sel is not None:
+                    c1, c2 = st.columns(2)
+                    amplitudes_sim = (c1.number_input("Variação Diária da Temperatura (± °C)", 0.0, 30.0, 0.0, 0.5, key="simulacao_temperatura_diaria"),
+                                      c2.number_input("Variação Anual da Temperatura (± °C)", 0.0, 30.0, 0.0, 0.5, key="simulacao_temperatura_anual"))
+                    if any(amplitudes_sim):
+                        # Ciclos em torno da temperatura do cenário, limitados à faixa da tabela do fluido
+                        temperaturas_sim = np.clip(perfil_temperatura(horas_sim, st.session_state.temperatura_fluido, *amplitudes_sim), temperatura_min, temperatura_max)
+                if not 0 <= nivel_liga_sim < nivel_desliga_sim <= nivel_max_sim:
+                    st.warning("Os níveis devem obedecer: liga < desliga ≤ máximo.")
+                else:
+                    reservatorio_sim = {"area_m2": area_sim, "nivel_inicial_m": nivel_inicial_sim, "nivel_max_m": nivel_max_sim,
+                                        "nivel_liga_m": nivel_liga_sim, "nivel_desliga_m": nivel_desliga_sim}
+                    chave_sim = f"{chave_cenario}:simulacao:{horas_sim}:{passo_sim}:{sorted(reservatorio_sim.items())}:{demanda_sim}:{rend_motor}:{tarifa_energia}:{perfil_sim.to_json()}:{amplitudes_sim}"
+                    with etapa("simulacao_periodo", horas=horas_sim):
+                        simulacao = CACHE_HIDRAULICO.obter_ou_calcular(chave_sim, lambda: simular_periodo(
+                            rede, resultado_hidraulico["func_curva_bomba"], resultado_hidraulico["func_curva_eficiencia"], st.session_state.h_geometrica,
+                            rend_motor, reservatorio_sim, demanda_sim * perfil_sim["Fator de Demanda"].to_numpy(dtype=float),
+                            tarifa_energia * perfil_sim["Fator de Tarifa"].to_numpy(dtype=float), horas_sim, passo_sim,
+                            perfil_sim["Bomba Bloqueada"].to_numpy(dtype=bool), temperaturas_c=temperaturas_sim
+                        ))
+                    resumo_sim = simulacao["resumo"]
+                    c1, c2, c3, c4 = st.columns(4)
+                    c1.metric("Custo no Período", f"R$ {resumo_sim['custo']:,.2f}")
+                    c2.metric("Custo Anualizado", f"R$ {resumo_sim['custo_anualizado']:,.2f}",
+                              delta=f"R$ {resumo_sim['custo_anualizado'] - resultados_energia['custo_anual']:+,.2f} vs. ponto fixo", delta_color="inverse")
+                    c3.metric("Bomba Ligada", f"{resumo_sim['horas_bomba'] * 24 / horas_sim:.1f} h/dia")
+                    c4.metric("Custo por m³", f"R$ {resumo_sim['custo_por_m3']:.4f}")
+                    st.caption(f"{resumo_sim['energia_kWh']:,.0f} kWh · tarifa média efetiva R$ {resumo_sim['tarifa_media_kwh']:.3f}/kWh · "
+                               f"{resumo_sim['partidas']} partida(s) · nível entre {resumo_sim['nivel_minimo_m']:.2f} e {resumo_sim['nivel_maximo_m']:.2f} m")
+                    if resumo_sim["deficit_m3"] > 0:
+                        st.warning(f"A demanda não foi atendida em {resumo_sim['deficit_m3']:,.1f} m³ (reservatório vazio com a bomba insuficiente).")
+                    if resumo_sim["extravasado_m3"] > 0:
+                        st.warning(f"{resumo_sim['extravasado_m3']:,.1f} m³ extravasaram do reservatório.")
+                    df_sim = dataframe_simulacao(simulacao)
+                    c1, c2 = st.columns(2)
+                    c1.line_chart(df_sim["Nível (m)"]); c2.line_chart(df_sim[["Vazão da Bomba (m³/h)", "Demanda (m³/h)"]])
+                    if "Temperatura (°C)" in df_sim:
+                        st.line_chart(df_sim["Temperatura (°C)"])
+            elif analise == "Velocidade Variável":
+                with etapa("importacoes", analise=analise):
+                    from simulacao_periodo import perfil_horario_padrao
+                    from velocidade_variavel import EFICIENCIA_INVERSOR, programacao_rotacao, rotacao_para_altura, rotacao_para_vazao
+                st.header("🎛️ Velocidade Variável (Inversor de Frequência)")
+                st.caption("Curvas levadas a outras rotações pelas leis de afinidade (Q ∝ n, H ∝ n², rendimento constante nos pontos homólogos).")
+                if 'perfil_horario_df' not in st.session_state: st.session_state.perfil_horario_df = perfil_horario_padrao()
+                # Demanda média e perfil horário da tela de simulação (padrões, se ela não foi aberta)
+                perfil_sim = st.session_state.perfil_horario_df
+                demanda_sim = st.session_state.get("demanda_media_simulacao", float(round(vazao_op * horas_por_dia / 24, 2)))
+                c1, c2, c3, c4 = st.columns(4)
+                vazao_alvo = c1.number_input("Vazão Alvo (m³/h)", 0.0, 1e6, float(round(vazao_op * 0.8, 2)), key="inversor_vazao_alvo")
+                altura_alvo = c2.number_input("Altura Alvo (m)", 0.0, 1e4, float(round(altura_op * 0.9, 2)), key="inversor_altura_alvo")
+                rend_inversor = c3.number_input("Rendimento do Inversor (%)", 50.0, 100.0, EFICIENCIA_INVERSOR, key="inversor_rendimento")
+                altura_minima = c4.number_input("Altura Mínima (m)", 0.0, 1e4, 0.0, key="inversor_altura_minima", help="Pressão mínima exigida no recalque em qualquer rotação")
+                faixa_rotacao = st.slider("Faixa de Rotação (% da nominal)", 20, 150, (40, 100), key="inversor_faixa")
+                rotacoes = np.linspace(faixa_rotacao[0] / 100, faixa_rotacao[1] / 100, faixa_rotacao[1] - faixa_rotacao[0] + 1)
+                rotacao_vazao = float(rotacao_para_vazao(rede, st.session_state.h_geometrica, func_curva_bomba, vazao_alvo)["rotacao"])
+                rotacao_altura = float(rotacao_para_altura(rede, st.session_state.h_geometrica, func_curva_bomba, altura_alvo)["rotacao"])
+                c1, c2 = st.columns(2)
+                c1.metric("Rotação para a Vazão Alvo", f"{100 * rotacao_vazao:.1f} %" if np.isfinite(rotacao_vazao) else "Fora da faixa")
+                c2.metric("Rotação para a Altura Alvo", f"{100 * rotacao_altura:.1f} %" if np.isfinite(rotacao_altura) else "Fora da faixa")
+
+                st.subheader("Programação Diária de Menor Custo")
+                st.caption("Para cada hora do perfil horário (demanda média e fatores da tela de Período Estendido), a rotação que entrega a demanda com o menor custo de energia, comparada à rotação nominal em liga/desliga.")
+                chave_inv = f"{chave_cenario}:inversor:{faixa_rotacao}:{rend_inversor}:{altura_minima}:{demanda_sim}:{rend_motor}:{tarifa_energia}:{perfil_sim.to_json()}"
+                with etapa("programacao_rotacao"):
+                    programacao = CACHE_HIDRAULICO.obter_ou_calcular(chave_inv, lambda: programacao_rotacao(
+                        rede, st.session_state.h_geometrica, func_curva_bomba, resultado_hidraulico["func_curva_eficiencia"],
+                        demanda_sim * perfil_sim["Fator de Demanda"].to_numpy(dtype=float), tarifa_energia * perfil_sim["Fator de Tarifa"].to_numpy(dtype=float),
+                        rend_motor, rotacoes, rend_inversor, altura_minima
+                    ))
+                resumo_inv = programacao["resumo"]
+                c1, c2, c3 = st.columns(3)
+                c1.metric("Custo Diário com Inversor", f"R$ {resumo_inv['custo']:,.2f}")
+                c2.metric("Custo Diário na Rotação Nominal", f"R$ {resumo_inv['custo_nominal']:,.2f}")
+                c3.metric("Economia Anual", f"R$ {365 * (resumo_inv['custo_nominal'] - resumo_inv['custo']):,.2f}", delta=f"{resumo_inv['economia_percent']:.1f} %")
+                if resumo_inv["horas_nao_atendidas"]:
+                    st.warning(f"Em {resumo_inv['horas_nao_atendidas']} hora(s) nenhuma rotação da faixa atende a demanda e a altura mínima.")
+                if not resumo_inv["nominal_atende"]:
+                    st.warning("A rotação nominal não atende a demanda de todas as horas; a comparação é só indicativa.")
+                horas_inv = programacao["horas"]
+                df_inv = pd.DataFrame({
+                    "Demanda (m³/h)": horas_inv["demanda_m3h"], "Rotação (%)": 100 * horas_inv["rotacao"], "Vazão da Bomba (m³/h)": horas_inv["vazao_m3h"],
+                    "Altura (m)": horas_inv["altura_m"], "Tempo Ligada (%)": 100 * horas_inv["fracao_ligada"], "Potência (kW)": horas_inv["potencia_kW"],
+                    "Custo (R$)": horas_inv["custo"], "Custo na Nominal (R$)": horas_inv["custo_nominal"],
+                }, index=pd.Index(perfil_sim["Hora"].to_numpy(), name="Hora"))
+                c1, c2 = st.columns(2)
+                c1.line_chart(df_inv["Rotação (%)"])
+                df_varredura = pd.DataFrame({"Rotação (%)": 100 * programacao["varredura"]["rotacao"],
+                                             "Energia Específica (kWh/m³)": programacao["varredura"]["energia_especifica"]}).dropna()
+                c2.line_chart(df_varredura, x="Rotação (%)", y="Energia Específica (kWh/m³)")
+                with st.expander("Programação hora a hora"):
+                    st.dataframe(df_inv, use_container_width=True)
+                st.caption(f"{resumo_inv['combinacoes']} combinações rotação × hora avaliadas em um único lote.")
+            elif analise == "Estação de Bombeamento":
+                with etapa("importacoes", analise=analise):
+                    from estacao_bombeamento import ARRANJO_PARALELO, ARRANJO_SERIE, avaliar_estacao, bombas_do_editor, estacao_padrao
+                if 'estacao_bombas_df' not in st.session_state: st.session_state.estacao_bombas_df = estacao_padrao()
+                st.header("🏭 Estação de Bombeamento")
+                st.caption("Cada bomba é a curva do cenário com fatores de vazão e de altura (1 e 1 = bomba igual à do cenário). Em paralelo as vazões se somam na mesma altura; o booster em série soma a sua altura. Todas as combinações de bombas ligadas são resolvidas no mesmo lote.")
+                st.session_state.estacao_bombas_df = st.data_editor(st.session_state.estacao_bombas_df, num_rows="dynamic", key="editor_estacao", column_config={
+                    "Arranjo": st.column_config.SelectboxColumn(options=[ARRANJO_PARALELO, ARRANJO_SERIE], required=True),
+                    "Fator de Vazão": st.column_config.NumberColumn(min_value=0.05, step=0.05), "Fator de Altura": st.column_config.NumberColumn(min_value=0.05, step=0.05),
+                })
+                vazao_minima_estacao = st.number_input("Vazão Mínima da Estação (m³/h)", 0.0, 1e6, 0.0, key="estacao_vazao_minima")
+                bombas_estacao = bombas_do_editor(st.session_state.estacao_bombas_df)
+                if not any(b["arranjo"] == ARRANJO_PARALELO for b in bombas_estacao):
+                    st.warning("Inclua pelo menos uma bomba em paralelo na estação.")
+                else:
+                    chave_est = f"{chave_cenario}:estacao:{bombas_estacao}:{vazao_minima_estacao}:{rend_motor}"
+                    with etapa("estacao_bombeamento", bombas=len(bombas_estacao)):
+                        estacao = CACHE_HIDRAULICO.obter_ou_calcular(chave_est, lambda: avaliar_estacao(
+                            rede, st.session_state.h_geometrica, func_curva_bomba, resultado_hidraulico["func_curva_eficiencia"], bombas_estacao, rend_motor, vazao_minima_estacao
+                        ))
+                    combinacoes = estacao["combinacoes"]
+                    if estacao["recomendada"] is None:
+                        st.error("Nenhuma combinação de bombas atende a vazão mínima com todas as bombas ligadas dentro da curva.")
+                    else:
+                        melhor = combinacoes.iloc[estacao["recomendada"]]
+                        c1, c2, c3, c4 = st.columns(4)
+                        c1.metric("Combinação Recomendada", melhor["Bombas Ligadas"])
+                        c2.metric("Energia Específica", f"{melhor['Energia Específica (kWh/m³)']:.4f} kWh/m³")
+                        c3.metric("Vazão", f"{melhor['Vazão (m³/h)']:.2f} m³/h")
+                        c4.metric("Potência", f"{melhor['Potência (kW)']:.2f} kW")
+                    st.dataframe(combinacoes.sort_values(["Viável", "Energia Específica (kWh/m³)"], ascending=[False, True]), use_container_width=True, hide_index=True)
+                    vazoes_sistema_est = np.linspace(0, 1.2 * np.nanmax(combinacoes["Vazão (m³/h)"].to_numpy(dtype=float), initial=vazao_op), 100)
+                    alturas_sistema_est = np.asarray(calcular_curva_sistema(rede, st.session_state.h_geometrica, vazoes_sistema_est))
+                    fig_estacao = criar_figura_estacao(estacao["vazoes_combinadas"], estacao["alturas_combinadas"], combinacoes["Bombas Ligadas"].tolist(),
+                                                       vazoes_sistema_est, np.where(alturas_sistema_est < 1e10, alturas_sistema_est, np.nan),
+                                                       combinacoes["Vazão (m³/h)"], combinacoes["Altura (m)"], estacao["recomendada"])
+                    st.pyplot(fig_estacao)
+                    plt.close(fig_estacao)
+            elif analise == "Incerteza (Monte Carlo)":
+                with etapa("importacoes", analise=analise):
+                    from analise_incerteza import DISTRIBUICOES, analisar_incerteza, incertezas_do_editor, incertezas_padrao
+                if 'incertezas_df' not in st.session_state: st.session_state.incertezas_df = incertezas_padrao()
+                st.header("🎲 Análise de Incerteza (Monte Carlo)")
+                st.caption("Rugosidade, viscosidade, fatores K e os pontos medidos das curvas da bomba são sorteados das distribuições abaixo (fatores sobre o valor nominal); a rugosidade cresce com a idade da rede. Cada lote de amostras é resolvido em um único cálculo vetorizado.")
+                st.session_state.incertezas_df = st.data_editor(st.session_state.incertezas_df, disabled=["Parâmetro"], hide_index=True, key="editor_incertezas", column_config={
+                    "Distribuição": st.column_config.SelectboxColumn(options=list(DISTRIBUICOES), required=True),
+                })
+                c1, c2, c3 = st.columns(3)
+                amostras_mc = c1.number_input("Número de Amostras", 1000, 100000, 10000, 1000, key="monte_carlo_amostras")
+                semente_mc = c2.number_input("Semente", 0, 2**31 - 1, 42, key="monte_carlo_semente")
+                idade_mc = c3.number_input("Idade da Rede (anos)", 0.0, 100.0, 10.0, 1.0, key="monte_carlo_idade")
+                incertezas_mc = incertezas_do_editor(st.session_state.incertezas_df)
+                chave_mc = f"{chave_cenario}:monte_carlo:{sorted(incertezas_mc.items())}:{amostras_mc}:{semente_mc}:{idade_mc}:{rend_motor}:{horas_por_dia}:{tarifa_energia}"
+                if st.button("🎲 Executar Monte Carlo"):
+                    st.session_state.monte_carlo_solicitado = chave_mc
+                if st.session_state.get("monte_carlo_solicitado") == chave_mc:
+                    with st.spinner("Sorteando e resolvendo as amostras..."), etapa("monte_carlo", amostras=amostras_mc):
+                        incerteza = CACHE_HIDRAULICO.obter_ou_calcular(chave_mc, lambda: analisar_incerteza(
+                            rede, st.session_state.h_geometrica, st.session_state.curva_altura_df, st.session_state.curva_eficiencia_df,
+                            incertezas_mc, amostras_mc, semente_mc, rend_motor, horas_por_dia, tarifa_energia,
+                            st.session_state.fluido_selecionado, fluidos_combinados, np.linspace(0, vazao_range[-1], 30), idade_mc
+                        ))
+                    percentis_mc = incerteza["percentis"]
+                    c1, c2, c3, c4 = st.columns(4)
+                    c1.metric("Vazão (P5 – P95)", f"{percentis_mc.loc['Vazão (m³/h)', 'P5']:.1f} – {percentis_mc.loc['Vazão (m³/h)', 'P95']:.1f} m³/h")
+                    c2.metric("Custo Anual (P50)", f"R$ {percentis_mc.loc['Custo Anual (R$)', 'P50']:,.2f}",
+                              delta=f"R$ {percentis_mc.loc['Custo Anual (R$)', 'P50'] - resultados_energia['custo_anual']:+,.2f} vs. nominal", delta_color="inverse")
+                    c3.metric("Custo Anual (P5 – P95)", f"R$ {percentis_mc.loc['Custo Anual (R$)', 'P5']:,.0f} – {percentis_mc.loc['Custo Anual (R$)', 'P95']:,.0f}")
+                    c4.metric("Tempo por Amostra", f"{incerteza['us_por_amostra']:.0f} µs")
+                    if incerteza["fracao_sem_ponto"] > 0:
+                        st.warning(f"{incerteza['fracao_sem_ponto']:.1%} das amostras não têm ponto de operação (bomba sorteada abaixo da altura geométrica ou sem interseção).")
+                    st.dataframe(percentis_mc, use_container_width=True)
+                    faixas_mc = incerteza["faixas"]
+                    if faixas_mc["curva_bomba"] is not None:
+                        amostras_grafico = incerteza["amostras"].head(2000)
+                        fig_faixas = criar_figura_faixas(faixas_mc["vazoes"], faixas_mc["curva_bomba"], faixas_mc["curva_sistema"],
+                                                         amostras_grafico["Vazão (m³/h)"], amostras_grafico["Altura (m)"])
+                        st.pyplot(fig_faixas)
+                        plt.close(fig_faixas)
+                    st.caption(f"{amostras_mc:,} amostras em {incerteza['tempo_s']:.2f} s ({incerteza['processos']} processo(s)); faixas P5–P95 e mediana. A mesma semente reproduz o resultado.")
+            elif analise == "Catálogo de Bombas":
+                with etapa("importacoes", analise=analise):
+                    from catalogo_bombas import COLUNAS_CATALOGO, buscar_bombas, importar_catalogo
+                st.header("📚 Catálogo de Bombas")
+                st.caption("Bombas do catálogo cujo ponto de operação nesta rede cai na janela de vazões, ordenadas pelo rendimento no ponto e pelo custo de ciclo de vida (preço mais o valor presente da energia).")
+                if usuario_admin:
+                    with st.expander(f"🗂️ Importar Catálogo ({count_catalog_pumps():,} curvas)"):
+                        st.caption(f"CSV com uma linha por ponto medido e as colunas: {', '.join(COLUNAS_CATALOGO)}.")
+                        arquivo_catalogo = st.file_uploader("Importar catálogo (.csv)", type="csv", key="catalogo_csv")
+                        if arquivo_catalogo is not None and st.button("Importar Curvas", key="importar_catalogo"):
+                            try:
+                                st.success(f"{importar_catalogo(pd.read_csv(arquivo_catalogo)):,} curvas importadas.")
+                            except ValueError as e:
+                                st.error(str(e))
+                c1, c2, c3 = st.columns(3)
+                vazao_min_cat = c1.number_input("Vazão Mínima (m³/h)", 0.0, value=float(round(0.8 * vazao_op, 1)), key="catalogo_vazao_min")
+                vazao_max_cat = c2.number_input("Vazão Máxima (m³/h)", 0.0, value=float(round(1.2 * vazao_op, 1)), key="catalogo_vazao_max")
+                npsh_cat = c3.number_input("NPSH Disponível (m)", 0.0, value=0.0, help="Zero dispensa a verificação de NPSHr.", key="catalogo_npsh")
+                c1, c2, c3 = st.columns(3)
+                taxa_cat = c1.number_input("Taxa de Desconto (% a.a.)", 0.0, 30.0, 8.0, 0.5, key="catalogo_taxa")
+                vida_cat = c2.number_input("Vida Útil (anos)", 1, 50, 20, key="catalogo_vida")
+                quantidade_cat = c3.number_input("Bombas por Lista", 1, 50, 10, key="catalogo_quantidade")
+                # Sem cache: o catálogo pode mudar entre execuções, e a busca leva dezenas de milissegundos
+                chave_cat = f"{chave_cenario}:catalogo:{vazao_min_cat}:{vazao_max_cat}:{npsh_cat}:{taxa_cat}:{vida_cat}:{quantidade_cat}:{rend_motor}:{horas_por_dia}:{tarifa_energia}"
+                if st.button("🔎 Buscar no Catálogo"):
+                    st.session_state.catalogo_solicitado = chave_cat
+                if st.session_state.get("catalogo_solicitado") == chave_cat:
+                    with etapa("busca_catalogo"):
+                        busca = buscar_bombas(rede, st.session_state.h_geometrica, vazao_min_cat, vazao_max_cat, rend_motor, horas_por_dia, tarifa_energia,
+                                              st.session_state.fluido_selecionado, fluidos_combinados, npsh_cat or None, taxa_cat, vida_cat, quantidade_cat)
+                    if busca["viaveis"] == 0:
+                        st.warning(f"Nenhuma das {busca['candidatas']} curvas próximas da janela opera entre {vazao_min_cat:.1f} e {vazao_max_cat:.1f} m³/h nesta rede.")
+                    else:
+                        encontradas = {}
+                        for titulo, chave_lista in (("Maior Rendimento no Ponto", "melhor_eficiencia"), ("Menor Custo de Ciclo de Vida", "menor_custo_ciclo_vida")):
+                            st.subheader(titulo)
+                            st.dataframe(busca[chave_lista], use_container_width=True, hide_index=True, column_config={"ID": None})
+                            encontradas.update({int(linha["ID"]): f"{linha['Fabricante']} {linha['Modelo']} — {linha['Rotação (rpm)']:.0f} rpm, Ø {linha['Rotor (mm)']:.0f} mm"
+                                                for _, linha in busca[chave_lista].iterrows()})
+                        c1, c2 = st.columns([3, 1])
+                        bomba_escolhida = c1.selectbox("Bomba", options=list(encontradas), format_func=encontradas.get, key="catalogo_bomba")
+                        c2.button("Usar Bomba", on_click=usar_bomba_catalogo, args=(bomba_escolhida,), use_container_width=True,
+                                  help="Substitui as curvas de altura e eficiência pelos pontos do catálogo.")
+                    st.caption(f"{busca['candidatas']} curvas selecionadas pelo índice, {busca['viaveis']} viáveis, em {1000 * busca['tempo_s']:.0f} ms.")
         else:
             st.error("Não foi possível encontrar um ponto de operação. Verifique os parâmetros.")
     except Exception as e:
         st.error(f"Ocorreu um erro inesperado durante a execução. Detalhe: {str(e)}")
 
+    if coleta_perfil is not None:
+        coleta_perfil.finalizar()
+        with painel_perfil:
+            st.metric("Tempo do rerun", f"{coleta_perfil.duracao_ms:.0f} ms")
+            st.dataframe(pd.DataFrame([{
+                "Etapa": "\u2003" * linha["profundidade"] + linha["etapa"],
+                "Tempo (ms)": round(linha["duracao_ms"], 1), "Próprio (ms)": round(linha["proprio_ms"], 1),
+                "% do rerun": round(100 * linha["fracao"], 1),
+                "Contadores": ", ".join(f"{nome}: {valor}" for nome, valor in linha["contadores"].items()),
+            } for linha in coleta_perfil.resumo()]), use_container_width=True, hide_index=True)
+            st.download_button("Exportar trace (.json)", coleta_perfil.trace_json(), file_name="perfil_rerun.json", mime="application/json",
+                               help="Formato Trace Event: abra em ui.perfetto.dev ou chrome://tracing")
+
 elif st.session_state.get("authentication_status") is False:
     st.error('Usuário/senha incorreto')
 elif st.session_state.get("authentication_status") is None:
@@ -0,0 +1,233 @@
+# rede_malhada.py (Redes malhadas: modelo nó/ligação e solver do Gradiente Global de Todini)
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import spsolve
+
+from hidraulica import K_FACTORS, parametros_trechos, _perdas_por_constantes
+from propriedades_fluidos import propriedades_fluido
+
+# Resistência aplicada a bombas com vazão reversa (válvula de retenção), em m/(m³/h)
+RESISTENCIA_BOMBA_FECHADA = 1e8
+# Busca linear: o passo de Newton é reduzido à metade até o resíduo cair; abaixo deste passo
+# a resolução é dada como não convergida
+PASSO_MINIMO = 1e-6
+# Meia largura relativa da faixa em torno da vazão de transição (Re = 4000) em que a perda é
+# interpolada entre a laminar e a turbulenta, para o Newton enxergar uma curva contínua
+FAIXA_TRANSICAO = 5e-2
+
+class RedeMalhada:
+    """
+    Rede genérica de nós e ligações.
+
+    Nós são junções (com demanda em m³/h, positiva para consumo) ou reservatórios (carga
+    fixa em m). Tubos usam o mesmo dicionário de trecho do restante da aplicação
+    ('comprimento', 'diametro', 'material', 'acessorios') mais 'de' e 'para'; o sentido
+    positivo da vazão é de 'de' para 'para'. Bombas recebem a curva altura x vazão (poly1d).
+    """
+    def __init__(self):
+        self.juncoes = {}
+        self.reservatorios = {}
+        self.tubos = []
+        self.bombas = []
+
+    def adicionar_juncao(self, nome, demanda_m3h=0.0):
+        self.juncoes[nome] = float(demanda_m3h)
+
+    def adicionar_reservatorio(self, nome, carga_m):
+        self.reservatorios[nome] = float(carga_m)
+
+    def adicionar_tubo(self, nome, de, para, comprimento, diametro, material, acessorios=()):
+        """ Acessórios aceitam {'nome', 'quantidade'} e buscam o K em K_FACTORS quando 'k' não é informado. """
+        acessorios = [{"nome": ac["nome"], "k": ac.get("k", K_FACTORS.get(ac["nome"], 0.0)), "quantidade": ac.get("quantidade", 1)} for ac in acessorios]
+        self.tubos.append({"nome": nome, "de": de, "para": para, "comprimento": comprimento, "diametro": diametro, "material": material, "acessorios": acessorios})
+
+    def adicionar_bomba(self, nome, de, para, func_curva_bomba):
+        self.bombas.append({"nome": nome, "de": de, "para": para, "curva": func_curva_bomba})
+
+    @classmethod
+    def de_sistema(cls, sistema, h_geometrica, func_curva_bomba):
+        """
+        Converte o layout de três partes ({'antes', 'paralelo', 'depois'}) em rede malhada:
+        reservatório de sucção (0 m) -> bomba -> trechos -> reservatório de recalque (h_geometrica).
+        Como em calcular_perdas_paralelo, um único ramal em paralelo não entra no cálculo.
+        """
+        rede = cls()
+        rede.adicionar_reservatorio("succao", 0.0)
+        rede.adicionar_reservatorio("recalque", h_geometrica)
+        ramais = {nome: trechos for nome, trechos in sistema['paralelo'].items() if trechos} if len(sistema['paralelo']) >= 2 else {}
+        partes = [(nome, trechos) for nome, trechos in (("Antes", sistema['antes']), ("Paralelo", ramais), ("Depois", sistema['depois'])) if trechos]
+        if not partes:
+            rede.adicionar_bomba("Bomba", "succao", "recalque", func_curva_bomba)
+            return rede
+
+        def novo_no():
+            nome = f"no_{len(rede.juncoes) + 1}"
+            rede.adicionar_juncao(nome)
+            return nome
+
+        def encadear(trechos, origem, destino, prefixo):
+            no_atual = origem
+            for i, trecho in enumerate(trechos):
+                proximo_no = destino if i == len(trechos) - 1 else novo_no()
+                rede.adicionar_tubo(f"{prefixo} (T{i+1})", no_atual, proximo_no, trecho["comprimento"], trecho["diametro"], trecho["material"], trecho["acessorios"])
+                no_atual = proximo_no
+
+        no_atual = novo_no()
+        rede.adicionar_bomba("Bomba", "succao", no_atual, func_curva_bomba)
+        for j, (nome_parte, trechos) in enumerate(partes):
+            destino = "recalque" if j == len(partes) - 1 else novo_no()
+            if nome_parte == "Paralelo":
+                for nome_ramal, trechos_ramal in trechos.items():
+                    encadear(trechos_ramal, no_atual, destino, nome_ramal)
+            else:
+                encadear(trechos, no_atual, destino, f"Trecho {nome_parte}")
+            no_atual = destino
+        return rede
+
+    def compilar(self, fluido_selecionado, materiais_combinados, fluidos_combinados, temperatura_c=None):
+        return RedeMalhadaCompilada(self, fluido_selecionado, materiais_combinados, fluidos_combinados, temperatura_c)
+
+class RedeMalhadaCompilada:
+    """ Matrizes de incidência esparsas e constantes por tubo, montadas uma única vez. """
+    def __init__(self, rede, fluido_selecionado, materiais_combinados, fluidos_combinados, temperatura_c=None):
+        self.nomes_juncoes = list(rede.juncoes)
+        self.nomes_reservatorios = list(rede.reservatorios)
+        self.demandas = np.array([rede.juncoes[n] for n in self.nomes_juncoes], dtype=float)
+        self.cargas_reservatorios = np.array([rede.reservatorios[n] for n in self.nomes_reservatorios], dtype=float)
+        ligacoes = rede.tubos + rede.bombas
+        self.nomes_ligacoes = [ligacao["nome"] for ligacao in ligacoes]
+        self.num_tubos, self.num_bombas = len(rede.tubos), len(rede.bombas)
+        self.curvas_bombas = [bomba["curva"] for bomba in rede.bombas]
+        self.derivadas_bombas = [bomba["curva"].deriv() for bomba in rede.bombas]
+
+        _, self.nu = propriedades_fluido(fluidos_combinados[fluido_selecionado], temperatura_c)
+        comprimentos, diametros_mm, rugosidades_mm, k_totais = parametros_trechos(rede.tubos, materiais_combinados)
+        diametros_m = diametros_mm / 1000
+        self.diametro_valido = diametros_m > 0
+        self.diametro_m = np.where(self.diametro_valido, diametros_m, 1.0)
+        self.area = (np.pi * self.diametro_m**2) / 4
+        self.razao_l_d = comprimentos / self.diametro_m
+        self.rugosidade_relativa = (rugosidades_mm / 1000) / self.diametro_m
+        self.k_total = k_totais
+        # Vazão (m³/h) em Re = 4000, onde o fator de atrito salta da laminar para a turbulenta, e
+        # as perdas nos extremos da faixa de interpolação em torno dela
+        self.vazao_transicao = 4000 * self.nu * self.area / self.diametro_m * 3600
+        self.limites_transicao = self.vazao_transicao * np.array([[1 - FAIXA_TRANSICAO], [1 + FAIXA_TRANSICAO]])
+        extremos = _perdas_por_constantes(self.limites_transicao, self.area, self.diametro_m, self.razao_l_d,
+                                          self.rugosidade_relativa, self.k_total, self.diametro_valido, self.nu, com_derivada=True)
+        self.perdas_transicao = extremos["principal"] + extremos["localizada"]
+        self.derivadas_transicao = extremos["derivada"]
+
+        # A12: ligações x junções (-1 no nó de montante, +1 no de jusante); A10 idem para reservatórios
+        indice_juncao = {nome: i for i, nome in enumerate(self.nomes_juncoes)}
+        indice_reservatorio = {nome: i for i, nome in enumerate(self.nomes_reservatorios)}
+        linhas_j, colunas_j, valores_j, linhas_r, colunas_r, valores_r = [], [], [], [], [], []
+        for k, ligacao in enumerate(ligacoes):
+            for no, sinal in ((ligacao["de"], -1.0), (ligacao["para"], 1.0)):
+                if no in indice_juncao:
+                    linhas_j.append(k); colunas_j.append(indice_juncao[no]); valores_j.append(sinal)
+                elif no in indice_reservatorio:
+                    linhas_r.append(k); colunas_r.append(indice_reservatorio[no]); valores_r.append(sinal)
+                else:
+                    raise ValueError(f"Ligação '{ligacao['nome']}' referencia o nó inexistente '{no}'.")
+        num_ligacoes = len(ligacoes)
+        self.A12 = sparse.csr_matrix((valores_j, (linhas_j, colunas_j)), shape=(num_ligacoes, len(self.nomes_juncoes)))
+        self.A10 = sparse.csr_matrix((valores_r, (linhas_r, colunas_r)), shape=(num_ligacoes, len(self.nomes_reservatorios)))
+        self.A21 = self.A12.T.tocsr()
+
+    def perdas_ligacoes(self, vazoes_m3h):
+        """ Perda de carga com sinal (m) e derivada dPerda/dQ de cada ligação; bombas têm perda negativa. """
+        vazoes_tubos = vazoes_m3h[:self.num_tubos]
+        perdas = _perdas_por_constantes(np.abs(vazoes_tubos), self.area, self.diametro_m, self.razao_l_d,
+                                        self.rugosidade_relativa, self.k_total, self.diametro_valido, self.nu, com_derivada=True)
+        perda_tubos, derivada_tubos = perdas["principal"] + perdas["localizada"], perdas["derivada"]
+        # No salto do fator de atrito a perda é a cúbica de Hermite entre os extremos da faixa de
+        # transição (valor e derivada contínuos nos extremos: sem quinas para o Newton)
+        (q_inferior, q_superior), (h_inferior, h_superior) = self.limites_transicao, self.perdas_transicao
+        na_transicao = self.diametro_valido & (np.abs(vazoes_tubos) > q_inferior) & (np.abs(vazoes_tubos) < q_superior)
+        if na_transicao.any():
+            largura = q_superior - q_inferior
+            t = (np.abs(vazoes_tubos) - q_inferior) / largura
+            m_inferior, m_superior = self.derivadas_transicao * largura
+            hermite = ((2 * t**3 - 3 * t**2 + 1) * h_inferior + (t**3 - 2 * t**2 + t) * m_inferior
+                       + (-2 * t**3 + 3 * t**2) * h_superior + (t**3 - t**2) * m_superior)
+            derivada_hermite = ((6 * t**2 - 6 * t) * h_inferior + (3 * t**2 - 4 * t + 1) * m_inferior
+                                + (-6 * t**2 + 6 * t) * h_superior + (3 * t**2 - 2 * t) * m_superior) / largura
+            perda_tubos = np.where(na_transicao, hermite, perda_tubos)
+            derivada_tubos = np.where(na_transicao, derivada_hermite, derivada_tubos)
+        perda = np.empty_like(vazoes_m3h)
+        derivada = np.empty_like(vazoes_m3h)
+        perda[:self.num_tubos] = np.sign(vazoes_tubos) * perda_tubos
+        derivada[:self.num_tubos] = derivada_tubos
+        for i, (curva, derivada_curva) in enumerate(zip(self.curvas_bombas, self.derivadas_bombas)):
+            k = self.num_tubos + i
+            q = vazoes_m3h[k]
+            if q >= 0:
+                perda[k], derivada[k] = -curva(q), -derivada_curva(q)
+            else:
+                perda[k], derivada[k] = -curva(0) + RESISTENCIA_BOMBA_FECHADA * q, RESISTENCIA_BOMBA_FECHADA
+        return perda, np.maximum(derivada, 1e-8)
+
+    def resolver(self, cargas_reservatorios=None, demandas=None, chute_vazoes=None, tolerancia=1e-8, max_iteracoes=200):
+        """
+        Resolve vazões e cargas pelo Gradiente Global (Todini & Pilati).
+
+        A cada iteração de Newton o sistema em (ΔQ, ΔH) é reduzido ao complemento de Schur
+        A21·D⁻¹·A12·ΔH = e2 - A21·D⁻¹·e1, esparso e simétrico positivo definido, com
+        D = diag(dPerda/dQ). Cada passo começa completo e é reduzido à metade (busca linear)
+        até a soma dos quadrados dos resíduos de energia e continuidade cair. Converge quando a
+        correção de Newton completa, relativa às vazões, fica abaixo de `tolerancia`; se o passo
+        cai abaixo de PASSO_MINIMO a resolução para sem convergir. Retorna {"vazoes", "cargas",
+        "iteracoes", "convergiu"}, com vazões por ligação (m³/h) e cargas por junção (m).
+        """
+        cargas_fixas = self.cargas_reservatorios if cargas_reservatorios is None else np.asarray(cargas_reservatorios, dtype=float)
+        demandas = self.demandas if demandas is None else np.asarray(demandas, dtype=float)
+        if chute_vazoes is None:
+            # Velocidade de 1 m/s nos tubos e a vazão média dos tubos nas bombas
+            vazoes = np.empty(self.num_tubos + self.num_bombas)
+            vazoes[:self.num_tubos] = self.area * 3600
+            vazoes[self.num_tubos:] = vazoes[:self.num_tubos].mean() if self.num_tubos else 1.0
+        else:
+            vazoes = np.array(chute_vazoes, dtype=float)
+        termo_fixo = self.A10 @ cargas_fixas
+        cargas = np.full(len(self.nomes_juncoes), cargas_fixas.mean() if len(cargas_fixas) else 0.0)
+
+        def residuos(vazoes, cargas):
+            perda, derivada = self.perdas_ligacoes(vazoes)
+            return perda + self.A12 @ cargas + termo_fixo, self.A21 @ vazoes - demandas, derivada
+
+        convergiu = False
+        erro_energia, erro_continuidade, derivada = residuos(vazoes, cargas)
+        norma = erro_energia @ erro_energia + erro_continuidade @ erro_continuidade
+        iteracoes = 0
+        for iteracoes in range(1, max_iteracoes + 1):
+            inverso_derivada = 1 / derivada
+            matriz = (self.A21 @ sparse.diags(inverso_derivada) @ self.A12).tocsc()
+            delta_cargas = spsolve(matriz, erro_continuidade - self.A21 @ (inverso_derivada * erro_energia))
+            delta_vazoes = -inverso_derivada * (erro_energia + self.A12 @ delta_cargas)
+            variacao = np.abs(delta_vazoes).sum() / max(np.abs(vazoes).sum(), 1.0)
+            if variacao <= tolerancia:
+                vazoes, cargas = vazoes + delta_vazoes, cargas + delta_cargas
+                convergiu = True
+                break
+            # Busca linear: tubos na faixa de transição (Re = 4000) podem fazer o passo completo
+            # piorar o resíduo; o passo aceito volta a ser completo na iteração seguinte
+            passo = 1.0
+            while True:
+                novas_vazoes, novas_cargas = vazoes + passo * delta_vazoes, cargas + passo * delta_cargas
+                novo_energia, novo_continuidade, nova_derivada = residuos(novas_vazoes, novas_cargas)
+                nova_norma = novo_energia @ novo_energia + novo_continuidade @ novo_continuidade
+                if nova_norma <= (1 - 1e-4 * passo) * norma or passo < PASSO_MINIMO:
+                    break
+                passo *= 0.5
+            if passo < PASSO_MINIMO:
+                break
+            vazoes, cargas, norma = novas_vazoes, novas_cargas, nova_norma
+            erro_energia, erro_continuidade, derivada = novo_energia, novo_continuidade, nova_derivada
+        return {
+            "vazoes": dict(zip(self.nomes_ligacoes, vazoes)),
+            "cargas": dict(zip(self.nomes_juncoes, cargas)),
+            "vazoes_array": vazoes, "cargas_array": cargas,
+            "iteracoes": iteracoes, "convergiu": convergiu
+        }
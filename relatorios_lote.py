@@ -0,0 +1,145 @@
+# relatorios_lote.py (Relatórios em lote de todos os cenários de um projeto, sem Streamlit)
+#
+# Uso: python relatorios_lote.py USUARIO PROJETO SAIDA.zip|SAIDA.pdf [--processos N]
+#      [--rend-motor 90] [--horas-dia 8] [--tarifa 0.75]
+
+import argparse
+import multiprocessing
+import os
+import re
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from database import get_scenarios_for_project, get_user_fluids, get_user_materials, load_scenario
+from graficos import gerar_diagrama_rede
+from hidraulica import (
+    FLUIDOS_PADRAO, MATERIAIS_PADRAO, MENSAGENS_STATUS, calcular_analise_energetica, resolver_cenario, sistema_do_cenario
+)
+from propriedades_fluidos import fluido_na_temperatura
+from report_generator import generate_combined_report, generate_report
+from servico_relatorios import argumentos_relatorio, montar_dados_relatorio
+
+def _preparar_cenario(tarefa):
+    """
+    Executado no processo de trabalho: resolve o cenário, renderiza diagrama e gráfico e
+    devolve o PDF pronto (saída zip) ou os argumentos de generate_report (PDF combinado).
+    """
+    project_name, scenario_name, dados, materiais, fluidos, equipamentos, montar_pdf = tarefa
+    try:
+        return _gerar_cenario(project_name, scenario_name, dados, materiais, fluidos, equipamentos, montar_pdf)
+    except Exception as e:
+        # Um cenário com dados corrompidos não deve interromper o lote inteiro
+        return scenario_name, None, f"Erro inesperado: {e}"
+
+def _gerar_cenario(project_name, scenario_name, dados, materiais, fluidos, equipamentos, montar_pdf):
+    sistema = sistema_do_cenario(dados)
+    h_geometrica = dados.get('h_geometrica', 15.0)
+    fluido = dados.get('fluido_selecionado', "Água a 20°C")
+    if fluido in fluidos:
+        fluidos = fluido_na_temperatura(fluidos, fluido, dados.get('temperatura_fluido'))
+    resultado = resolver_cenario(dados, materiais, fluidos)
+    if resultado["status"] != "ok":
+        return scenario_name, None, MENSAGENS_STATUS[resultado["status"]]
+
+    rend_motor, horas_por_dia, tarifa_energia = equipamentos
+    resultados_energia = calcular_analise_energetica(resultado["vazao_op"], resultado["altura_op"], resultado["eficiencia_op"],
+                                                     rend_motor, horas_por_dia, tarifa_energia, fluido, fluidos)
+    distribuicao = resultado["distribuicao_vazao"] if len(sistema['paralelo']) >= 2 else {}
+    diagrama = gerar_diagrama_rede(sistema, resultado["vazao_op"], distribuicao, fluido, materiais, fluidos)
+    dados_relatorio = montar_dados_relatorio(project_name, scenario_name, sistema, h_geometrica, fluido, resultado,
+                                             resultados_energia, rend_motor, horas_por_dia, tarifa_energia, diagrama.source)
+    argumentos = argumentos_relatorio(dados_relatorio)
+    return scenario_name, generate_report(**argumentos) if montar_pdf else argumentos, None
+
+def _resultados_em_ordem(tarefas, max_processos, max_pendentes):
+    """
+    Distribui as tarefas pelo pool mantendo no máximo 'max_pendentes' em andamento e entrega
+    os resultados na ordem de entrada, para que a memória não cresça com o número de cenários.
+    """
+    with ProcessPoolExecutor(max_workers=max_processos, mp_context=multiprocessing.get_context('spawn')) as executor:
+        pendentes = deque()
+        for tarefa in tarefas:
+            pendentes.append(executor.submit(_preparar_cenario, tarefa))
+            if len(pendentes) >= max_pendentes:
+                yield pendentes.popleft().result()
+        while pendentes:
+            yield pendentes.popleft().result()
+
+def _nome_arquivo(texto):
+    return re.sub(r'[\\/:*?"<>|]+', '_', texto)
+
+def gerar_relatorios_projeto(username, project_name, destino, formato="zip", max_processos=None,
+                             rend_motor=90, horas_por_dia=8.0, tarifa_energia=0.75, ao_concluir=None):
+    """
+    Gera os relatórios de todos os cenários de um projeto, carregados do banco, em paralelo.
+
+    'destino' é um caminho ou um arquivo binário aberto. No formato "zip" cada PDF é gravado
+    no arquivo assim que fica pronto; no formato "pdf" os cenários são reunidos em um único
+    documento, cujo conteúdo precisa ficar em memória até o fim. Rendimento do motor, horas
+    de operação e tarifa não fazem parte do cenário salvo e valem para todo o lote.
+    'ao_concluir(nome_cenario, erro)' é chamada a cada cenário processado.
+    Retorna {"gerados": [...], "falhas": {cenario: mensagem}}.
+    """
+    if formato not in ("zip", "pdf"):
+        raise ValueError(f"Formato '{formato}' inválido; use 'zip' ou 'pdf'.")
+    max_processos = max_processos or os.cpu_count() or 1
+    materiais = {**MATERIAIS_PADRAO, **get_user_materials(username)}
+    fluidos = {**FLUIDOS_PADRAO, **get_user_fluids(username)}
+    equipamentos = (rend_motor, horas_por_dia, tarifa_energia)
+
+    # Os cenários são lidos do banco à medida que o pool tem vaga, não todos de uma vez
+    tarefas = (
+        (project_name, nome, dados, materiais, fluidos, equipamentos, formato == "zip")
+        for nome in get_scenarios_for_project(username, project_name)
+        for dados in [load_scenario(username, project_name, nome)] if dados
+    )
+    gerados, falhas = [], {}
+
+    def relatorios_concluidos():
+        for nome, conteudo, erro in _resultados_em_ordem(tarefas, max_processos, 2 * max_processos):
+            if erro:
+                falhas[nome] = erro
+            else:
+                gerados.append(nome)
+            if ao_concluir:
+                ao_concluir(nome, erro)
+            if conteudo is not None:
+                yield nome, conteudo
+
+    if formato == "zip":
+        # PDFs já são comprimidos; ZIP_STORED evita recomprimir
+        with zipfile.ZipFile(destino, "w", compression=zipfile.ZIP_STORED) as arquivo_zip:
+            for nome, pdf_bytes in relatorios_concluidos():
+                arquivo_zip.writestr(_nome_arquivo(f"Relatorio_{project_name}_{nome}.pdf"), pdf_bytes)
+            if falhas:
+                arquivo_zip.writestr("falhas.txt", "\n".join(f"{nome}: {erro}" for nome, erro in falhas.items()))
+    else:
+        pdf_bytes = generate_combined_report(project_name, (argumentos for _, argumentos in relatorios_concluidos()))
+        if hasattr(destino, "write"):
+            destino.write(pdf_bytes)
+        else:
+            with open(destino, "wb") as arquivo:
+                arquivo.write(pdf_bytes)
+    return {"gerados": gerados, "falhas": falhas}
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera os relatórios PDF de todos os cenários de um projeto.")
+    parser.add_argument("usuario")
+    parser.add_argument("projeto")
+    parser.add_argument("saida", help="arquivo .zip (um PDF por cenário) ou .pdf (documento único)")
+    parser.add_argument("--processos", type=int, default=None)
+    parser.add_argument("--rend-motor", type=float, default=90)
+    parser.add_argument("--horas-dia", type=float, default=8.0)
+    parser.add_argument("--tarifa", type=float, default=0.75)
+    args = parser.parse_args()
+
+    formato = "pdf" if args.saida.lower().endswith(".pdf") else "zip"
+    resumo = gerar_relatorios_projeto(
+        args.usuario, args.projeto, args.saida, formato, args.processos, args.rend_motor, args.horas_dia, args.tarifa,
+        ao_concluir=lambda nome, erro: print(f"{nome}: {erro or 'ok'}", flush=True)
+    )
+    print(f"{len(resumo['gerados'])} relatório(s) em {args.saida}; {len(resumo['falhas'])} falha(s).")
+
+if __name__ == "__main__":
+    main()
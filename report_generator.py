@@ -1,17 +1,23 @@
-# report_generator.py (Versão 2.3 - Correção do import 'time')
+# report_generator.py (Versão 2.4 - Imagens em memória, sem arquivos temporários)
 
-import time # LINHA ADICIONADA
+import hashlib
 from fpdf import FPDF
+from fpdf.image_parsing import preload_image
 from datetime import datetime
 import io
 from PIL import Image
-import os
+
+from perfil_etapas import etapa
+
+# Resolução com que as imagens são incorporadas ao PDF, na largura em que são impressas
+DPI_IMPRESSAO = 200
 
 class PDFReport(FPDF):
     def __init__(self, project_name, scenario_name, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.project_name = project_name
         self.scenario_name = scenario_name
+        self._imagens = {}
         self.set_auto_page_break(auto=True, margin=20) 
 
     def header(self):
@@ -147,14 +153,29 @@ class PDFReport(FPDF):
         draw_rows('Trechos em Série (Depois)', network_data.get('depois', []))
         self.ln(5)
 
+    def _preparar_imagem(self, image_bytes, largura_mm):
+        """
+        Registra a imagem no cache do fpdf a partir do buffer em memória, reduzida para a
+        resolução de impressão. Retorna o nome no cache; imagens repetidas não são reprocessadas.
+        """
+        largura_px = max(1, round(largura_mm / 25.4 * DPI_IMPRESSAO))
+        chave = (hashlib.sha1(image_bytes).hexdigest(), largura_px)
+        if chave in self._imagens:
+            return self._imagens[chave]
+        with etapa("pdf_preparar_imagem"):
+            img_pil = Image.open(io.BytesIO(image_bytes))
+            # PNGs do matplotlib/graphviz vêm em RGBA totalmente opaco; sem o canal alfa o PDF dispensa a SMask
+            if img_pil.mode == 'RGBA' and img_pil.getchannel('A').getextrema() == (255, 255):
+                img_pil = img_pil.convert('RGB')
+            if img_pil.width > largura_px:
+                # Filtro BOX (média por área): bem mais rápido que LANCZOS e comprime melhor no PDF
+                img_pil = img_pil.resize((largura_px, max(1, round(img_pil.height * largura_px / img_pil.width))), Image.BOX)
+            self._imagens[chave] = preload_image(self.image_cache, img_pil)[0]
+        return self._imagens[chave]
+
     def add_image_from_bytes(self, image_bytes):
-        temp_img_path = f"temp_image_{time.time()}.png"
-        with open(temp_img_path, "wb") as f:
-            f.write(image_bytes)
-        
-        img_pil = Image.open(temp_img_path)
-        img_width, img_height = img_pil.size
-        img_pil.close()
+        with Image.open(io.BytesIO(image_bytes)) as img_pil:
+            img_width, img_height = img_pil.size
 
         max_page_width = 190
         new_width = max_page_width
@@ -170,32 +191,47 @@ class PDFReport(FPDF):
                  new_height *= scale_factor
                  new_width *= scale_factor
 
-        self.image(temp_img_path, x='C', w=new_width)
+        self.image(self._preparar_imagem(image_bytes, new_width), x='C', w=new_width, h=new_height)
         self.ln(5)
-        os.remove(temp_img_path)
+
+    def add_scenario_report(self, params_data, results_data, metrics_data, network_data, diagram_image_bytes, chart_figure_bytes):
+        """ Adiciona, a partir de uma nova página, todas as seções do relatório de um cenário. """
+        self.add_page()
+        
+        self.add_section_title('Parâmetros Gerais da Simulação')
+        self.add_key_value_table(params_data)
+
+        self.add_section_title('Resumo da Rede de Tubulação')
+        with etapa("pdf_tabela_rede"):
+            self.add_network_summary_table(network_data)
+
+        self.add_section_title('Diagrama da Rede')
+        self.add_image_from_bytes(diagram_image_bytes) 
+        
+        self.add_section_title('Resultados no Ponto de Operação')
+        self.add_results_metrics(metrics_data)
+        
+        self.add_section_title('Análise de Custo Energético')
+        self.add_key_value_table(results_data)
+
+        self.add_section_title('Gráfico: Curva da Bomba vs. Curva do Sistema')
+        self.add_image_from_bytes(chart_figure_bytes)
 
 
 def generate_report(project_name, scenario_name, params_data, results_data, metrics_data, 
                     network_data, diagram_image_bytes, chart_figure_bytes):
-    pdf = PDFReport(project_name, scenario_name)
-    pdf.add_page()
-    
-    pdf.add_section_title('Parâmetros Gerais da Simulação')
-    pdf.add_key_value_table(params_data)
-
-    pdf.add_section_title('Resumo da Rede de Tubulação')
-    pdf.add_network_summary_table(network_data)
-
-    pdf.add_section_title('Diagrama da Rede')
-    pdf.add_image_from_bytes(diagram_image_bytes) 
-    
-    pdf.add_section_title('Resultados no Ponto de Operação')
-    pdf.add_results_metrics(metrics_data)
-    
-    pdf.add_section_title('Análise de Custo Energético')
-    pdf.add_key_value_table(results_data)
-
-    pdf.add_section_title('Gráfico: Curva da Bomba vs. Curva do Sistema')
-    pdf.add_image_from_bytes(chart_figure_bytes)
-    
-    return bytes(pdf.output())
+    with etapa("pdf_montagem"):
+        pdf = PDFReport(project_name, scenario_name)
+        pdf.add_scenario_report(params_data, results_data, metrics_data, network_data, diagram_image_bytes, chart_figure_bytes)
+    with etapa("pdf_saida"):
+        return bytes(pdf.output())
+
+def generate_combined_report(project_name, reports):
+    """ Um único PDF com os relatórios de vários cenários; 'reports' é um iterável com os argumentos de generate_report. """
+    pdf = PDFReport(project_name, "")
+    for report in reports:
+        pdf.scenario_name = report['scenario_name']
+        pdf.add_scenario_report(report['params_data'], report['results_data'], report['metrics_data'],
+                                report['network_data'], report['diagram_image_bytes'], report['chart_figure_bytes'])
+    with etapa("pdf_saida"):
+        return bytes(pdf.output())
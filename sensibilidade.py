@@ -0,0 +1,102 @@
+# sensibilidade.py (Análise de sensibilidade de diâmetros em lote, com o ponto de operação re-resolvido)
+
+import numpy as np
+import pandas as pd
+
+from hidraulica import calcular_analise_energetica, calcular_curva_sistema, resolver_pontos_operacao
+
+def grupos_trechos(rede):
+    """
+    Grupos candidatos a redimensionamento: cada trecho em série, cada ramal inteiro e cada
+    trecho de ramais com mais de um trecho. Retorna {nome: máscara booleana por trecho}.
+    """
+    def mascara(indices):
+        selecao = np.zeros(rede.num_trechos, dtype=bool)
+        selecao[indices] = True
+        return selecao
+
+    grupos = {f"Antes (T{i+1})": mascara(k) for i, k in enumerate(range(rede.faixa_antes.start, rede.faixa_antes.stop))}
+    # Com um único ramal o paralelo não entra no cálculo (ver calcular_perdas_paralelo)
+    if rede.num_ramais >= 2:
+        for nome_ramal, faixa in zip(rede.nomes_ramais, rede.faixas_ramais):
+            grupos[nome_ramal] = mascara(faixa)
+            if faixa.stop - faixa.start > 1:
+                grupos.update({f"{nome_ramal} (T{i+1})": mascara(k) for i, k in enumerate(range(faixa.start, faixa.stop))})
+    grupos.update({f"Depois (T{i+1})": mascara(k) for i, k in enumerate(range(rede.faixa_depois.start, rede.faixa_depois.stop))})
+    return grupos
+
+def avaliar_multiplicadores(rede, multiplicadores, h_geometrica, func_curva_bomba, func_curva_eficiencia, chute_vazao=None):
+    """
+    Ponto de operação de cada candidato, todos em um único lote. `multiplicadores` tem forma
+    (..., trechos) e multiplica os diâmetros atuais. Retorna {"vazao", "altura", "eficiencia"}.
+    """
+    rede_lote = rede.com_diametros(rede.diametro_m * np.asarray(multiplicadores, dtype=float))
+    pontos = resolver_pontos_operacao(rede_lote, h_geometrica, func_curva_bomba, chute_vazao)
+    eficiencia = np.where(pontos["convergiu"], np.clip(func_curva_eficiencia(pontos["vazao"]), 0, 100), np.nan)
+    return {"vazao": pontos["vazao"], "altura": pontos["altura"], "eficiencia": eficiencia}
+
+def sensibilidade_uniforme(rede, fatores_percentuais, h_geometrica, func_curva_bomba, func_curva_eficiencia, chute_vazao=None):
+    """ Mesmo fator de escala em todos os diâmetros; arrays com um valor por fator. """
+    fatores = np.asarray(fatores_percentuais, dtype=float)
+    multiplicadores = np.broadcast_to((fatores / 100)[:, np.newaxis], (len(fatores), rede.num_trechos))
+    return {"fator": fatores, **avaliar_multiplicadores(rede, multiplicadores, h_geometrica, func_curva_bomba, func_curva_eficiencia, chute_vazao)}
+
+def sensibilidade_por_grupo(rede, fatores_percentuais, h_geometrica, func_curva_bomba, func_curva_eficiencia, grupos=None, chute_vazao=None):
+    """
+    Escala um grupo de trechos por vez (qual trecho ou ramal vale a pena ampliar?).
+    Arrays com forma (grupos, fatores).
+    """
+    grupos = grupos if grupos is not None else grupos_trechos(rede)
+    fatores = np.asarray(fatores_percentuais, dtype=float)
+    mascaras = np.array(list(grupos.values()), dtype=bool).reshape(len(grupos), rede.num_trechos)
+    multiplicadores = np.where(mascaras[:, np.newaxis, :], (fatores / 100)[np.newaxis, :, np.newaxis], 1.0)
+    return {"grupos": list(grupos), "fator": fatores,
+            **avaliar_multiplicadores(rede, multiplicadores, h_geometrica, func_curva_bomba, func_curva_eficiencia, chute_vazao)}
+
+def sensibilidade_temperatura(rede, temperaturas_c, h_geometrica, func_curva_bomba, func_curva_eficiencia, chute_vazao=None):
+    """
+    Ponto de operação para cada temperatura do fluido (ex.: de verão a inverno), todas em um
+    único lote; rho e nu saem do interpolador em cache do fluido (CompiledNetwork.com_temperatura).
+    """
+    temperaturas = np.asarray(temperaturas_c, dtype=float)
+    pontos = resolver_pontos_operacao(rede.com_temperatura(temperaturas), h_geometrica, func_curva_bomba, chute_vazao)
+    eficiencia = np.where(pontos["convergiu"], np.clip(func_curva_eficiencia(pontos["vazao"]), 0, 100), np.nan)
+    return {"temperatura": temperaturas, "vazao": pontos["vazao"], "altura": pontos["altura"], "eficiencia": eficiencia}
+
+def varredura_diametro_vazao(rede, fatores_percentuais, vazoes_m3h, h_geometrica):
+    """ Altura do sistema para cada par (fator de escala, vazão): array (fatores, vazões), NaN onde a divisão falha. """
+    fatores = np.asarray(fatores_percentuais, dtype=float)
+    rede_lote = rede.com_diametros(rede.diametro_m * (fatores / 100)[:, np.newaxis, np.newaxis])
+    alturas = np.asarray(calcular_curva_sistema(rede_lote, h_geometrica, np.asarray(vazoes_m3h, dtype=float)[np.newaxis, :]))
+    return np.where(alturas < 1e10, alturas, np.nan)
+
+def tabela_custos(pontos, eficiencia_motor_percent, horas_dia, custo_kwh, fluido_selecionado, fluidos_combinados):
+    """
+    Acrescenta potência, custo anual e energia específica aos pontos de operação. A vazão
+    muda com o diâmetro, então o custo por m³ bombeado é a base justa de comparação.
+    """
+    energia = calcular_analise_energetica(pontos["vazao"], pontos["altura"], pontos["eficiencia"], eficiencia_motor_percent,
+                                          horas_dia, custo_kwh, fluido_selecionado, fluidos_combinados, pontos.get("temperatura"))
+    invalido = np.isnan(pontos["vazao"])
+    potencia = np.where(invalido, np.nan, energia["potencia_eletrica_kW"])
+    return {
+        **pontos,
+        "potencia_kW": potencia,
+        "custo_anual": np.where(invalido, np.nan, energia["custo_anual"]),
+        "energia_especifica": potencia / np.where(invalido, np.nan, pontos["vazao"]),
+    }
+
+def dataframe_sensibilidade(resultado):
+    """ Resultado de sensibilidade_uniforme/por_grupo/temperatura (com custos) em formato longo para gráficos e tabelas. """
+    colunas = {
+        "vazao": "Vazão (m³/h)", "altura": "Altura (m)", "eficiencia": "Eficiência (%)",
+        "custo_anual": "Custo Anual de Energia (R$)", "energia_especifica": "Energia Específica (kWh/m³)",
+    }
+    if "temperatura" in resultado:
+        dados = {"Temperatura do Fluido (°C)": resultado["temperatura"]}
+    else:
+        dados = {"Fator de Escala nos Diâmetros (%)": np.broadcast_to(resultado["fator"], np.shape(resultado["vazao"])).ravel()}
+    if "grupos" in resultado:
+        dados = {"Grupo": np.repeat(resultado["grupos"], len(resultado["fator"])), **dados}
+    dados.update({titulo: np.ravel(resultado[chave]) for chave, titulo in colunas.items() if chave in resultado})
+    return pd.DataFrame(dados)
@@ -0,0 +1,159 @@
+# servico_relatorios.py (Geração de relatórios PDF sob demanda em processos de trabalho)
+
+import hashlib
+import io
+import json
+import multiprocessing
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from cache_resultados import CacheResultados
+from perfil_etapas import coletar, etapa
+
+def chave_relatorio(chave_cenario, dados):
+    """
+    Hash SHA-256 de um relatório: a chave hidráulica do cenário (que já determina as curvas)
+    mais os textos, tabelas e o diagrama que entram no PDF.
+    """
+    conteudo = {k: v for k, v in dados.items() if k != 'curvas'}
+    texto = json.dumps(conteudo, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{chave_cenario}|{texto}".encode('utf-8')).hexdigest()
+
+def montar_dados_relatorio(project_name, scenario_name, sistema, h_geometrica, fluido_selecionado, resultado_hidraulico,
+                           resultados_energia, rend_motor, horas_por_dia, tarifa_energia, diagrama_dot):
+    """ Entradas do relatório (tabelas, diagrama e curvas) a partir do resultado de resolver_hidraulica. """
+    vazao_op, altura_op = resultado_hidraulico['vazao_op'], resultado_hidraulico['altura_op']
+    return {
+        "project_name": project_name,
+        "scenario_name": scenario_name,
+        "params_data": {
+            "Fluido Selecionado": fluido_selecionado,
+            "Altura Geométrica (m)": f"{h_geometrica:.2f}",
+            "Horas de Operação por Dia": f"{horas_por_dia:.1f}",
+            "Custo de Energia (R$/kWh)": f"{tarifa_energia:.2f}",
+            "Eficiência do Motor (%)": f"{rend_motor:.1f}"
+        },
+        "results_data": {
+            "Potência Elétrica Consumida (kW)": f"{resultados_energia['potencia_eletrica_kW']:.2f}",
+            "Custo Anual de Energia (R$)": f"{resultados_energia['custo_anual']:.2f}"
+        },
+        "metrics_data": [
+            ("Vazão (m³/h)", f"{vazao_op:.2f}"),
+            ("Altura (m)", f"{altura_op:.2f}"),
+            ("Eficiência Bomba (%)", f"{resultado_hidraulico['eficiencia_op']:.1f}")
+        ],
+        "network_data": sistema,
+        "diagrama_dot": diagrama_dot,
+        "curvas": (resultado_hidraulico['vazao_range'], resultado_hidraulico['altura_bomba'], resultado_hidraulico['altura_sistema'], vazao_op, altura_op)
+    }
+
+def argumentos_relatorio(dados):
+    """ Renderiza o diagrama e o gráfico (300 dpi) e devolve os argumentos de generate_report. """
+    # Importados aqui: só os processos de trabalho renderizam, a interface não paga o custo
+    import graphviz
+    import matplotlib.pyplot as plt
+    from graficos import criar_figura_curvas
+
+    with etapa("diagrama_graphviz"):
+        diagrama_bytes = graphviz.Source(dados['diagrama_dot']).pipe(format='png')
+
+    with etapa("grafico_savefig_300dpi"):
+        fig_curvas = criar_figura_curvas(*dados['curvas'])
+        chart_buffer = io.BytesIO()
+        fig_curvas.savefig(chart_buffer, format='PNG', dpi=300, bbox_inches='tight')
+        plt.close(fig_curvas)
+
+    return {
+        "project_name": dados['project_name'],
+        "scenario_name": dados['scenario_name'],
+        "params_data": dados['params_data'],
+        "results_data": dados['results_data'],
+        "metrics_data": dados['metrics_data'],
+        "network_data": dados['network_data'],
+        "diagram_image_bytes": diagrama_bytes,
+        "chart_figure_bytes": chart_buffer.getvalue()
+    }
+
+def renderizar_relatorio(dados, perfil=False):
+    """
+    Executado no processo de trabalho: renderiza as imagens e monta o PDF. Com `perfil`,
+    devolve (pdf, etapas) com os tempos de cada etapa medidos no processo de trabalho.
+    """
+    from report_generator import generate_report
+    if not perfil:
+        return generate_report(**argumentos_relatorio(dados))
+    with coletar("relatorio") as coleta:
+        pdf_bytes = generate_report(**argumentos_relatorio(dados))
+    return pdf_bytes, coleta.etapas
+
+class ServicoRelatorios:
+    """
+    Fila de relatórios atendida por um pool de processos criado na primeira solicitação.
+    Pedidos repetidos de um relatório já gerado saem do cache; pedidos simultâneos do mesmo
+    relatório compartilham o mesmo Future.
+    """
+    def __init__(self, max_processos=2, cache=None):
+        self.max_processos = max_processos
+        self.cache = cache if cache is not None else CacheResultados(max_entradas=64, max_bytes=128 * 1024 * 1024)
+        self._executor = None
+        self._pendentes = {}
+        self._etapas = {}
+        self._lock = threading.Lock()
+
+    def _obter_executor(self):
+        if self._executor is None:
+            # 'spawn' evita herdar via fork as threads e locks do servidor Streamlit
+            self._executor = ProcessPoolExecutor(max_workers=self.max_processos, mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def solicitar(self, chave, dados, perfil=False):
+        """
+        Agenda a geração do relatório (se necessário) e devolve um Future com os bytes do PDF.
+        Com `perfil`, as etapas medidas no processo de trabalho ficam disponíveis em obter_etapas().
+        """
+        with self._lock:
+            if chave in self._pendentes:
+                return self._pendentes[chave]
+            pdf_bytes = self.cache.obter(chave)
+            if pdf_bytes is not None:
+                futuro = Future()
+                futuro.set_result(pdf_bytes)
+                return futuro
+            inicio = time.perf_counter()
+            tarefa = self._obter_executor().submit(renderizar_relatorio, dados, perfil)
+            # O Future devolvido sempre tem só os bytes do PDF, com ou sem perfil
+            futuro = Future()
+            futuro.set_running_or_notify_cancel()
+            self._pendentes[chave] = futuro
+        tarefa.add_done_callback(lambda t: self._concluir(chave, t, futuro, perfil, time.perf_counter() - inicio))
+        return futuro
+
+    def _concluir(self, chave, tarefa, futuro, perfil, tempo_s):
+        with self._lock:
+            self._pendentes.pop(chave, None)
+            erro = tarefa.exception() if not tarefa.cancelled() else CancelledError()
+            if isinstance(erro, BrokenProcessPool):
+                self._executor = None
+            if erro is None and perfil:
+                pdf_bytes, self._etapas[chave] = tarefa.result()
+        if erro is not None:
+            futuro.set_exception(erro)
+            return
+        if not perfil:
+            pdf_bytes = tarefa.result()
+        self.cache.guardar(chave, pdf_bytes, tempo_s)
+        futuro.set_result(pdf_bytes)
+
+    def obter_etapas(self, chave):
+        """ Etapas da última geração do relatório com perfil (uma única vez), ou None. """
+        with self._lock:
+            return self._etapas.pop(chave, None)
+
+    def em_andamento(self, chave):
+        with self._lock:
+            return chave in self._pendentes
+
+# Instância única por processo, compartilhada pelas sessões do Streamlit
+SERVICO_RELATORIOS = ServicoRelatorios()
@@ -0,0 +1,190 @@
+# simulacao_periodo.py (Simulação estendida: 24 h ou um ano com reservatório, controles e tarifa horária)
+#
+# A bomba recalca para um reservatório cujo nível muda a altura geométrica ao longo do dia
+# (balanço de massa a cada passo). Ela é ligada e desligada por nível, com horários em que
+# fica bloqueada (ex.: ponta), e a energia é cobrada pela tarifa de cada hora.
+#
+# O ponto de operação só depende da altura geométrica, então é resolvido uma única vez, em
+# lote, numa malha de níveis (resolver_pontos_operacao); cada passo apenas interpola nessa
+# tabela, e um ano de passos horários roda em dezenas de milissegundos. Com temperatura do
+# fluido variável, a tabela ganha uma segunda dimensão (malha de temperaturas, com rho e nu
+# do interpolador em cache do fluido) e cada passo interpola também na temperatura.
+
+import numpy as np
+import pandas as pd
+
+from hidraulica import calcular_potencia_eletrica, resolver_pontos_operacao
+
+HORAS_ANO = 8760
+
+# Fator sobre a demanda média em cada hora do dia (média 1): consumo urbano típico
+PADRAO_DEMANDA = (0.55, 0.50, 0.45, 0.45, 0.50, 0.65, 0.95, 1.25, 1.35, 1.30, 1.25, 1.25,
+                  1.30, 1.20, 1.10, 1.05, 1.05, 1.15, 1.35, 1.40, 1.25, 1.05, 0.85, 0.65)
+# Horário de ponta padrão (hora inicial inclusiva, final exclusiva) e fator da tarifa nele
+HORARIO_PONTA = (18, 21)
+FATOR_TARIFA_PONTA = 3.0
+
+def perfil_horario_padrao():
+    """ Tabela de 24 horas com o padrão de demanda, o fator de tarifa e o bloqueio na ponta. """
+    ponta = [HORARIO_PONTA[0] <= hora < HORARIO_PONTA[1] for hora in range(24)]
+    return pd.DataFrame({
+        "Hora": range(24), "Fator de Demanda": PADRAO_DEMANDA,
+        "Fator de Tarifa": [FATOR_TARIFA_PONTA if p else 1.0 for p in ponta], "Bomba Bloqueada": ponta,
+    })
+
+def perfil_temperatura(horas, media_c, amplitude_diaria_c=0.0, amplitude_anual_c=0.0, hora_pico=15):
+    """
+    Temperatura do fluido hora a hora: média mais um ciclo diário (máximo em `hora_pico`) e um
+    ciclo anual com o máximo no início do ano (verão no hemisfério sul).
+    """
+    tempo_h = np.arange(horas)
+    return (media_c + amplitude_diaria_c * np.cos(2 * np.pi * (tempo_h % 24 - hora_pico) / 24)
+            + amplitude_anual_c * np.cos(2 * np.pi * tempo_h / HORAS_ANO))
+
+def _por_hora(valores, horas, nome):
+    """ Expande um escalar, um padrão diário (24 valores) ou uma série completa para `horas` valores. """
+    valores = np.atleast_1d(np.asarray(valores))
+    if len(valores) not in (1, 24, horas):
+        raise ValueError(f"'{nome}' deve ter 1, 24 ou {horas} valores (recebidos {len(valores)}).")
+    return np.resize(valores, horas)
+
+def tabela_operacao(rede, func_curva_bomba, func_curva_eficiencia, eficiencia_motor_percent, alturas_geometricas):
+    """
+    Ponto de operação e potência elétrica para cada altura geométrica, todos em um único lote.
+    Vazão e potência são zero onde a bomba não vence a altura. Com uma rede em lote de
+    temperaturas (com_temperatura), passe as alturas como coluna: a tabela fica (alturas, temperaturas).
+    """
+    alturas_geometricas = np.asarray(alturas_geometricas, dtype=float)
+    pontos = resolver_pontos_operacao(rede, alturas_geometricas, func_curva_bomba)
+    vazao = np.where(pontos["convergiu"], pontos["vazao"], 0.0)
+    altura = np.where(pontos["convergiu"], pontos["altura"], alturas_geometricas)
+    eficiencia = np.where(pontos["convergiu"], np.clip(func_curva_eficiencia(vazao), 0, 100), 0.0)
+    potencia_kW = np.asarray(calcular_potencia_eletrica(vazao, altura, eficiencia, eficiencia_motor_percent, rede.rho))
+    return {"h_geometrica": alturas_geometricas, "vazao": vazao, "altura": altura, "eficiencia": eficiencia, "potencia_kW": potencia_kW}
+
+def simular_periodo(rede, func_curva_bomba, func_curva_eficiencia, h_geometrica, eficiencia_motor_percent, reservatorio,
+                    demanda_m3h, tarifas_kwh, horas=24, passo_h=1.0, horas_bloqueadas=False, pontos_tabela=65,
+                    temperaturas_c=None, pontos_temperatura=9):
+    """
+    Simulação em período estendido com passo fixo.
+
+    `h_geometrica` é a altura estática com o reservatório vazio (nível 0); `reservatorio` traz
+    area_m2, nivel_inicial_m, nivel_max_m, nivel_liga_m e nivel_desliga_m. Demanda (m³/h),
+    tarifa (R$/kWh) e bloqueio aceitam um valor, um padrão diário de 24 horas ou uma série
+    hora a hora do período, assim como `temperaturas_c` (°C, temperatura do fluido; None mantém
+    as propriedades da rede). O bloqueio cede quando o reservatório esvazia: a bomba parte nesse
+    instante e segue até o fim do bloqueio ou até o nível de desligamento.
+
+    Dentro do passo a bomba para no instante em que o nível atinge nivel_desliga e parte no
+    instante em que cai a nivel_liga (como o encurtamento de passo do EPANET), então as horas
+    de bomba não dependem do tamanho do passo. Retorna {"passos": arrays por passo, "resumo": totais}.
+    """
+    area = float(reservatorio["area_m2"])
+    nivel_max = float(reservatorio["nivel_max_m"])
+    nivel_liga, nivel_desliga = float(reservatorio["nivel_liga_m"]), float(reservatorio["nivel_desliga_m"])
+    if not 0 <= nivel_liga < nivel_desliga <= nivel_max:
+        raise ValueError("Os níveis devem obedecer 0 ≤ liga < desliga ≤ máximo.")
+    demanda = _por_hora(demanda_m3h, horas, "demanda_m3h").astype(float)
+    tarifas = _por_hora(tarifas_kwh, horas, "tarifas_kwh").astype(float)
+    bloqueio = _por_hora(horas_bloqueadas, horas, "horas_bloqueadas").astype(bool)
+
+    alturas_tabela = h_geometrica + np.linspace(0.0, nivel_max, pontos_tabela)
+    temperaturas = None if temperaturas_c is None else _por_hora(temperaturas_c, horas, "temperaturas_c").astype(float)
+    coluna, peso = np.zeros(horas, dtype=int), np.zeros(horas)
+    if temperaturas is None:
+        tabela = tabela_operacao(rede, func_curva_bomba, func_curva_eficiencia, eficiencia_motor_percent, alturas_tabela)
+    else:
+        # Malha de temperaturas entre os extremos do período; cada hora pesa as duas colunas vizinhas
+        malha_temperaturas = np.linspace(temperaturas.min(), temperaturas.max(), pontos_temperatura if np.ptp(temperaturas) > 0 else 2)
+        tabela = tabela_operacao(rede.com_temperatura(malha_temperaturas), func_curva_bomba, func_curva_eficiencia, eficiencia_motor_percent,
+                                 alturas_tabela[:, np.newaxis])
+        posicao = np.interp(temperaturas, malha_temperaturas, np.arange(len(malha_temperaturas)))
+        coluna = np.minimum(posicao.astype(int), len(malha_temperaturas) - 2)
+        peso = posicao - coluna
+    vazoes_tabela, potencias_tabela = tabela["vazao"], tabela["potencia_kW"]
+
+    def interpolar(h_geo, valores, hora):
+        if valores.ndim == 1:
+            return float(np.interp(h_geo, alturas_tabela, valores))
+        i, w = coluna[hora], peso[hora]
+        return float((1 - w) * np.interp(h_geo, alturas_tabela, valores[:, i]) + w * np.interp(h_geo, alturas_tabela, valores[:, i + 1]))
+
+    num_passos = int(round(horas / passo_h))
+    nivel = float(np.clip(reservatorio["nivel_inicial_m"], 0.0, nivel_max))
+    ligada = nivel <= nivel_liga
+    rodando = emergencia = False
+    niveis, vazoes, fracoes, potencias = (np.zeros(num_passos) for _ in range(4))
+    deficit = extravasado = 0.0
+    partidas = 0
+    for k in range(num_passos):
+        hora = min(int(k * passo_h), horas - 1)
+        q_demanda = demanda[hora]
+        niveis[k] = nivel
+        # Controle por nível com histerese; no bloqueio a partida só acontece com o reservatório vazio
+        if nivel <= nivel_liga:
+            ligada = True
+        elif nivel >= nivel_desliga:
+            ligada = False
+        emergencia = emergencia and bloqueio[hora]
+        permitida = not bloqueio[hora] or emergencia
+        nivel_partida = nivel_liga if permitida else 0.0
+        h_geo = h_geometrica + nivel
+        q_bomba = interpolar(h_geo, vazoes_tabela, hora)
+        if ligada and permitida:
+            saldo = q_bomba - q_demanda
+            # Parada no meio do passo quando o nível chega ao de desligamento
+            fracao = min(1.0, (nivel_desliga - nivel) * area / (saldo * passo_h)) if saldo > 0 else 1.0
+            partidas += not rodando
+            ligada = rodando = fracao >= 1.0
+        elif q_demanda > 0 and nivel - q_demanda * passo_h / area < nivel_partida:
+            # Partida no meio do passo, quando o consumo leva o nível ao de acionamento
+            fracao = 1.0 - max(0.0, (nivel - nivel_partida) * area / (q_demanda * passo_h))
+            partidas += 1
+            ligada = rodando = True
+            emergencia = not permitida
+        else:
+            fracao = 0.0
+            rodando = False
+        nivel += (fracao * q_bomba - q_demanda) * passo_h / area
+        if nivel < 0.0:
+            deficit += -nivel * area
+            nivel = 0.0
+        elif nivel > nivel_max:
+            extravasado += (nivel - nivel_max) * area
+            nivel = nivel_max
+        vazoes[k] = fracao * q_bomba
+        fracoes[k] = fracao
+        potencias[k] = fracao * interpolar(h_geo, potencias_tabela, hora)
+
+    horas_passo = np.minimum((np.arange(num_passos) * passo_h).astype(int), horas - 1)
+    energia = potencias * passo_h
+    custo = energia * tarifas[horas_passo]
+    volume = vazoes.sum() * passo_h
+    passos = {
+        "tempo_h": np.arange(num_passos) * passo_h, "nivel_m": niveis, "h_geometrica": h_geometrica + niveis,
+        "demanda_m3h": demanda[horas_passo], "vazao_m3h": vazoes, "fracao_ligada": fracoes,
+        "potencia_kW": potencias, "energia_kWh": energia, "tarifa_kwh": tarifas[horas_passo], "custo": custo,
+    }
+    if temperaturas is not None:
+        passos["temperatura_c"] = temperaturas[horas_passo]
+    resumo = {
+        "horas": horas, "energia_kWh": float(energia.sum()), "custo": float(custo.sum()),
+        "custo_anualizado": float(custo.sum() * HORAS_ANO / horas), "horas_bomba": float(fracoes.sum() * passo_h),
+        "partidas": partidas, "volume_bombeado_m3": float(volume),
+        "custo_por_m3": float(custo.sum() / volume) if volume > 0 else float("nan"),
+        "tarifa_media_kwh": float(custo.sum() / energia.sum()) if energia.sum() > 0 else float("nan"),
+        "deficit_m3": float(deficit), "extravasado_m3": float(extravasado), "nivel_final_m": float(nivel),
+        "nivel_minimo_m": float(min(niveis.min(), nivel)), "nivel_maximo_m": float(max(niveis.max(), nivel)),
+    }
+    return {"passos": passos, "resumo": resumo}
+
+def dataframe_simulacao(resultado):
+    """ Passos da simulação em um DataFrame indexado pelo tempo, para gráficos e tabelas. """
+    passos = resultado["passos"]
+    df = pd.DataFrame({
+        "Nível (m)": passos["nivel_m"], "Vazão da Bomba (m³/h)": passos["vazao_m3h"], "Demanda (m³/h)": passos["demanda_m3h"],
+        "Potência (kW)": passos["potencia_kW"], "Tarifa (R$/kWh)": passos["tarifa_kwh"], "Custo (R$)": passos["custo"],
+    }, index=pd.Index(passos["tempo_h"], name="Tempo (h)"))
+    if "temperatura_c" in passos:
+        df["Temperatura (°C)"] = passos["temperatura_c"]
+    return df
@@ -0,0 +1,136 @@
+# transferencia_dados.py (Exportação e importação em massa de cenários, fluidos e materiais)
+#
+# Formatos: JSON lines (um registro por linha) ou Parquet (pyarrow, já instalado com o
+# Streamlit). Os dois são lidos e escritos em fluxo, registro a registro ou em grupos de
+# linhas, então a memória não cresce com o número de cenários.
+#
+# Uso: python transferencia_dados.py exportar ARQUIVO [--usuario U [--projeto P]]
+#      python transferencia_dados.py importar ARQUIVO [--usuario-destino U] [--manter-existentes]
+#
+# O formato é escolhido pela extensão (.parquet ou qualquer outra para JSON lines);
+# ARQUIVO '-' usa a entrada/saída padrão em JSON lines.
+
+import argparse
+import json
+import sys
+from itertools import islice
+
+from database import export_records, import_records, setup_database
+
+LINHAS_POR_GRUPO = 2000
+
+# Esquema único do Parquet: cada tipo de registro preenche só as suas colunas
+COLUNAS_PARQUET = ("tipo", "username", "project_name", "scenario_name", "last_modified", "nome", "rho", "nu",
+                   "tabela", "rugosidade", "scenario_data", "last_results")
+COLUNAS_JSON = ("tabela", "scenario_data", "last_results")
+
+def _eh_parquet(caminho):
+    return caminho.lower().endswith(".parquet")
+
+def escrever_jsonl(registros, arquivo):
+    """ Escreve um registro por linha; devolve quantos foram escritos. """
+    total = 0
+    for registro in registros:
+        arquivo.write(json.dumps(registro, ensure_ascii=False, separators=(',', ':')) + "\n")
+        total += 1
+    return total
+
+def ler_jsonl(arquivo):
+    """ Gera os registros linha a linha; linhas inválidas viram registros sem tipo (ignorados na importação). """
+    for numero, linha in enumerate(arquivo, start=1):
+        if not linha.strip():
+            continue
+        try:
+            yield json.loads(linha)
+        except json.JSONDecodeError as e:
+            print(f"Linha {numero} ignorada: JSON inválido ({e})", file=sys.stderr)
+            yield {}
+
+def _esquema_parquet():
+    import pyarrow as pa
+    texto, real = pa.string(), pa.float64()
+    tipos = {"rho": real, "nu": real, "rugosidade": real}
+    return pa.schema([(coluna, tipos.get(coluna, texto)) for coluna in COLUNAS_PARQUET])
+
+def escrever_parquet(registros, caminho, linhas_por_grupo=LINHAS_POR_GRUPO):
+    """
+    Grava um grupo de linhas do Parquet a cada `linhas_por_grupo` registros. Os dados do
+    cenário, os resultados e a tabela por temperatura dos fluidos vão como texto JSON.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    esquema = _esquema_parquet()
+    registros, total = iter(registros), 0
+    with pq.ParquetWriter(caminho, esquema, compression="zstd") as escritor:
+        for grupo in iter(lambda: list(islice(registros, linhas_por_grupo)), []):
+            colunas = {coluna: [] for coluna in COLUNAS_PARQUET}
+            for registro in grupo:
+                for coluna in COLUNAS_PARQUET:
+                    valor = registro.get(coluna)
+                    if coluna in COLUNAS_JSON and valor is not None:
+                        valor = json.dumps(valor, ensure_ascii=False, separators=(',', ':'))
+                    colunas[coluna].append(valor)
+            escritor.write_table(pa.table(colunas, schema=esquema))
+            total += len(grupo)
+    return total
+
+def ler_parquet(caminho, linhas_por_grupo=LINHAS_POR_GRUPO):
+    """ Gera os registros lendo um lote de linhas do arquivo por vez. """
+    import pyarrow.parquet as pq
+    arquivo = pq.ParquetFile(caminho)
+    for lote in arquivo.iter_batches(batch_size=linhas_por_grupo):
+        for linha in lote.to_pylist():
+            registro = {coluna: valor for coluna, valor in linha.items() if valor is not None}
+            for coluna in COLUNAS_JSON:
+                if coluna in registro:
+                    registro[coluna] = json.loads(registro[coluna])
+            yield registro
+
+def exportar(caminho, username=None, project_name=None):
+    """ Exporta para `caminho` ('-' = saída padrão em JSON lines); devolve o número de registros. """
+    registros = export_records(username, project_name)
+    if caminho == "-":
+        return escrever_jsonl(registros, sys.stdout)
+    if _eh_parquet(caminho):
+        return escrever_parquet(registros, caminho)
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        return escrever_jsonl(registros, arquivo)
+
+def importar(caminho, username=None, on_conflict="replace"):
+    """ Importa de `caminho` ('-' = entrada padrão em JSON lines); devolve as contagens de import_records. """
+    if caminho == "-":
+        return import_records(ler_jsonl(sys.stdin), username, on_conflict)
+    if _eh_parquet(caminho):
+        return import_records(ler_parquet(caminho), username, on_conflict)
+    with open(caminho, encoding="utf-8") as arquivo:
+        return import_records(ler_jsonl(arquivo), username, on_conflict)
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta e importa cenários, fluidos e materiais em JSON lines ou Parquet.")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+    parser_exportar = subcomandos.add_parser("exportar")
+    parser_exportar.add_argument("arquivo", help="arquivo .jsonl/.parquet ou '-' para a saída padrão")
+    parser_exportar.add_argument("--usuario", default=None, help="só os dados deste usuário (padrão: todos)")
+    parser_exportar.add_argument("--projeto", default=None, help="só os cenários deste projeto (exige --usuario)")
+    parser_importar = subcomandos.add_parser("importar")
+    parser_importar.add_argument("arquivo", help="arquivo .jsonl/.parquet ou '-' para a entrada padrão")
+    parser_importar.add_argument("--usuario-destino", default=None, help="grava tudo para este usuário")
+    parser_importar.add_argument("--manter-existentes", action="store_true",
+                                 help="não altera cenários, fluidos e materiais que já existem (padrão: nova versão/atualização)")
+    args = parser.parse_args()
+    # Nomes de projeto são por usuário: sem --usuario, o mesmo nome pegaria projetos de outras contas
+    if args.comando == "exportar" and args.projeto and not args.usuario:
+        parser_exportar.error("--projeto exige --usuario")
+
+    setup_database()
+    if args.comando == "exportar":
+        total = exportar(args.arquivo, args.usuario, args.projeto)
+        print(f"{total} registro(s) exportado(s).", file=sys.stderr)
+    else:
+        contagem = importar(args.arquivo, args.usuario_destino, "skip" if args.manter_existentes else "replace")
+        print(f"{contagem['cenarios_novos']} cenário(s) novo(s), {contagem['cenarios_existentes']} já existente(s), "
+              f"{contagem['fluidos']} fluido(s), {contagem['materiais']} material(is), {contagem['ignorados']} registro(s) ignorado(s).",
+              file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# velocidade_variavel.py (Bomba com inversor de frequência: leis de afinidade e rotação de menor custo)
+#
+# As curvas ajustadas na rotação nominal são levadas a qualquer rotação relativa r = n / n_nominal
+# pelas leis de afinidade (Q ∝ r, H ∝ r², rendimento constante nos pontos homólogos). A curva
+# escalada aceita um array de rotações, que vira a dimensão de lote de resolver_pontos_operacao:
+# uma varredura de rotações é um único Newton vetorizado, sem um laço de raízes em Python.
+
+import numpy as np
+
+from hidraulica import _limite_superior_bomba, calcular_curva_sistema, calcular_potencia_eletrica, resolver_pontos_operacao
+
+# Rendimento típico de um inversor de frequência em carga (%)
+EFICIENCIA_INVERSOR = 97.0
+# Faixa de rotações relativas avaliada por padrão na programação diária
+ROTACOES_PADRAO = np.linspace(0.4, 1.0, 61)
+
+class CurvaAfinidade:
+    """
+    Curva ajustada na rotação nominal (np.poly1d) levada à rotação relativa `rotacao`:
+    f_r(Q) = r^expoente · f(Q / r), com expoente 2 para a altura e 0 para o rendimento.
+    Chamável como o poly1d de criar_funcao_curva e com deriv(); `rotacao` pode ser um array.
+    """
+    def __init__(self, curva_nominal, rotacao, expoente=2):
+        self.curva_nominal = curva_nominal
+        self.rotacao = np.asarray(rotacao, dtype=float)
+        self.expoente = expoente
+
+    def __call__(self, vazoes_m3h):
+        return self.rotacao ** self.expoente * self.curva_nominal(np.asarray(vazoes_m3h, dtype=float) / self.rotacao)
+
+    def deriv(self):
+        return CurvaAfinidade(self.curva_nominal.deriv(), self.rotacao, self.expoente - 1)
+
+    def limite_superior(self, h_geometrica):
+        """ Limite do bracket para todo o lote: a vazão-limite cresce com a rotação, então vale a da maior. """
+        rotacao_max = float(self.rotacao.max())
+        limite = _limite_superior_bomba(self.curva_nominal, h_geometrica / rotacao_max ** self.expoente)
+        return None if limite is None else rotacao_max * limite
+
+def rotacao_para_ponto(curva_altura, vazoes_m3h, alturas_m, rotacao_min=0.1, rotacao_max=1.5, tolerancia=1e-10, max_iteracoes=60):
+    """
+    Rotação relativa em que a curva de altura passa por (Q, H): r²·H(Q/r) = H. Vetorizada sobre
+    os pares (Newton protegido por bisseção em [rotacao_min, rotacao_max]); NaN fora da faixa.
+    """
+    vazoes, alturas = np.broadcast_arrays(np.asarray(vazoes_m3h, dtype=float), np.asarray(alturas_m, dtype=float))
+    derivada_curva = curva_altura.deriv()
+
+    def erro(r):
+        return r**2 * curva_altura(vazoes / r) - alturas, 2 * r * curva_altura(vazoes / r) - vazoes * derivada_curva(vazoes / r)
+
+    inferior, superior = np.full(vazoes.shape, rotacao_min), np.full(vazoes.shape, rotacao_max)
+    # A altura entregue em Q cresce com a rotação: sem troca de sinal, o ponto está fora da faixa
+    alcancavel = (erro(inferior)[0] <= 0) & (erro(superior)[0] >= 0)
+    rotacoes = 0.5 * (inferior + superior)
+    for _ in range(max_iteracoes):
+        valor, derivada = erro(rotacoes)
+        inferior = np.where(valor < 0, rotacoes, inferior)
+        superior = np.where(valor > 0, rotacoes, superior)
+        novas = rotacoes - valor / np.where(derivada > 0, derivada, 1e-12)
+        novas = np.where(~np.isfinite(novas) | (novas <= inferior) | (novas >= superior), 0.5 * (inferior + superior), novas)
+        if np.all(np.abs(novas - rotacoes) <= tolerancia):
+            rotacoes = novas
+            break
+        rotacoes = novas
+    return np.where(alcancavel & np.isfinite(vazoes) & np.isfinite(alturas), rotacoes, np.nan)
+
+def rotacao_para_vazao(rede, h_geometrica, curva_altura, vazoes_alvo_m3h):
+    """ Rotação que leva o ponto de operação à vazão pedida (sobre a curva do sistema). """
+    vazoes = np.asarray(vazoes_alvo_m3h, dtype=float)
+    alturas = np.asarray(calcular_curva_sistema(rede, h_geometrica, vazoes))
+    alturas = np.where(alturas < 1e10, alturas, np.nan)
+    return {"rotacao": rotacao_para_ponto(curva_altura, vazoes, alturas), "vazao": vazoes, "altura": alturas}
+
+def rotacao_para_altura(rede, h_geometrica, curva_altura, alturas_alvo_m):
+    """
+    Rotação que leva o ponto de operação à altura manométrica pedida (controle por pressão).
+    A vazão sai da curva do sistema, resolvida como o ponto de uma "bomba" de altura constante.
+    """
+    alturas = np.asarray(alturas_alvo_m, dtype=float)
+    pontos = resolver_pontos_operacao(rede, h_geometrica - alturas, np.poly1d([0.0]))
+    return {"rotacao": rotacao_para_ponto(curva_altura, pontos["vazao"], alturas), "vazao": pontos["vazao"], "altura": alturas}
+
+def varredura_rotacao(rede, h_geometrica, curva_altura, curva_eficiencia, rotacoes, eficiencia_motor_percent,
+                      eficiencia_inversor_percent=EFICIENCIA_INVERSOR):
+    """
+    Ponto de operação, rendimento e potência elétrica (com motor e inversor) para cada rotação,
+    todas em um único lote. Arrays com a forma de `rotacoes`; NaN onde não há ponto de operação.
+    """
+    rotacoes = np.asarray(rotacoes, dtype=float)
+    pontos = resolver_pontos_operacao(rede, h_geometrica, CurvaAfinidade(curva_altura, rotacoes))
+    eficiencia = np.where(pontos["convergiu"], np.clip(CurvaAfinidade(curva_eficiencia, rotacoes, expoente=0)(pontos["vazao"]), 0, 100), np.nan)
+    rendimento_acionamento = eficiencia_motor_percent * eficiencia_inversor_percent / 100
+    potencia = np.where(pontos["convergiu"], calcular_potencia_eletrica(pontos["vazao"], pontos["altura"], eficiencia, rendimento_acionamento, rede.rho), np.nan)
+    return {"rotacao": rotacoes, "vazao": pontos["vazao"], "altura": pontos["altura"], "eficiencia": eficiencia,
+            "potencia_kW": potencia, "energia_especifica": potencia / pontos["vazao"]}
+
+def programacao_rotacao(rede, h_geometrica, curva_altura, curva_eficiencia, demandas_m3h, tarifas_kwh, eficiencia_motor_percent,
+                        rotacoes=None, eficiencia_inversor_percent=EFICIENCIA_INVERSOR, altura_minima_m=0.0):
+    """
+    Rotação de menor custo para cada hora de um perfil de demanda (ex.: 24 horas).
+
+    Com rotação r a bomba entrega Q(r) ≥ Q_d e fica ligada a fração Q_d / Q(r) da hora
+    (reservatório pulmão absorve o ciclo), então a energia da hora é Q_d·e(r), com e(r) em kWh/m³.
+    Candidatas: a malha `rotacoes` mais, para cada hora, a rotação de operação contínua
+    (Q(r) = Q_d), todas resolvidas num só lote; o custo de cada par (rotação, hora) sai de uma
+    matriz. A referência é a rotação nominal em liga/desliga, sem as perdas do inversor.
+    """
+    demandas = np.asarray(demandas_m3h, dtype=float)
+    tarifas = np.broadcast_to(np.asarray(tarifas_kwh, dtype=float), demandas.shape)
+    rotacoes = ROTACOES_PADRAO if rotacoes is None else np.asarray(rotacoes, dtype=float)
+    continuas = rotacao_para_vazao(rede, h_geometrica, curva_altura, demandas[demandas > 0])["rotacao"]
+    continuas = continuas[np.isfinite(continuas) & (continuas >= rotacoes.min()) & (continuas <= rotacoes.max())]
+    candidatas = varredura_rotacao(rede, h_geometrica, curva_altura, curva_eficiencia, np.concatenate([rotacoes, continuas]),
+                                   eficiencia_motor_percent, eficiencia_inversor_percent)
+
+    # Matriz (candidatas, horas): viável se a vazão cobre a demanda e a altura atende o mínimo
+    vazao, energia_especifica = candidatas["vazao"][:, np.newaxis], candidatas["energia_especifica"][:, np.newaxis]
+    viavel = np.isfinite(energia_especifica) & (vazao >= demandas * (1 - 1e-9)) & (candidatas["altura"][:, np.newaxis] >= altura_minima_m)
+    custo = np.where(viavel, demandas * energia_especifica * tarifas, np.inf)
+    escolha = custo.argmin(axis=0)
+    atendida = viavel[escolha, np.arange(len(demandas))]
+    ligada = atendida & (demandas > 0)
+
+    def por_hora(chave):
+        return np.where(ligada, candidatas[chave][escolha], np.nan)
+
+    energia = np.where(ligada, demandas * candidatas["energia_especifica"][escolha], 0.0)
+    nominal = varredura_rotacao(rede, h_geometrica, curva_altura, curva_eficiencia, np.array([1.0]), eficiencia_motor_percent, 100.0)
+    atende_nominal = (nominal["vazao"][0] >= demandas) & (nominal["altura"][0] >= altura_minima_m)
+    energia_nominal = np.where(demandas > 0, demandas * nominal["energia_especifica"][0], 0.0)
+    horas = {
+        "demanda_m3h": demandas, "tarifa_kwh": tarifas, "rotacao": por_hora("rotacao"), "vazao_m3h": por_hora("vazao"),
+        "altura_m": por_hora("altura"), "eficiencia": por_hora("eficiencia"), "potencia_kW": por_hora("potencia_kW"),
+        "fracao_ligada": np.where(ligada, demandas / np.where(ligada, por_hora("vazao"), 1.0), 0.0),
+        "energia_kWh": energia, "custo": energia * tarifas, "atendida": atendida | (demandas <= 0),
+        "energia_nominal_kWh": energia_nominal, "custo_nominal": energia_nominal * tarifas,
+    }
+    custo_total, custo_nominal = float(horas["custo"].sum()), float(horas["custo_nominal"].sum())
+    resumo = {
+        "custo": custo_total, "energia_kWh": float(energia.sum()), "custo_nominal": custo_nominal,
+        "energia_nominal_kWh": float(energia_nominal.sum()), "nominal_atende": bool(atende_nominal[demandas > 0].all()),
+        "economia_percent": 100 * (1 - custo_total / custo_nominal) if custo_nominal > 0 else float("nan"),
+        "horas_nao_atendidas": int((~horas["atendida"]).sum()), "combinacoes": int(custo.size),
+    }
+    ordem = np.argsort(candidatas["rotacao"])
+    return {"horas": horas, "resumo": resumo, "varredura": {chave: valores[ordem] for chave, valores in candidatas.items()}}